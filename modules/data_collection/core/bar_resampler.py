@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+上位時間足リサンプラー
+
+5分足から15分足・1時間足・4時間足・日足のOHLCVをインクリメンタルに生成します。
+
+- 15分足・1時間足・4時間足: UTC基準で時間足の長さに揃えたバケット
+- 日足: 指定タイムゾーンのセッション開始時刻を基準にしたバケット
+  （例: UTC 0時、ニューヨーク 17時クローズ）
+- バーのタイムスタンプはバケットの開始時刻（UTC）
+
+処理中（未確定）のバケットは構成する5分足をタイムスタンプで保持するため、
+同じ5分足が更新されて再入力されても集計は正しく上書きされます。
+後続バケットの5分足が届いた時点で前のバケットは確定し、状態から破棄されます。
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pytz
+
+from modules.data_collection.providers.base_provider import PriceData, TimeFrame
+
+logger = logging.getLogger(__name__)
+
+BASE_TIMEFRAME = TimeFrame.M5
+DERIVED_TIMEFRAMES = (TimeFrame.M15, TimeFrame.H1, TimeFrame.H4, TimeFrame.D1)
+
+INTRADAY_DURATIONS = {
+    TimeFrame.M5: timedelta(minutes=5),
+    TimeFrame.M15: timedelta(minutes=15),
+    TimeFrame.H1: timedelta(hours=1),
+    TimeFrame.H4: timedelta(hours=4),
+}
+
+RESAMPLED_SOURCE_SUFFIX = ":resampled"
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass
+class _OpenBucket:
+    """集計中のバケット"""
+    start: datetime
+    members: Dict[datetime, PriceData] = field(default_factory=dict)
+
+
+class BarResampler:
+    """5分足から上位時間足を生成するリサンプラー"""
+
+    def __init__(self, timeframes: Iterable[TimeFrame] = DERIVED_TIMEFRAMES,
+                 session_timezone: str = "UTC", session_start_hour: int = 0):
+        """
+        初期化
+
+        Args:
+            timeframes: 生成する時間足
+            session_timezone: 日足セッションのタイムゾーン（pytz名）
+            session_start_hour: 日足セッションの開始時刻（session_timezone の時）
+        """
+        self.timeframes = [tf for tf in timeframes if tf != BASE_TIMEFRAME]
+        for timeframe in self.timeframes:
+            if timeframe not in INTRADAY_DURATIONS and timeframe != TimeFrame.D1:
+                raise ValueError(f"未対応の時間足です: {timeframe}")
+
+        self.session_timezone = pytz.timezone(session_timezone)
+        self.session_start_hour = session_start_hour
+        self._buckets: Dict[Tuple[str, TimeFrame], _OpenBucket] = {}
+
+    def bucket_start(self, timestamp: datetime, timeframe: TimeFrame) -> datetime:
+        """
+        タイムスタンプが属するバケットの開始時刻（UTC）
+
+        Args:
+            timestamp: 5分足の開始時刻（naiveはUTCとして扱う）
+            timeframe: 時間足
+
+        Returns:
+            バケットの開始時刻
+        """
+        timestamp = self._to_utc(timestamp)
+
+        if timeframe in INTRADAY_DURATIONS:
+            duration = INTRADAY_DURATIONS[timeframe]
+            return timestamp - (timestamp - _EPOCH) % duration
+
+        # 日足: セッション開始時刻からの経過で取引日を決定
+        local = timestamp.astimezone(self.session_timezone)
+        session_date = (local - timedelta(hours=self.session_start_hour)).date()
+        naive_start = datetime(session_date.year, session_date.month, session_date.day) \
+            + timedelta(hours=self.session_start_hour)
+        return self.session_timezone.localize(naive_start).astimezone(timezone.utc)
+
+    def update(self, bars: Iterable[PriceData]) -> List[PriceData]:
+        """
+        5分足を取り込み、影響を受けた上位時間足を返す
+
+        確定したバケットと集計中のバケットの両方を返します。
+        集計中のバーは後続の呼び出しで同じタイムスタンプのまま更新されるため、
+        呼び出し側はUPSERTで保存してください。
+
+        Args:
+            bars: 5分足（時系列順でなくても可）
+
+        Returns:
+            更新された上位時間足（時間足・時刻順）
+        """
+        touched: Dict[Tuple[str, TimeFrame, datetime], _OpenBucket] = {}
+
+        for bar in sorted(bars, key=lambda b: self._to_utc(b.timestamp)):
+            if bar.timeframe != BASE_TIMEFRAME:
+                continue
+            bar_time = self._to_utc(bar.timestamp)
+
+            for timeframe in self.timeframes:
+                start = self.bucket_start(bar_time, timeframe)
+                key = (bar.symbol, timeframe)
+                bucket = self._buckets.get(key)
+
+                if bucket is None or start > bucket.start:
+                    if bucket is not None:
+                        touched[(bar.symbol, timeframe, bucket.start)] = bucket
+                    bucket = _OpenBucket(start=start)
+                    self._buckets[key] = bucket
+                elif start < bucket.start:
+                    # 確定済みバケットへの遅延データは部分的な集計で上書きしないよう無視
+                    logger.debug(f"確定済み{timeframe.value}バケットへの遅延データを無視: {bar_time}")
+                    continue
+
+                bucket.members[bar_time] = bar
+                touched[(bar.symbol, timeframe, bucket.start)] = bucket
+
+        derived = [
+            self._aggregate(symbol, timeframe, bucket)
+            for (symbol, timeframe, _), bucket in touched.items()
+        ]
+        derived.sort(key=lambda b: (DERIVED_TIMEFRAMES.index(b.timeframe), b.timestamp))
+        return derived
+
+    def seed(self, bars: Iterable[PriceData]) -> None:
+        """
+        保存済みの5分足で集計中のバケットを復元（起動時用）
+
+        Args:
+            bars: 現在のセッション開始以降の5分足
+        """
+        self.update(bars)
+
+    def seed_start(self, latest: datetime) -> datetime:
+        """
+        seed に必要な5分足の開始時刻（最も長いバケットの開始時刻）
+
+        Args:
+            latest: 保存済み5分足の最新時刻
+
+        Returns:
+            取得開始時刻
+        """
+        return min(self.bucket_start(latest, timeframe) for timeframe in self.timeframes)
+
+    def get_open_bar(self, symbol: str, timeframe: TimeFrame) -> Optional[PriceData]:
+        """集計中のバーを取得"""
+        bucket = self._buckets.get((symbol, timeframe))
+        if bucket is None or not bucket.members:
+            return None
+        return self._aggregate(symbol, timeframe, bucket)
+
+    @staticmethod
+    def _to_utc(timestamp: datetime) -> datetime:
+        if timestamp.tzinfo is None:
+            return timestamp.replace(tzinfo=timezone.utc)
+        return timestamp.astimezone(timezone.utc)
+
+    @staticmethod
+    def _aggregate(symbol: str, timeframe: TimeFrame, bucket: _OpenBucket) -> PriceData:
+        members = [bucket.members[ts] for ts in sorted(bucket.members)]
+        first = members[0]
+        return PriceData(
+            symbol=symbol,
+            timeframe=timeframe,
+            timestamp=bucket.start,
+            open=first.open,
+            high=max(bar.high for bar in members),
+            low=min(bar.low for bar in members),
+            close=members[-1].close,
+            volume=sum(bar.volume for bar in members),
+            source=first.source + RESAMPLED_SOURCE_SUFFIX,
+            quality_score=min(bar.quality_score for bar in members),
+        )
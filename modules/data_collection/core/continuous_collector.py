@@ -12,9 +12,13 @@ from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Callable, Awaitable
 
 from modules.data_collection.providers.yahoo_finance import YahooFinanceProvider
-from modules.data_collection.providers.base_provider import TimeFrame
+from modules.data_collection.core.bar_resampler import BarResampler
+from modules.data_collection.providers.base_provider import PriceData, TimeFrame
+from modules.data_persistence.core.database.bulk_upsert import bulk_upsert_price_data
 from modules.data_persistence.core.database.connection_manager import DatabaseConnectionManager
+from modules.data_persistence.core.database.event_listener import DATA_COLLECTION_CHANNEL, notify_event
 from modules.data_persistence.config.settings import DatabaseConfig
+from modules.instrumentation.core.metrics import get_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +26,17 @@ logger = logging.getLogger(__name__)
 class ContinuousDataCollector:
     """継続的データ収集クラス"""
     
-    def __init__(self, symbol: str = "USDJPY=X"):
+    def __init__(self, symbol: str = "USDJPY=X", derive_higher_timeframes: bool = True,
+                 session_timezone: str = "UTC", session_start_hour: int = 0):
+        """
+        初期化
+        
+        Args:
+            symbol: 通貨ペアシンボル
+            derive_higher_timeframes: 5分足のみを取得し上位時間足をローカルで生成するか
+            session_timezone: 日足セッションのタイムゾーン
+            session_start_hour: 日足セッションの開始時刻
+        """
         self.symbol = symbol
         self.provider = YahooFinanceProvider()
         
@@ -44,6 +58,19 @@ class ContinuousDataCollector:
             (TimeFrame.D1, "日足", 1440)     # 1日間隔
         ]
         
+        # 上位時間足のローカル生成
+        self.derive_higher_timeframes = derive_higher_timeframes
+        self.resampler = BarResampler(
+            timeframes=[timeframe for timeframe, _, _ in self.timeframes],
+            session_timezone=session_timezone,
+            session_start_hour=session_start_hour
+        )
+        self._resampler_seeded = False
+        
+        # 今回のサイクルで保存した足（イベントに含めて分析側のバーストアへ渡す）
+        self.max_event_bars_per_timeframe = 500
+        self._cycle_bars: Dict[str, List] = {}
+        
         self.is_running = False
         self.tasks: List[asyncio.Task] = []
         
@@ -76,31 +103,14 @@ class ContinuousDataCollector:
     async def collect_missing_data(self, timeframe: TimeFrame, tf_name: str) -> int:
         """欠けているデータを収集"""
         try:
-            # データベースの最新タイムスタンプを取得
-            db_latest = await self.get_database_latest_timestamp(timeframe.value)
-            
-            if not db_latest:
-                logger.warning(f"⚠️ {tf_name}: データベースにデータが見つかりません")
-                return 0
-            
-            # データベースの最新時刻から現在時刻まで
-            start_date = db_latest + timedelta(minutes=1)
-            end_date = datetime.now(timezone.utc)
+            data = await self._fetch_missing_data(timeframe, tf_name)
             
-            # データを取得
-            result = await self.provider.get_historical_data(
-                symbol=self.symbol,
-                timeframe=timeframe,
-                start_date=start_date,
-                end_date=end_date
-            )
-            
-            if result.success and result.data:
+            if data:
                 # データベースに保存
                 saved_count = await self.save_to_database(
                     symbol=self.symbol,
                     timeframe=timeframe.value,
-                    data=result.data
+                    data=data
                 )
                 
                 if saved_count > 0:
@@ -115,8 +125,138 @@ class ContinuousDataCollector:
             logger.error(f"❌ {tf_name} データ収集エラー: {e}")
             return 0
     
+    async def _fetch_missing_data(self, timeframe: TimeFrame, tf_name: str) -> List[PriceData]:
+        """データベースの最新時刻以降のデータをプロバイダーから取得"""
+        # データベースの最新タイムスタンプを取得
+        db_latest = await self.get_database_latest_timestamp(timeframe.value)
+        
+        if not db_latest:
+            logger.warning(f"⚠️ {tf_name}: データベースにデータが見つかりません")
+            return []
+        
+        # データベースの最新時刻から現在時刻まで
+        start_date = db_latest + timedelta(minutes=1)
+        end_date = datetime.now(timezone.utc)
+        
+        # データを取得
+        with get_metrics().time('data_collection_time', timeframe=timeframe.value):
+            result = await self.provider.get_historical_data(
+                symbol=self.symbol,
+                timeframe=timeframe,
+                start_date=start_date,
+                end_date=end_date
+            )
+        
+        if result.success and result.data:
+            return result.data
+        return []
+    
+    async def collect_and_resample(self) -> Dict[str, int]:
+        """5分足のみを取得し、上位時間足はローカルで生成して保存"""
+        results = {timeframe.value: 0 for timeframe, _, _ in self.timeframes}
+        
+        try:
+            bars = await self._fetch_missing_data(TimeFrame.M5, "5分足")
+            if not bars:
+                logger.debug("ℹ️ 5分足: 新しいデータはありません")
+                return results
+            
+            saved_count = await self.save_to_database(self.symbol, TimeFrame.M5.value, bars)
+            results[TimeFrame.M5.value] = saved_count
+            logger.info(f"📈 5分足: {saved_count}件の新しいデータを保存")
+            
+            if not self._resampler_seeded:
+                await self._seed_resampler(min(bar.timestamp for bar in bars))
+            
+            derived_by_timeframe: Dict[str, List[PriceData]] = {}
+            for bar in self.resampler.update(bars):
+                derived_by_timeframe.setdefault(bar.timeframe.value, []).append(bar)
+            
+            for timeframe_value, derived in derived_by_timeframe.items():
+                results[timeframe_value] = await self.save_to_database(self.symbol, timeframe_value, derived)
+            
+            logger.info(f"🧮 上位時間足を5分足から生成: {dict((tf, len(b)) for tf, b in derived_by_timeframe.items())}")
+            
+        except Exception as e:
+            logger.error(f"❌ 5分足収集・リサンプリングエラー: {e}")
+        
+        return results
+    
+    async def _seed_resampler(self, first_new_bar: datetime):
+        """集計中の上位時間足バケットを保存済みの5分足で復元"""
+        seed_start = self.resampler.seed_start(first_new_bar)
+        
+        async with self.connection_manager.get_connection() as conn:
+            rows = await conn.fetch("""
+                SELECT timestamp, open, high, low, close, volume,
+                       COALESCE(source, 'yahoo_finance') AS source
+                FROM price_data
+                WHERE symbol = $1 AND timeframe = $2
+                  AND timestamp >= $3 AND timestamp < $4
+                ORDER BY timestamp
+            """, self.symbol, TimeFrame.M5.value, seed_start, first_new_bar)
+        
+        self.resampler.seed(
+            PriceData(
+                symbol=self.symbol,
+                timeframe=TimeFrame.M5,
+                timestamp=row['timestamp'],
+                open=float(row['open']),
+                high=float(row['high']),
+                low=float(row['low']),
+                close=float(row['close']),
+                volume=int(row['volume']),
+                source=row['source'],
+            )
+            for row in rows
+        )
+        self._resampler_seeded = True
+        logger.info(f"🌱 リサンプラーを{len(rows)}件の5分足で復元 (開始: {seed_start})")
+    
     async def save_to_database(self, symbol: str, timeframe: str, data: list) -> int:
-        """データベースに保存"""
+        """データベースに保存（COPY + マージで一括UPSERT）"""
+        if not data:
+            return 0
+        
+        columns = ("symbol", "timeframe", "timestamp", "open", "close", "high", "low", "volume", "source")
+        records = [
+            (symbol, timeframe, record.timestamp, record.open, record.close,
+             record.high, record.low, record.volume, record.source)
+            for record in data
+        ]
+        
+        try:
+            async with self.connection_manager.get_connection() as conn:
+                await bulk_upsert_price_data(conn, records, columns)
+            self._cycle_bars.setdefault(timeframe, []).extend(data)
+            return len(records)
+            
+        except Exception as e:
+            # 不正なレコードが混ざっている場合は1件ずつ保存して他のレコードを救済
+            logger.warning(f"一括保存エラー、1件ずつの保存に切り替えます: {e}")
+            return await self._save_records_individually(symbol, timeframe, data)
+    
+    def get_event_bar_payload(self) -> Dict[str, List[List]]:
+        """
+        今回のサイクルで保存した足をイベント用に整形
+        
+        件数が多い時間足（バックフィル等）は含めず、分析側でDBから差分同期させます。
+        
+        Returns:
+            {時間足: [[ISO8601タイムスタンプ, open, high, low, close, volume], ...]}
+        """
+        payload = {}
+        for timeframe, bars in self._cycle_bars.items():
+            if not bars or len(bars) > self.max_event_bars_per_timeframe:
+                continue
+            payload[timeframe] = [
+                [bar.timestamp.isoformat(), bar.open, bar.high, bar.low, bar.close, bar.volume]
+                for bar in sorted(bars, key=lambda b: b.timestamp)
+            ]
+        return payload
+    
+    async def _save_records_individually(self, symbol: str, timeframe: str, data: list) -> int:
+        """レコードを1件ずつ保存"""
         try:
             saved_count = 0
             
@@ -126,8 +266,8 @@ class ContinuousDataCollector:
                         insert_query = """
                             INSERT INTO price_data (
                                 symbol, timeframe, timestamp, open, close, high, low, volume,
-                                created_at, updated_at
-                            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW(), NOW())
+                                source, created_at, updated_at
+                            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, NOW(), NOW())
                             ON CONFLICT (symbol, timeframe, timestamp) 
                             DO UPDATE SET
                                 open = EXCLUDED.open,
@@ -135,6 +275,7 @@ class ContinuousDataCollector:
                                 high = EXCLUDED.high,
                                 low = EXCLUDED.low,
                                 volume = EXCLUDED.volume,
+                                source = EXCLUDED.source,
                                 updated_at = NOW()
                         """
                         
@@ -147,7 +288,8 @@ class ContinuousDataCollector:
                             record.close,
                             record.high,
                             record.low,
-                            record.volume
+                            record.volume,
+                            record.source
                         )
                         
                         saved_count += 1
@@ -165,7 +307,26 @@ class ContinuousDataCollector:
     async def collect_all_timeframes(self) -> Dict[str, int]:
         """全時間足のデータを収集"""
         logger.info("📊 全時間足のデータ収集開始...")
+        self._cycle_bars = {}
+        
+        if self.derive_higher_timeframes:
+            results = await self.collect_and_resample()
+        else:
+            results = await self._collect_each_timeframe()
+        
+        total_saved = sum(results.values())
+        logger.info(f"📈 データ収集完了: 合計{total_saved}件保存")
+        
+        # コールバックの実行
+        if total_saved > 0:
+            await self._trigger_data_collection_callbacks(results)
+            # イベントの発行
+            await self._publish_data_collection_event(results)
         
+        return results
+    
+    async def _collect_each_timeframe(self) -> Dict[str, int]:
+        """各時間足をプロバイダーから個別に収集"""
         results = {}
         
         for timeframe, tf_name, interval_minutes in self.timeframes:
@@ -180,15 +341,6 @@ class ContinuousDataCollector:
                 logger.error(f"❌ {tf_name} 収集エラー: {e}")
                 results[timeframe.value] = 0
         
-        total_saved = sum(results.values())
-        logger.info(f"📈 データ収集完了: 合計{total_saved}件保存")
-        
-        # コールバックの実行
-        if total_saved > 0:
-            await self._trigger_data_collection_callbacks(results)
-            # イベントの発行
-            await self._publish_data_collection_event(results)
-        
         return results
     
     def add_data_collection_callback(self, callback: Callable):
@@ -215,7 +367,8 @@ class ContinuousDataCollector:
                 "symbol": self.symbol,
                 "timeframes": {},
                 "total_new_records": sum(results.values()),
-                "timestamp": datetime.now(timezone.utc).isoformat()
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "bars": self.get_event_bar_payload()
             }
             
             # 各時間足の詳細情報を追加
@@ -226,12 +379,19 @@ class ContinuousDataCollector:
                         "latest_timestamp": datetime.now(timezone.utc).isoformat()
                     }
             
-            # イベントをデータベースに保存
+            # イベントをデータベースに保存し、コミット時に消費側へ通知
             async with self.connection_manager.get_connection() as conn:
-                await conn.execute("""
-                    INSERT INTO events (event_type, symbol, event_data, created_at) 
-                    VALUES ('data_collection_completed', $1, $2, NOW())
-                """, self.symbol, json.dumps(event_data))
+                async with conn.transaction():
+                    event_id = await conn.fetchval("""
+                        INSERT INTO events (event_type, symbol, event_data, created_at) 
+                        VALUES ('data_collection_completed', $1, $2, NOW())
+                        RETURNING id
+                    """, self.symbol, json.dumps(event_data))
+                    await notify_event(conn, DATA_COLLECTION_CHANNEL, {
+                        "id": event_id,
+                        "event_type": "data_collection_completed",
+                        "symbol": self.symbol
+                    })
             
             logger.info(f"📢 データ収集完了イベントを発行: {self.symbol} - {sum(results.values())}件")
             
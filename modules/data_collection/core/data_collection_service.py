@@ -15,6 +15,7 @@ from ..providers.yahoo_finance import YahooFinanceProvider
 from ..core.intelligent_collector.intelligent_collector import IntelligentDataCollector
 from ..core.database_saver.database_saver import DatabaseSaver
 from ...data_persistence.core.database.connection_manager import DatabaseConnectionManager
+from ...instrumentation.core.metrics import get_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -166,12 +167,13 @@ class DataCollectionService:
             start_date = end_date - timedelta(minutes=10)  # 最新10分間
             
             # データを収集
-            price_data = await self.collector.collect_data(
-                symbol=symbol,
-                timeframe=timeframe,
-                start_date=start_date,
-                end_date=end_date
-            )
+            with get_metrics().time('data_collection_time', timeframe=timeframe.value):
+                price_data = await self.collector.collect_data(
+                    symbol=symbol,
+                    timeframe=timeframe,
+                    start_date=start_date,
+                    end_date=end_date
+                )
             
             if price_data:
                 # データベースに保存
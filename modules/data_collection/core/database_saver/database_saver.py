@@ -12,6 +12,8 @@ from typing import Any, Dict, List, Optional
 
 import asyncpg
 
+from modules.data_persistence.core.database.bulk_upsert import bulk_upsert_price_data
+
 from ...providers.base_provider import PriceData
 from .data_validator import DataValidator
 from .quality_metrics import QualityMetrics
@@ -33,7 +35,7 @@ class SaveResult:
 class DatabaseSaver:
     """データベース保存クラス"""
 
-    def __init__(self, connection_string: str, batch_size: int = 1000):
+    def __init__(self, connection_string: str, batch_size: int = 10000):
         self.connection_string = connection_string
         self.batch_size = batch_size
         self.validator = DataValidator()
@@ -121,46 +123,28 @@ class DatabaseSaver:
     async def _upsert_batch(
         self, conn: asyncpg.Connection, batch: List[PriceData]
     ) -> int:
-        """バッチをUPSERT"""
-        query = """
-        INSERT INTO price_data (
-            symbol, timeframe, timestamp, open, high, low, close, volume,
-            source, quality_score, created_at, updated_at
-        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
-        ON CONFLICT (symbol, timeframe, timestamp)
-        DO UPDATE SET
-            open = EXCLUDED.open,
-            high = EXCLUDED.high,
-            low = EXCLUDED.low,
-            close = EXCLUDED.close,
-            volume = EXCLUDED.volume,
-            source = EXCLUDED.source,
-            quality_score = EXCLUDED.quality_score,
-            updated_at = EXCLUDED.updated_at
-        """
-
-        now = datetime.now()
-        values = []
-
-        for data in batch:
-            values.append(
-                (
-                    data.symbol,
-                    data.timeframe.value,
-                    data.timestamp,
-                    data.open,
-                    data.high,
-                    data.low,
-                    data.close,
-                    data.volume,
-                    data.source,
-                    data.quality_score,
-                    now,
-                    now,
-                )
+        """バッチをUPSERT（COPY + セットベースのマージ）"""
+        columns = (
+            "symbol", "timeframe", "timestamp", "open", "high", "low", "close",
+            "volume", "source", "data_quality_score",
+        )
+        values = (
+            (
+                data.symbol,
+                data.timeframe.value,
+                data.timestamp,
+                data.open,
+                data.high,
+                data.low,
+                data.close,
+                data.volume,
+                data.source,
+                data.quality_score,
             )
+            for data in batch
+        )
 
-        result = await conn.executemany(query, values)
+        await bulk_upsert_price_data(conn, values, columns, batch_size=self.batch_size)
         return len(batch)
 
     async def _insert_batch(
@@ -170,7 +154,7 @@ class DatabaseSaver:
         query = """
         INSERT INTO price_data (
             symbol, timeframe, timestamp, open, high, low, close, volume,
-            source, quality_score, created_at, updated_at
+            source, data_quality_score, created_at, updated_at
         ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
         """
 
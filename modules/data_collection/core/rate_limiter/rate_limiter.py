@@ -11,6 +11,8 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Any, Dict, Optional
 
+from ....instrumentation.core.metrics import get_metrics
+
 
 class RateLimitStrategy(Enum):
     """レート制限戦略の種類"""
@@ -88,11 +90,13 @@ class YahooFinanceRateLimiter(RateLimiter):
 
     async def wait_for_availability(self, tokens: int = 1) -> None:
         """利用可能になるまで待機"""
+        started = time.perf_counter()
         while not await self.acquire(tokens):
             # 次のリフィルまで待機
             next_refill = self._last_refill + (1 / self.config.refill_rate)
             wait_time = max(0, next_refill - time.time())
             await asyncio.sleep(wait_time)
+        get_metrics().observe('rate_limiter_wait_time', time.perf_counter() - started, limiter='yahoo_finance')
 
     def get_remaining_tokens(self) -> int:
         """残りトークン数を取得"""
@@ -18,6 +18,7 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from modules.data_collection.core.continuous_collector import ContinuousDataCollector
 from modules.llm_analysis.core.technical_analysis_service import TechnicalAnalysisService
+from modules.instrumentation.core.exporter import start_metrics_server
 
 # ログ設定（JST時刻で出力）
 import logging.handlers
@@ -186,6 +187,8 @@ async def main():
     log_dir = Path("/app/logs")
     log_dir.mkdir(exist_ok=True)
     
+    start_metrics_server("data_collection", default_port=8000)
+    
     # デーモンを作成・実行
     daemon = DataCollectionDaemon(
         symbol="USDJPY=X",
@@ -19,7 +19,9 @@ sys.path.append(str(Path(__file__).parent.parent.parent.parent))
 
 from modules.data_collection.core.continuous_collector import ContinuousDataCollector
 from modules.data_persistence.core.database.connection_manager import DatabaseConnectionManager
+from modules.data_persistence.core.database.event_listener import DATA_COLLECTION_CHANNEL, notify_event
 from modules.data_persistence.config.settings import DatabaseConfig
+from modules.instrumentation.core.exporter import start_metrics_server
 
 # ログ設定
 logging.basicConfig(
@@ -115,7 +117,8 @@ class StandaloneDataCollectionDaemon:
                 "timeframes": {},
                 "total_new_records": sum(results.values()),
                 "timestamp": datetime.now(timezone.utc).isoformat(),
-                "daemon_type": "standalone"
+                "daemon_type": "standalone",
+                "bars": self.collector.get_event_bar_payload()
             }
             
             # 各時間足の詳細情報を追加
@@ -126,12 +129,19 @@ class StandaloneDataCollectionDaemon:
                         "latest_timestamp": datetime.now(timezone.utc).isoformat()
                     }
             
-            # イベントをデータベースに保存
+            # イベントをデータベースに保存し、コミット時に消費側へ通知
             async with self.connection_manager.get_connection() as conn:
-                await conn.execute("""
-                    INSERT INTO events (event_type, symbol, event_data, created_at) 
-                    VALUES ('data_collection_completed', $1, $2, NOW())
-                """, self.symbol, json.dumps(event_data))
+                async with conn.transaction():
+                    event_id = await conn.fetchval("""
+                        INSERT INTO events (event_type, symbol, event_data, created_at) 
+                        VALUES ('data_collection_completed', $1, $2, NOW())
+                        RETURNING id
+                    """, self.symbol, json.dumps(event_data))
+                    await notify_event(conn, DATA_COLLECTION_CHANNEL, {
+                        "id": event_id,
+                        "event_type": "data_collection_completed",
+                        "symbol": self.symbol
+                    })
             
             logger.info(f"📢 データ収集完了イベントを発行: {self.symbol} - {sum(results.values())}件")
             
@@ -215,6 +225,8 @@ async def main():
     
     args = parser.parse_args()
     
+    start_metrics_server("data_collection", default_port=8000)
+    
     daemon = StandaloneDataCollectionDaemon(
         symbol=args.symbol,
         interval_minutes=args.interval
@@ -15,6 +15,7 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from modules.data_collection.config.settings import DataCollectionSettings
 from modules.data_collection.core.data_collection_service import DataCollectionService
+from modules.instrumentation.core.exporter import start_metrics_server
 
 # ログ設定
 logging.basicConfig(
@@ -30,6 +31,7 @@ async def main():
         # 設定を読み込み
         settings = DataCollectionSettings.from_env()
         logger.info(f"Starting data collection with settings: {settings.to_dict()}")
+        start_metrics_server("data_collection", default_port=8000)
 
         # サービスを作成して開始
         service = DataCollectionService(settings)
@@ -0,0 +1,111 @@
+"""
+上位時間足リサンプラーのテスト
+
+5分足から生成した上位時間足が、一括集計の結果と一致することを確認します。
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent.parent.parent))
+
+from modules.data_collection.core.bar_resampler import BarResampler
+from modules.data_collection.providers.base_provider import PriceData, TimeFrame
+
+
+def _make_bars(start: datetime, count: int, seed: int = 7):
+    rng = random.Random(seed)
+    bars = []
+    price = 150.0
+    for i in range(count):
+        open_ = price
+        close = open_ + rng.uniform(-0.05, 0.05)
+        bars.append(PriceData(
+            symbol="USDJPY=X",
+            timeframe=TimeFrame.M5,
+            timestamp=start + timedelta(minutes=5 * i),
+            open=open_,
+            high=max(open_, close) + rng.uniform(0, 0.02),
+            low=min(open_, close) - rng.uniform(0, 0.02),
+            close=close,
+            volume=rng.randint(1, 100),
+            source="yahoo_finance",
+        ))
+        price = close
+    return bars
+
+
+def _expected(bars, bucket_of):
+    groups = {}
+    for bar in bars:
+        groups.setdefault(bucket_of(bar.timestamp), []).append(bar)
+    return {
+        start: (members[0].open, max(b.high for b in members), min(b.low for b in members),
+                members[-1].close, sum(b.volume for b in members))
+        for start, members in groups.items()
+    }
+
+
+class TestBarResampler:
+    """リサンプラーのテストクラス"""
+
+    def test_incremental_matches_batch_aggregation(self):
+        """5分足を1本ずつ入力した結果が一括集計と一致すること"""
+        bars = _make_bars(datetime(2024, 3, 4, 22, 0, tzinfo=timezone.utc), 12 * 24 * 3)
+        resampler = BarResampler()
+
+        latest = {}
+        for bar in bars:
+            for derived in resampler.update([bar]):
+                latest[(derived.timeframe, derived.timestamp)] = derived
+
+        for timeframe in (TimeFrame.M15, TimeFrame.H1, TimeFrame.H4, TimeFrame.D1):
+            expected = _expected(bars, lambda ts: resampler.bucket_start(ts, timeframe))
+            actual = {
+                ts: (b.open, b.high, b.low, b.close, b.volume)
+                for (tf, ts), b in latest.items() if tf == timeframe
+            }
+            assert actual.keys() == expected.keys()
+            for start, values in expected.items():
+                assert actual[start] == pytest.approx(values)
+
+    def test_intraday_buckets_are_utc_aligned(self):
+        """15分足・4時間足のバケットがUTC基準で揃うこと"""
+        resampler = BarResampler()
+        ts = datetime(2024, 3, 4, 9, 55, tzinfo=timezone.utc)
+        assert resampler.bucket_start(ts, TimeFrame.M15) == datetime(2024, 3, 4, 9, 45, tzinfo=timezone.utc)
+        assert resampler.bucket_start(ts, TimeFrame.H4) == datetime(2024, 3, 4, 8, 0, tzinfo=timezone.utc)
+
+    def test_daily_session_anchoring_follows_dst(self):
+        """日足がニューヨーク17時のセッション開始に揃い、夏時間に追従すること"""
+        resampler = BarResampler(session_timezone="America/New_York", session_start_hour=17)
+
+        winter = datetime(2024, 1, 10, 23, 0, tzinfo=timezone.utc)  # 18:00 EST
+        summer = datetime(2024, 7, 10, 20, 30, tzinfo=timezone.utc)  # 16:30 EDT
+        assert resampler.bucket_start(winter, TimeFrame.D1) == datetime(2024, 1, 10, 22, 0, tzinfo=timezone.utc)
+        assert resampler.bucket_start(summer, TimeFrame.D1) == datetime(2024, 7, 9, 21, 0, tzinfo=timezone.utc)
+
+    def test_revised_bar_replaces_previous_value(self):
+        """同じ5分足が更新されて再入力された場合に集計が上書きされること"""
+        bars = _make_bars(datetime(2024, 3, 4, 0, 0, tzinfo=timezone.utc), 3)
+        resampler = BarResampler(timeframes=[TimeFrame.M15])
+        resampler.update(bars)
+
+        revised = PriceData(**{**bars[-1].__dict__, "close": 999.0, "high": 999.0, "volume": 0})
+        (derived,) = resampler.update([revised])
+        assert derived.close == 999.0
+        assert derived.high == 999.0
+        assert derived.volume == bars[0].volume + bars[1].volume
+
+    def test_late_bar_for_closed_bucket_is_ignored(self):
+        """確定済みバケットへの遅延データで上書きしないこと"""
+        bars = _make_bars(datetime(2024, 3, 4, 0, 0, tzinfo=timezone.utc), 4)
+        resampler = BarResampler(timeframes=[TimeFrame.M15])
+        resampler.update(bars)
+        assert resampler.update([bars[0]]) == []
+        assert resampler.get_open_bar("USDJPY=X", TimeFrame.M15).timestamp == bars[3].timestamp
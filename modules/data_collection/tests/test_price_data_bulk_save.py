@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+価格データ一括保存の呼び出し側テスト
+
+DatabaseSaver とバックフィルツールが price_data のカラム名で COPY し、
+一括保存に失敗した場合は1件ずつの保存でほかのレコードを救済することを確認します。
+DBの代わりに、実行したクエリとCOPYを記録する接続を使います。
+"""
+
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent.parent.parent))
+
+from modules.data_collection.core.database_saver.database_saver import DatabaseSaver
+from modules.data_collection.providers.base_provider import PriceData, TimeFrame
+from modules.data_collection.tools import collect_and_save_data
+
+# database_initializer.py の price_data テーブルのカラム
+PRICE_DATA_COLUMNS = {
+    "symbol", "timeframe", "timestamp", "open", "close", "high", "low", "volume",
+    "source", "data_quality_score", "created_at", "updated_at",
+}
+
+
+class RecordingConnection:
+    """クエリとCOPYを記録する asyncpg 接続の代替"""
+
+    def __init__(self, fail_copy: bool = False):
+        self.fail_copy = fail_copy
+        self.copied = []
+        self.executed = []
+
+    @asynccontextmanager
+    async def get_connection(self):
+        yield self
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def copy_records_to_table(self, table, records, columns):
+        if self.fail_copy:
+            raise ValueError("invalid input for COPY")
+        self.copied.append((list(columns), list(records)))
+
+    async def execute(self, query, *args):
+        if args and any(value is None for value in args):
+            raise ValueError("null value violates not-null constraint")
+        self.executed.append((query, args))
+        return "INSERT 0 1"
+
+
+def _price_data(count: int, bad_index: int = -1):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        PriceData(
+            symbol="USDJPY=X", timeframe=TimeFrame.M5, timestamp=start + timedelta(minutes=5 * i),
+            open=None if i == bad_index else 150.0, high=150.2, low=149.9, close=150.1,
+            volume=100, source="yahoo_finance", quality_score=0.9,
+        )
+        for i in range(count)
+    ]
+
+
+def test_database_saver_copies_price_data_columns():
+    """DatabaseSaver の UPSERT が price_data に存在するカラム（data_quality_score）で COPY すること"""
+    conn = RecordingConnection()
+    saved = asyncio.run(DatabaseSaver("postgresql://unused")._upsert_batch(conn, _price_data(3)))
+
+    assert saved == 3
+    columns, records = conn.copied[0]
+    assert set(columns) <= PRICE_DATA_COLUMNS
+    assert records[0][columns.index("data_quality_score")] == 0.9
+    assert all("quality_score" not in query.replace("data_quality_score", "") for query, _ in conn.executed)
+
+
+def test_backfill_falls_back_to_per_record_upserts():
+    """バックフィルの一括保存が失敗しても、不正なレコード以外は1件ずつ保存されること"""
+    conn = RecordingConnection(fail_copy=True)
+    saved = asyncio.run(collect_and_save_data.save_price_data(conn, _price_data(5, bad_index=2)))
+
+    assert saved == 4
+    assert len([query for query, args in conn.executed if args]) == 4
+
+
+if __name__ == "__main__":
+    test_database_saver_copies_price_data_columns()
+    test_backfill_falls_back_to_per_record_upserts()
+    print("✅ 価格データ一括保存テスト完了")
@@ -14,6 +14,7 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from modules.data_collection.providers.yahoo_finance import YahooFinanceProvider
 from modules.data_collection.config.settings import TimeFrame
+from modules.data_persistence.core.database.bulk_upsert import bulk_upsert_price_data
 from modules.data_persistence.core.database.connection_manager import DatabaseConnectionManager
 from modules.data_persistence.config.settings import DatabaseConfig
 
@@ -26,51 +27,77 @@ logger = logging.getLogger(__name__)
 
 
 async def save_price_data(conn_manager, price_data_list):
-    """価格データをデータベースに保存"""
+    """価格データをデータベースに保存（COPY + マージで一括UPSERT）"""
     if not price_data_list:
         return 0
     
+    columns = (
+        "symbol", "timeframe", "timestamp", "open", "close", "high", "low", "volume",
+        "source", "data_quality_score"
+    )
+    records = (
+        (data.symbol, data.timeframe.value, data.timestamp, data.open, data.close,
+         data.high, data.low, data.volume, data.source, data.quality_score)
+        for data in price_data_list
+    )
+    
+    try:
+        async with conn_manager.get_connection() as conn:
+            return await bulk_upsert_price_data(conn, records, columns)
+    except Exception as e:
+        # 不正なレコードが混ざっている場合は1件ずつ保存して他のレコードを救済
+        logger.warning(f'一括保存エラー、1件ずつの保存に切り替えます: {e}')
+        return await _save_price_data_individually(conn_manager, price_data_list)
+
+
+async def _save_price_data_individually(conn_manager, price_data_list):
+    """価格データを1件ずつ保存（保存できなかったレコードはログに出して飛ばす）"""
     saved_count = 0
-    async with conn_manager.get_connection() as conn:
-        for data in price_data_list:
-            try:
-                query = '''
-                    INSERT INTO price_data (
-                        symbol, timeframe, timestamp, open, close, high, low, volume, 
-                        source, data_quality_score, created_at, updated_at
-                    ) VALUES (
-                        $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, NOW(), NOW()
-                    )
-                    ON CONFLICT (symbol, timeframe, timestamp) DO UPDATE SET
-                        open = EXCLUDED.open,
-                        close = EXCLUDED.close,
-                        high = EXCLUDED.high,
-                        low = EXCLUDED.low,
-                        volume = EXCLUDED.volume,
-                        source = EXCLUDED.source,
-                        data_quality_score = EXCLUDED.data_quality_score,
-                        updated_at = NOW()
-                '''
+    try:
+        async with conn_manager.get_connection() as conn:
+            for data in price_data_list:
+                try:
+                    query = '''
+                        INSERT INTO price_data (
+                            symbol, timeframe, timestamp, open, close, high, low, volume, 
+                            source, data_quality_score, created_at, updated_at
+                        ) VALUES (
+                            $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, NOW(), NOW()
+                        )
+                        ON CONFLICT (symbol, timeframe, timestamp) DO UPDATE SET
+                            open = EXCLUDED.open,
+                            close = EXCLUDED.close,
+                            high = EXCLUDED.high,
+                            low = EXCLUDED.low,
+                            volume = EXCLUDED.volume,
+                            source = EXCLUDED.source,
+                            data_quality_score = EXCLUDED.data_quality_score,
+                            updated_at = NOW()
+                    '''
                 
-                await conn.execute(
-                    query,
-                    data.symbol,
-                    data.timeframe.value,
-                    data.timestamp,
-                    data.open,
-                    data.close,
-                    data.high,
-                    data.low,
-                    data.volume,
-                    data.source,
-                    data.quality_score
-                )
-                saved_count += 1
-            except Exception as e:
-                logger.error(f'保存エラー: {e}')
-                continue
+                    await conn.execute(
+                        query,
+                        data.symbol,
+                        data.timeframe.value,
+                        data.timestamp,
+                        data.open,
+                        data.close,
+                        data.high,
+                        data.low,
+                        data.volume,
+                        data.source,
+                        data.quality_score
+                    )
+                    saved_count += 1
+                except Exception as e:
+                    logger.error(f'保存エラー: {e}')
+                    continue
     
-    return saved_count
+        return saved_count
+        
+    except Exception as e:
+        logger.error(f'データベース保存エラー: {e}')
+        return saved_count
 
 
 async def collect_and_save_all_data():
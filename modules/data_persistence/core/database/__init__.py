@@ -4,10 +4,18 @@
 PostgreSQLデータベースへの接続と管理機能を提供します。
 """
 
+from .bulk_upsert import bulk_upsert_price_data
 from .connection_manager import DatabaseConnectionManager
 from .database_initializer import DatabaseInitializer
+from .event_listener import DATA_COLLECTION_CHANNEL, EventNotificationListener, notify_event
+from .event_queue import EventQueue
 
 __all__ = [
     'DatabaseConnectionManager',
-    'DatabaseInitializer'
+    'DatabaseInitializer',
+    'EventNotificationListener',
+    'EventQueue',
+    'DATA_COLLECTION_CHANNEL',
+    'notify_event',
+    'bulk_upsert_price_data'
 ]
@@ -0,0 +1,94 @@
+"""
+価格データの一括UPSERT
+
+price_data への大量書き込みを COPY とセットベースのマージで行います。
+
+1. price_data と同じ型の一時ステージングテーブルを作成
+2. copy_records_to_table でバッチをバイナリCOPY（1バッチ1往復）
+3. INSERT ... SELECT ... ON CONFLICT で price_data へ1文でマージ
+
+行ごとの INSERT や executemany と比べ、数十万件のバックフィルでも
+サーバー側の文実行は1バッチあたり1回で済みます。
+"""
+
+import logging
+from itertools import islice
+from typing import Iterable, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRICE_DATA_KEY_COLUMNS = ('symbol', 'timeframe', 'timestamp')
+PRICE_DATA_STAGING_TABLE = 'price_data_staging'
+
+
+def _chunks(records: Iterable[Tuple], size: int) -> Iterable[list]:
+    """イテラブルを指定サイズのリストに分割"""
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+async def bulk_upsert_price_data(conn, records: Iterable[Tuple], columns: Sequence[str],
+                                 batch_size: int = 50000) -> int:
+    """
+    価格データを COPY + マージで一括UPSERT
+
+    同じキー（symbol, timeframe, timestamp）が入力内で重複する場合は
+    後に現れたレコードが採用されます。created_at / updated_at は
+    マージ時に NOW() で設定されるため columns に含めないでください。
+
+    Args:
+        conn: asyncpg 接続
+        records: columns の順に並んだタプルのイテラブル
+        columns: 書き込むカラム名（キーカラムを含むこと）
+        batch_size: 1回のCOPY/マージで扱う件数
+
+    Returns:
+        マージした件数
+    """
+    columns = list(columns)
+    missing = [key for key in PRICE_DATA_KEY_COLUMNS if key not in columns]
+    if missing:
+        raise ValueError(f"キーカラムが不足しています: {missing}")
+
+    column_list = ', '.join(columns)
+    key_list = ', '.join(PRICE_DATA_KEY_COLUMNS)
+    update_list = ', '.join(
+        f"{column} = EXCLUDED.{column}" for column in columns if column not in PRICE_DATA_KEY_COLUMNS
+    )
+
+    merge_query = f"""
+        INSERT INTO price_data ({column_list}, created_at, updated_at)
+        SELECT DISTINCT ON ({key_list}) {column_list}, NOW(), NOW()
+        FROM {PRICE_DATA_STAGING_TABLE}
+        ORDER BY {key_list}, seq DESC
+        ON CONFLICT ({key_list})
+        DO UPDATE SET {update_list + ', ' if update_list else ''}updated_at = NOW()
+    """
+
+    merged = 0
+    async with conn.transaction():
+        # price_data と同じ型を持ち、入力順を保持する seq 列を加えたステージングテーブル
+        await conn.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {PRICE_DATA_STAGING_TABLE}
+            ON COMMIT DROP AS
+            SELECT {column_list} FROM price_data WITH NO DATA
+        """)
+        await conn.execute(f"""
+            ALTER TABLE {PRICE_DATA_STAGING_TABLE}
+            ADD COLUMN IF NOT EXISTS seq BIGSERIAL
+        """)
+
+        for chunk in _chunks(records, batch_size):
+            await conn.copy_records_to_table(
+                PRICE_DATA_STAGING_TABLE, records=chunk, columns=columns
+            )
+            status = await conn.execute(merge_query)
+            await conn.execute(f"TRUNCATE {PRICE_DATA_STAGING_TABLE}")
+            merged += int(status.split()[-1])
+
+    logger.debug(f"📦 price_data に{merged}件を一括UPSERT")
+    return merged
@@ -24,8 +24,30 @@ except ImportError:
     psycopg2 = None
     ISOLATION_LEVEL_AUTOCOMMIT = None
 
+from ....instrumentation.core.metrics import get_metrics
+
 logger = logging.getLogger(__name__)
 
+# database_query_time の operation ラベルとして扱うSQLキーワード
+QUERY_OPERATIONS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'COPY')
+
+
+def _query_operation(query: str) -> str:
+    """SQLの先頭キーワードからメトリクス用の操作名を決定"""
+    keyword = query.lstrip().split(None, 1)[0].upper() if query and query.strip() else ''
+    return keyword.lower() if keyword in QUERY_OPERATIONS else 'other'
+
+
+def _record_query_time(record) -> None:
+    """asyncpg のクエリロガー: 実行時間を database_query_time に記録"""
+    get_metrics().observe('database_query_time', record.elapsed, operation=_query_operation(record.query))
+
+
+async def _init_connection(conn) -> None:
+    """プール接続の初期化（クエリ時間の計測を登録）"""
+    if hasattr(conn, 'add_query_logger'):
+        conn.add_query_logger(_record_query_time)
+
 
 class DatabaseConnectionManager:
     """データベース接続管理"""
@@ -49,6 +71,7 @@ class DatabaseConnectionManager:
                     min_size=self.min_connections,
                     max_size=self.max_connections,
                     command_timeout=60,
+                    init=_init_connection,
                     server_settings={
                         'application_name': 'trading_system',
                         'timezone': 'UTC'
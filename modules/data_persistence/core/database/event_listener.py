@@ -0,0 +1,206 @@
+"""
+イベント通知リスナー
+
+events テーブルへの INSERT と同時に発行される PostgreSQL の NOTIFY を
+専用の asyncpg 接続で LISTEN し、イベント消費側のループを即座に起こします。
+
+通知は「起床のきっかけ」であり、処理対象は従来通り events テーブル
+（processed = FALSE）から取得します。そのため、リスナーの切断中や再接続直後に
+取りこぼした通知は、低頻度のフォールバックポーリングで回収されます。
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+
+try:
+    import asyncpg
+    from asyncpg import Connection
+except ImportError:
+    asyncpg = None
+    Connection = None
+
+logger = logging.getLogger(__name__)
+
+# データ収集完了イベントの通知チャネル
+DATA_COLLECTION_CHANNEL = "data_collection_events"
+
+
+async def notify_event(conn: Connection, channel: str, payload: Dict[str, Any]) -> None:
+    """
+    イベント通知を発行
+
+    トランザクション内で呼び出した場合、通知はコミット時に配信されます。
+
+    Args:
+        conn: データベース接続
+        channel: 通知チャネル
+        payload: 通知内容（8000バイト未満のJSONに収まる小さな辞書）
+    """
+    await conn.execute("SELECT pg_notify($1, $2)", channel, json.dumps(payload))
+
+
+class EventNotificationListener:
+    """LISTEN専用接続を保持するイベント通知リスナー"""
+
+    def __init__(self, connection_string: Optional[str], channels: Iterable[str] = (DATA_COLLECTION_CHANNEL,),
+                 reconnect_delay: float = 5.0, health_check_interval: float = 30.0):
+        """
+        初期化
+
+        Args:
+            connection_string: データベース接続文字列（Noneの場合はポーリングのみ）
+            channels: LISTENするチャネル
+            reconnect_delay: 再接続までの待機秒数
+            health_check_interval: 接続確認の間隔（秒）
+        """
+        self.connection_string = connection_string
+        self.channels = tuple(channels)
+        self.reconnect_delay = reconnect_delay
+        self.health_check_interval = health_check_interval
+
+        self.connection: Optional[Connection] = None
+        self.is_running = False
+        self._supervisor_task: Optional[asyncio.Task] = None
+        self._wake_event = asyncio.Event()
+        self._disconnected = asyncio.Event()
+
+        # 統計情報
+        self.stats = {
+            'notifications_received': 0,
+            'reconnects': 0,
+            'fallback_polls': 0,
+            'last_notification_time': None,
+            'last_payload': None,
+        }
+
+    @property
+    def is_connected(self) -> bool:
+        """LISTEN接続が有効か"""
+        return self.connection is not None and not self.connection.is_closed()
+
+    async def start(self) -> None:
+        """リスナーを開始（接続と再接続はバックグラウンドで行う）"""
+        if self.is_running:
+            return
+
+        self.is_running = True
+        if asyncpg is None or not self.connection_string:
+            logger.warning("⚠️ LISTEN接続を利用できないため、イベント通知はポーリングのみで動作します")
+            return
+
+        self._supervisor_task = asyncio.create_task(self._supervise())
+        logger.info(f"👂 イベント通知リスナー開始: {', '.join(self.channels)}")
+
+    async def stop(self) -> None:
+        """リスナーを停止"""
+        self.is_running = False
+        if self._supervisor_task and not self._supervisor_task.done():
+            self._supervisor_task.cancel()
+            try:
+                await self._supervisor_task
+            except asyncio.CancelledError:
+                pass
+        self._supervisor_task = None
+        await self._close_connection()
+        logger.info("👂 イベント通知リスナー停止")
+
+    async def wait_for_event(self, poll_interval: float = 5.0, fallback_interval: float = 60.0) -> bool:
+        """
+        次のイベント通知まで待機
+
+        LISTEN接続中は通知が届くか fallback_interval が経過するまで、
+        切断中は従来のポーリング間隔 poll_interval だけ待機します。
+        直前の確保がバッチいっぱいだった場合（未処理が残っている場合）は、
+        呼び出し元は待機せずに続けて確保してください。
+
+        Args:
+            poll_interval: 切断中のポーリング間隔（秒）
+            fallback_interval: 接続中の取りこぼし回収用ポーリング間隔（秒）
+
+        Returns:
+            通知（または再接続）で起床した場合True、タイムアウトの場合False
+        """
+        timeout = fallback_interval if self.is_connected else poll_interval
+        try:
+            await asyncio.wait_for(self._wake_event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.stats['fallback_polls'] += 1
+            return False
+        finally:
+            self._wake_event.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        return {**self.stats, 'connected': self.is_connected}
+
+    async def _supervise(self) -> None:
+        """接続を維持し、切断時は再接続する"""
+        has_connected = False
+        while self.is_running:
+            try:
+                await self._connect()
+                if has_connected:
+                    self.stats['reconnects'] += 1
+                    logger.info("🔌 イベント通知リスナー再接続完了")
+                has_connected = True
+                # 切断中に発行された通知を回収するため、消費側を起こす
+                self._wake_event.set()
+
+                while self.is_running and self.is_connected:
+                    try:
+                        await asyncio.wait_for(self._disconnected.wait(), timeout=self.health_check_interval)
+                        break
+                    except asyncio.TimeoutError:
+                        await self.connection.fetchval("SELECT 1")
+
+                if self.is_running:
+                    logger.warning("⚠️ イベント通知リスナーの接続が切断されました")
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ イベント通知リスナー接続エラー: {e}")
+
+            await self._close_connection()
+            if self.is_running:
+                await asyncio.sleep(self.reconnect_delay)
+
+    async def _connect(self) -> None:
+        self._disconnected.clear()
+        self.connection = await asyncpg.connect(
+            self.connection_string,
+            server_settings={'application_name': 'trading_system_listener'}
+        )
+        self.connection.add_termination_listener(self._on_termination)
+        for channel in self.channels:
+            await self.connection.add_listener(channel, self._on_notification)
+
+    async def _close_connection(self) -> None:
+        connection, self.connection = self.connection, None
+        if connection is None or connection.is_closed():
+            return
+        try:
+            for channel in self.channels:
+                await connection.remove_listener(channel, self._on_notification)
+            await connection.close()
+        except Exception as e:
+            logger.debug(f"LISTEN接続のクローズエラー: {e}")
+
+    def _on_notification(self, connection: Connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            parsed = json.loads(payload) if payload else None
+        except ValueError:
+            parsed = payload
+
+        self.stats['notifications_received'] += 1
+        self.stats['last_notification_time'] = datetime.now(timezone.utc)
+        self.stats['last_payload'] = parsed
+        logger.debug(f"📨 イベント通知受信: {channel} {parsed}")
+        self._wake_event.set()
+
+    def _on_termination(self, connection: Connection) -> None:
+        self._disconnected.set()
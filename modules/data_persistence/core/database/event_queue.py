@@ -0,0 +1,234 @@
+"""
+イベントキュー
+
+events テーブルを複数ワーカーで安全に消費するためのクレームAPIを提供します。
+
+- claim: FOR UPDATE SKIP LOCKED で未処理イベントを原子的に確保し、リース期限を設定
+- complete / fail: 自分が保持しているリースに対してのみ状態を更新
+- リース期限切れのイベント（ワーカー停止など）は再クレームされ、
+  試行回数が上限に達したイベントはデッドレター状態に移されます。
+
+状態遷移: pending → claimed → done
+                      ↘ pending（失敗・リース切れ） → … → dead_letter
+"""
+
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from .connection_manager import DatabaseConnectionManager
+from ....instrumentation.core.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+EVENT_STATUS_PENDING = 'pending'
+EVENT_STATUS_CLAIMED = 'claimed'
+EVENT_STATUS_DONE = 'done'
+EVENT_STATUS_DEAD_LETTER = 'dead_letter'
+
+
+def default_worker_id() -> str:
+    """ホスト名・プロセスID・ランダム値からワーカーIDを生成"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class EventQueue:
+    """events テーブルのクレーム型キュー"""
+
+    def __init__(self, connection_manager: DatabaseConnectionManager, worker_id: Optional[str] = None,
+                 lease_seconds: float = 300.0, max_attempts: int = 5,
+                 backlog_interval: float = 30.0):
+        """
+        初期化
+
+        Args:
+            connection_manager: データベース接続管理
+            worker_id: ワーカーID（Noneの場合は自動生成）
+            lease_seconds: クレームのリース期間（秒）
+            max_attempts: デッドレターに移すまでの最大試行回数
+            backlog_interval: event_backlog_depth メトリクスの更新間隔（秒）
+        """
+        self.connection_manager = connection_manager
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backlog_interval = backlog_interval
+        self._backlog_updated_at: Dict[str, float] = {}
+
+    async def claim(self, event_type: str, limit: int = 10, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        未処理イベントを確保
+
+        他のワーカーがロック中の行はスキップするため、同じイベントが
+        複数のワーカーに渡されることはありません。
+
+        Args:
+            event_type: イベントタイプ
+            limit: 最大取得件数
+            symbol: シンボルで絞り込む場合に指定
+
+        Returns:
+            確保したイベント（created_at順）
+        """
+        async with self.connection_manager.get_connection() as conn:
+            async with conn.transaction():
+                # 試行回数の上限に達したままリースが切れたイベントをデッドレターへ
+                dead = await conn.fetch("""
+                    UPDATE events
+                    SET status = 'dead_letter',
+                        processed = TRUE,
+                        processed_at = NOW(),
+                        lease_expires_at = NULL,
+                        error_message = COALESCE(error_message, 'lease expired')
+                    WHERE event_type = $1
+                      AND status = 'claimed'
+                      AND lease_expires_at < NOW()
+                      AND retry_count + 1 >= $2
+                    RETURNING id
+                """, event_type, self.max_attempts)
+
+                rows = await conn.fetch("""
+                    WITH candidates AS (
+                        SELECT id FROM events
+                        WHERE event_type = $1
+                          AND processed = FALSE
+                          AND (status = 'pending' OR (status = 'claimed' AND lease_expires_at < NOW()))
+                          AND ($3::varchar IS NULL OR symbol = $3)
+                        ORDER BY created_at ASC
+                        LIMIT $2
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    UPDATE events e
+                    SET status = 'claimed',
+                        claimed_by = $4,
+                        claimed_at = NOW(),
+                        lease_expires_at = NOW() + make_interval(secs => $5),
+                        -- リース切れの再クレームは1回の失敗として数える
+                        retry_count = e.retry_count + CASE WHEN e.status = 'claimed' THEN 1 ELSE 0 END
+                    FROM candidates c
+                    WHERE e.id = c.id
+                    RETURNING e.id, e.event_type, e.symbol, e.event_data, e.created_at, e.retry_count
+                """, event_type, limit, symbol, self.worker_id, float(self.lease_seconds))
+
+        for row in dead:
+            logger.warning(f"☠️ リース切れのイベントをデッドレターに移動: ID={row['id']}")
+
+        events = sorted((dict(row) for row in rows), key=lambda event: event['created_at'])
+        if events:
+            logger.debug(f"📥 {len(events)}件のイベントを確保: worker={self.worker_id}")
+
+        await self._update_backlog_gauge(event_type)
+        return events
+
+    async def complete(self, event_id: int) -> bool:
+        """
+        イベントを処理済みにする
+
+        Args:
+            event_id: イベントID
+
+        Returns:
+            自分のリースで更新できた場合True（リース切れで他ワーカーに移った場合False）
+        """
+        async with self.connection_manager.get_connection() as conn:
+            result = await conn.execute("""
+                UPDATE events
+                SET status = 'done',
+                    processed = TRUE,
+                    processed_at = NOW(),
+                    lease_expires_at = NULL
+                WHERE id = $1 AND status = 'claimed' AND claimed_by = $2
+            """, event_id, self.worker_id)
+
+        updated = result.endswith(' 1')
+        if not updated:
+            logger.warning(f"⚠️ イベントのリースを失っていたため完了を記録できません: ID={event_id}")
+        return updated
+
+    async def fail(self, event_id: int, error_message: str) -> Optional[str]:
+        """
+        イベントの処理失敗を記録
+
+        試行回数が上限に達した場合はデッドレター、それ以外は再試行待ちに戻します。
+
+        Args:
+            event_id: イベントID
+            error_message: エラーメッセージ
+
+        Returns:
+            更新後の状態（リースを失っていた場合None）
+        """
+        async with self.connection_manager.get_connection() as conn:
+            status = await conn.fetchval("""
+                UPDATE events
+                SET retry_count = retry_count + 1,
+                    error_message = $3,
+                    status = CASE WHEN retry_count + 1 >= $4 THEN 'dead_letter' ELSE 'pending' END,
+                    processed = (retry_count + 1 >= $4),
+                    processed_at = CASE WHEN retry_count + 1 >= $4 THEN NOW() ELSE NULL END,
+                    claimed_by = NULL,
+                    lease_expires_at = NULL
+                WHERE id = $1 AND status = 'claimed' AND claimed_by = $2
+                RETURNING status
+            """, event_id, self.worker_id, error_message, self.max_attempts)
+
+        if status == EVENT_STATUS_DEAD_LETTER:
+            logger.error(f"☠️ イベントをデッドレターに移動: ID={event_id} - {error_message}")
+        elif status is None:
+            logger.warning(f"⚠️ イベントのリースを失っていたため失敗を記録できません: ID={event_id}")
+        return status
+
+    async def extend_lease(self, event_id: int) -> bool:
+        """
+        長時間の処理中にリースを延長
+
+        Args:
+            event_id: イベントID
+
+        Returns:
+            延長できた場合True
+        """
+        async with self.connection_manager.get_connection() as conn:
+            result = await conn.execute("""
+                UPDATE events
+                SET lease_expires_at = NOW() + make_interval(secs => $3)
+                WHERE id = $1 AND status = 'claimed' AND claimed_by = $2
+            """, event_id, self.worker_id, float(self.lease_seconds))
+        return result.endswith(' 1')
+
+    async def get_status_counts(self, event_type: Optional[str] = None) -> Dict[str, int]:
+        """
+        状態別のイベント数を取得
+
+        Args:
+            event_type: イベントタイプ（Noneの場合は全て）
+
+        Returns:
+            {状態: 件数}
+        """
+        async with self.connection_manager.get_connection() as conn:
+            rows = await conn.fetch("""
+                SELECT status, COUNT(*) AS count
+                FROM events
+                WHERE ($1::varchar IS NULL OR event_type = $1)
+                GROUP BY status
+            """, event_type)
+        return {row['status']: row['count'] for row in rows}
+
+    async def _update_backlog_gauge(self, event_type: str) -> None:
+        """未処理イベント数をメトリクスに反映（backlog_interval ごとに1回）"""
+        now = time.monotonic()
+        if now - self._backlog_updated_at.get(event_type, float('-inf')) < self.backlog_interval:
+            return
+        self._backlog_updated_at[event_type] = now
+
+        try:
+            counts = await self.get_status_counts(event_type)
+        except Exception as e:
+            logger.debug(f"未処理イベント数の取得に失敗: {e}")
+            return
+        backlog = counts.get(EVENT_STATUS_PENDING, 0) + counts.get(EVENT_STATUS_CLAIMED, 0)
+        get_metrics().set_gauge('event_backlog_depth', backlog, event_type=event_type)
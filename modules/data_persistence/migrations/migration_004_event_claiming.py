@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Migration 004: イベントのクレーム（リース）管理カラムの追加
+
+複数の分析ワーカーが events テーブルを並列に処理できるよう、
+クレーム状態・リース期限・デッドレター状態を追加します。
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent.parent))
+
+from modules.data_persistence.core.database.connection_manager import DatabaseConnectionManager
+from modules.data_persistence.config.settings import DatabaseConfig
+
+
+class Migration004EventClaiming:
+    """イベントクレーム管理マイグレーション"""
+
+    def __init__(self, connection_manager: DatabaseConnectionManager):
+        self.connection_manager = connection_manager
+
+    async def up(self):
+        """クレーム管理カラムとインデックスを追加"""
+        async with self.connection_manager.get_connection() as conn:
+            async with conn.transaction():
+                # 状態: pending / claimed / done / dead_letter
+                await conn.execute("""
+                    ALTER TABLE events
+                        ADD COLUMN IF NOT EXISTS status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                        ADD COLUMN IF NOT EXISTS claimed_by VARCHAR(100),
+                        ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP WITH TIME ZONE,
+                        ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE
+                """)
+
+                # 既存の処理済みイベントを完了状態に揃える
+                await conn.execute("""
+                    UPDATE events SET status = 'done'
+                    WHERE processed = TRUE AND status = 'pending'
+                """)
+
+                # クレーム対象（未処理）だけを対象にした部分インデックス
+                await conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_events_claimable
+                    ON events (event_type, created_at)
+                    WHERE processed = FALSE
+                """)
+
+                await conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_events_status
+                    ON events (status)
+                """)
+
+            print("✅ イベントクレーム管理カラムとインデックスを追加しました")
+
+    async def down(self):
+        """クレーム管理カラムを削除"""
+        async with self.connection_manager.get_connection() as conn:
+            await conn.execute("DROP INDEX IF EXISTS idx_events_claimable")
+            await conn.execute("DROP INDEX IF EXISTS idx_events_status")
+            await conn.execute("""
+                ALTER TABLE events
+                    DROP COLUMN IF EXISTS status,
+                    DROP COLUMN IF EXISTS claimed_by,
+                    DROP COLUMN IF EXISTS claimed_at,
+                    DROP COLUMN IF EXISTS lease_expires_at
+            """)
+            print("✅ イベントクレーム管理カラムを削除しました")
+
+
+async def main():
+    """テスト用のメイン関数"""
+    db_config = DatabaseConfig()
+    connection_manager = DatabaseConnectionManager(connection_string=db_config.connection_string)
+    await connection_manager.initialize()
+
+    migration = Migration004EventClaiming(connection_manager)
+    await migration.up()
+
+    await connection_manager.close()
+
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+価格データ一括UPSERTテスト
+
+COPY + マージによる price_data への書き込みを確認します。
+PostgreSQL に接続できない環境ではDBを使うテストをスキップします。
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent.parent.parent))
+
+from modules.data_persistence.config.settings import DatabaseConfig
+from modules.data_persistence.core.database.bulk_upsert import _chunks, bulk_upsert_price_data
+from modules.data_persistence.core.database.connection_manager import DatabaseConnectionManager
+
+COLUMNS = ("symbol", "timeframe", "timestamp", "open", "close", "high", "low", "volume")
+TEST_SYMBOL = "BULKTEST=X"
+
+
+def _bars(count: int, offset: float = 0.0):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        (TEST_SYMBOL, "5m", start + timedelta(minutes=5 * i),
+         150.0 + offset, 150.1 + offset, 150.2 + offset, 149.9 + offset, 100 + i)
+        for i in range(count)
+    ]
+
+
+def test_chunks_preserves_order_and_sizes():
+    """チャンク分割で順序と件数が保たれること"""
+    chunks = list(_chunks(iter(range(7)), 3))
+    assert chunks == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_requires_key_columns():
+    """キーカラムが無い場合はエラーになること"""
+    with pytest.raises(ValueError):
+        asyncio.run(bulk_upsert_price_data(None, [], ("symbol", "open")))
+
+
+def test_bulk_upsert_inserts_and_updates():
+    """新規挿入・既存行の更新・入力内の重複キーを1回のマージで処理できること"""
+    async def scenario():
+        config = DatabaseConfig.from_env()
+        manager = DatabaseConnectionManager(config.connection_string, min_connections=1, max_connections=2)
+        try:
+            await asyncio.wait_for(manager.initialize(), timeout=5)
+        except Exception as e:
+            pytest.skip(f"データベースに接続できません: {e}")
+
+        try:
+            async with manager.get_connection() as conn:
+                await conn.execute("DELETE FROM price_data WHERE symbol = $1", TEST_SYMBOL)
+                inserted = await bulk_upsert_price_data(conn, _bars(2500), COLUMNS, batch_size=1000)
+                # 2件目の書き込みは既存行の更新と入力内重複（後勝ち）を含む
+                updates = _bars(10, offset=1.0) + _bars(10, offset=2.0)
+                updated = await bulk_upsert_price_data(conn, updates, COLUMNS)
+                count = await conn.fetchval("SELECT COUNT(*) FROM price_data WHERE symbol = $1", TEST_SYMBOL)
+                first_open = await conn.fetchval("""
+                    SELECT open FROM price_data WHERE symbol = $1 ORDER BY timestamp LIMIT 1
+                """, TEST_SYMBOL)
+                await conn.execute("DELETE FROM price_data WHERE symbol = $1", TEST_SYMBOL)
+            return inserted, updated, count, float(first_open)
+        finally:
+            await manager.close()
+
+    inserted, updated, count, first_open = asyncio.run(scenario())
+    assert inserted == 2500
+    assert updated == 10
+    assert count == 2500
+    assert first_open == pytest.approx(152.0)
+
+
+if __name__ == "__main__":
+    test_chunks_preserves_order_and_sizes()
+    test_requires_key_columns()
+    test_bulk_upsert_inserts_and_updates()
+    print("✅ 価格データ一括UPSERTテスト完了")
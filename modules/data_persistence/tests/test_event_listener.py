@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+イベント通知リスナーテスト
+
+データベースに接続せずに、通知による起床とフォールバックポーリングの動作を確認します。
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent.parent.parent))
+
+from modules.data_persistence.core.database.event_listener import (
+    DATA_COLLECTION_CHANNEL,
+    EventNotificationListener,
+)
+
+
+def test_notification_wakes_waiter_immediately():
+    """通知を受信すると待機中の消費側が即座に起きること"""
+    async def scenario():
+        listener = EventNotificationListener(None)
+        await listener.start()
+
+        waiter = asyncio.create_task(listener.wait_for_event(poll_interval=5.0, fallback_interval=60.0))
+        await asyncio.sleep(0)
+        payload = json.dumps({'id': 1, 'event_type': 'data_collection_completed', 'symbol': 'USDJPY=X'})
+        listener._on_notification(None, 0, DATA_COLLECTION_CHANNEL, payload)
+
+        woke = await asyncio.wait_for(waiter, timeout=1.0)
+        await listener.stop()
+        return woke, listener.get_stats()
+
+    woke, stats = asyncio.run(scenario())
+    assert woke is True
+    assert stats['notifications_received'] == 1
+    assert stats['last_payload']['id'] == 1
+    assert stats['connected'] is False
+
+
+def test_falls_back_to_polling_without_connection():
+    """LISTEN接続が無い場合はポーリング間隔でタイムアウトすること"""
+    async def scenario():
+        listener = EventNotificationListener(None)
+        await listener.start()
+        woke = await listener.wait_for_event(poll_interval=0.01, fallback_interval=60.0)
+        await listener.stop()
+        return woke, listener.get_stats()
+
+    woke, stats = asyncio.run(scenario())
+    assert woke is False
+    assert stats['fallback_polls'] == 1
+
+
+def test_notification_before_wait_is_not_lost():
+    """待機開始前に届いた通知で次の待機がすぐに戻ること"""
+    async def scenario():
+        listener = EventNotificationListener(None)
+        listener._on_notification(None, 0, DATA_COLLECTION_CHANNEL, '{"id": 2}')
+        first = await listener.wait_for_event(poll_interval=1.0)
+        second = await listener.wait_for_event(poll_interval=0.01)
+        return first, second
+
+    assert asyncio.run(scenario()) == (True, False)
+
+
+if __name__ == "__main__":
+    test_notification_wakes_waiter_immediately()
+    test_falls_back_to_polling_without_connection()
+    test_notification_before_wait_is_not_lost()
+    print("✅ イベント通知リスナーテスト完了")
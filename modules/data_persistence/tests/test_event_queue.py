@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+イベントキューテスト
+
+複数ワーカーによるクレーム・リース切れ・デッドレターの動作を確認します。
+PostgreSQL に接続できない環境、または migration_004 が未適用の環境ではスキップします。
+"""
+
+import asyncio
+import json
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent.parent.parent))
+
+from modules.data_persistence.config.settings import DatabaseConfig
+from modules.data_persistence.core.database.connection_manager import DatabaseConnectionManager
+from modules.data_persistence.core.database.event_queue import EventQueue
+
+
+async def _setup(event_count: int):
+    config = DatabaseConfig.from_env()
+    manager = DatabaseConnectionManager(config.connection_string, min_connections=1, max_connections=4)
+    try:
+        await asyncio.wait_for(manager.initialize(), timeout=5)
+    except Exception as e:
+        pytest.skip(f"データベースに接続できません: {e}")
+
+    async with manager.get_connection() as conn:
+        has_status = await conn.fetchval("""
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'events' AND column_name = 'status'
+            )
+        """)
+    if not has_status:
+        await manager.close()
+        pytest.skip("events テーブルにクレーム管理カラムがありません（migration_004 未適用）")
+
+    event_type = f"test_claim_{uuid.uuid4().hex[:8]}"
+    async with manager.get_connection() as conn:
+        for i in range(event_count):
+            await conn.execute("""
+                INSERT INTO events (event_type, symbol, event_data)
+                VALUES ($1, 'USDJPY=X', $2)
+            """, event_type, json.dumps({'sequence': i}))
+    return manager, event_type
+
+
+async def _teardown(manager: DatabaseConnectionManager, event_type: str):
+    async with manager.get_connection() as conn:
+        await conn.execute("DELETE FROM events WHERE event_type = $1", event_type)
+    await manager.close()
+
+
+def test_concurrent_workers_never_share_events():
+    """並列に確保したイベントが重複しないこと"""
+    async def scenario():
+        manager, event_type = await _setup(40)
+        try:
+            workers = [EventQueue(manager, worker_id=f"worker-{i}") for i in range(4)]
+            batches = await asyncio.gather(*(worker.claim(event_type, limit=15) for worker in workers))
+            claimed = [event['id'] for batch in batches for event in batch]
+            counts = await workers[0].get_status_counts(event_type)
+            return claimed, counts
+        finally:
+            await _teardown(manager, event_type)
+
+    claimed, counts = asyncio.run(scenario())
+    assert len(claimed) == len(set(claimed)) == 40
+    assert counts == {'claimed': 40}
+
+
+def test_complete_requires_owning_lease():
+    """リースを保持していないワーカーは完了を記録できないこと"""
+    async def scenario():
+        manager, event_type = await _setup(1)
+        try:
+            owner = EventQueue(manager, worker_id="owner")
+            other = EventQueue(manager, worker_id="other")
+            event = (await owner.claim(event_type))[0]
+            return await other.complete(event['id']), await owner.complete(event['id']), \
+                await owner.get_status_counts(event_type)
+        finally:
+            await _teardown(manager, event_type)
+
+    other_result, owner_result, counts = asyncio.run(scenario())
+    assert other_result is False
+    assert owner_result is True
+    assert counts == {'done': 1}
+
+
+def test_expired_lease_is_reclaimed_then_dead_lettered():
+    """リース切れのイベントが再確保され、上限到達でデッドレターになること"""
+    async def scenario():
+        manager, event_type = await _setup(1)
+        try:
+            queue = EventQueue(manager, worker_id="crashing", lease_seconds=0.01, max_attempts=2)
+            first = await queue.claim(event_type)
+            await asyncio.sleep(0.05)
+            second = await queue.claim(event_type)
+            await asyncio.sleep(0.05)
+            third = await queue.claim(event_type)
+            return first, second, third, await queue.get_status_counts(event_type)
+        finally:
+            await _teardown(manager, event_type)
+
+    first, second, third, counts = asyncio.run(scenario())
+    assert len(first) == 1 and len(second) == 1
+    assert second[0]['retry_count'] == 1
+    assert third == []
+    assert counts == {'dead_letter': 1}
+
+
+def test_failures_retry_until_dead_letter():
+    """失敗したイベントが再試行され、上限到達でデッドレターになること"""
+    async def scenario():
+        manager, event_type = await _setup(1)
+        try:
+            queue = EventQueue(manager, worker_id="failing", max_attempts=2)
+            statuses = []
+            for _ in range(3):
+                events = await queue.claim(event_type)
+                if not events:
+                    break
+                statuses.append(await queue.fail(events[0]['id'], "テストエラー"))
+            return statuses
+        finally:
+            await _teardown(manager, event_type)
+
+    assert asyncio.run(scenario()) == ['pending', 'dead_letter']
+
+
+if __name__ == "__main__":
+    test_concurrent_workers_never_share_events()
+    test_complete_requires_owning_lease()
+    test_expired_lease_is_reclaimed_then_dead_lettered()
+    test_failures_retry_until_dead_letter()
+    print("✅ イベントキューテスト完了")
@@ -0,0 +1,26 @@
+"""
+メトリクス設定
+
+Prometheusエクスポーターの設定を管理します。
+"""
+
+import os
+from dataclasses import dataclass
+
+
+@dataclass
+class MetricsSettings:
+    """メトリクスエクスポーター設定"""
+
+    enabled: bool = True
+    port: int = 8000
+    addr: str = "0.0.0.0"
+
+    @classmethod
+    def from_env(cls, default_port: int = 8000) -> "MetricsSettings":
+        """環境変数から設定を読み込み"""
+        return cls(
+            enabled=os.getenv("METRICS_ENABLED", "true").lower() == "true",
+            port=int(os.getenv("METRICS_PORT", str(default_port))),
+            addr=os.getenv("METRICS_ADDR", "0.0.0.0"),
+        )
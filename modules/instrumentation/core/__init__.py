@@ -0,0 +1,17 @@
+"""
+計測（インストルメンテーション）
+
+全サービス共通のPrometheusメトリクスとエクスポーターを提供します。
+"""
+
+from .exporter import start_metrics_server
+from .metrics import ServiceMetrics, get_metrics
+from .quantile_sketch import QuantileSketch, WindowedQuantileSketch
+
+__all__ = [
+    'QuantileSketch',
+    'ServiceMetrics',
+    'WindowedQuantileSketch',
+    'get_metrics',
+    'start_metrics_server'
+]
@@ -0,0 +1,65 @@
+"""
+Prometheusエクスポーター
+
+各サービスのプロセス内で /metrics を公開するHTTPサーバーを起動します。
+サーバーは prometheus-client のバックグラウンドスレッドで動作するため、
+asyncio のイベントループを妨げません。
+"""
+
+import logging
+from typing import Optional
+
+try:
+    from prometheus_client import start_http_server
+except ImportError:
+    start_http_server = None
+
+from ..config.settings import MetricsSettings
+from .metrics import ServiceMetrics, get_metrics
+
+logger = logging.getLogger(__name__)
+
+_started_port: Optional[int] = None
+
+
+def start_metrics_server(service_name: str, default_port: int,
+                         settings: Optional[MetricsSettings] = None,
+                         metrics: Optional[ServiceMetrics] = None) -> bool:
+    """
+    /metrics エクスポーターを起動
+
+    同じプロセスで2回目以降に呼ばれた場合は何もしません。
+
+    Args:
+        service_name: ログ用のサービス名
+        default_port: METRICS_PORT が未設定の場合のポート
+        settings: エクスポーター設定（Noneの場合は環境変数から読み込み）
+        metrics: 公開するメトリクス（Noneの場合はプロセス共有のもの）
+
+    Returns:
+        エクスポーターが稼働中の場合True
+    """
+    global _started_port
+
+    if _started_port is not None:
+        return True
+
+    settings = settings or MetricsSettings.from_env(default_port)
+    if not settings.enabled:
+        logger.info(f"📉 {service_name}: メトリクスエクスポーターは無効です")
+        return False
+
+    metrics = metrics or get_metrics()
+    if start_http_server is None or not metrics.enabled:
+        logger.warning(f"⚠️ {service_name}: prometheus-client が無いため /metrics を公開できません")
+        return False
+
+    try:
+        start_http_server(settings.port, addr=settings.addr, registry=metrics.registry)
+    except OSError as e:
+        logger.warning(f"⚠️ {service_name}: メトリクスエクスポーターを起動できません (port={settings.port}): {e}")
+        return False
+
+    _started_port = settings.port
+    logger.info(f"📈 {service_name}: /metrics を公開しました ({settings.addr}:{settings.port})")
+    return True
@@ -0,0 +1,199 @@
+"""
+共有メトリクス定義
+
+全サービスで共通のPrometheusメトリクスを定義し、記録用のヘルパーを提供します。
+ヒストグラム名は PerformanceMonitor.monitored_metrics の名前をそのまま使用します。
+
+prometheus-client がインストールされていない環境では記録は何もしません。
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    from prometheus_client import CollectorRegistry, Gauge, Histogram, generate_latest
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:
+    CollectorRegistry = None
+    Gauge = None
+    Histogram = None
+    generate_latest = None
+    GaugeMetricFamily = None
+
+from .quantile_sketch import WINDOWS, WindowedQuantileSketch
+
+logger = logging.getLogger(__name__)
+
+# 秒単位のレイテンシ用バケット（0.5ms〜30s）
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 名前: (説明, ラベル)
+HISTOGRAM_DEFINITIONS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    # PerformanceMonitor.monitored_metrics
+    'gate1_evaluation_time': ('GATE 1評価時間（秒）', ()),
+    'gate2_evaluation_time': ('GATE 2評価時間（秒）', ()),
+    'gate3_evaluation_time': ('GATE 3評価時間（秒）', ()),
+    'total_evaluation_time': ('総評価時間（秒）', ()),
+    'pattern_loading_time': ('パターン読み込み時間（秒）', ()),
+    'technical_calculation_time': ('テクニカル計算時間（秒）', ('timeframe',)),
+    'database_query_time': ('データベースクエリ時間（秒）', ('operation',)),
+    'signal_generation_time': ('シグナル生成時間（秒）', ()),
+    # サービス横断
+    'data_collection_time': ('時間足ごとのデータ収集時間（秒）', ('timeframe',)),
+    'rate_limiter_wait_time': ('レート制限による待機時間（秒）', ('limiter',)),
+    'discord_send_time': ('Discord送信時間（秒）', ('status',)),
+}
+
+GAUGE_DEFINITIONS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    'event_backlog_depth': ('未処理イベント数', ('event_type',)),
+    'stream_queue_depth': ('ストリームのディスパッチ待ち件数', ('stream',)),
+    'stream_parse_rate': ('ストリームの1秒あたりの解析行数', ('stream',)),
+    'stream_dropped_messages': ('キューのあふれで破棄したメッセージ数（累計）', ('stream',)),
+}
+
+UNKNOWN_LABEL = 'unknown'
+
+# 時間窓つき分位点として公開する分位
+EXPORTED_QUANTILES = (0.5, 0.95, 0.99)
+
+SketchSource = Callable[[], Dict[str, WindowedQuantileSketch]]
+
+
+class _QuantileCollector:
+    """分位点スケッチを時間窓ごとのゲージとして公開するコレクター"""
+
+    def __init__(self):
+        self.sources: list = []
+
+    def collect(self):
+        family = GaugeMetricFamily(
+            'performance_metric_quantile',
+            '時間窓ごとのメトリクス分位点（秒）',
+            labels=['metric', 'window', 'quantile']
+        )
+        for source in self.sources:
+            # エクスポーターのスレッドから呼ばれるため、記録側と競合しないようコピーして走査
+            for name, sketch in list(source().items()):
+                for window, seconds in WINDOWS.items():
+                    values = sketch.window(seconds).quantiles(EXPORTED_QUANTILES)
+                    for quantile, value in zip(EXPORTED_QUANTILES, values):
+                        if value is not None:
+                            family.add_metric([name, window, str(quantile)], value)
+        yield family
+
+
+class ServiceMetrics:
+    """サービス共通メトリクス"""
+
+    def __init__(self, registry: Optional[Any] = None):
+        """
+        初期化
+
+        Args:
+            registry: Prometheusレジストリ（Noneの場合は専用レジストリを作成）
+        """
+        self.enabled = Histogram is not None
+        self.registry = None
+        self._metrics: Dict[str, Any] = {}
+        self._labels: Dict[str, Tuple[str, ...]] = {}
+        self._quantile_collector: Optional[_QuantileCollector] = None
+
+        if not self.enabled:
+            logger.debug("prometheus-client が利用できないため、メトリクスは記録されません")
+            return
+
+        self.registry = registry if registry is not None else CollectorRegistry()
+        for name, (description, labels) in HISTOGRAM_DEFINITIONS.items():
+            self._metrics[name] = Histogram(
+                name, description, labels, registry=self.registry, buckets=LATENCY_BUCKETS
+            )
+            self._labels[name] = labels
+        for name, (description, labels) in GAUGE_DEFINITIONS.items():
+            self._metrics[name] = Gauge(name, description, labels, registry=self.registry)
+            self._labels[name] = labels
+
+    def observe(self, name: str, seconds: float, /, **labels: Any) -> None:
+        """
+        ヒストグラムに値を記録
+
+        定義されていない名前は無視し、不足しているラベルは 'unknown' で埋めます。
+        """
+        metric = self._resolve(name, labels)
+        if metric is not None:
+            metric.observe(seconds)
+
+    def set_gauge(self, name: str, value: float, /, **labels: Any) -> None:
+        """ゲージの値を設定"""
+        metric = self._resolve(name, labels)
+        if metric is not None:
+            metric.set(value)
+
+    @contextmanager
+    def time(self, name: str, /, **labels: Any):
+        """ブロックの実行時間を記録するコンテキストマネージャ"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name: str, /, **labels: Any):
+        """関数（同期・非同期）の実行時間を記録するデコレータ"""
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.time(name, **labels):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def register_quantile_source(self, source: SketchSource) -> None:
+        """
+        時間窓つき分位点の取得元を登録
+
+        登録した関数が返すスケッチは performance_metric_quantile として
+        1m/5m/1h の窓ごとに公開されます。
+        """
+        if not self.enabled:
+            return
+        if self._quantile_collector is None:
+            self._quantile_collector = _QuantileCollector()
+            self.registry.register(self._quantile_collector)
+        self._quantile_collector.sources.append(source)
+
+    def render(self) -> bytes:
+        """テキスト形式のエクスポート（/metrics の内容）"""
+        if not self.enabled:
+            return b''
+        return generate_latest(self.registry)
+
+    def _resolve(self, name: str, labels: Dict[str, Any]):
+        metric = self._metrics.get(name)
+        if metric is None:
+            return None
+        label_names = self._labels[name]
+        if not label_names:
+            return metric
+        return metric.labels(*(str(labels.get(label, UNKNOWN_LABEL)) for label in label_names))
+
+
+_metrics: Optional[ServiceMetrics] = None
+
+
+def get_metrics() -> ServiceMetrics:
+    """プロセス共有のメトリクスを取得"""
+    global _metrics
+    if _metrics is None:
+        _metrics = ServiceMetrics()
+    return _metrics
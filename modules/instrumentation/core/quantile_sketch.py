@@ -0,0 +1,264 @@
+"""
+ストリーミング分位点スケッチ
+
+対数バケット（HDRヒストグラム / DDSketch 方式）で値を集計し、
+相対誤差 relative_accuracy 以内の分位点を返します。
+
+- 記録: バケットのカウントを加算するだけの O(1)
+- 分位点: バケット数 k（値の範囲で決まり、件数 n に依存しない）に対する走査
+- マージ: 同じ精度のスケッチ同士はバケットごとの加算で結合可能（プロセス間集計用）
+
+WindowedQuantileSketch は一定間隔のスロットごとにスケッチを持ち、
+直近1分/5分/1時間などの時間窓の分位点を返します。
+"""
+
+import bisect
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+# 時間窓の別名（秒）
+WINDOWS: Dict[str, float] = {
+    '1m': 60.0,
+    '5m': 300.0,
+    '1h': 3600.0,
+}
+
+
+class QuantileSketch:
+    """相対誤差保証付きの分位点スケッチ（非負の計測値用）"""
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-9):
+        """
+        初期化
+
+        Args:
+            relative_accuracy: 分位点の相対誤差
+            min_value: これ以下の値は0バケットにまとめる
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy は 0 と 1 の間で指定してください")
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._bins: Dict[int, int] = {}
+        self._keys: List[int] = []
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, count: int = 1) -> None:
+        """値を記録"""
+        self.count += count
+        self.sum += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+        if value <= self.min_value:
+            self.zero_count += count
+            return
+
+        key = math.ceil(math.log(value) / self._log_gamma)
+        if key in self._bins:
+            self._bins[key] += count
+        else:
+            self._bins[key] = count
+            bisect.insort(self._keys, key)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """分位点（0〜1）を取得、データが無い場合はNone"""
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        """複数の分位点を1回の走査で取得"""
+        qs = list(qs)
+        if self.count == 0:
+            return [None] * len(qs)
+
+        order = sorted(range(len(qs)), key=lambda i: qs[i])
+        results: List[Optional[float]] = [None] * len(qs)
+        cumulative = self.zero_count
+        key_index = 0
+
+        for i in order:
+            if qs[i] <= 0.0 or qs[i] >= 1.0:
+                # 両端は記録済みの最小値・最大値を正確に返す
+                results[i] = self.min if qs[i] <= 0.0 else self.max
+                continue
+            rank = qs[i] * (self.count - 1)
+            if rank < self.zero_count:
+                value = 0.0
+            else:
+                # rank を含むバケットまで累積カウントを進める（qs は昇順に処理）
+                while key_index < len(self._keys) and cumulative <= rank:
+                    cumulative += self._bins[self._keys[key_index]]
+                    key_index += 1
+                value = self._value(key_index - 1)
+            results[i] = min(max(value, self.min), self.max)
+
+        return results
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """別のスケッチを結合"""
+        if other.relative_accuracy != self.relative_accuracy or other.min_value != self.min_value:
+            raise ValueError("精度の異なるスケッチは結合できません")
+        if other.count == 0:
+            return
+
+        for key, count in list(other._bins.items()):
+            if key in self._bins:
+                self._bins[key] += count
+            else:
+                self._bins[key] = count
+                bisect.insort(self._keys, key)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """シリアライズ（JSON互換）"""
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'min_value': self.min_value,
+            'bins': {str(key): count for key, count in self._bins.items()},
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        """to_dict の結果から復元"""
+        sketch = cls(data['relative_accuracy'], data['min_value'])
+        sketch._bins = {int(key): int(count) for key, count in data['bins'].items()}
+        sketch._keys = sorted(sketch._bins)
+        sketch.zero_count = int(data['zero_count'])
+        sketch.count = int(data['count'])
+        sketch.sum = float(data['sum'])
+        if sketch.count:
+            sketch.min = float(data['min'])
+            sketch.max = float(data['max'])
+        return sketch
+
+    def _value(self, key_index: int) -> float:
+        if key_index < 0:
+            return 0.0
+        key = self._keys[key_index]
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+
+class WindowedQuantileSketch:
+    """時間窓つき分位点スケッチ（スロットごとのスケッチのリング）"""
+
+    def __init__(self, slot_seconds: float = 10.0, retention_seconds: float = 3600.0,
+                 relative_accuracy: float = 0.01, clock: Callable[[], float] = time.time):
+        """
+        初期化
+
+        Args:
+            slot_seconds: 1スロットの長さ（秒）
+            retention_seconds: 時間窓として参照できる最大期間（秒）
+            relative_accuracy: 分位点の相対誤差
+            clock: 現在時刻（UNIX秒）を返す関数
+        """
+        self.slot_seconds = slot_seconds
+        self.retention_seconds = retention_seconds
+        self.relative_accuracy = relative_accuracy
+        self.clock = clock
+        self.total = QuantileSketch(relative_accuracy)
+        self._slots: Deque[Tuple[float, QuantileSketch]] = deque()
+
+    def add(self, value: float, timestamp: Optional[float] = None) -> None:
+        """値を記録"""
+        self.total.add(value)
+        self._slot_for(self.clock() if timestamp is None else timestamp).add(value)
+
+    def window(self, seconds: Optional[float] = None) -> QuantileSketch:
+        """
+        直近 seconds 秒のスケッチを取得
+
+        Args:
+            seconds: 時間窓（秒）。Noneの場合は記録開始からの累計
+
+        Returns:
+            時間窓内の値を結合したスケッチ
+        """
+        if seconds is None:
+            return self.total
+
+        now = self.clock()
+        self._expire(now)
+        cutoff = self._slot_start(now) - seconds + self.slot_seconds
+        merged = QuantileSketch(self.relative_accuracy)
+        for slot_start, sketch in list(self._slots):
+            if slot_start >= cutoff:
+                merged.merge(sketch)
+        return merged
+
+    def merge(self, other: "WindowedQuantileSketch") -> None:
+        """別プロセスのスケッチを結合（スロット時刻が一致するものを加算）"""
+        self.total.merge(other.total)
+        for slot_start, sketch in other._slots:
+            self._slot_for(slot_start).merge(sketch)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """シリアライズ（JSON互換）"""
+        return {
+            'slot_seconds': self.slot_seconds,
+            'retention_seconds': self.retention_seconds,
+            'relative_accuracy': self.relative_accuracy,
+            'total': self.total.to_dict(),
+            'slots': [[slot_start, sketch.to_dict()] for slot_start, sketch in self._slots],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], clock: Callable[[], float] = time.time) -> "WindowedQuantileSketch":
+        """to_dict の結果から復元"""
+        windowed = cls(data['slot_seconds'], data['retention_seconds'], data['relative_accuracy'], clock)
+        windowed.total = QuantileSketch.from_dict(data['total'])
+        for slot_start, sketch in data['slots']:
+            windowed._slots.append((float(slot_start), QuantileSketch.from_dict(sketch)))
+        return windowed
+
+    def _slot_start(self, timestamp: float) -> float:
+        return math.floor(timestamp / self.slot_seconds) * self.slot_seconds
+
+    def _slot_for(self, timestamp: float) -> QuantileSketch:
+        slot_start = self._slot_start(timestamp)
+        if self._slots and self._slots[-1][0] == slot_start:
+            return self._slots[-1][1]
+
+        if not self._slots or self._slots[-1][0] < slot_start:
+            sketch = QuantileSketch(self.relative_accuracy)
+            self._slots.append((slot_start, sketch))
+            self._expire(self.clock())
+            return sketch
+
+        # 過去のスロット（マージ・遅延記録）
+        for existing_start, sketch in self._slots:
+            if existing_start == slot_start:
+                return sketch
+        sketch = QuantileSketch(self.relative_accuracy)
+        slots = sorted([*self._slots, (slot_start, sketch)], key=lambda slot: slot[0])
+        self._slots = deque(slots)
+        self._expire(self.clock())
+        return sketch
+
+    def _expire(self, now: float) -> None:
+        cutoff = self._slot_start(now) - self.retention_seconds
+        while self._slots and self._slots[0][0] <= cutoff:
+            self._slots.popleft()
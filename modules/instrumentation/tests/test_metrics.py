@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+共有メトリクスのテスト
+
+ヒストグラム・ゲージの記録とラベル補完、prometheus-client が無い環境での動作を確認します。
+"""
+
+import sys
+import os
+import asyncio
+
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from modules.instrumentation.core import metrics as metrics_module
+from modules.instrumentation.core.metrics import ServiceMetrics
+
+
+def test_histograms_and_gauges_are_exported():
+    """PerformanceMonitor のメトリクス名でヒストグラムが出力され、ラベルが補完されること"""
+    pytest.importorskip("prometheus_client")
+
+    metrics = ServiceMetrics()
+    metrics.observe('gate1_evaluation_time', 0.02)
+    metrics.observe('technical_calculation_time', 0.1, timeframe='5m')
+    metrics.observe('database_query_time', 0.003)
+    metrics.observe('not_defined_metric', 1.0)
+    metrics.set_gauge('event_backlog_depth', 7, event_type='data_collection_completed')
+
+    @metrics.timed('discord_send_time', status='success')
+    async def send():
+        return True
+
+    assert asyncio.run(send())
+
+    with metrics.time('data_collection_time', timeframe='1h'):
+        pass
+
+    text = metrics.render().decode()
+    assert 'gate1_evaluation_time_count 1.0' in text
+    assert 'technical_calculation_time_count{timeframe="5m"} 1.0' in text
+    assert 'database_query_time_count{operation="unknown"} 1.0' in text
+    assert 'event_backlog_depth{event_type="data_collection_completed"} 7.0' in text
+    assert 'discord_send_time_count{status="success"} 1.0' in text
+    assert 'data_collection_time_count{timeframe="1h"} 1.0' in text
+    assert 'not_defined_metric' not in text
+
+
+def test_recording_is_noop_without_prometheus_client(monkeypatch):
+    """prometheus-client が無い場合は記録しても例外にならないこと"""
+    monkeypatch.setattr(metrics_module, 'Histogram', None)
+
+    metrics = ServiceMetrics()
+    assert not metrics.enabled
+    metrics.observe('gate1_evaluation_time', 0.02)
+    metrics.set_gauge('event_backlog_depth', 3, event_type='x')
+    with metrics.time('signal_generation_time'):
+        pass
+    assert metrics.render() == b''
+
+
+if __name__ == "__main__":
+    test_histograms_and_gauges_are_exported()
+    print("✅ 共有メトリクステスト完了")
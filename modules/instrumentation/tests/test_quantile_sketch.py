@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+分位点スケッチのテスト
+
+相対誤差、プロセス間マージ、時間窓、PerformanceMonitor の統計を確認します。
+"""
+
+import sys
+import os
+import random
+
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from modules.instrumentation.core.quantile_sketch import QuantileSketch, WindowedQuantileSketch
+from modules.llm_analysis.core.performance_monitor import PerformanceMonitor
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_quantiles_within_relative_accuracy_and_mergeable():
+    """分位点が相対誤差内に収まり、分割して記録したスケッチの結合結果が一致すること"""
+    rng = random.Random(42)
+    values = [rng.lognormvariate(-3, 1) for _ in range(20000)]
+
+    whole = QuantileSketch(relative_accuracy=0.01)
+    first, second = QuantileSketch(relative_accuracy=0.01), QuantileSketch(relative_accuracy=0.01)
+    for i, value in enumerate(values):
+        whole.add(value)
+        (first if i % 2 else second).add(value)
+
+    for q, estimate in zip((0.5, 0.95, 0.99), whole.quantiles([0.5, 0.95, 0.99])):
+        assert estimate == pytest.approx(exact_quantile(values, q), rel=0.02)
+    assert whole.quantile(0.0) == min(values)
+    assert whole.quantile(1.0) == max(values)
+
+    # シリアライズを経由してマージ（別プロセスからの受け取りを想定）
+    first.merge(QuantileSketch.from_dict(second.to_dict()))
+    assert first.count == whole.count
+    assert first.quantiles([0.5, 0.99]) == whole.quantiles([0.5, 0.99])
+
+
+def test_time_windows_only_include_recent_values():
+    """時間窓の分位点が窓内の値だけから求まり、保持期間外のスロットは捨てられること"""
+    now = [10000.0]
+    sketch = WindowedQuantileSketch(slot_seconds=10, retention_seconds=3600, clock=lambda: now[0])
+
+    for second in range(3600):
+        now[0] = 10000.0 + second
+        sketch.add(5.0 if second >= 3540 else 1.0)
+
+    assert sketch.window(60).count == 60
+    assert sketch.window(60).quantile(0.5) == pytest.approx(5.0, rel=0.01)
+    assert sketch.window(3600).quantile(0.5) == pytest.approx(1.0, rel=0.01)
+    assert sketch.window(None).count == 3600
+
+    now[0] += 7200
+    assert sketch.window(3600).count == 0
+    assert sketch.window(None).count == 3600
+
+
+def test_performance_monitor_stats_use_sketch():
+    """PerformanceMonitor の統計が履歴件数を超えても全件から求まり、時間窓を指定できること"""
+    monitor = PerformanceMonitor(max_history=100)
+    for i in range(1, 1001):
+        monitor.record_metric('gate1_evaluation_time', i / 1000)
+
+    stats = monitor.get_stats('gate1_evaluation_time')
+    assert stats.count == 1000
+    assert stats.min_value == pytest.approx(0.001)
+    assert stats.max_value == pytest.approx(1.0)
+    assert stats.avg_value == pytest.approx(0.5005)
+    assert stats.p95_value == pytest.approx(0.95, rel=0.02)
+    assert stats.last_value == pytest.approx(1.0)
+    assert monitor.get_stats('gate1_evaluation_time', window='1m').count == 1000
+
+    other = PerformanceMonitor()
+    other.merge_sketches(monitor.export_sketches())
+    assert other.sketches['gate1_evaluation_time'].window(None).count == 1000
+
+
+if __name__ == "__main__":
+    test_quantiles_within_relative_accuracy_and_mergeable()
+    test_time_windows_only_include_recent_values()
+    test_performance_monitor_stats_use_sketch()
+    print("✅ 分位点スケッチテスト完了")
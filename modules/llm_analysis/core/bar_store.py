@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""
+インメモリ・ローリングバーストア
+
+(symbol, timeframe) ごとに固定長のNumPy配列で直近の足を保持し、
+分析サービス間で共有します（プロセスごとに1つ）。
+
+- 起動時（または初回アクセス時）に price_data から1回だけウォームアップ
+- データ収集イベントに含まれる足（event_data["bars"]）をそのまま追記
+- イベントに足が無い・取りこぼしがある・一定時間更新が無い場合のみ、
+  最新時刻以降の差分だけをDBから取得
+- イベントを受け取らない読み手は呼び出しごとに短い許容秒数を指定し、
+  足の区切りを跨いだ場合にも差分同期する
+- 読み出しは配列のスライス（ゼロコピー・読み取り専用ビュー）
+
+バッファは容量の2倍の配列を持ち、末尾まで埋まったら直近の容量分を先頭へ
+詰め直すため、常に連続したスライスとして窓を返せます。
+
+各バッファは内容が変わるたびにプロセス内で一意なリビジョンを更新するため、
+(最新足の時刻, リビジョン) を派生データ（指標スナップショット等）のキャッシュキーに使えます。
+
+イベントの足ペイロード形式:
+    {"bars": {"5m": [[ISO8601タイムスタンプ, open, high, low, close, volume], ...], ...}}
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import math
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume', 'data_quality_score')
+
+TIMEFRAME_DURATIONS = {
+    '5m': timedelta(minutes=5),
+    '15m': timedelta(minutes=15),
+    '1h': timedelta(hours=1),
+    '4h': timedelta(hours=4),
+    '1d': timedelta(days=1),
+}
+
+# 連続性チェックで許容する間隔（時間足の長さに対する倍率）
+_GAP_TOLERANCE = 1.5
+
+# バッファ内容のリビジョン（全バッファで一意）
+_revisions = itertools.count(1)
+
+
+def _to_ns(timestamp: Any) -> int:
+    """タイムスタンプをUTCのエポックナノ秒に変換"""
+    ts = pd.Timestamp(timestamp)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize('UTC')
+    return int(ts.tz_convert('UTC').as_unit('ns').value)
+
+
+@dataclass(frozen=True)
+class BarView:
+    """バッファの読み取り専用ビュー（時系列順）"""
+    timestamp: np.ndarray  # datetime64[ns]（UTC）
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    data_quality_score: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def to_frame(self, index: bool = True, fields: Sequence[str] = PRICE_FIELDS) -> pd.DataFrame:
+        """
+        DataFrameに変換（配列はコピーしない）
+
+        Args:
+            index: Trueの場合timestampをDatetimeIndexに、Falseの場合は列にする
+            fields: 含める価格フィールド
+        """
+        columns = {field: getattr(self, field) for field in fields}
+        timestamps = pd.DatetimeIndex(self.timestamp, tz='UTC', name='timestamp')
+        if index:
+            return pd.DataFrame(columns, index=timestamps, copy=False)
+        return pd.DataFrame({'timestamp': timestamps, **columns}, copy=False)
+
+
+class BarBuffer:
+    """1つの (symbol, timeframe) の固定長リングバッファ"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._timestamps = np.zeros(capacity * 2, dtype=np.int64)
+        self._values = {field: np.zeros(capacity * 2, dtype=np.float64) for field in PRICE_FIELDS}
+        self._start = 0
+        self._end = 0
+        self.synced_at: Optional[float] = None
+        self.revision = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def last_timestamp(self) -> Optional[pd.Timestamp]:
+        """最新足のタイムスタンプ"""
+        if self._end == self._start:
+            return None
+        return pd.Timestamp(int(self._timestamps[self._end - 1]), tz='UTC')
+
+    def upsert(self, timestamp_ns: int, values: Sequence[float]) -> None:
+        """
+        1本の足を追加または更新
+
+        最新足と同時刻なら上書き（未確定足の更新）、より新しければ追記、
+        窓内の過去の時刻なら該当位置を上書きまたは挿入します。
+        """
+        if self._end > self._start and timestamp_ns <= self._timestamps[self._end - 1]:
+            position = self._start + int(np.searchsorted(self._timestamps[self._start:self._end], timestamp_ns))
+            if position < self._end and self._timestamps[position] == timestamp_ns:
+                if not self._same_values(position, values):
+                    self._write(position, timestamp_ns, values)
+                return
+            if position == self._start and len(self) >= self.capacity:
+                # 窓より古い足は保持しない
+                return
+            self._insert(position, timestamp_ns, values)
+            return
+
+        if self._end == len(self._timestamps):
+            self._compact()
+        self._write(self._end, timestamp_ns, values)
+        self._end += 1
+        if len(self) > self.capacity:
+            self._start += 1
+
+    def view(self, limit: Optional[int] = None, start: Optional[Any] = None,
+             end: Optional[Any] = None) -> BarView:
+        """
+        窓のビューを取得
+
+        Args:
+            limit: 末尾から取得する最大本数
+            start: この時刻以降（含む）
+            end: この時刻以前（含む）
+        """
+        timestamps = self._timestamps[self._start:self._end]
+        lo, hi = 0, len(timestamps)
+        if start is not None:
+            lo = int(np.searchsorted(timestamps, _to_ns(start), side='left'))
+        if end is not None:
+            hi = int(np.searchsorted(timestamps, _to_ns(end), side='right'))
+        if limit is not None:
+            lo = max(lo, hi - limit)
+
+        window = slice(self._start + lo, self._start + max(lo, hi))
+        arrays = [self._timestamps[window].view('datetime64[ns]')]
+        arrays += [self._values[field][window] for field in PRICE_FIELDS]
+        for array in arrays:
+            array.flags.writeable = False
+        return BarView(*arrays)
+
+    def _write(self, position: int, timestamp_ns: int, values: Sequence[float]) -> None:
+        self._timestamps[position] = timestamp_ns
+        for field, value in zip(PRICE_FIELDS, values):
+            self._values[field][position] = np.nan if value is None else value
+        self.revision = next(_revisions)
+
+    def _same_values(self, position: int, values: Sequence[float]) -> bool:
+        """同じ足の再配信（値が変わらない上書き）かどうか"""
+        for field, value in zip(PRICE_FIELDS, values):
+            current = self._values[field][position]
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                if not np.isnan(current):
+                    return False
+            elif current != value:
+                return False
+        return True
+
+    def _insert(self, position: int, timestamp_ns: int, values: Sequence[float]) -> None:
+        """窓の途中に挿入（欠損の補完時のみ発生）"""
+        if self._end == len(self._timestamps):
+            offset = self._start
+            self._compact()
+            position -= offset
+        self._timestamps[position + 1:self._end + 1] = self._timestamps[position:self._end]
+        for array in self._values.values():
+            array[position + 1:self._end + 1] = array[position:self._end]
+        self._write(position, timestamp_ns, values)
+        self._end += 1
+        if len(self) > self.capacity:
+            self._start += 1
+
+    def _compact(self) -> None:
+        """直近の窓を配列の先頭へ詰め直す"""
+        size = len(self)
+        self._timestamps[:size] = self._timestamps[self._start:self._end]
+        for array in self._values.values():
+            array[:size] = array[self._start:self._end]
+        self._start, self._end = 0, size
+
+
+class BarStore:
+    """(symbol, timeframe) ごとのローリングバーストア"""
+
+    def __init__(self, capacity: int = 2500, max_staleness: float = 600.0, bar_interval: float = 300.0):
+        """
+        初期化
+
+        Args:
+            capacity: 各バッファの保持本数（4時間足1年分を目安）
+            max_staleness: イベントによる更新がない場合に差分同期するまでの秒数
+            bar_interval: 足の区切りの間隔（秒）。呼び出しごとに max_staleness を指定した読み手は、
+                最後の同期以降にこの区切りを跨いだ場合も差分同期する
+        """
+        self.capacity = capacity
+        self.max_staleness = max_staleness
+        self.bar_interval = bar_interval
+        self._buffers: Dict[Tuple[str, str], BarBuffer] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self.stats = {
+            'reads': 0,
+            'warmups': 0,
+            'delta_syncs': 0,
+            'event_bars_applied': 0,
+        }
+
+    def get_buffer(self, symbol: str, timeframe: str) -> Optional[BarBuffer]:
+        """バッファを取得（未作成の場合None）"""
+        return self._buffers.get((symbol, timeframe))
+
+    def append_bars(self, symbol: str, timeframe: str, bars: Iterable[Sequence[Any]]) -> int:
+        """
+        足を追記
+
+        Args:
+            bars: (timestamp, open, high, low, close, volume[, data_quality_score]) の並び
+
+        Returns:
+            追記・更新した本数
+        """
+        buffer = self._buffers.setdefault((symbol, timeframe), BarBuffer(self.capacity))
+        count = 0
+        for bar in bars:
+            values = [None if value is None else float(value) for value in bar[1:]]
+            if len(values) < len(PRICE_FIELDS):
+                values.append(1.0)
+            buffer.upsert(_to_ns(bar[0]), values)
+            count += 1
+        return count
+
+    def get_snapshot_key(self, symbol: str, timeframe: str) -> Optional[Tuple[int, int]]:
+        """
+        バッファ内容を識別するキーを取得（DBアクセスなし）
+
+        Returns:
+            (最新足のタイムスタンプ[ns], リビジョン)、バッファが空または未作成の場合None
+        """
+        buffer = self._buffers.get((symbol, timeframe))
+        if buffer is None or len(buffer) == 0:
+            return None
+        return int(buffer.last_timestamp.value), buffer.revision
+
+    def get_view(self, symbol: str, timeframe: str, limit: Optional[int] = None,
+                 start: Optional[Any] = None, end: Optional[Any] = None) -> Optional[BarView]:
+        """保持しているビューを取得（DBアクセスなし）"""
+        buffer = self._buffers.get((symbol, timeframe))
+        if buffer is None:
+            return None
+        self.stats['reads'] += 1
+        return buffer.view(limit=limit, start=start, end=end)
+
+    async def get_frame(self, connection_manager, symbol: str, timeframe: str,
+                        limit: Optional[int] = None, start: Optional[Any] = None,
+                        end: Optional[Any] = None, index: bool = True,
+                        fields: Sequence[str] = PRICE_FIELDS,
+                        max_staleness: Optional[float] = None) -> pd.DataFrame:
+        """
+        必要に応じてウォームアップ・差分同期してからDataFrameを取得
+
+        Args:
+            connection_manager: データベース接続管理
+            symbol: シンボル
+            timeframe: 時間足
+            limit: 末尾から取得する最大本数
+            start: この時刻以降（含む）
+            end: この時刻以前（含む）
+            index: timestampをインデックスにするか
+            fields: 含める価格フィールド
+            max_staleness: 許容する経過秒数（ensure_fresh を参照）
+        """
+        await self.ensure_fresh(connection_manager, symbol, timeframe, max_staleness)
+        view = self.get_view(symbol, timeframe, limit=limit, start=start, end=end)
+        return view.to_frame(index=index, fields=fields)
+
+    async def ensure_fresh(self, connection_manager, symbol: str, timeframe: str,
+                           max_staleness: Optional[float] = None) -> BarBuffer:
+        """
+        未ウォームアップならウォームアップし、古ければ差分同期
+
+        Args:
+            max_staleness: 許容する経過秒数。データ収集イベントを受け取らない読み手が指定し、
+                この秒数を過ぎた場合に加えて、最後の同期以降に足の区切り（bar_interval）を跨いだ場合も
+                同期する（None の場合はイベントで更新される前提の self.max_staleness）
+        """
+        key = (symbol, timeframe)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            buffer = self._buffers.get(key)
+            if buffer is None or buffer.synced_at is None:
+                await self._warm(connection_manager, symbol, timeframe)
+            elif self._is_stale(buffer, max_staleness):
+                await self._sync(connection_manager, symbol, timeframe)
+            return self._buffers[key]
+
+    def _is_stale(self, buffer: BarBuffer, max_staleness: Optional[float]) -> bool:
+        age = time.monotonic() - buffer.synced_at
+        if max_staleness is None:
+            return age > self.max_staleness
+        # 最後の同期が直近の足の区切りより前か
+        since_boundary = time.time() % self.bar_interval
+        return age > max_staleness or age > since_boundary
+
+    async def ensure_fresh_many(self, connection_manager, symbol: str, timeframes: Sequence[str],
+                                max_concurrency: int = 4, single_query: bool = False,
+                                max_staleness: Optional[float] = None) -> None:
+        """
+        複数の時間足を並列にウォームアップ・差分同期
+
+        Args:
+            connection_manager: データベース接続管理
+            symbol: シンボル
+            timeframes: 時間足
+            max_concurrency: 同時に発行するクエリ数の上限
+            single_query: 未ウォームアップの時間足を1回のクエリでまとめて読み込むか
+            max_staleness: 許容する経過秒数（ensure_fresh を参照）
+        """
+        if single_query:
+            cold = [tf for tf in timeframes if self._needs_warm(symbol, tf)]
+            if len(cold) > 1:
+                await self._warm_many(connection_manager, symbol, cold)
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def refresh(timeframe: str) -> None:
+            async with semaphore:
+                await self.ensure_fresh(connection_manager, symbol, timeframe, max_staleness)
+
+        await asyncio.gather(*(refresh(timeframe) for timeframe in timeframes))
+
+    async def warm(self, connection_manager, symbols: Iterable[str], timeframes: Iterable[str]) -> None:
+        """起動時のウォームアップ（シンボルごとに1クエリ）"""
+        timeframes = list(timeframes)
+        for symbol in symbols:
+            await self.ensure_fresh_many(connection_manager, symbol, timeframes, single_query=True)
+
+    async def apply_event(self, connection_manager, symbol: str, event_data: Any) -> Dict[str, int]:
+        """
+        データ収集イベントを反映
+
+        ペイロードに足が含まれ、保持している最新足から連続している時間足は
+        そのまま追記し、それ以外の時間足はDBから差分同期します。
+
+        Args:
+            connection_manager: データベース接続管理
+            symbol: シンボル
+            event_data: events.event_data（JSON文字列または辞書）
+
+        Returns:
+            {時間足: 反映した本数}
+        """
+        if isinstance(event_data, str):
+            event_data = json.loads(event_data)
+        event_data = event_data or {}
+
+        payload = event_data.get('bars') or {}
+        timeframes = set(payload) | set(event_data.get('timeframes') or {})
+        applied = {}
+
+        for timeframe in sorted(timeframes):
+            key = (symbol, timeframe)
+            buffer = self._buffers.get(key)
+            if buffer is None or buffer.synced_at is None:
+                # 未ウォームアップの時間足は初回アクセス時にまとめて読み込む
+                continue
+
+            bars = payload.get(timeframe)
+            async with self._locks.setdefault(key, asyncio.Lock()):
+                if bars and self._is_contiguous(buffer, timeframe, bars[0][0]):
+                    applied[timeframe] = self.append_bars(symbol, timeframe, bars)
+                    buffer.synced_at = time.monotonic()
+                    self.stats['event_bars_applied'] += applied[timeframe]
+                else:
+                    applied[timeframe] = await self._sync(connection_manager, symbol, timeframe)
+
+        return applied
+
+    def get_stats(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        return {
+            **self.stats,
+            'buffers': len(self._buffers),
+            'bars': sum(len(buffer) for buffer in self._buffers.values()),
+        }
+
+    @staticmethod
+    def _is_contiguous(buffer: BarBuffer, timeframe: str, first_timestamp: Any) -> bool:
+        last = buffer.last_timestamp
+        duration = TIMEFRAME_DURATIONS.get(timeframe)
+        if last is None or duration is None:
+            return False
+        return pd.Timestamp(_to_ns(first_timestamp), tz='UTC') - last <= duration * _GAP_TOLERANCE
+
+    def _needs_warm(self, symbol: str, timeframe: str) -> bool:
+        buffer = self._buffers.get((symbol, timeframe))
+        return buffer is None or buffer.synced_at is None
+
+    async def _warm_many(self, connection_manager, symbol: str, timeframes: Sequence[str]) -> None:
+        """複数時間足の直近の足を ROW_NUMBER で1回のクエリにまとめて読み込む"""
+        keys = sorted((symbol, timeframe) for timeframe in timeframes)
+        locks = [self._locks.setdefault(key, asyncio.Lock()) for key in keys]
+        for lock in locks:
+            await lock.acquire()
+        try:
+            timeframes = [tf for _, tf in keys if self._needs_warm(symbol, tf)]
+            if not timeframes:
+                return
+
+            async with connection_manager.get_connection() as conn:
+                rows = await conn.fetch("""
+                    SELECT timeframe, timestamp, open, high, low, close, volume, data_quality_score
+                    FROM (
+                        SELECT timeframe, timestamp, open, high, low, close, volume, data_quality_score,
+                               ROW_NUMBER() OVER (PARTITION BY timeframe ORDER BY timestamp DESC) AS rn
+                        FROM price_data
+                        WHERE symbol = $1 AND timeframe = ANY($2::text[])
+                    ) ranked
+                    WHERE rn <= $3
+                    ORDER BY timeframe, timestamp ASC
+                """, symbol, list(timeframes), self.capacity)
+
+            grouped: Dict[str, list] = {timeframe: [] for timeframe in timeframes}
+            for row in rows:
+                row = tuple(row)
+                grouped[row[0]].append(row[1:])
+
+            now = time.monotonic()
+            for timeframe, bars in grouped.items():
+                self._buffers[(symbol, timeframe)] = BarBuffer(self.capacity)
+                self.append_bars(symbol, timeframe, bars)
+                self._buffers[(symbol, timeframe)].synced_at = now
+            self.stats['warmups'] += 1
+            logger.info(f"🔥 バーストアを一括ウォームアップ: {symbol} {dict((tf, len(b)) for tf, b in grouped.items())}")
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    async def _warm(self, connection_manager, symbol: str, timeframe: str) -> int:
+        async with connection_manager.get_connection() as conn:
+            rows = await conn.fetch("""
+                SELECT timestamp, open, high, low, close, volume, data_quality_score
+                FROM price_data
+                WHERE symbol = $1 AND timeframe = $2
+                ORDER BY timestamp DESC
+                LIMIT $3
+            """, symbol, timeframe, self.capacity)
+
+        buffer = BarBuffer(self.capacity)
+        self._buffers[(symbol, timeframe)] = buffer
+        count = self.append_bars(symbol, timeframe, (tuple(row) for row in reversed(rows)))
+        buffer.synced_at = time.monotonic()
+        self.stats['warmups'] += 1
+        logger.info(f"🔥 バーストアをウォームアップ: {symbol} {timeframe} ({count}本)")
+        return count
+
+    async def _sync(self, connection_manager, symbol: str, timeframe: str) -> int:
+        buffer = self._buffers[(symbol, timeframe)]
+        last = buffer.last_timestamp
+        if last is None:
+            return await self._warm(connection_manager, symbol, timeframe)
+
+        # 最新足（未確定の可能性がある）も含めて取り直す
+        async with connection_manager.get_connection() as conn:
+            rows = await conn.fetch("""
+                SELECT timestamp, open, high, low, close, volume, data_quality_score
+                FROM price_data
+                WHERE symbol = $1 AND timeframe = $2 AND timestamp >= $3
+                ORDER BY timestamp ASC
+                LIMIT $4
+            """, symbol, timeframe, last.to_pydatetime(), self.capacity)
+
+        if len(rows) >= self.capacity:
+            # 差分が窓を超える場合は直近の窓を読み直す
+            return await self._warm(connection_manager, symbol, timeframe)
+
+        count = self.append_bars(symbol, timeframe, (tuple(row) for row in rows))
+        buffer.synced_at = time.monotonic()
+        self.stats['delta_syncs'] += 1
+        logger.debug(f"🔄 バーストアを差分同期: {symbol} {timeframe} ({count}本)")
+        return count
+
+
+_default_store: Optional[BarStore] = None
+
+
+def get_bar_store() -> BarStore:
+    """プロセス共有のバーストアを取得"""
+    global _default_store
+    if _default_store is None:
+        _default_store = BarStore()
+    return _default_store
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+条件評価順序
+
+パターンバリアントの条件を、不合格が早く確定する順に並べます。
+
+- 必須条件（required_conditions）を最初に評価
+- 残りは 重み × 不合格率 の大きい順（不合格率は実績からラプラス補正で推定）
+
+並び順は一定回数の評価ごとに実績から再計算されます。
+"""
+
+import logging
+from typing import Dict, List, Tuple
+
+from .pattern_compiler import CompiledCondition, CompiledVariant
+
+logger = logging.getLogger(__name__)
+
+
+class ConditionOrdering:
+    """条件の合否実績に基づくバリアントごとの評価順"""
+
+    def __init__(self, reorder_interval: int = 100):
+        """
+        初期化
+
+        Args:
+            reorder_interval: 評価順を再計算する間隔（バリアントの評価回数）
+        """
+        self.reorder_interval = reorder_interval
+        # id(condition) -> [条件, 評価回数, 合格回数]（条件を保持して id の再利用を防ぐ）
+        self._stats: Dict[int, List] = {}
+        # id(variant) -> [バリアント, 評価順, 次回再計算までの残り回数]
+        self._orders: Dict[int, List] = {}
+
+    def order(self, variant: CompiledVariant) -> Tuple[int, ...]:
+        """バリアントの条件インデックスを評価順で取得"""
+        entry = self._orders.get(id(variant))
+        if entry is None or entry[0] is not variant:
+            entry = [variant, self._compute_order(variant), self.reorder_interval]
+            self._orders[id(variant)] = entry
+        else:
+            entry[2] -= 1
+            if entry[2] <= 0:
+                entry[1] = self._compute_order(variant)
+                entry[2] = self.reorder_interval
+        return entry[1]
+
+    def record(self, condition: CompiledCondition, passed: bool) -> None:
+        """条件の合否を記録"""
+        stats = self._stats.get(id(condition))
+        if stats is None or stats[0] is not condition:
+            stats = [condition, 0, 0]
+            self._stats[id(condition)] = stats
+        stats[1] += 1
+        if passed:
+            stats[2] += 1
+
+    def fail_rate(self, condition: CompiledCondition) -> float:
+        """条件の不合格率の推定値"""
+        stats = self._stats.get(id(condition))
+        if stats is None or stats[0] is not condition:
+            return 0.5
+        return (stats[1] - stats[2] + 1) / (stats[1] + 2)
+
+    def clear(self) -> None:
+        """実績と評価順を破棄（パターン再読み込み時など）"""
+        self._stats.clear()
+        self._orders.clear()
+
+    def _compute_order(self, variant: CompiledVariant) -> Tuple[int, ...]:
+        required = [index for group in variant.required_indices for index in group]
+        required = list(dict.fromkeys(required))
+        others = [index for index in range(len(variant.conditions)) if index not in required]
+        others.sort(key=lambda index: -variant.conditions[index].weight * self.fail_rate(variant.conditions[index]))
+        return tuple(required + others)
@@ -8,7 +8,7 @@ TimescaleDBから複数時間足の価格データを取得し、
 import logging
 import asyncio
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 try:
     import pandas as pd
@@ -24,6 +24,11 @@ from modules.data_persistence.core.database.connection_manager import DatabaseCo
 from modules.data_collection.utils.timezone_utils import TimezoneUtils
 from .technical_calculator import TechnicalIndicatorCalculator
 
+try:
+    from .bar_store import get_bar_store
+except ImportError:
+    get_bar_store = None
+
 
 class LLMDataPreparator:
     """LLM分析用データ準備器（ルールベース売買システム用）"""
@@ -49,6 +54,15 @@ class LLMDataPreparator:
         self.connection_manager = DatabaseConnectionManager(connection_string)
         self.timezone_utils = TimezoneUtils()
         self.technical_calculator = TechnicalIndicatorCalculator()
+        # プロセス共有のバーストア（pandas/numpyが利用できない場合はDBから直接取得）
+        self.bar_store = get_bar_store() if get_bar_store is not None else None
+        # 時間足データ取得の同時実行数と、未読み込み時に1クエリでまとめて取得するか
+        self.max_concurrent_fetches = 4
+        self.single_query_fetch = False
+        # データ収集イベントを受け取っていない時間足で許容するバーストアの経過秒数
+        # （足の区切りを跨いだ場合も同期する。イベントを反映した時間足はバーストアの既定値）
+        self.unsubscribed_max_staleness = 60.0
+        self._event_timeframes: Set[Tuple[str, str]] = set()
         self._initialized = False
         
         # 分析タイプ別設定
@@ -124,16 +138,12 @@ class LLMDataPreparator:
             end_time = datetime.now(timezone.utc)
             start_time = end_time - timedelta(hours=config["lookback_hours"])
             
-            # 各時間足のデータを取得
+            # 各時間足のデータを並列に取得
+            self.logger.info(f"⏰ {', '.join(timeframes)}足データ取得中...")
+            raw_frames = await self._fetch_all_timeframes(symbol, timeframes, start_time, end_time)
+            
             timeframe_data = {}
-            for timeframe in timeframes:
-                self.logger.info(f"⏰ {timeframe}足データ取得中...")
-                
-                # データベースからデータ取得
-                raw_data = await self._fetch_timeframe_data(
-                    symbol, timeframe, start_time, end_time
-                )
-                
+            for timeframe, raw_data in zip(timeframes, raw_frames):
                 # データが空かどうかをチェック
                 is_empty = False
                 try:
@@ -193,6 +203,42 @@ class LLMDataPreparator:
             self.logger.error(f"❌ データ準備エラー: {e}")
             raise
 
+    async def _fetch_all_timeframes(
+        self,
+        symbol: str,
+        timeframes: List[str],
+        start_time: datetime,
+        end_time: datetime
+    ) -> List:
+        """
+        複数時間足のデータを同時実行数を制限して並列に取得
+        
+        single_query_fetch が有効な場合、未読み込みの時間足は
+        1回のクエリ（ROW_NUMBER() OVER (PARTITION BY timeframe)）でまとめて読み込みます。
+        
+        Returns:
+            timeframes と同じ順の価格データ
+        """
+        if self.bar_store is not None:
+            groups: Dict[Optional[float], List[str]] = {}
+            for timeframe in timeframes:
+                groups.setdefault(self._max_staleness(symbol, timeframe), []).append(timeframe)
+            for max_staleness, group in groups.items():
+                await self.bar_store.ensure_fresh_many(
+                    self.connection_manager, symbol, group,
+                    max_concurrency=self.max_concurrent_fetches,
+                    single_query=self.single_query_fetch,
+                    max_staleness=max_staleness
+                )
+        
+        semaphore = asyncio.Semaphore(self.max_concurrent_fetches)
+        
+        async def fetch(timeframe: str):
+            async with semaphore:
+                return await self._fetch_timeframe_data(symbol, timeframe, start_time, end_time)
+        
+        return await asyncio.gather(*(fetch(timeframe) for timeframe in timeframes))
+
     async def _fetch_timeframe_data(
         self,
         symbol: str,
@@ -213,6 +259,14 @@ class LLMDataPreparator:
             価格データのDataFrame
         """
         try:
+            if self.bar_store is not None:
+                # 共有バーストアから読み出し（必要な場合のみDBから差分同期）
+                df = await self.bar_store.get_frame(
+                    self.connection_manager, symbol, timeframe, start=start_time, end=end_time,
+                    max_staleness=self._max_staleness(symbol, timeframe)
+                )
+                return df.dropna()
+            
             # SQLクエリの構築（asyncpg用のプレースホルダー）
             query = """
             SELECT 
@@ -266,6 +320,32 @@ class LLMDataPreparator:
             self.logger.error(f"❌ データ取得エラー ({timeframe}): {e}")
             return pd.DataFrame() if pd is not None else []
 
+    async def apply_collection_event(self, symbol: str, event_data) -> None:
+        """
+        データ収集完了イベントの新しい足を共有バーストアへ反映
+        
+        Args:
+            symbol: 通貨ペアシンボル
+            event_data: イベントデータ（JSON文字列または辞書）
+        """
+        if self.bar_store is None:
+            return
+        if not self._initialized:
+            await self.initialize()
+        applied = await self.bar_store.apply_event(self.connection_manager, symbol, event_data)
+        self._event_timeframes.update((symbol, timeframe) for timeframe in applied)
+
+    def _max_staleness(self, symbol: str, timeframe: str) -> Optional[float]:
+        """
+        バーストアの許容経過秒数
+        
+        イベントで足を反映している時間足はバーストアの既定値（None）、それ以外は
+        DBから直接取得していた頃と同程度の鮮度になるよう短い値を返す。
+        """
+        if (symbol, timeframe) in self._event_timeframes:
+            return None
+        return self.unsubscribed_max_staleness
+
     def _check_data_quality(self, data, timeframe: str) -> float:
         """
         データ品質のチェック
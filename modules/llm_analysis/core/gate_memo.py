@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+ゲート結果メモ
+
+パターンバリアントごとの GateResult を、そのバリアントが参照する時間足の
+足のバージョンと対応付けて保持します。GATE 1（D1/H4）や GATE 2（主に H1）の
+パターンは、参照する時間足の足が変わるまで同じ結果を返すため、5分足ごとの
+評価で条件を再評価せずに済みます。
+
+- 時間足の集合はパターンの条件の timeframe から決まります（PatternCompiler）。
+- 条件の指標が指定時間足に無く他の時間足へフォールバックした場合は、
+  全時間足のバージョンをキーに含めます。
+- パターンファイルが再読み込みされて評価プランが差し替わると、そのゲートのメモは破棄されます。
+"""
+
+import logging
+from dataclasses import replace
+from datetime import datetime, timezone
+from typing import Any, Dict, Hashable, Mapping, Optional, Tuple
+
+from .pattern_compiler import CompiledGatePlan, CompiledVariant
+
+logger = logging.getLogger(__name__)
+
+BarVersions = Mapping[str, Hashable]
+
+
+class GateResultMemo:
+    """パターンバリアント単位のゲート結果メモ"""
+
+    def __init__(self):
+        self._plans: Dict[int, CompiledGatePlan] = {}
+        # gate_number -> {(symbol, id(variant)): (バージョンキー, GateResult)}
+        self._entries: Dict[int, Dict[Tuple[str, int], Tuple[Tuple, Any]]] = {}
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0,
+        }
+
+    def bind(self, plan: CompiledGatePlan) -> bool:
+        """
+        評価に使うプランを登録（プランが差し替わった場合はそのゲートのメモを破棄）
+
+        Returns:
+            既存のプランが差し替わった場合True
+        """
+        current = self._plans.get(plan.gate_number)
+        if current is plan:
+            return False
+        if current is not None:
+            self.stats['invalidations'] += 1
+            logger.info(f"GATE {plan.gate_number} パターンが更新されたため結果メモを破棄しました")
+        # プランを保持している間は id(variant) が再利用されない
+        self._plans[plan.gate_number] = plan
+        self._entries[plan.gate_number] = {}
+        return current is not None
+
+    def version_key(self, plan: CompiledGatePlan, variant: CompiledVariant,
+                    data: Mapping[str, Any], bar_versions: Optional[BarVersions]) -> Optional[Tuple]:
+        """
+        バリアントが参照する時間足のバージョンからキーを作成
+
+        Returns:
+            キー（バージョンが揃わない場合はNone＝メモ化しない）
+        """
+        if not bar_versions:
+            return None
+
+        timeframes = variant.timeframes
+        if any(plan.slot_names[slot] not in data for slot in variant.slots):
+            # 他の時間足へのフォールバックが起こり得るため全時間足に依存させる
+            timeframes = bar_versions.keys()
+
+        key = []
+        for timeframe in sorted(timeframes):
+            version = bar_versions.get(timeframe)
+            if version is None:
+                return None
+            key.append((timeframe, version))
+        return tuple(key)
+
+    def get(self, gate_number: int, symbol: str, variant: CompiledVariant, key: Tuple) -> Optional[Any]:
+        """
+        メモ済みの結果を取得
+
+        呼び出し側が結果を書き換えても影響しないよう、条件リストと additional_data をコピーし
+        タイムスタンプを現在時刻にした複製を返します。
+        """
+        entry = self._entries.get(gate_number, {}).get((symbol, id(variant)))
+        if entry is None or entry[0] != key:
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        result = entry[1]
+        return replace(self._copy(result), timestamp=datetime.now(timezone.utc))
+
+    def put(self, gate_number: int, symbol: str, variant: CompiledVariant, key: Tuple, result: Any) -> None:
+        """結果を保存（同じバリアントの古いバージョンは置き換え）"""
+        entries = self._entries.setdefault(gate_number, {})
+        entries[(symbol, id(variant))] = (key, self._copy(result))
+
+    @staticmethod
+    def _copy(result: Any) -> Any:
+        return replace(
+            result,
+            passed_conditions=list(result.passed_conditions),
+            failed_conditions=list(result.failed_conditions),
+            additional_data=dict(result.additional_data),
+        )
+
+    def clear(self) -> None:
+        """全てのメモを破棄"""
+        self._plans.clear()
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """メモ統計を取得"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'entries': sum(len(entries) for entries in self._entries.values()),
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+        }
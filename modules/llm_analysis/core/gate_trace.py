@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+ゲート評価トレース
+
+三層ゲート評価のホットパスのログを、本番モードでは文字列整形もハンドラ出力も
+行わずにリングバッファへ記録します。
+
+- production: 条件・パターン単位のイベントはリングバッファに記録するだけ
+  （sample_every 件に1件だけ構造化ログとして出力）。ゲートごとのサマリーを1行出力し、
+  シグナル生成時とエラー時にバッファの内容をまとめて出力します。
+- verbose: 従来どおり全イベントを即時にログ出力します（デバッグ用）。
+
+イベントのメッセージは %-形式のテンプレートと引数のまま保持し、出力時に初めて整形します。
+"""
+
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+LOG_MODES = ('production', 'verbose')
+
+
+@dataclass
+class GateLogSettings:
+    """ゲート評価ログの設定"""
+
+    mode: str = 'production'
+    trace_capacity: int = 2000
+    sample_every: int = 1000
+
+    @classmethod
+    def from_env(cls) -> "GateLogSettings":
+        """環境変数から設定を読み込み"""
+        mode = os.getenv("GATE_LOG_MODE", "production").lower()
+        if mode not in LOG_MODES:
+            logger.warning(f"⚠️ 不明な GATE_LOG_MODE: {mode}（production を使用）")
+            mode = 'production'
+        return cls(
+            mode=mode,
+            trace_capacity=int(os.getenv("GATE_TRACE_CAPACITY", "2000")),
+            sample_every=int(os.getenv("GATE_LOG_SAMPLE_EVERY", "1000")),
+        )
+
+
+@dataclass
+class TraceEvent:
+    """整形前のトレースイベント"""
+    timestamp: float
+    level: int
+    event: str
+    message: str
+    args: Tuple[Any, ...] = ()
+    fields: Dict[str, Any] = field(default_factory=dict)
+
+    def format(self) -> str:
+        """メッセージを整形"""
+        return self.message % self.args if self.args else self.message
+
+
+class GateTrace:
+    """ゲート評価イベントのリングバッファ"""
+
+    def __init__(self, capacity: int = 2000, sample_every: int = 0,
+                 output: logging.Logger = logger):
+        """
+        初期化
+
+        Args:
+            capacity: 保持するイベント数
+            sample_every: N件に1件を即時出力（0の場合は出力しない）
+            output: 出力先ロガー
+        """
+        self.capacity = capacity
+        self.sample_every = sample_every
+        self.output = output
+        self._events: Deque[TraceEvent] = deque(maxlen=capacity)
+        self._count = 0
+        self.stats = {
+            'recorded': 0,
+            'sampled': 0,
+            'flushes': 0,
+        }
+
+    def record(self, level: int, event: str, message: str, *args: Any, **fields: Any) -> None:
+        """
+        イベントを記録（整形はしない）
+
+        Args:
+            level: ログレベル
+            event: イベント名（例: condition, pattern, gate）
+            message: %-形式のメッセージテンプレート
+            *args: テンプレートの引数
+            **fields: 構造化フィールド
+        """
+        self._events.append(TraceEvent(time.time(), level, event, message, args, fields))
+        self._count += 1
+        self.stats['recorded'] += 1
+        if self.sample_every and self._count % self.sample_every == 0:
+            self.stats['sampled'] += 1
+            self.output.log(level, message, *args, extra={'event': event, 'fields': fields})
+
+    def flush(self, reason: str, level: int = logging.INFO) -> int:
+        """
+        バッファの内容をまとめて出力して破棄
+
+        Args:
+            reason: 出力理由（シグナル生成、エラーなど）
+            level: 出力時のログレベル（各イベントのレベルとの高い方）
+
+        Returns:
+            出力したイベント数
+        """
+        events = list(self._events)
+        self._events.clear()
+        if not events:
+            return 0
+
+        self.stats['flushes'] += 1
+        self.output.log(level, "🧾 評価トレース（%s）: %d件", reason, len(events))
+        for event in events:
+            self.output.log(max(level, event.level), "   [%s] %s", event.event, event.format(),
+                            extra={'event': event.event, 'fields': event.fields})
+        return len(events)
+
+    def clear(self) -> None:
+        """バッファを破棄"""
+        self._events.clear()
+
+    def __len__(self) -> int:
+        return len(self._events)
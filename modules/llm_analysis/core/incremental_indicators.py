@@ -0,0 +1,879 @@
+#!/usr/bin/env python3
+"""
+インクリメンタル・テクニカル指標エンジン
+
+(symbol, timeframe) ごとに指標の内部状態（EMAシード、Wilder平滑化の
+平均値、ローリングウィンドウ）を保持し、確定足が1本追加されるたびに
+O(1) で最新値を更新します。
+
+計算式はTA-Lib（TechnicalIndicatorCalculator が使用するバッチ計算）の
+実装と同じ順序で行うため、同じ履歴に対するバッチ計算の最終行と
+数値的に一致します。
+
+最後に追加した足は同じタイムスタンプのまま値が変わる（形成中の足の更新）ことがあるため、
+各指標はその足で変更したスカラー値とウィンドウから押し出した値だけを取り消し記録として保持し、
+revise_last() で巻き戻してから再計算できます（記録の作成・巻き戻しもウィンドウ長によらない）。
+"""
+
+import logging
+import math
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _is_zero(value: float) -> bool:
+    """TA-LibのTA_IS_ZEROと同じ判定"""
+    return -0.00000001 < value < 0.00000001
+
+
+# maxlen 付き deque に追加しても押し出される値がない場合の印
+_NOTHING = object()
+
+
+def _evicted(window: Deque) -> Any:
+    """追加時に押し出される値（押し出されない場合は _NOTHING）"""
+    return window[0] if len(window) == window.maxlen else _NOTHING
+
+
+def _undo_append(window: Deque, evicted: Any) -> None:
+    """maxlen 付き deque への append を取り消す"""
+    window.pop()
+    if evicted is not _NOTHING:
+        window.appendleft(evicted)
+
+
+def _true_range(high: float, low: float, prev_close: float) -> float:
+    """TA-LibのTRUE_RANGEと同じ計算"""
+    greatest = high - low
+    val2 = abs(prev_close - high)
+    if val2 > greatest:
+        greatest = val2
+    val3 = abs(prev_close - low)
+    if val3 > greatest:
+        greatest = val3
+    return greatest
+
+
+class _SMAState:
+    """単純移動平均（TA-Libのランニングサム方式）"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window: Deque[float] = deque(maxlen=period)
+        self.total = 0.0
+        self.count = 0
+        self.value: Optional[float] = None
+
+    def checkpoint(self) -> tuple:
+        return self.count, self.total, self.value, _evicted(self.window)
+
+    def rollback(self, checkpoint: tuple) -> None:
+        count, self.total, self.value, evicted = checkpoint
+        if self.count != count:
+            _undo_append(self.window, evicted)
+        self.count = count
+
+    def update(self, x: float) -> Optional[float]:
+        self.count += 1
+        self.window.append(x)
+        self.total += x
+        if self.count < self.period:
+            return None
+        self.value = self.total / self.period
+        # 次の足のために最古の値を差し引いておく
+        self.total -= self.window[0]
+        return self.value
+
+
+class _EMAState:
+    """指数移動平均（最初の期間のSMAをシードに使用）"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.seed_sum = 0.0
+        self.count = 0
+        self.value: Optional[float] = None
+
+    def checkpoint(self) -> tuple:
+        return self.seed_sum, self.count, self.value
+
+    def rollback(self, checkpoint: tuple) -> None:
+        self.seed_sum, self.count, self.value = checkpoint
+
+    def update(self, x: float) -> Optional[float]:
+        self.count += 1
+        if self.value is None:
+            self.seed_sum += x
+            if self.count == self.period:
+                self.value = self.seed_sum / self.period
+            return self.value
+        self.value = ((x - self.value) * self.k) + self.value
+        return self.value
+
+
+class _MACDState:
+    """MACD（TA-Libと同様に短期EMAのシードを長期EMAの開始位置に揃える）"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast_period = fast
+        self.slow_period = slow
+        self.fast_k = 2.0 / (fast + 1)
+        self.recent: Deque[float] = deque(maxlen=fast)
+        self.slow = _EMAState(slow)
+        self.signal = _EMAState(signal)
+        self.fast_value: Optional[float] = None
+        self.value: Optional[Tuple[float, float, float]] = None
+
+    def checkpoint(self) -> tuple:
+        return (_evicted(self.recent), self.slow.checkpoint(), self.signal.checkpoint(),
+                self.fast_value, self.value)
+
+    def rollback(self, checkpoint: tuple) -> None:
+        evicted, slow, signal, self.fast_value, self.value = checkpoint
+        if self.slow.count != slow[1]:
+            _undo_append(self.recent, evicted)
+        self.slow.rollback(slow)
+        self.signal.rollback(signal)
+
+    def update(self, x: float) -> Optional[Tuple[float, float, float]]:
+        self.recent.append(x)
+        slow_value = self.slow.update(x)
+        if slow_value is None:
+            return None
+
+        if self.fast_value is None:
+            # 長期EMAの最初の値と同じ足で、直近fast本のSMAをシードとする
+            total = 0.0
+            for v in self.recent:
+                total += v
+            self.fast_value = total / self.fast_period
+        else:
+            self.fast_value = ((x - self.fast_value) * self.fast_k) + self.fast_value
+
+        macd = self.fast_value - slow_value
+        signal = self.signal.update(macd)
+        if signal is None:
+            return None
+        self.value = (macd, signal, macd - signal)
+        return self.value
+
+
+class _RSIState:
+    """Wilder平滑化RSI"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.prev_close: Optional[float] = None
+        self.diff_count = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.value: Optional[float] = None
+
+    def _output(self) -> float:
+        total = self.avg_gain + self.avg_loss
+        if not _is_zero(total):
+            return 100.0 * (self.avg_gain / total)
+        return 0.0
+
+    def checkpoint(self) -> tuple:
+        return self.prev_close, self.diff_count, self.avg_gain, self.avg_loss, self.value
+
+    def rollback(self, checkpoint: tuple) -> None:
+        self.prev_close, self.diff_count, self.avg_gain, self.avg_loss, self.value = checkpoint
+
+    def update(self, x: float) -> Optional[float]:
+        if self.prev_close is None:
+            self.prev_close = x
+            return None
+
+        diff = x - self.prev_close
+        self.prev_close = x
+        self.diff_count += 1
+
+        if self.diff_count <= self.period:
+            if diff < 0:
+                self.avg_loss -= diff
+            else:
+                self.avg_gain += diff
+            if self.diff_count == self.period:
+                self.avg_loss /= self.period
+                self.avg_gain /= self.period
+                self.value = self._output()
+            return self.value
+
+        self.avg_loss *= (self.period - 1)
+        self.avg_gain *= (self.period - 1)
+        if diff < 0:
+            self.avg_loss -= diff
+        else:
+            self.avg_gain += diff
+        self.avg_loss /= self.period
+        self.avg_gain /= self.period
+        self.value = self._output()
+        return self.value
+
+
+class _ATRState:
+    """Wilder平滑化ATR（最初の値はTRのSMA）"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.seed = _SMAState(period)
+        self.value: Optional[float] = None
+
+    def checkpoint(self) -> tuple:
+        return self.seed.checkpoint(), self.value
+
+    def rollback(self, checkpoint: tuple) -> None:
+        seed, self.value = checkpoint
+        self.seed.rollback(seed)
+
+    def update(self, true_range: Optional[float]) -> Optional[float]:
+        if true_range is None:
+            return None
+        if self.value is None:
+            self.value = self.seed.update(true_range)
+            return self.value
+        self.value = ((self.value * (self.period - 1)) + true_range) / self.period
+        return self.value
+
+
+class _BollingerState:
+    """ボリンジャーバンド（SMA＋事前計算済みMAを使う標準偏差）"""
+
+    def __init__(self, period: int = 20, num_std: float = 2.0):
+        self.period = period
+        self.num_std = num_std
+        self.middle = _SMAState(period)
+        self.squares: Deque[float] = deque(maxlen=period)
+        self.total2 = 0.0
+        self.value: Optional[Tuple[float, float, float]] = None
+
+    def checkpoint(self) -> tuple:
+        return self.middle.checkpoint(), _evicted(self.squares), self.total2, self.value
+
+    def rollback(self, checkpoint: tuple) -> None:
+        middle, evicted, self.total2, self.value = checkpoint
+        if self.middle.count != middle[0]:
+            _undo_append(self.squares, evicted)
+        self.middle.rollback(middle)
+
+    def update(self, x: float) -> Optional[Tuple[float, float, float]]:
+        square = x * x
+        self.squares.append(square)
+        self.total2 += square
+        middle = self.middle.update(x)
+        if middle is None:
+            return None
+
+        mean2 = self.total2 / self.period
+        self.total2 -= self.squares[0]
+        mean2 -= middle * middle
+        std = math.sqrt(mean2) if not mean2 < 0.00000001 else 0.0
+
+        band = std * self.num_std
+        self.value = (middle + band, middle, middle - band)
+        return self.value
+
+
+class _ExtremaWindow:
+    """直近N本の高値・安値"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.highs: Deque[float] = deque(maxlen=period)
+        self.lows: Deque[float] = deque(maxlen=period)
+
+    def checkpoint(self) -> tuple:
+        return _evicted(self.highs), _evicted(self.lows)
+
+    def rollback(self, checkpoint: tuple) -> None:
+        _undo_append(self.highs, checkpoint[0])
+        _undo_append(self.lows, checkpoint[1])
+
+    def update(self, high: float, low: float) -> Optional[Tuple[float, float]]:
+        self.highs.append(high)
+        self.lows.append(low)
+        if len(self.highs) < self.period:
+            return None
+        return max(self.highs), min(self.lows)
+
+
+class _StochasticState:
+    """スローストキャスティクス（%K・%DともにSMA）"""
+
+    def __init__(self, fastk_period: int = 14, slowk_period: int = 3, slowd_period: int = 3):
+        self.window = _ExtremaWindow(fastk_period)
+        self.slow_k = _SMAState(slowk_period)
+        self.slow_d = _SMAState(slowd_period)
+        self.value: Optional[Tuple[float, float]] = None
+
+    def checkpoint(self) -> tuple:
+        return self.window.checkpoint(), self.slow_k.checkpoint(), self.slow_d.checkpoint(), self.value
+
+    def rollback(self, checkpoint: tuple) -> None:
+        window, slow_k, slow_d, self.value = checkpoint
+        self.window.rollback(window)
+        self.slow_k.rollback(slow_k)
+        self.slow_d.rollback(slow_d)
+
+    def update(self, high: float, low: float, close: float) -> Optional[Tuple[float, float]]:
+        extrema = self.window.update(high, low)
+        if extrema is None:
+            return None
+        highest, lowest = extrema
+        diff = (highest - lowest) / 100.0
+        fast_k = (close - lowest) / diff if diff != 0.0 else 0.0
+
+        slow_k = self.slow_k.update(fast_k)
+        if slow_k is None:
+            return None
+        slow_d = self.slow_d.update(slow_k)
+        if slow_d is None:
+            return None
+        self.value = (slow_k, slow_d)
+        return self.value
+
+
+class _WilliamsRState:
+    """Williams %R"""
+
+    def __init__(self, period: int = 14):
+        self.window = _ExtremaWindow(period)
+        self.value: Optional[float] = None
+
+    def checkpoint(self) -> tuple:
+        return self.window.checkpoint(), self.value
+
+    def rollback(self, checkpoint: tuple) -> None:
+        window, self.value = checkpoint
+        self.window.rollback(window)
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        extrema = self.window.update(high, low)
+        if extrema is None:
+            return None
+        highest, lowest = extrema
+        diff = (highest - lowest) / -100.0
+        self.value = (highest - close) / diff if diff != 0.0 else 0.0
+        return self.value
+
+
+class _ADXState:
+    """Wilder平滑化ADX"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.bar_count = 0
+        self.prev_high: Optional[float] = None
+        self.prev_low: Optional[float] = None
+        self.prev_close: Optional[float] = None
+        self.plus_dm = 0.0
+        self.minus_dm = 0.0
+        self.tr = 0.0
+        self.sum_dx = 0.0
+        self.value: Optional[float] = None
+
+    def checkpoint(self) -> tuple:
+        return (self.bar_count, self.prev_high, self.prev_low, self.prev_close,
+                self.plus_dm, self.minus_dm, self.tr, self.sum_dx, self.value)
+
+    def rollback(self, checkpoint: tuple) -> None:
+        (self.bar_count, self.prev_high, self.prev_low, self.prev_close,
+         self.plus_dm, self.minus_dm, self.tr, self.sum_dx, self.value) = checkpoint
+
+    def _directional_movement(self, high: float, low: float) -> Tuple[float, float]:
+        diff_p = high - self.prev_high
+        diff_m = self.prev_low - low
+        plus_dm = 0.0
+        minus_dm = 0.0
+        if diff_m > 0 and diff_p < diff_m:
+            minus_dm = diff_m
+        elif diff_p > 0 and diff_p > diff_m:
+            plus_dm = diff_p
+        return plus_dm, minus_dm
+
+    def _dx(self) -> Optional[float]:
+        if _is_zero(self.tr):
+            return None
+        minus_di = 100.0 * (self.minus_dm / self.tr)
+        plus_di = 100.0 * (self.plus_dm / self.tr)
+        total = minus_di + plus_di
+        if _is_zero(total):
+            return None
+        return 100.0 * (abs(minus_di - plus_di) / total)
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        self.bar_count += 1
+        if self.prev_high is None:
+            self.prev_high, self.prev_low, self.prev_close = high, low, close
+            return None
+
+        plus_dm, minus_dm = self._directional_movement(high, low)
+        true_range = _true_range(high, low, self.prev_close)
+        self.prev_high, self.prev_low, self.prev_close = high, low, close
+
+        if self.bar_count <= self.period:
+            # 最初の period-1 本はDMとTRを単純に合計
+            self.plus_dm += plus_dm
+            self.minus_dm += minus_dm
+            self.tr += true_range
+            return None
+
+        self.minus_dm -= self.minus_dm / self.period
+        self.plus_dm -= self.plus_dm / self.period
+        self.minus_dm += minus_dm
+        self.plus_dm += plus_dm
+        self.tr = self.tr - (self.tr / self.period) + true_range
+        dx = self._dx()
+
+        if self.value is None:
+            # 最初のADXは period 本分のDXの平均
+            if dx is not None:
+                self.sum_dx += dx
+            if self.bar_count == 2 * self.period:
+                self.value = self.sum_dx / self.period
+            return self.value
+
+        if dx is not None:
+            self.value = ((self.value * (self.period - 1)) + dx) / self.period
+        return self.value
+
+
+class _OBVState:
+    """On Balance Volume（TA-Libと同様に最初の足の出来高から累積）"""
+
+    def __init__(self):
+        self.prev_close: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def checkpoint(self) -> tuple:
+        return self.prev_close, self.value
+
+    def rollback(self, checkpoint: tuple) -> None:
+        self.prev_close, self.value = checkpoint
+
+    def update(self, close: float, volume: float) -> float:
+        if self.value is None:
+            self.value = volume
+        elif close > self.prev_close:
+            self.value += volume
+        elif close < self.prev_close:
+            self.value -= volume
+        self.prev_close = close
+        return self.value
+
+
+class _SlidingExtremum:
+    """直近N本の最大値（または最小値）を単調デックで O(1)（償却）で求める"""
+
+    def __init__(self, size: int, maximum: bool = True):
+        self.size = size
+        self.sign = 1.0 if maximum else -1.0
+        # (足の番号, 符号を揃えた値) の単調減少列
+        self.candidates: Deque[Tuple[int, float]] = deque()
+
+    def push(self, index: int, value: float) -> tuple:
+        """値を追加して取り消し記録（右から外した候補、左から外した候補）を返す"""
+        value *= self.sign
+        candidates = self.candidates
+        dropped_right = []
+        while candidates and candidates[-1][1] <= value:
+            dropped_right.append(candidates.pop())
+        candidates.append((index, value))
+        dropped_left = []
+        while candidates[0][0] <= index - self.size:
+            dropped_left.append(candidates.popleft())
+        return dropped_right, dropped_left
+
+    def undo(self, record: tuple) -> None:
+        dropped_right, dropped_left = record
+        self.candidates.extendleft(reversed(dropped_left))
+        self.candidates.pop()
+        self.candidates.extend(reversed(dropped_right))
+
+    @property
+    def value(self) -> float:
+        return self.candidates[0][1] * self.sign
+
+
+class _SwingWindow:
+    """
+    前後 period 本の中心化ウィンドウでスイングハイ・ローを確定（_identify_swing_points と同じ条件）
+
+    period 本後の足が揃った時点で中心の足が確定するため、最新のスイングは period 本遅れて更新されます。
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.size = 2 * period + 1
+        self.count = 0
+        self.highest = _SlidingExtremum(self.size, maximum=True)
+        self.lowest = _SlidingExtremum(self.size, maximum=False)
+        # 中心の足（period 本前）の高値・安値
+        self.centers: Deque[Tuple[float, float]] = deque(maxlen=period + 1)
+        self.swing_high: Optional[float] = None
+        self.swing_low: Optional[float] = None
+
+    def update(self, high: float, low: float) -> tuple:
+        """足を追加して取り消し記録を返す"""
+        record = (
+            self.count, self.swing_high, self.swing_low, _evicted(self.centers),
+            self.highest.push(self.count, high), self.lowest.push(self.count, low),
+        )
+        self.centers.append((high, low))
+        self.count += 1
+        if self.count >= self.size:
+            center_high, center_low = self.centers[0]
+            if center_high >= self.highest.value * 0.999:  # 0.1%の許容誤差
+                self.swing_high = center_high
+            if center_low <= self.lowest.value * 1.001:
+                self.swing_low = center_low
+        return record
+
+    def undo(self, record: tuple) -> None:
+        self.count, self.swing_high, self.swing_low, evicted, highest, lowest = record
+        _undo_append(self.centers, evicted)
+        self.highest.undo(highest)
+        self.lowest.undo(lowest)
+
+
+class _SwingState:
+    """設定されたスイング期間のうち、ハイとローが両方見つかっている最初の期間の最新スイング"""
+
+    def __init__(self, periods: Sequence[int]):
+        self.windows = [_SwingWindow(period) for period in periods]
+        self.undo_records: Optional[List[tuple]] = None
+
+    def checkpoint(self) -> tuple:
+        # 単調デックから外す候補は追加時まで決まらないため、取り消し記録は update() で作成
+        return ()
+
+    def rollback(self, checkpoint: tuple) -> None:
+        for window, record in zip(self.windows, self.undo_records):
+            window.undo(record)
+        self.undo_records = None
+
+    def update(self, high: float, low: float) -> Optional[Tuple[float, float]]:
+        self.undo_records = [window.update(high, low) for window in self.windows]
+        for window in self.windows:
+            if window.swing_high is not None and window.swing_low is not None:
+                return window.swing_high, window.swing_low
+        return None
+
+
+@dataclass
+class IncrementalIndicatorState:
+    """(symbol, timeframe) ごとの指標状態"""
+    symbol: str
+    timeframe: str
+    bar_count: int = 0
+    last_timestamp: Optional[datetime] = None
+    prev_close: Optional[float] = None
+    prev_candle: Optional[float] = None
+    prev_candle_bullish: Optional[bool] = None
+    prev_candle_bearish: Optional[bool] = None
+    states: Dict[str, Any] = field(default_factory=dict)
+    latest: Dict[str, Any] = field(default_factory=dict)
+    # 直近の足ごとの指標値（過去の値を参照する派生指標用）
+    history: Optional[Deque[Dict[str, Any]]] = None
+    # 最後の足の取り消し記録（revise_last 用）
+    undo: Optional[tuple] = None
+
+
+class IncrementalIndicatorEngine:
+    """ストリーミング（インクリメンタル）指標計算エンジン"""
+
+    # インクリメンタル計算の対象となる指標列
+    SUPPORTED_INDICATORS = (
+        'EMA_21', 'EMA_55', 'EMA_200',
+        'SMA_20', 'SMA_50', 'SMA_200',
+        'MACD', 'MACD_Signal', 'MACD_Histogram',
+        'ADX',
+        'RSI_14', 'RSI_21', 'RSI_7',
+        'Stochastic_K', 'Stochastic_D', 'Williams_R',
+        'ATR_14', 'ATR_21',
+        'BB_Upper', 'BB_Middle', 'BB_Lower', 'BB_Position', 'bollinger_width',
+        'candle_body', 'candle_upper_shadow', 'candle_lower_shadow',
+        'candle_bullish', 'candle_bearish',
+        'previous_candle_bullish', 'previous_candle_bearish',
+        'current_candle', 'previous_candle',
+        'candle_body_size', 'average_body_size',
+        'Volume_SMA_20', 'Volume_SMA_50', 'Volume_Ratio', 'OBV',
+    )
+
+    def __init__(self, history_size: int = 64, swing_periods: Optional[Dict[str, Sequence[int]]] = None):
+        """
+        初期化
+
+        Args:
+            history_size: 保持する直近の指標値の本数
+            swing_periods: 時間足ごとのスイング期間（指定した時間足のみ Swing_High / Swing_Low を計算）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.history_size = history_size
+        self.swing_periods = swing_periods or {}
+        self._states: Dict[Tuple[str, str], IncrementalIndicatorState] = {}
+
+    def _new_states(self, timeframe: str) -> Dict[str, Any]:
+        states = {
+            'EMA_21': _EMAState(21),
+            'EMA_55': _EMAState(55),
+            'EMA_200': _EMAState(200),
+            'SMA_20': _SMAState(20),
+            'SMA_50': _SMAState(50),
+            'SMA_200': _SMAState(200),
+            'MACD': _MACDState(12, 26, 9),
+            'ADX': _ADXState(14),
+            'RSI_14': _RSIState(14),
+            'RSI_21': _RSIState(21),
+            'RSI_7': _RSIState(7),
+            'Stochastic': _StochasticState(14, 3, 3),
+            'Williams_R': _WilliamsRState(14),
+            'ATR_14': _ATRState(14),
+            'ATR_21': _ATRState(21),
+            'Bollinger': _BollingerState(20, 2.0),
+            'average_body_size': _SMAState(20),
+            'Volume_SMA_20': _SMAState(20),
+            'Volume_SMA_50': _SMAState(50),
+            'OBV': _OBVState(),
+        }
+        if self.swing_periods.get(timeframe):
+            states['Swing'] = _SwingState(self.swing_periods[timeframe])
+        return states
+
+    def has_state(self, symbol: str, timeframe: str) -> bool:
+        """状態が存在するかどうか"""
+        return (symbol, timeframe) in self._states
+
+    def get_state(self, symbol: str, timeframe: str) -> Optional[IncrementalIndicatorState]:
+        """状態を取得"""
+        return self._states.get((symbol, timeframe))
+
+    def reset(self, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        """
+        状態をリセット
+
+        Args:
+            symbol: 対象シンボル（Noneの場合はすべて）
+            timeframe: 対象時間足（Noneの場合はシンボルの全時間足）
+        """
+        if symbol is None:
+            self._states.clear()
+            return
+        for key in list(self._states.keys()):
+            if key[0] == symbol and (timeframe is None or key[1] == timeframe):
+                del self._states[key]
+
+    def warm_up(self, symbol: str, timeframe: str, bars: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        履歴データで状態を初期化
+
+        Args:
+            symbol: シンボル
+            timeframe: 時間足
+            bars: 時系列順のOHLCV辞書（timestamp, open, high, low, close, volume）
+
+        Returns:
+            最新の指標値の辞書
+        """
+        self.reset(symbol, timeframe)
+        bars = list(bars)
+        latest: Dict[str, Any] = {}
+        for i, bar in enumerate(bars):
+            latest = self.update(symbol, timeframe, bar, keep_previous=i == len(bars) - 1)
+        self.logger.debug(
+            f"インクリメンタル指標ウォームアップ完了: {symbol} {timeframe} "
+            f"({self._states[(symbol, timeframe)].bar_count}本)"
+            if self.has_state(symbol, timeframe) else
+            f"インクリメンタル指標ウォームアップ: {symbol} {timeframe} データなし"
+        )
+        return latest
+
+    def update(self, symbol: str, timeframe: str, bar: Dict[str, Any],
+               keep_previous: bool = True) -> Dict[str, Any]:
+        """
+        確定足を1本追加して指標を更新
+
+        Args:
+            symbol: シンボル
+            timeframe: 時間足
+            bar: OHLCV辞書（timestampは任意）
+            keep_previous: 取り消し記録を保持し revise_last() で差し替えられるようにするか
+
+        Returns:
+            最新の指標値の辞書（未確定の指標はNaN）
+
+        Raises:
+            ValueError: 直前の足以前のタイムスタンプが渡された場合
+        """
+        key = (symbol, timeframe)
+        state = self._states.get(key)
+        if state is None:
+            state = IncrementalIndicatorState(
+                symbol=symbol, timeframe=timeframe, states=self._new_states(timeframe),
+                history=deque(maxlen=self.history_size)
+            )
+            self._states[key] = state
+
+        timestamp = bar.get('timestamp')
+        if timestamp is not None and state.last_timestamp is not None and timestamp <= state.last_timestamp:
+            raise ValueError(
+                f"足の順序が不正です: {symbol} {timeframe} {timestamp} <= {state.last_timestamp}"
+            )
+        state.undo = (
+            {name: indicator.checkpoint() for name, indicator in state.states.items()},
+            state.bar_count, state.last_timestamp, state.prev_close, state.prev_candle,
+            state.prev_candle_bullish, state.prev_candle_bearish, dict(state.latest),
+            _evicted(state.history),
+        ) if keep_previous else None
+
+        open_ = float(bar['open'])
+        high = float(bar['high'])
+        low = float(bar['low'])
+        close = float(bar['close'])
+
+        states = state.states
+        latest = state.latest
+        nan = float('nan')
+
+        def _value(v: Optional[float]) -> float:
+            return nan if v is None else v
+
+        # トレンド系
+        for name in ('EMA_21', 'EMA_55', 'EMA_200', 'SMA_20', 'SMA_50', 'SMA_200'):
+            latest[name] = _value(states[name].update(close))
+
+        macd = states['MACD'].update(close)
+        latest['MACD'], latest['MACD_Signal'], latest['MACD_Histogram'] = macd if macd else (nan, nan, nan)
+        latest['ADX'] = _value(states['ADX'].update(high, low, close))
+
+        # モメンタム系
+        for name in ('RSI_14', 'RSI_21', 'RSI_7'):
+            latest[name] = _value(states[name].update(close))
+        stoch = states['Stochastic'].update(high, low, close)
+        latest['Stochastic_K'], latest['Stochastic_D'] = stoch if stoch else (nan, nan)
+        latest['Williams_R'] = _value(states['Williams_R'].update(high, low, close))
+
+        # ボラティリティ系
+        true_range = _true_range(high, low, state.prev_close) if state.prev_close is not None else None
+        latest['ATR_14'] = _value(states['ATR_14'].update(true_range))
+        latest['ATR_21'] = _value(states['ATR_21'].update(true_range))
+
+        bands = states['Bollinger'].update(close)
+        if bands:
+            upper, middle, lower = bands
+            latest['BB_Upper'], latest['BB_Middle'], latest['BB_Lower'] = upper, middle, lower
+            width = upper - lower
+            latest['BB_Position'] = (close - lower) / width if width != 0 else nan
+            latest['bollinger_width'] = width / middle if middle != 0 else nan
+        else:
+            for name in ('BB_Upper', 'BB_Middle', 'BB_Lower', 'BB_Position', 'bollinger_width'):
+                latest[name] = nan
+
+        # ローソク足分析
+        candle_body = abs(close - open_)
+        current_candle = close - open_
+        latest['candle_body'] = candle_body
+        latest['candle_upper_shadow'] = high - max(open_, close)
+        latest['candle_lower_shadow'] = min(open_, close) - low
+        latest['candle_bullish'] = close > open_
+        latest['candle_bearish'] = close < open_
+        latest['previous_candle_bullish'] = state.prev_candle_bullish
+        latest['previous_candle_bearish'] = state.prev_candle_bearish
+        latest['current_candle'] = current_candle
+        latest['previous_candle'] = _value(state.prev_candle)
+        latest['candle_body_size'] = candle_body
+        latest['average_body_size'] = _value(states['average_body_size'].update(candle_body))
+
+        latest['open'] = open_
+        latest['high'] = high
+        latest['low'] = low
+        latest['close'] = close
+        latest['volume'] = volume = float(bar.get('volume') or 0.0)
+
+        # ボリューム系
+        volume_sma = _value(states['Volume_SMA_20'].update(volume))
+        latest['Volume_SMA_20'] = volume_sma
+        latest['Volume_SMA_50'] = _value(states['Volume_SMA_50'].update(volume))
+        latest['Volume_Ratio'] = volume / volume_sma if volume_sma != 0 else 1.0
+        latest['OBV'] = states['OBV'].update(close, volume)
+
+        # スイングハイ・ロー（フィボナッチ用）
+        if 'Swing' in states:
+            swing = states['Swing'].update(high, low)
+            latest['Swing_High'], latest['Swing_Low'] = swing if swing else (nan, nan)
+
+        state.prev_close = close
+        state.prev_candle = current_candle
+        state.prev_candle_bullish = latest['candle_bullish']
+        state.prev_candle_bearish = latest['candle_bearish']
+        state.bar_count += 1
+        if timestamp is not None:
+            state.last_timestamp = timestamp
+
+        result = dict(latest)
+        state.history.append(result)
+        return dict(result)
+
+    def revise_last(self, symbol: str, timeframe: str, bar: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        最後に追加した足を同じタイムスタンプの新しい値で差し替えて指標を再計算
+
+        Args:
+            symbol: シンボル
+            timeframe: 時間足
+            bar: 差し替え後のOHLCV辞書
+
+        Returns:
+            最新の指標値の辞書
+
+        Raises:
+            ValueError: 直前の状態がない場合、またはタイムスタンプが最後の足と異なる場合
+        """
+        state = self._states.get((symbol, timeframe))
+        if state is None or state.undo is None:
+            raise ValueError(f"差し替え可能な足がありません: {symbol} {timeframe}")
+        if bar.get('timestamp') != state.last_timestamp:
+            raise ValueError(
+                f"最後の足と異なるタイムスタンプです: {symbol} {timeframe} "
+                f"{bar.get('timestamp')} != {state.last_timestamp}"
+            )
+        (checkpoints, state.bar_count, state.last_timestamp, state.prev_close, state.prev_candle,
+         state.prev_candle_bullish, state.prev_candle_bearish, state.latest, evicted) = state.undo
+        for name, checkpoint in checkpoints.items():
+            state.states[name].rollback(checkpoint)
+        _undo_append(state.history, evicted)
+        state.undo = None
+        return self.update(symbol, timeframe, bar)
+
+    def is_revision(self, symbol: str, timeframe: str, bar: Dict[str, Any]) -> bool:
+        """最後に追加した足と同じタイムスタンプでOHLCVが異なるかどうか"""
+        state = self._states.get((symbol, timeframe))
+        if state is None or state.bar_count == 0 or bar.get('timestamp') != state.last_timestamp:
+            return False
+        latest = state.latest
+        for column in ('open', 'high', 'low', 'close', 'volume'):
+            new, old = float(bar.get(column) or 0.0), latest[column]
+            if new != old and not (math.isnan(new) and math.isnan(old)):
+                return True
+        return False
+
+    def get_history(self, symbol: str, timeframe: str) -> List[Dict[str, Any]]:
+        """直近の足ごとの指標値（古い順、最大 history_size 本）"""
+        state = self._states.get((symbol, timeframe))
+        if state is None or state.history is None:
+            return []
+        return list(state.history)
+
+    def get_latest(self, symbol: str, timeframe: str) -> Optional[Dict[str, Any]]:
+        """最新の指標値を取得"""
+        state = self._states.get((symbol, timeframe))
+        if state is None or state.bar_count == 0:
+            return None
+        return dict(state.latest)
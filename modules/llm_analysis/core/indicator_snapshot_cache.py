@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+指標スナップショットキャッシュ
+
+三層ゲート評価に渡す「時間足プレフィックス付きの最新指標値」（例: 1d_EMA_21）を
+時間足ごとに保持し、入力の足が変わっていない時間足の再計算を省きます。
+
+キーは (symbol, timeframe) ごとに
+    (最新足のタイムスタンプ, バーストアのリビジョン, 指標設定のハッシュ)
+です。未確定足が同じ時刻のまま更新された場合や欠損が補完された場合も
+リビジョンが変わるため、古い値を返すことはありません。
+"""
+
+import logging
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class IndicatorSnapshotCache:
+    """時間足ごとの最新指標値キャッシュ（各 (symbol, timeframe) につき最新の1件のみ保持）"""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], Tuple[Hashable, Dict[str, Any]]] = {}
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+        }
+
+    def get(self, symbol: str, timeframe: str, key: Hashable) -> Optional[Dict[str, Any]]:
+        """
+        キャッシュ済みの指標値を取得
+
+        Args:
+            symbol: シンボル
+            timeframe: 時間足
+            key: スナップショットキー
+
+        Returns:
+            プレフィックス付き指標値の辞書（キーが一致しない場合None）
+        """
+        entry = self._entries.get((symbol, timeframe))
+        if entry is not None and entry[0] == key:
+            self.stats['hits'] += 1
+            return entry[1]
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, symbol: str, timeframe: str, key: Hashable, values: Dict[str, Any]) -> None:
+        """指標値を保存（同じ (symbol, timeframe) の古いエントリは置き換え）"""
+        self._entries[(symbol, timeframe)] = (key, values)
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        """キャッシュを破棄（symbol指定時はそのシンボルのみ）"""
+        if symbol is None:
+            self._entries.clear()
+            return
+        for entry_key in [k for k in self._entries if k[0] == symbol]:
+            del self._entries[entry_key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """キャッシュ統計を取得"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'entries': len(self._entries),
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+指標シンボルテーブル
+
+指標スナップショット（{timeframe}_{indicator} 形式の辞書）に対する
+(指標名, 時間足) → 値 の解決結果を保持します。
+
+解決順は従来の ConditionEvaluator と同じです。
+1. 時間足プレフィックス付きの名前
+2. 元の名前
+3. 他の時間足（1d → 4h → 1h → 5m の順）へのフォールバック
+
+1つのスナップショットにつき各 (指標名, 時間足) は一度だけ解決され、
+以降の条件・参照値の引き当ては辞書参照1回で済みます。
+見つからない指標の警告もスナップショットごとに1回だけ出力します。
+"""
+
+import logging
+from typing import Any, Dict, List, Mapping, Set, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# フォールバック時に探索する時間足の順序
+FALLBACK_TIMEFRAMES = ('1d', '4h', '1h', '5m')
+
+_MISSING = object()
+
+
+class IndicatorTable:
+    """1つの指標スナップショットに対する解決済みシンボルテーブル"""
+
+    def __init__(self, source: Mapping[str, Any]):
+        """
+        初期化
+
+        Args:
+            source: 指標スナップショット
+        """
+        self.source = source
+        self._resolved: Dict[Tuple[str, str], Any] = {}
+        self._missing: Set[Tuple[str, str]] = set()
+
+    def get(self, indicator_name: str, timeframe: str) -> Any:
+        """
+        指標値を取得
+
+        Args:
+            indicator_name: 指標名
+            timeframe: 時間足
+
+        Returns:
+            指標値（見つからない場合None）
+        """
+        key = (indicator_name, timeframe)
+        value = self._resolved.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._resolve(indicator_name, timeframe)
+            self._resolved[key] = value
+        return value
+
+    def resolve(self, data: Mapping[str, Any], indicator_name: str, timeframe: str) -> Any:
+        """CompiledGatePlan.resolve に渡せる (data, indicator, timeframe) 形式の解決関数"""
+        return self.get(indicator_name, timeframe)
+
+    @property
+    def missing(self) -> List[Tuple[str, str]]:
+        """見つからなかった (指標名, 時間足) の一覧"""
+        return sorted(self._missing)
+
+    def _resolve(self, indicator_name: str, timeframe: str) -> Any:
+        candidates = [(f"{timeframe}_{indicator_name}", timeframe), (indicator_name, None)]
+        candidates += [
+            (f"{tf}_{indicator_name}", tf) for tf in FALLBACK_TIMEFRAMES if tf != timeframe
+        ]
+        for name, found_timeframe in candidates:
+            if name not in self.source:
+                continue
+            value = self._latest(self.source[name], indicator_name)
+            if value is _MISSING:
+                continue
+            if found_timeframe is not None and found_timeframe != timeframe:
+                logger.debug(f"指標 {indicator_name} を {found_timeframe} 時間足で発見: {name}")
+            return value
+
+        self._missing.add((indicator_name, timeframe))
+        logger.warning(f"指標 {indicator_name} が見つかりません (時間足: {timeframe})")
+        return None
+
+    @staticmethod
+    def _latest(value: Any, indicator_name: str) -> Any:
+        """DataFrameの場合は指標列の最新値を取得（列が無い場合は見つからない扱い）"""
+        if isinstance(value, pd.DataFrame):
+            if indicator_name in value.columns:
+                return value[indicator_name].iloc[-1]
+            return _MISSING
+        return value
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+ゲート閾値のパラメータスイープ
+
+gate1/2/3_patterns.yaml の数値フィールド（min_confidence、条件の weight・value の帯・
+tolerance など）に値の範囲を指定し、全組み合わせを指標計算済みの履歴に対して
+VectorizedGateBacktester で評価して、シグナル数・勝率・R倍数のランキングを返します。
+
+- 組み合わせはプロセスプールで並列に評価します。
+- 指標列は親プロセスで基準足に整列・解決してから .npy に書き出し、各ワーカーは
+  読み取り専用の memmap として開くため、ワーカー数に比例してメモリが増えません。
+- 取引結果はエンジンと同じ ATR 下限（atr_multiplier_min / min_risk_pips）の損切りと
+  最初の利確倍率（take_profit_ratios[0]）で、シグナル足の終値から先の足を走査して求めます
+  （サポレジ・フィボナッチへのスナップは行いません）。
+
+パラメータのパスはゲート番号から始まるドット区切りで、リストの要素は
+name またはインデックスで指定します。
+    gate1.patterns.trend_reversal.uptrend_reversal.confidence_calculation.min_confidence
+    gate2.patterns.breakout_setup.conditions[bollinger_compression].value
+"""
+
+import copy
+import itertools
+import logging
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from modules.llm_analysis.core.pattern_compiler import PatternCompiler
+from modules.llm_analysis.core.three_gate_engine import ThreeGateEngine
+from modules.llm_analysis.core.vectorized_backtest import AlignedHistory, SlotColumn, VectorizedGateBacktester
+
+logger = logging.getLogger(__name__)
+
+GatePatterns = Dict[int, Dict[str, Any]]
+
+_SELECTOR = re.compile(r'^([^\[\]]+)\[([^\]]+)\]$')
+
+# 取引結果の計算に使う価格系列（SharedHistory.prices の行）
+_PRICE_ROWS = ('close', 'high', 'low', 'atr')
+
+
+@dataclass(frozen=True)
+class ParameterRange:
+    """スイープするパラメータと候補値"""
+    path: str
+    values: Tuple[Any, ...]
+
+    def __post_init__(self):
+        object.__setattr__(self, 'values', tuple(self.values))
+        if not self.values:
+            raise ValueError(f"候補値がありません: {self.path}")
+
+    @property
+    def gate_number(self) -> int:
+        head = self.path.split('.', 1)[0]
+        if not head.startswith('gate') or not head[4:].isdigit():
+            raise ValueError(f"パスはゲート番号から始めてください（例: gate1.patterns...）: {self.path}")
+        return int(head[4:])
+
+
+def set_pattern_value(patterns: GatePatterns, path: str, value: Any) -> None:
+    """
+    パターン設定のパスに値を設定
+
+    Args:
+        patterns: ゲート番号 → パターン設定辞書
+        path: gate{n} から始まるパス
+        value: 設定する値
+
+    Raises:
+        KeyError: パスが存在しない場合
+    """
+    gate_number = ParameterRange(path, (value,)).gate_number
+    target: Any = patterns[gate_number]
+    tokens = path.split('.')[1:]
+    if not tokens:
+        raise KeyError(f"パスにフィールドがありません: {path}")
+
+    for position, token in enumerate(tokens):
+        last = position == len(tokens) - 1
+        match = _SELECTOR.match(token)
+        if match is None:
+            if last:
+                if not isinstance(target, dict):
+                    raise KeyError(f"辞書ではない要素にフィールドは設定できません: {path}")
+                target[token] = value
+                return
+            if not isinstance(target, dict) or token not in target:
+                raise KeyError(f"パスが見つかりません: {path} ({token})")
+            target = target[token]
+            continue
+
+        key, selector = match.groups()
+        items = target.get(key) if isinstance(target, dict) else None
+        if not isinstance(items, list):
+            raise KeyError(f"リストではありません: {path} ({key})")
+        index = _select_item(items, selector)
+        if index is None:
+            raise KeyError(f"要素が見つかりません: {path} ({token})")
+        if last:
+            items[index] = value
+            return
+        target = items[index]
+
+
+def _select_item(items: List[Any], selector: str) -> Optional[int]:
+    for index, item in enumerate(items):
+        if isinstance(item, dict) and item.get('name') == selector:
+            return index
+    if selector.lstrip('-').isdigit() and -len(items) <= int(selector) < len(items):
+        return int(selector) % len(items)
+    return None
+
+
+def apply_parameters(base_patterns: GatePatterns, paths: Sequence[str],
+                     combination: Sequence[Any]) -> GatePatterns:
+    """
+    基準のパターン設定に組み合わせを適用した設定を作成
+
+    変更するゲートだけを複製し、他のゲートは基準の設定をそのまま共有します
+    （共有したゲートはコンパイル済みプランも再利用されます）。
+    """
+    touched = {ParameterRange(path, (None,)).gate_number for path in paths}
+    patterns = {
+        gate: copy.deepcopy(gate_patterns) if gate in touched else gate_patterns
+        for gate, gate_patterns in base_patterns.items()
+    }
+    for path, value in zip(paths, combination):
+        set_pattern_value(patterns, path, value)
+    return patterns
+
+
+class StaticPatternSource:
+    """PatternLoader の代わりに固定のパターン設定を返すソース"""
+
+    def __init__(self, patterns: GatePatterns):
+        self._patterns = patterns
+
+    def load_gate_patterns(self, gate_number: int) -> Dict[str, Any]:
+        return self._patterns[gate_number]
+
+
+class SharedHistory:
+    """
+    ワーカー間で共有する整列済み指標列
+
+    VectorizedGateBacktester.evaluate が参照する resolve / __len__ / timestamps を提供します。
+    """
+
+    def __init__(self, timestamps: pd.DatetimeIndex, slot_keys: Sequence[Tuple[str, str]],
+                 values: np.ndarray, none_mask: np.ndarray, bad_mask: np.ndarray, prices: np.ndarray):
+        self.timestamps = timestamps
+        self.slot_index = {tuple(key): index for index, key in enumerate(slot_keys)}
+        self.values = values
+        self.none_mask = none_mask
+        self.bad_mask = bad_mask
+        self.prices = prices
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def resolve(self, name: str, timeframe: str) -> SlotColumn:
+        index = self.slot_index.get((name, timeframe))
+        if index is None:
+            raise KeyError(f"共有されていない指標です: {timeframe}_{name}")
+        return self.values[index], self.none_mask[index], self.bad_mask[index]
+
+    def price(self, name: str) -> np.ndarray:
+        return self.prices[_PRICE_ROWS.index(name)]
+
+    def slice(self, start: int, stop: int) -> "SharedHistory":
+        """[start, stop) の足だけを参照するビュー（配列はコピーしない）"""
+        if start == 0 and stop == len(self):
+            return self
+        keys = sorted(self.slot_index, key=self.slot_index.get)
+        return SharedHistory(self.timestamps[start:stop], keys, self.values[:, start:stop],
+                             self.none_mask[:, start:stop], self.bad_mask[:, start:stop],
+                             self.prices[:, start:stop])
+
+    @classmethod
+    def build(cls, history: AlignedHistory, slot_keys: Sequence[Tuple[str, str]],
+              base_timeframe: str, atr_timeframe: str = '1h') -> "SharedHistory":
+        """整列済みの履歴から必要なスロットだけを解決して作成"""
+        length = len(history)
+        values = np.empty((len(slot_keys), length))
+        none_mask = np.empty((len(slot_keys), length), dtype=bool)
+        bad_mask = np.empty((len(slot_keys), length), dtype=bool)
+        for index, key in enumerate(slot_keys):
+            values[index], none_mask[index], bad_mask[index] = history.resolve(*key)
+
+        prices = np.empty((len(_PRICE_ROWS), length))
+        for index, name in enumerate(_PRICE_ROWS[:3]):
+            prices[index] = history.resolve(name, base_timeframe)[0]
+        prices[3] = history.resolve('ATR_14', atr_timeframe)[0]
+        return cls(history.timestamps, slot_keys, values, none_mask, bad_mask, prices)
+
+    def save(self, directory: Path) -> Dict[str, Any]:
+        """memmap で開ける形式で書き出し、ワーカーに渡す仕様を返す"""
+        spec = {'directory': str(directory), 'slot_keys': [list(key) for key in self.slot_index]}
+        for name in ('values', 'none_mask', 'bad_mask', 'prices'):
+            np.save(directory / f"{name}.npy", getattr(self, name))
+        np.save(directory / "timestamps.npy", self.timestamps.asi8)
+        return spec
+
+    @classmethod
+    def load(cls, spec: Dict[str, Any]) -> "SharedHistory":
+        """save() で書き出した配列を読み取り専用の memmap として開く"""
+        directory = Path(spec['directory'])
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode='r')
+            for name in ('values', 'none_mask', 'bad_mask', 'prices')
+        }
+        timestamps = pd.DatetimeIndex(np.load(directory / "timestamps.npy")).tz_localize('UTC')
+        return cls(timestamps, [tuple(key) for key in spec['slot_keys']], **arrays)
+
+
+def simulate_trades(history: SharedHistory, signal_index: np.ndarray, directions: np.ndarray,
+                    atr_multiplier: float, min_risk: float, take_profit_ratio: float,
+                    horizon_bars: int) -> np.ndarray:
+    """
+    シグナルごとのR倍数を計算
+
+    損切りは ATR × atr_multiplier と min_risk の大きい方、利確は ATR × take_profit_ratio。
+    同じ足で両方に達した場合は損切りを優先し、horizon_bars 本以内に決着しない場合は
+    最後の足の終値で評価します。
+
+    Returns:
+        シグナルごとのR倍数
+    """
+    close, high, low, atr = (history.price(name) for name in _PRICE_ROWS)
+    length = len(close)
+    r_multiples = np.zeros(len(signal_index))
+
+    for position, (index, direction) in enumerate(zip(signal_index, directions)):
+        entry = close[index]
+        bar_atr = atr[index] if atr[index] > 0 else 0.01
+        risk = max(bar_atr * atr_multiplier, min_risk)
+        stop = entry - direction * risk
+        target = entry + direction * bar_atr * take_profit_ratio
+
+        end = min(index + 1 + horizon_bars, length)
+        if end <= index + 1:
+            continue
+        highs, lows = high[index + 1:end], low[index + 1:end]
+        if direction > 0:
+            stop_hit, target_hit = lows <= stop, highs >= target
+        else:
+            stop_hit, target_hit = highs >= stop, lows <= target
+
+        first_stop = np.argmax(stop_hit) if stop_hit.any() else len(highs)
+        first_target = np.argmax(target_hit) if target_hit.any() else len(highs)
+        if first_stop < len(highs) and first_stop <= first_target:
+            r_multiples[position] = -1.0
+        elif first_target < len(highs):
+            r_multiples[position] = bar_atr * take_profit_ratio / risk
+        else:
+            r_multiples[position] = direction * (close[end - 1] - entry) / risk
+    return r_multiples
+
+
+class _SweepWorker:
+    """ワーカープロセスでの組み合わせ評価"""
+
+    def __init__(self, spec: Dict[str, Any], base_patterns: GatePatterns, paths: Sequence[str],
+                 base_timeframe: str, horizon_bars: int):
+        self.history = SharedHistory.load(spec)
+        self.base_patterns = base_patterns
+        self.paths = list(paths)
+        self.horizon_bars = horizon_bars
+        self.engine = ThreeGateEngine()
+        self.backtester = VectorizedGateBacktester(self.engine, base_timeframe=base_timeframe)
+
+    def evaluate(self, combination: Tuple[Any, ...], start: int = 0, stop: Optional[int] = None) -> Dict[str, Any]:
+        patterns = apply_parameters(self.base_patterns, self.paths, combination)
+        self.engine.pattern_loader = StaticPatternSource(patterns)
+
+        history = self.history.slice(start, len(self.history) if stop is None else stop)
+        decisions = self.backtester.evaluate(history)
+        signal_index = np.flatnonzero(decisions['signal'].to_numpy())
+        directions = np.where(decisions['signal_type'].to_numpy()[signal_index] == 'SELL', -1.0, 1.0)
+        engine = self.engine
+        r_multiples = simulate_trades(
+            history, signal_index, directions,
+            atr_multiplier=engine.atr_multiplier_min,
+            min_risk=engine.min_risk_pips * 0.0001,
+            take_profit_ratio=engine.take_profit_ratios[0],
+            horizon_bars=self.horizon_bars,
+        )
+
+        signals = len(signal_index)
+        wins = int((r_multiples > 0).sum())
+        return {
+            **dict(zip(self.paths, combination)),
+            'gate1_passed': int(decisions['gate1_valid'].sum()),
+            'gate2_passed': int(decisions['gate2_valid'].sum()),
+            'gate3_passed': int(decisions['gate3_valid'].sum()),
+            'signals': signals,
+            'wins': wins,
+            'win_rate': wins / signals if signals else 0.0,
+            'avg_r': float(r_multiples.mean()) if signals else 0.0,
+            'total_r': float(r_multiples.sum()),
+        }
+
+
+_worker: Optional[_SweepWorker] = None
+
+
+def _init_worker(*args) -> None:
+    global _worker
+    _worker = _SweepWorker(*args)
+
+
+def _evaluate_chunk(tasks: List[Tuple[int, Tuple[Any, ...], int, int]]) -> List[Dict[str, Any]]:
+    return [{'segment': segment, **_worker.evaluate(combination, start, stop)}
+            for segment, combination, start, stop in tasks]
+
+
+class ParameterSweep:
+    """ゲート閾値の全組み合わせをバックテストしてランキングするスイープエンジン"""
+
+    def __init__(self, base_patterns: Optional[GatePatterns] = None, engine: Optional[ThreeGateEngine] = None,
+                 base_timeframe: str = '5m', horizon_bars: int = 288, processes: Optional[int] = None,
+                 chunk_size: int = 4):
+        """
+        初期化
+
+        Args:
+            base_patterns: スイープの基準となるゲート番号 → パターン設定（Noneの場合はエンジンの設定）
+            engine: 整列・指標計算に使うエンジン（Noneの場合は新規作成）
+            base_timeframe: 評価する基準足
+            horizon_bars: 取引結果を判定する最大保有本数
+            processes: ワーカープロセス数（Noneの場合はCPU数、1の場合は同一プロセスで実行）
+            chunk_size: 1タスクで評価する組み合わせ数
+        """
+        self.engine = engine or ThreeGateEngine()
+        if base_patterns is None:
+            base_patterns = {gate: self.engine.pattern_loader.load_gate_patterns(gate) for gate in (1, 2, 3)}
+        self.base_patterns = copy.deepcopy(base_patterns)
+        self.base_timeframe = base_timeframe
+        self.horizon_bars = horizon_bars
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.logger = logging.getLogger(__name__)
+
+    def run_from_prices(self, price_data: Dict[str, pd.DataFrame], ranges: Sequence[ParameterRange],
+                        rank_by: str = 'total_r') -> pd.DataFrame:
+        """OHLCVデータから指標を計算してスイープを実行"""
+        indicators = self.engine.technical_calculator.calculate_all_indicators(price_data)
+        return self.run(indicators, ranges, rank_by=rank_by)
+
+    def run(self, indicator_frames: Dict[str, pd.DataFrame], ranges: Sequence[ParameterRange],
+            rank_by: str = 'total_r') -> pd.DataFrame:
+        """
+        指標計算済みの全履歴に対して全組み合わせを評価
+
+        Args:
+            indicator_frames: calculate_all_indicators() の戻り値
+            ranges: スイープするパラメータ
+            rank_by: ランキングに使う列
+
+        Returns:
+            パラメータ値と成績の表（rank_by の降順、rank 列付き）
+        """
+        table = self.evaluate_segments(indicator_frames, ranges, [(None, None)]).drop(columns='segment')
+        table = table.sort_values(rank_by, ascending=False, kind='stable').reset_index(drop=True)
+        table.insert(0, 'rank', np.arange(1, len(table) + 1))
+        return table
+
+    def evaluate_segments(self, indicator_frames: Dict[str, pd.DataFrame], ranges: Sequence[ParameterRange],
+                          segments: Sequence[Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]]) -> pd.DataFrame:
+        """
+        全組み合わせを期間ごとに評価
+
+        履歴の整列と共有は1回だけ行い、各期間は共有配列の区間として評価します。
+
+        Args:
+            indicator_frames: calculate_all_indicators() の戻り値
+            ranges: スイープするパラメータ
+            segments: 基準足の時刻の [開始, 終了) のリスト（None は履歴の端）
+
+        Returns:
+            segment（segments のインデックス）・パラメータ値・成績の表
+        """
+        start = time.perf_counter()
+        paths = [parameter.path for parameter in ranges]
+        combinations = list(itertools.product(*(parameter.values for parameter in ranges)))
+        slot_keys = self._collect_slot_keys(paths, combinations)
+
+        backtester = VectorizedGateBacktester(self.engine, base_timeframe=self.base_timeframe)
+        shared = SharedHistory.build(backtester.align(indicator_frames), slot_keys, self.base_timeframe)
+        bounds = [self._segment_rows(shared.timestamps, segment) for segment in segments]
+        tasks = [
+            (segment, combination, rows[0], rows[1])
+            for segment, rows in enumerate(bounds) for combination in combinations
+        ]
+        chunks = [tasks[i:i + self.chunk_size] for i in range(0, len(tasks), self.chunk_size)]
+
+        with tempfile.TemporaryDirectory(prefix="gate_sweep_") as directory:
+            spec = shared.save(Path(directory))
+            del shared
+            initargs = (spec, self.base_patterns, paths, self.base_timeframe, self.horizon_bars)
+            if self.processes == 1:
+                _init_worker(*initargs)
+                rows = [row for chunk in chunks for row in _evaluate_chunk(chunk)]
+            else:
+                with ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                         initargs=initargs) as executor:
+                    rows = [row for chunk_rows in executor.map(_evaluate_chunk, chunks) for row in chunk_rows]
+
+        self.logger.info(
+            f"🔬 パラメータスイープ完了: {len(combinations)}通り × {len(segments)}期間, "
+            f"{self.processes}プロセス, {time.perf_counter() - start:.2f}秒"
+        )
+        return pd.DataFrame(rows)
+
+    @staticmethod
+    def _segment_rows(timestamps: pd.DatetimeIndex,
+                      segment: Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]) -> Tuple[int, int]:
+        """期間の時刻を基準足の行範囲に変換"""
+        def position(value, default: int) -> int:
+            if value is None:
+                return default
+            timestamp = pd.Timestamp(value)
+            timestamp = timestamp.tz_localize('UTC') if timestamp.tz is None else timestamp.tz_convert('UTC')
+            return int(timestamps.searchsorted(timestamp, side='left'))
+
+        begin, end = segment
+        start = position(begin, 0)
+        return start, max(start, position(end, len(timestamps)))
+
+    def _collect_slot_keys(self, paths: Sequence[str],
+                           combinations: Sequence[Tuple[Any, ...]]) -> List[Tuple[str, str]]:
+        """全組み合わせのプランが参照する (指標, 時間足) を収集（パスの検証を兼ねる）"""
+        compiler = PatternCompiler(translate_condition=self.engine._translate_condition_name)
+        keys = set()
+        for combination in combinations:
+            patterns = apply_parameters(self.base_patterns, paths, combination)
+            for gate_number, gate_patterns in patterns.items():
+                keys.update(compiler.compile_gate(gate_number, gate_patterns).slot_keys)
+        return sorted(keys)
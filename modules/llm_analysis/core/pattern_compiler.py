@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+"""
+三層ゲート パターンコンパイラ
+
+PatternLoader が読み込んだ gate1/2/3_patterns.yaml を、評価時に辞書参照や
+演算子の文字列比較を行わない不変の評価プランに変換します。
+
+- 指標参照（indicator / reference と timeframe の組）はスロット番号に解決され、
+  スナップショットごとに1回だけ値を引き当てます。
+- 各条件は演算子・パラメータを束縛済みのクロージャになります。
+- プランは読み込み元の設定辞書と対応付けてキャッシュされ、PatternLoader が
+  ファイル変更を検知して辞書を差し替えた時だけ再コンパイルされます。
+- 各バリアントは条件の timeframe から、参照する時間足の集合を保持します
+  （ゲート結果のメモ化で、どの時間足の足が変わったら再評価するかの判定に使用）。
+- 各バリアントは必須条件の条件インデックスと重みの合計を保持します
+  （信頼度の上限による評価の打ち切りに使用）。
+"""
+
+import decimal
+import logging
+import operator as _operator
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SlotKey = Tuple[str, str]
+SlotValues = Sequence[Any]
+Resolver = Callable[[Dict[str, Any], str, str], Any]
+
+_COMPARISON_FUNCS = {
+    '>': _operator.gt,
+    '<': _operator.lt,
+    '>=': _operator.ge,
+    '<=': _operator.le,
+    '==': lambda a, b: abs(a - b) < 0.001,
+    '!=': lambda a, b: abs(a - b) >= 0.001,
+}
+
+# GATE 1 で評価するバリアントキーとバリアント名（評価順）
+_GATE1_VARIANT_KEYS = (
+    ('bullish_trend', 'bullish'),
+    ('bearish_trend', 'bearish'),
+    ('uptrend_reversal', 'uptrend_reversal'),
+    ('downtrend_reversal', 'downtrend_reversal'),
+)
+
+
+def _is_nan(value: Any) -> bool:
+    return isinstance(value, float) and value != value
+
+
+@dataclass(frozen=True)
+class CompiledCondition:
+    """コンパイル済み条件"""
+    name: str
+    translated_name: str
+    indicator: Optional[str]
+    timeframe: str
+    weight: float
+    slots: Tuple[int, ...]
+    evaluate: Callable[[SlotValues], float] = field(repr=False, compare=False)
+    describe: Callable[[SlotValues, float], str] = field(repr=False, compare=False)
+    operator: Any = None
+    indicator_slot: Optional[int] = None
+    reference_slot: Optional[int] = None
+    spec: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}), repr=False, compare=False)
+
+
+@dataclass(frozen=True)
+class CompiledVariant:
+    """コンパイル済みパターンバリアント"""
+    pattern_name: str
+    variant: str
+    result_pattern: str
+    conditions: Tuple[CompiledCondition, ...]
+    min_confidence: float
+    required_conditions: Tuple[str, ...]
+    additional_data: Mapping[str, Any]
+    allowed_environments: Tuple[str, ...] = ()
+    timeframes: FrozenSet[str] = frozenset()
+    slots: Tuple[int, ...] = ()
+    # 必須条件ごとの該当条件インデックス（required_conditions と同じ順序）
+    required_indices: Tuple[Tuple[int, ...], ...] = ()
+    total_weight: float = 0.0
+
+
+@dataclass(frozen=True)
+class CompiledScenario:
+    """コンパイル済みGATE 2シナリオ"""
+    name: str
+    direct: Optional[CompiledVariant]
+    environment_variants: Tuple[Tuple[str, CompiledVariant], ...]
+
+
+@dataclass(frozen=True)
+class CompiledGatePlan:
+    """ゲート単位の評価プラン"""
+    gate_number: int
+    pattern_count: int
+    slot_keys: Tuple[SlotKey, ...]
+    variants: Tuple[CompiledVariant, ...]
+    scenarios: Mapping[str, CompiledScenario]
+    source: Any = field(repr=False, compare=False)
+    slot_names: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'slot_names', tuple(f"{timeframe}_{name}" for name, timeframe in self.slot_keys))
+
+    def resolve(self, data: Dict[str, Any], resolver: Resolver) -> List[Any]:
+        """
+        スナップショットから全スロットの値を引き当てる
+
+        Args:
+            data: 指標スナップショット（{timeframe}_{indicator} 形式の辞書）
+            resolver: (data, indicator, timeframe) -> 値 の解決関数
+
+        Returns:
+            スロット番号順の値リスト（見つからない場合はNone）
+        """
+        return [resolver(data, name, timeframe) for name, timeframe in self.slot_keys]
+
+
+class _SlotTable:
+    """コンパイル中のスロット割り当て"""
+
+    def __init__(self):
+        self.keys: List[SlotKey] = []
+        self._index: Dict[SlotKey, int] = {}
+
+    def slot(self, name: str, timeframe: str) -> int:
+        key = (name, timeframe)
+        index = self._index.get(key)
+        if index is None:
+            index = len(self.keys)
+            self._index[key] = index
+            self.keys.append(key)
+        return index
+
+
+class PatternCompiler:
+    """YAMLパターン設定を評価プランに変換するコンパイラ"""
+
+    def __init__(self, translate_condition: Optional[Callable[[str], str]] = None):
+        """
+        初期化
+
+        Args:
+            translate_condition: 条件名の表示名変換関数
+        """
+        self.translate_condition = translate_condition or (lambda name: name)
+        self.logger = logging.getLogger(__name__)
+        self._plans: Dict[int, CompiledGatePlan] = {}
+        self._stats = {'compiles': 0, 'hits': 0}
+
+    def get_plan(self, gate_number: int, patterns: Dict[str, Any]) -> CompiledGatePlan:
+        """
+        ゲートの評価プランを取得（設定が差し替わった場合のみ再コンパイル）
+
+        Args:
+            gate_number: ゲート番号（1, 2, 3）
+            patterns: PatternLoader.load_gate_patterns() の戻り値
+
+        Returns:
+            評価プラン
+        """
+        plan = self._plans.get(gate_number)
+        if plan is not None and plan.source is patterns:
+            self._stats['hits'] += 1
+            return plan
+
+        plan = self.compile_gate(gate_number, patterns)
+        self._plans[gate_number] = plan
+        self._stats['compiles'] += 1
+        self.logger.info(
+            f"GATE {gate_number} パターンをコンパイルしました: "
+            f"{plan.pattern_count}個のパターン, {len(plan.slot_keys)}個の指標スロット"
+        )
+        return plan
+
+    def get_stats(self) -> Dict[str, int]:
+        """コンパイル統計を取得"""
+        return dict(self._stats)
+
+    def clear(self):
+        """コンパイル済みプランを破棄"""
+        self._plans.clear()
+
+    def compile_gate(self, gate_number: int, patterns: Dict[str, Any]) -> CompiledGatePlan:
+        """
+        ゲート設定全体をコンパイル
+
+        Args:
+            gate_number: ゲート番号
+            patterns: パターン設定辞書
+
+        Returns:
+            評価プラン
+        """
+        slots = _SlotTable()
+        pattern_configs = patterns.get('patterns', {})
+        variants: List[CompiledVariant] = []
+        scenarios: Dict[str, CompiledScenario] = {}
+
+        for pattern_name, pattern_config in pattern_configs.items():
+            if gate_number == 1:
+                for key, variant_name in _GATE1_VARIANT_KEYS:
+                    if key in pattern_config:
+                        variants.append(
+                            self.compile_variant(pattern_name, pattern_config[key], variant_name, slots)
+                        )
+                if 'conditions' in pattern_config:
+                    variants.append(self.compile_variant(pattern_name, pattern_config, 'neutral', slots))
+            elif gate_number == 2:
+                scenarios[pattern_name] = self._compile_scenario(pattern_name, pattern_config, slots)
+            else:
+                variants.append(self.compile_variant(pattern_name, pattern_config, 'trigger', slots))
+
+        return CompiledGatePlan(
+            gate_number=gate_number,
+            pattern_count=len(pattern_configs),
+            slot_keys=tuple(slots.keys),
+            variants=tuple(variants),
+            scenarios=MappingProxyType(scenarios),
+            source=patterns,
+        )
+
+    def compile_single_variant(self, pattern_name: str, pattern_config: Dict[str, Any],
+                               variant: str) -> CompiledGatePlan:
+        """
+        単一のパターンバリアントを独立したプランとしてコンパイル（キャッシュしない）
+
+        Args:
+            pattern_name: パターン名
+            pattern_config: バリアントの設定
+            variant: バリアント名
+
+        Returns:
+            バリアントを1つだけ持つ評価プラン
+        """
+        slots = _SlotTable()
+        compiled = self.compile_variant(pattern_name, pattern_config, variant, slots)
+        return CompiledGatePlan(
+            gate_number=0,
+            pattern_count=1,
+            slot_keys=tuple(slots.keys),
+            variants=(compiled,),
+            scenarios=MappingProxyType({}),
+            source=pattern_config,
+        )
+
+    def compile_variant(self, pattern_name: str, pattern_config: Dict[str, Any], variant: str,
+                        slots: Optional[_SlotTable] = None) -> CompiledVariant:
+        """
+        パターンバリアントをコンパイル
+
+        Args:
+            pattern_name: パターン名
+            pattern_config: バリアントの設定（conditions などを含む辞書）
+            variant: バリアント名
+            slots: スロットテーブル（Noneの場合は新規）
+
+        Returns:
+            コンパイル済みバリアント
+        """
+        if slots is None:
+            slots = _SlotTable()
+
+        confidence_config = pattern_config.get('confidence_calculation', {})
+        conditions = tuple(
+            self.compile_condition(condition, slots)
+            for condition in pattern_config.get('conditions', [])
+        )
+        used_slots = sorted({slot for condition in conditions for slot in condition.slots})
+        required_conditions = tuple(pattern_config.get('required_conditions', []))
+
+        return CompiledVariant(
+            pattern_name=pattern_name,
+            variant=variant,
+            result_pattern=f"{pattern_name}_{variant}",
+            conditions=conditions,
+            min_confidence=confidence_config.get('min_confidence', 0.6),
+            required_conditions=required_conditions,
+            additional_data=MappingProxyType(dict(pattern_config.get('additional_data', {}))),
+            allowed_environments=tuple(pattern_config.get('allowed_environments', [])),
+            timeframes=frozenset(condition.timeframe for condition in conditions),
+            slots=tuple(used_slots),
+            required_indices=tuple(
+                tuple(index for index, condition in enumerate(conditions)
+                      if condition.translated_name == required)
+                for required in required_conditions
+            ),
+            total_weight=sum(condition.weight for condition in conditions),
+        )
+
+    def _compile_scenario(self, scenario_name: str, scenario_config: Dict[str, Any],
+                          slots: _SlotTable) -> CompiledScenario:
+        environment_conditions = scenario_config.get('environment_conditions', {})
+        if environment_conditions:
+            return CompiledScenario(
+                name=scenario_name,
+                direct=None,
+                environment_variants=tuple(
+                    (env_name, self.compile_variant(scenario_name, env_config, env_name, slots))
+                    for env_name, env_config in environment_conditions.items()
+                ),
+            )
+        return CompiledScenario(
+            name=scenario_name,
+            direct=self.compile_variant(scenario_name, scenario_config, 'direct', slots),
+            environment_variants=(),
+        )
+
+    def compile_condition(self, condition: Dict[str, Any], slots: _SlotTable) -> CompiledCondition:
+        """
+        個別条件をコンパイル
+
+        ConditionEvaluator.evaluate_condition と同じ判定を、演算子と
+        パラメータを束縛したクロージャとして生成します。
+
+        Args:
+            condition: 条件設定の辞書
+            slots: スロットテーブル
+
+        Returns:
+            コンパイル済み条件
+        """
+        name = condition.get('name', 'unknown')
+        indicator = condition.get('indicator')
+        operator = condition.get('operator')
+        reference = condition.get('reference')
+        value = condition.get('value')
+        timeframe = condition.get('timeframe', '1d')
+        weight = condition.get('weight', 1.0)
+
+        used_slots: List[int] = []
+        indicator_slot = None
+        if indicator is not None:
+            indicator_slot = slots.slot(indicator, timeframe)
+            used_slots.append(indicator_slot)
+
+        reference_slot = None
+        if isinstance(reference, str) and reference:
+            reference_slot = slots.slot(reference, timeframe)
+            used_slots.append(reference_slot)
+        elif reference and not isinstance(reference, str):
+            # 指標名のリストは参照値として解決できない（従来の評価では常に0.0）
+            self.logger.warning(f"条件 '{name}': 参照指標 {reference} は解決できないため常に不合格になります")
+
+        compare = self._bind_operator(operator, condition)
+        evaluate = self._bind_evaluate(indicator_slot, reference, reference_slot, value, compare)
+        describe = self._bind_describe(indicator, operator, reference, reference_slot, value,
+                                       indicator_slot, condition)
+
+        return CompiledCondition(
+            name=name,
+            translated_name=self.translate_condition(name),
+            indicator=indicator,
+            timeframe=timeframe,
+            weight=weight,
+            slots=tuple(used_slots),
+            evaluate=evaluate,
+            describe=describe,
+            operator=operator,
+            indicator_slot=indicator_slot,
+            reference_slot=reference_slot,
+            spec=MappingProxyType(dict(condition)),
+        )
+
+    @staticmethod
+    def _bind_evaluate(indicator_slot: Optional[int], reference: Any, reference_slot: Optional[int],
+                       value: Any, compare: Callable[[Any, Any], float]) -> Callable[[SlotValues], float]:
+        """スロット値を取り出して演算子関数に渡す評価関数を生成"""
+        if indicator_slot is None:
+            return lambda values: 0.0
+
+        if reference_slot is not None:
+            def evaluate(values: SlotValues) -> float:
+                indicator_value = values[indicator_slot]
+                if indicator_value is None:
+                    return 0.0
+                reference_value = values[reference_slot]
+                if reference_value is None:
+                    reference_value = value
+                    if reference_value is None:
+                        return 0.0
+                try:
+                    return compare(indicator_value, reference_value)
+                except Exception:
+                    return 0.0
+            return evaluate
+
+        if reference or value is None:
+            # 解決できない参照、または参照値なし
+            return lambda values: 0.0
+
+        def evaluate_constant(values: SlotValues) -> float:
+            indicator_value = values[indicator_slot]
+            if indicator_value is None:
+                return 0.0
+            try:
+                return compare(indicator_value, value)
+            except Exception:
+                return 0.0
+        return evaluate_constant
+
+    @staticmethod
+    def _bind_operator(operator: Any, condition: Dict[str, Any]) -> Callable[[Any, Any], float]:
+        """演算子とパラメータを束縛した比較関数を生成"""
+        if operator in _COMPARISON_FUNCS:
+            func = _COMPARISON_FUNCS[operator]
+            has_multiplier = 'multiplier' in condition
+            multiplier = condition.get('multiplier')
+
+            def compare(value: Any, reference: Any) -> float:
+                if value is None or _is_nan(value) or reference is None or _is_nan(reference):
+                    return 0.0
+                try:
+                    value = float(value)
+                    reference = float(reference)
+                    if has_multiplier:
+                        reference = reference * multiplier
+                except (ValueError, TypeError, decimal.InvalidOperation):
+                    return 0.0
+                return 1.0 if func(value, reference) else 0.0
+            return compare
+
+        if operator in ('between', 'not_between'):
+            inside = operator == 'between'
+
+            def in_range(value: Any, reference: Any) -> float:
+                if not isinstance(reference, list) or len(reference) != 2:
+                    return 0.0
+                min_val, max_val = reference
+                return 1.0 if (min_val <= value <= max_val) == inside else 0.0
+            return in_range
+
+        if operator in ('all_above', 'all_below', 'any_above', 'any_below'):
+            periods = condition.get('periods', 1)
+            aggregate = all if operator.startswith('all_') else any
+            above = operator.endswith('_above')
+
+            def logical(value: Any, reference: Any) -> float:
+                if not isinstance(value, list):
+                    value = [value]
+                try:
+                    reference = float(reference) if reference is not None else 0.0
+                except (ValueError, TypeError, decimal.InvalidOperation):
+                    return 0.0
+                safe_values = []
+                for v in value[-periods:]:
+                    if v is None or _is_nan(v):
+                        continue
+                    try:
+                        safe_values.append(float(v))
+                    except (ValueError, TypeError, decimal.InvalidOperation):
+                        continue
+                if not safe_values:
+                    return 0.0
+                if above:
+                    return 1.0 if aggregate(v > reference for v in safe_values) else 0.0
+                return 1.0 if aggregate(v < reference for v in safe_values) else 0.0
+            return logical
+
+        if operator == 'near':
+            tolerance = condition.get('tolerance', 0.01)
+            return lambda value, reference: 1.0 if abs(value - reference) <= tolerance * reference else 0.0
+
+        if operator == 'engulfs':
+            def engulfs(value: Any, reference: Any) -> float:
+                try:
+                    return 1.0 if abs(value) > abs(reference) * 1.1 else 0.0
+                except (TypeError, ValueError):
+                    return 0.0
+            return engulfs
+
+        if operator == 'breaks':
+            return lambda value, reference: 1.0 if value > reference else 0.0
+
+        if operator == 'oscillates_around':
+            lookback_periods = condition.get('lookback_periods', 10)
+
+            def oscillates(value: Any, reference: Any) -> float:
+                if isinstance(value, list) and len(value) >= lookback_periods:
+                    recent_values = value[-lookback_periods:]
+                    above_count = sum(1 for v in recent_values if v > reference)
+                    below_count = sum(1 for v in recent_values if v < reference)
+                    return 1.0 if above_count > 0 and below_count > 0 else 0.0
+                return 0.0
+            return oscillates
+
+        logger.warning(f"未対応の演算子: {operator}")
+        return lambda value, reference: 0.0
+
+    @staticmethod
+    def _bind_describe(indicator: Optional[str], operator: Any, reference: Any,
+                       reference_slot: Optional[int], value: Any, indicator_slot: Optional[int],
+                       condition: Dict[str, Any]) -> Callable[[SlotValues, float], str]:
+        """条件詳細文字列（ThreeGateEngine._create_condition_detail と同じ形式）の生成関数"""
+        if indicator_slot is None:
+            return lambda values, score: "N/A"
+
+        has_multiplier = 'multiplier' in condition
+        multiplier = condition.get('multiplier')
+        if operator == 'near':
+            suffix = f" (±{condition.get('tolerance', 0.01)})"
+            op_text = 'near'
+        else:
+            suffix = ''
+            op_text = operator
+
+        def describe(values: SlotValues, score: float) -> str:
+            try:
+                indicator_value = values[indicator_slot]
+                if indicator_value is None:
+                    indicator_value = 'N/A'
+
+                if reference_slot is not None:
+                    reference_value = values[reference_slot]
+                    if reference_value is None and value is not None:
+                        reference_value = value
+                elif reference:
+                    reference_value = reference
+                elif value is not None:
+                    reference_value = value
+                else:
+                    reference_value = 'N/A'
+
+                if has_multiplier and isinstance(reference_value, (int, float)):
+                    reference_value = reference_value * multiplier
+
+                return f"{indicator}({indicator_value}) {op_text} {reference_value}{suffix} [スコア: {score:.2f}]"
+            except Exception as e:
+                return f"条件詳細作成エラー: {e}"
+        return describe
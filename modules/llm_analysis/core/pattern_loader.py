@@ -4,44 +4,79 @@
 
 YAML形式の設定ファイルから三層ゲートのパターン設定を読み込み、
 キャッシュ機能とホットリロード機能を提供します。
+
+ファイルの変更はバックグラウンドで監視します（watchdog が利用可能な場合は
+ファイルシステムイベント、無い場合はポーリング）。変更されたファイルは解析・検証に
+成功した場合のみ新しい設定辞書に差し替えるため、評価時の読み込みは辞書参照だけです。
+内容が同じ場合（touch のみなど）は差し替えず、content_hash で内容の変化を判定できます。
 """
 
 import yaml
+import hashlib
 import logging
+import threading
+import time
+import weakref
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timezone
 
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+from .performance_monitor import performance_monitor
+
 logger = logging.getLogger(__name__)
 
+GATE_NUMBERS = (1, 2, 3)
+
 
 class PatternLoader:
     """パターン設定読み込みクラス"""
     
-    def __init__(self, config_dir: str = "config"):
+    def __init__(self, config_dir: str = "config", watch: bool = True, poll_interval: float = 2.0):
         """
         初期化
         
         Args:
             config_dir: 設定ファイルディレクトリのパス
+            watch: 設定ファイルの変更を監視して自動で再読み込みするか
+            poll_interval: ポーリング監視の間隔（秒、watchdog が無い場合）
         """
         if Path(config_dir).is_absolute():
             self.config_dir = Path(config_dir)
         else:
             self.config_dir = Path(__file__).parent.parent / config_dir
+        # 読み込み済みの設定（更新時は辞書ごと差し替える）
         self._patterns_cache = {}
         self._last_modified = {}
+        self._content_hashes = {}
+        self._file_signatures = {}
+        self._lock = threading.Lock()
         self._cache_stats = {
             'hits': 0,
             'misses': 0,
-            'loads': 0
+            'loads': 0,
+            'reloads': 0,
+            'reload_errors': 0,
         }
         self.logger = logging.getLogger(__name__)
+        self.poll_interval = poll_interval
+        self._observer = None
+        self._poll_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
         
         # 設定ディレクトリの存在確認
         if not self.config_dir.exists():
             self.config_dir.mkdir(parents=True, exist_ok=True)
             self.logger.info(f"設定ディレクトリを作成しました: {self.config_dir}")
+        
+        if watch:
+            self.start_watching()
     
     def load_gate_patterns(self, gate_number: int) -> Dict[str, Any]:
         """
@@ -59,69 +94,83 @@ class PatternLoader:
         """
         cache_key = f"gate{gate_number}"
         
-        # キャッシュの確認とファイル更新チェック
-        if self._should_reload_cache(cache_key, gate_number):
-            self._load_patterns_from_file(gate_number)
-            self._cache_stats['misses'] += 1
-        else:
+        # 読み込み済みならファイルは確認しない（変更は監視側で差し替え）
+        patterns = self._patterns_cache.get(cache_key)
+        if patterns is not None:
             self._cache_stats['hits'] += 1
+            return patterns
+        
+        self._cache_stats['misses'] += 1
+        self._load_patterns_from_file(gate_number)
         
         if cache_key not in self._patterns_cache:
             raise FileNotFoundError(f"GATE {gate_number} のパターン設定が見つかりません")
         
         return self._patterns_cache[cache_key]
     
-    def _should_reload_cache(self, cache_key: str, gate_number: int) -> bool:
+    def content_hash(self, gate_number: int) -> Optional[str]:
         """
-        キャッシュの再読み込みが必要かチェック
+        読み込み済みパターン設定ファイルの内容ハッシュ（SHA-256）を取得
         
         Args:
-            cache_key: キャッシュキー
             gate_number: ゲート番号
             
         Returns:
-            再読み込みが必要な場合True
+            ハッシュ値（未読み込みの場合None）
         """
-        config_file = self.config_dir / f"gate{gate_number}_patterns.yaml"
-        
-        if not config_file.exists():
-            return False
-        
-        # ファイルの最終更新時刻をチェック
-        current_mtime = config_file.stat().st_mtime
-        
-        if cache_key not in self._last_modified:
-            return True
-        
-        return current_mtime > self._last_modified[cache_key]
+        return self._content_hashes.get(f"gate{gate_number}")
+    
+    def _config_file(self, gate_number: int) -> Path:
+        return self.config_dir / f"gate{gate_number}_patterns.yaml"
     
-    def _load_patterns_from_file(self, gate_number: int):
+    def _load_patterns_from_file(self, gate_number: int, force: bool = True) -> bool:
         """
         ファイルからパターン設定を読み込み
         
+        解析と検証に成功した場合のみ、キャッシュの辞書を新しいものに差し替えます。
+        
         Args:
             gate_number: ゲート番号
+            force: 内容が同じでも差し替えるか
+            
+        Returns:
+            設定を差し替えた場合True
         """
-        config_file = self.config_dir / f"gate{gate_number}_patterns.yaml"
+        config_file = self._config_file(gate_number)
         cache_key = f"gate{gate_number}"
         
         if not config_file.exists():
             self.logger.warning(f"設定ファイルが見つかりません: {config_file}")
-            return
+            return False
         
         try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                patterns = yaml.safe_load(f)
+            started = time.perf_counter()
+            stat = config_file.stat()
+            content = config_file.read_bytes()
+            content_hash = hashlib.sha256(content).hexdigest()
+            
+            with self._lock:
+                self._file_signatures[cache_key] = (stat.st_mtime_ns, stat.st_size)
+                if not force and self._content_hashes.get(cache_key) == content_hash:
+                    # 内容が変わっていない（touch のみなど）
+                    self._last_modified[cache_key] = stat.st_mtime
+                    return False
+            
+            patterns = yaml.safe_load(content.decode('utf-8'))
             
             # 設定の妥当性チェック
             self._validate_patterns(patterns, gate_number)
+            performance_monitor.record_metric('pattern_loading_time', time.perf_counter() - started)
             
-            # キャッシュに保存
-            self._patterns_cache[cache_key] = patterns
-            self._last_modified[cache_key] = config_file.stat().st_mtime
+            # キャッシュに保存（辞書ごと差し替え、読み込み側はロック不要）
+            with self._lock:
+                self._patterns_cache = {**self._patterns_cache, cache_key: patterns}
+                self._content_hashes[cache_key] = content_hash
+                self._last_modified[cache_key] = stat.st_mtime
             
             self._cache_stats['loads'] += 1
             self.logger.info(f"GATE {gate_number} パターン設定を読み込みました: {len(patterns.get('patterns', {}))}個のパターン")
+            return True
             
         except yaml.YAMLError as e:
             self.logger.error(f"YAML解析エラー (GATE {gate_number}): {e}")
@@ -130,6 +179,67 @@ class PatternLoader:
             self.logger.error(f"パターン設定読み込みエラー (GATE {gate_number}): {e}")
             raise
     
+    def start_watching(self):
+        """設定ファイルの監視を開始（watchdog が無い場合はポーリング）"""
+        if self._observer is not None or self._poll_thread is not None:
+            return
+        
+        self._stop_event.clear()
+        if Observer is not None:
+            observer = Observer()
+            observer.schedule(_PatternFileHandler(self), str(self.config_dir), recursive=False)
+            observer.daemon = True
+            observer.start()
+            self._observer = observer
+            self.logger.debug(f"パターン設定の監視を開始しました（watchdog）: {self.config_dir}")
+            return
+        
+        self._poll_thread = threading.Thread(
+            target=_poll_pattern_files,
+            args=(weakref.ref(self), self._stop_event, self.poll_interval),
+            name="pattern-loader-poll",
+            daemon=True,
+        )
+        self._poll_thread.start()
+        self.logger.debug(f"パターン設定の監視を開始しました（ポーリング {self.poll_interval}秒）: {self.config_dir}")
+    
+    def stop_watching(self):
+        """設定ファイルの監視を停止"""
+        self._stop_event.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+        if self._poll_thread is not None:
+            self._poll_thread.join(timeout=5)
+            self._poll_thread = None
+    
+    def check_for_changes(self):
+        """読み込み済みの設定ファイルを確認し、変更があれば再読み込み（ポーリング用）"""
+        for gate_number in GATE_NUMBERS:
+            cache_key = f"gate{gate_number}"
+            if cache_key not in self._patterns_cache:
+                continue
+            try:
+                stat = self._config_file(gate_number).stat()
+            except OSError:
+                continue
+            if self._file_signatures.get(cache_key) != (stat.st_mtime_ns, stat.st_size):
+                self._on_file_changed(gate_number)
+    
+    def _on_file_changed(self, gate_number: int):
+        """設定ファイル変更時の再読み込み（失敗時は現在の設定を維持）"""
+        if f"gate{gate_number}" not in self._patterns_cache:
+            # 未使用のゲートは次回の読み込み時に読む
+            return
+        try:
+            if self._load_patterns_from_file(gate_number, force=False):
+                self._cache_stats['reloads'] += 1
+                self.logger.info(f"🔄 GATE {gate_number} パターン設定の変更を反映しました")
+        except Exception as e:
+            self._cache_stats['reload_errors'] += 1
+            self.logger.error(f"❌ GATE {gate_number} パターン設定の再読み込みに失敗したため現在の設定を維持します: {e}")
+    
     def _validate_patterns(self, patterns: Dict[str, Any], gate_number: int):
         """
         パターン設定の妥当性チェック
@@ -207,20 +317,11 @@ class PatternLoader:
             gate_number: 指定されたゲート番号（Noneの場合は全ゲート）
         """
         if gate_number:
-            cache_key = f"gate{gate_number}"
-            if cache_key in self._patterns_cache:
-                del self._patterns_cache[cache_key]
-            if cache_key in self._last_modified:
-                del self._last_modified[cache_key]
-            
             self._load_patterns_from_file(gate_number)
             self.logger.info(f"GATE {gate_number} パターン設定を再読み込みしました")
         else:
-            self._patterns_cache.clear()
-            self._last_modified.clear()
-            
             # 全ゲートの設定を再読み込み
-            for gate_num in [1, 2, 3]:
+            for gate_num in GATE_NUMBERS:
                 self._load_patterns_from_file(gate_num)
             
             self.logger.info("全パターン設定を再読み込みしました")
@@ -280,6 +381,7 @@ class PatternLoader:
             cache_info[cache_key] = {
                 'pattern_count': len(patterns.get('patterns', {})),
                 'last_modified': self._last_modified.get(cache_key, 0),
+                'content_hash': self._content_hashes.get(cache_key),
                 'cached_at': datetime.now(timezone.utc).isoformat()
             }
         
@@ -287,11 +389,44 @@ class PatternLoader:
     
     def clear_cache(self):
         """キャッシュをクリア"""
-        self._patterns_cache.clear()
-        self._last_modified.clear()
+        with self._lock:
+            self._patterns_cache = {}
+            self._last_modified.clear()
+            self._content_hashes.clear()
+            self._file_signatures.clear()
         self.logger.info("パターン設定キャッシュをクリアしました")
 
 
+class _PatternFileHandler(FileSystemEventHandler):
+    """watchdog のイベントをパターン設定の再読み込みに変換"""
+    
+    def __init__(self, loader: PatternLoader):
+        super().__init__()
+        self._loader = weakref.ref(loader)
+        self._files = {f"gate{gate_number}_patterns.yaml": gate_number for gate_number in GATE_NUMBERS}
+    
+    def on_any_event(self, event):
+        loader = self._loader()
+        if loader is None or event.is_directory:
+            return
+        # エディタの「一時ファイルに書いてリネーム」にも対応するため移動先も確認
+        for path in (getattr(event, 'dest_path', None), event.src_path):
+            gate_number = self._files.get(Path(path).name) if path else None
+            if gate_number is not None:
+                loader._on_file_changed(gate_number)
+                return
+
+
+def _poll_pattern_files(loader_ref: "weakref.ref[PatternLoader]", stop_event: threading.Event, interval: float):
+    """ポーリング監視スレッド（ローダーが破棄されたら終了）"""
+    while not stop_event.wait(interval):
+        loader = loader_ref()
+        if loader is None:
+            return
+        loader.check_for_changes()
+        del loader
+
+
 # テスト用のメイン関数
 if __name__ == "__main__":
     import asyncio
@@ -8,11 +8,13 @@
 
 import time
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from collections import deque
-import statistics
+
+from modules.instrumentation.core.metrics import get_metrics
+from modules.instrumentation.core.quantile_sketch import WINDOWS, WindowedQuantileSketch
 
 logger = logging.getLogger(__name__)
 
@@ -44,16 +46,18 @@ class PerformanceStats:
 class PerformanceMonitor:
     """パフォーマンス監視クラス"""
     
-    def __init__(self, max_history: int = 1000):
+    def __init__(self, max_history: int = 1000, relative_accuracy: float = 0.01):
         """
         初期化
         
         Args:
             max_history: 保持する履歴の最大数
+            relative_accuracy: 統計に使う分位点スケッチの相対誤差
         """
         self.max_history = max_history
+        self.relative_accuracy = relative_accuracy
         self.metrics_history: Dict[str, deque] = {}
-        self.stats_cache: Dict[str, PerformanceStats] = {}
+        self.sketches: Dict[str, WindowedQuantileSketch] = {}
         self.logger = logging.getLogger(__name__)
         
         # 監視対象のメトリクス
@@ -92,54 +96,75 @@ class PerformanceMonitor:
             self.metrics_history[name] = deque(maxlen=self.max_history)
         
         self.metrics_history[name].append(metric)
+        self._sketch(name).add(value)
         
-        # 統計キャッシュを無効化
-        if name in self.stats_cache:
-            del self.stats_cache[name]
+        # 同名のPrometheusヒストグラムへ転送（メタデータのうちラベル名に一致するものをラベルに使用）
+        get_metrics().observe(name, value, **metadata)
         
         self.logger.debug(f"メトリクス記録: {name} = {value:.4f}s")
     
-    def get_stats(self, metric_name: str) -> Optional[PerformanceStats]:
+    def get_stats(self, metric_name: str, window: Union[str, float, None] = None) -> Optional[PerformanceStats]:
         """
         指定されたメトリクスの統計を取得
         
+        分位点はストリーミングスケッチから求めるため、履歴のコピーやソートは行いません。
+        
         Args:
             metric_name: メトリクス名
+            window: 時間窓（'1m' / '5m' / '1h' または秒数）。Noneの場合は記録開始からの累計
             
         Returns:
             パフォーマンス統計、またはNone
         """
-        if metric_name not in self.metrics_history:
+        history = self.metrics_history.get(metric_name)
+        if not history:
             return None
         
-        # キャッシュから取得
-        if metric_name in self.stats_cache:
-            return self.stats_cache[metric_name]
-        
-        # 統計を計算
-        metrics = list(self.metrics_history[metric_name])
-        if not metrics:
+        sketch = self.sketches[metric_name].window(WINDOWS.get(window, window))
+        if sketch.count == 0:
             return None
         
-        values = [m.value for m in metrics]
+        median, p95, p99 = sketch.quantiles([0.5, 0.95, 0.99])
+        last_metric = history[-1]
         
-        stats = PerformanceStats(
+        return PerformanceStats(
             metric_name=metric_name,
-            count=len(values),
-            min_value=min(values),
-            max_value=max(values),
-            avg_value=statistics.mean(values),
-            median_value=statistics.median(values),
-            p95_value=self._percentile(values, 95),
-            p99_value=self._percentile(values, 99),
-            last_value=values[-1],
-            last_updated=metrics[-1].timestamp
+            count=sketch.count,
+            min_value=sketch.min,
+            max_value=sketch.max,
+            avg_value=sketch.mean,
+            median_value=median,
+            p95_value=p95,
+            p99_value=p99,
+            last_value=last_metric.value,
+            last_updated=last_metric.timestamp
         )
+    
+    def export_sketches(self) -> Dict[str, Any]:
+        """
+        分位点スケッチをエクスポート（他プロセスでの結合用）
         
-        # キャッシュに保存
-        self.stats_cache[metric_name] = stats
+        Returns:
+            メトリクス名をキーとしたスケッチのシリアライズ結果
+        """
+        return {name: sketch.to_dict() for name, sketch in self.sketches.items()}
+    
+    def merge_sketches(self, exported: Dict[str, Any]):
+        """
+        他プロセスがエクスポートしたスケッチを結合
         
-        return stats
+        Args:
+            exported: export_sketches の結果
+        """
+        for name, data in exported.items():
+            self._sketch(name).merge(WindowedQuantileSketch.from_dict(data))
+    
+    def _sketch(self, name: str) -> WindowedQuantileSketch:
+        sketch = self.sketches.get(name)
+        if sketch is None:
+            sketch = WindowedQuantileSketch(relative_accuracy=self.relative_accuracy)
+            self.sketches[name] = sketch
+        return sketch
     
     def get_all_stats(self) -> Dict[str, PerformanceStats]:
         """
@@ -187,24 +212,6 @@ class PerformanceMonitor:
         
         return summary
     
-    def _percentile(self, values: List[float], percentile: int) -> float:
-        """
-        パーセンタイル値を計算
-        
-        Args:
-            values: 値のリスト
-            percentile: パーセンタイル（0-100）
-            
-        Returns:
-            パーセンタイル値
-        """
-        if not values:
-            return 0.0
-        
-        sorted_values = sorted(values)
-        index = int((percentile / 100) * (len(sorted_values) - 1))
-        return sorted_values[index]
-    
     def _generate_recommendations(self, stats: Dict[str, Any]) -> List[str]:
         """
         パフォーマンス改善の推奨事項を生成
@@ -267,12 +274,11 @@ class PerformanceMonitor:
         if metric_name:
             if metric_name in self.metrics_history:
                 self.metrics_history[metric_name].clear()
-                if metric_name in self.stats_cache:
-                    del self.stats_cache[metric_name]
+                self.sketches.pop(metric_name, None)
                 self.logger.info(f"メトリクス履歴をクリアしました: {metric_name}")
         else:
             self.metrics_history.clear()
-            self.stats_cache.clear()
+            self.sketches.clear()
             self.logger.info("すべてのメトリクス履歴をクリアしました")
     
     def export_stats(self) -> Dict[str, Any]:
@@ -307,6 +313,7 @@ class PerformanceMonitor:
 
 # グローバルインスタンス
 performance_monitor = PerformanceMonitor()
+get_metrics().register_quantile_source(lambda: performance_monitor.sketches)
 
 
 def measure_time(metric_name: str, metadata: Dict[str, Any] = None):
@@ -5,11 +5,13 @@
 ルールベース中心のシステムで、LLMは補助的役割に限定。
 """
 
+import dataclasses
 import logging
+import math
 import os
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Any, Set, Tuple, Union
+from dataclasses import dataclass, field
 from enum import Enum
 
 try:
@@ -28,6 +30,56 @@ except ImportError:
     np = None
 
 from .data_preparator import LLMDataPreparator
+from .rule_expression import (
+    COLUMN_ALIASES,
+    CompiledCondition,
+    RuleExpressionError,
+    SymbolTable,
+    compile_expression,
+)
+
+
+def _legacy_signal_gap(sign: float) -> Callable[..., Tuple[bool, float]]:
+    """MACD とシグナルの比較（シグナルに対する相対差の5倍）"""
+    def evaluate(macd: float, signal: float) -> Tuple[bool, float]:
+        passed = (macd - signal) * sign > 0
+        ratio = (macd - signal) * sign / abs(signal) if signal != 0 else 0
+        return passed, min(1.0, max(0.0, ratio * 5)) if passed else 0.0
+    return evaluate
+
+
+def _legacy_fib_band(price: float, low: float, high: float) -> Tuple[bool, float]:
+    """フィボナッチ帯の判定（列の順序のまま比較し、入れ替えない）"""
+    if not low <= price <= high:
+        return False, 0.0
+    max_distance = (high - low) / 2
+    return True, max(0.0, 1.0 - abs(price - (low + high) / 2) / max_distance) if max_distance else 1.0
+
+
+# 拡張構文が無効な場合に評価する条件式（従来の条件ハンドラが解釈していたもの）。
+# None は汎用のスコアと一致する式、関数は従来の判定とスコアを参照値（式中の出現順）から計算する。
+# これ以外の式は従来どおり "Unknown condition" として不成立になる。
+LEGACY_CONDITIONS: Dict[str, Optional[Callable[..., Tuple[bool, float]]]] = {
+    "RSI_14 <= 40": None,
+    "RSI_14 >= 70": None,
+    "RSI_14 > 50": None,
+    "price > EMA_200": None,
+    "price < EMA_200": None,
+    "price > EMA_21": None,
+    "MACD > MACD_Signal": _legacy_signal_gap(1.0),
+    "MACD < MACD_Signal": _legacy_signal_gap(-1.0),
+    "MACD > 0": lambda macd: (macd > 0, min(1.0, max(0.0, macd * 100)) if macd > 0 else 0.0),
+    "price BETWEEN Fib_0.382 AND Fib_0.618": _legacy_fib_band,
+    "price BETWEEN Fib_0.618 AND Fib_0.786": _legacy_fib_band,
+    "price > Fib_1.272": lambda price, fib: (
+        price > fib, max(0.0, (price - fib) / fib * 100) if price > fib else 0.0
+    ),
+    "active_session = Tokyo OR London": None,
+    "active_session = London OR NewYork": None,
+    "daily_trades < 5": None,
+    "daily_risk < 3%": None,
+    "Volume_Ratio > 1.5": None,
+}
 
 
 class RuleStatus(Enum):
@@ -89,11 +141,47 @@ class EntrySignal:
     created_at: datetime
 
 
+@dataclass
+class TickRuleState:
+    """
+    ティック評価用の足単位の状態
+
+    足の確定ごとに分析データから作り直し、足の途中では形成中の足の価格スロットだけを書き換える。
+    """
+    symbol: str
+    analysis_type: str
+    data: Dict
+    values: List[float]
+    context: Dict[str, Any]
+    rules: List[Tuple[Dict, List[Tuple[RuleCondition, Optional[CompiledCondition]]]]]
+    bar_results: Dict[str, Tuple[bool, float]]
+    tick_conditions: Dict[str, CompiledCondition]
+    price_slots: Dict[str, List[int]]
+    risk_passed: bool = True
+    bar_high: float = -math.inf
+    bar_low: float = math.inf
+    fired: Set[str] = field(default_factory=set)
+    ticks: int = 0
+
+
 class RuleBasedEngine:
     """ルールベース判定エンジン"""
 
-    def __init__(self, config_path: Optional[str] = None):
-        """初期化"""
+    # シグナル生成に必要な総合スコア
+    min_signal_score = 0.7
+
+    # ティックで更新する形成中の足の列
+    FORMING_BAR_COLUMNS = ('close', 'high', 'low')
+
+    def __init__(self, config_path: Optional[str] = None, extended_conditions: Optional[bool] = None):
+        """
+        初期化
+        
+        Args:
+            config_path: ルール設定ファイルのパス
+            extended_conditions: 任意の閾値・指標同士の比較・クロスなどの拡張構文を有効にするか
+                （None の場合は rules.yaml の extended_conditions。既定は無効で、従来の条件式のみ評価）
+        """
         self.logger = logging.getLogger(__name__)
         self.data_preparator = LLMDataPreparator()
         
@@ -103,6 +191,9 @@ class RuleBasedEngine:
         
         self.rules_config = self._load_rules_config(config_path)
         self.risk_constraints = self._load_risk_constraints()
+        if extended_conditions is None:
+            extended_conditions = bool(self.rules_config.get('extended_conditions', False))
+        self.extended_conditions = extended_conditions
         
         # セッション時間の定義（JST基準）
         self.session_times = {
@@ -111,6 +202,12 @@ class RuleBasedEngine:
             SessionType.NEW_YORK: {"start": "22:00", "end": "05:59"}
         }
         
+        # 条件式のコンパイル（評価時は値ベクトルのインデックス参照と比較のみ）
+        self.rule_symbols = SymbolTable()
+        self._compiled_conditions: Dict[str, Union[CompiledCondition, RuleExpressionError]] = {}
+        self._snapshot: Optional[Tuple[Dict, List[float], Dict[str, Any]]] = None
+        self._compile_rules()
+        
         # 初期化フラグ
         self._initialized = False
 
@@ -326,8 +423,8 @@ class RuleBasedEngine:
             total_score = 0.0
             total_weight = 0.0
             
-            for condition_str in rule_config['conditions']:
-                result = self._evaluate_condition(condition_str, data, symbol)
+            for condition in rule_config['conditions']:
+                result = self._evaluate_condition(condition, data, symbol)
                 rule_results.append(result)
                 
                 if result.required and not result.passed:
@@ -346,7 +443,7 @@ class RuleBasedEngine:
                 return None
             
             # 条件を満たす場合、エントリーシグナルを生成
-            if all_passed and overall_score >= 0.7:  # 70%以上のスコア
+            if all_passed and overall_score >= self.min_signal_score:  # 70%以上のスコア
                 signal = self._generate_entry_signal(
                     rule_config, data, rule_results, overall_score, symbol
                 )
@@ -360,9 +457,70 @@ class RuleBasedEngine:
             self.logger.error(f"❌ ルール評価エラー ({rule_name}): {e}")
             return None
 
+    def _compile_rules(self) -> None:
+        """アクティブルールの条件式を読み込み時に一度だけコンパイル"""
+        for rule_config in self.rules_config.get('active_rules', []):
+            for condition in rule_config.get('conditions', []):
+                compiled = self._compile_condition(self._as_rule_condition(condition).expression)
+                if isinstance(compiled, RuleExpressionError):
+                    log = self.logger.error if self.extended_conditions else self.logger.debug
+                    log(f"❌ 条件式を評価できません ({rule_config.get('name')}): {compiled}")
+        self.logger.debug(f"🧮 条件式コンパイル完了: {len(self._compiled_conditions)}式, "
+                          f"{len(self.rule_symbols)}スロット")
+
+    def _compile_condition(self, expression: str) -> Union[CompiledCondition, RuleExpressionError]:
+        """条件式のコンパイル（結果と構文エラーは式ごとにキャッシュ）"""
+        compiled = self._compiled_conditions.get(expression)
+        if compiled is None:
+            try:
+                legacy = None
+                if not self.extended_conditions:
+                    normalized = ' '.join(expression.split())
+                    if normalized not in LEGACY_CONDITIONS:
+                        raise RuleExpressionError(f"拡張構文が無効のため評価できない条件式です: {expression!r}")
+                    legacy = LEGACY_CONDITIONS[normalized]
+                compiled = compile_expression(expression, self.rule_symbols,
+                                              constants=self.rules_config.get('parameters') or {})
+                if legacy is not None:
+                    compiled = self._with_legacy_score(compiled, legacy)
+            except RuleExpressionError as e:
+                compiled = e
+            self._compiled_conditions[expression] = compiled
+        return compiled
+
+    @staticmethod
+    def _with_legacy_score(
+        compiled: CompiledCondition,
+        legacy: Callable[..., Tuple[bool, float]]
+    ) -> CompiledCondition:
+        """従来の判定とスコアで評価するコンパイル済み条件"""
+        slots = compiled.slots
+
+        def evaluate(values, context) -> Tuple[bool, float]:
+            operands = [values[slot] for slot in slots]
+            if any(value != value for value in operands):
+                return False, 0.0
+            return legacy(*operands)
+        return dataclasses.replace(compiled, evaluate=evaluate)
+
+    @staticmethod
+    def _as_rule_condition(condition: Union[str, Dict, RuleCondition]) -> RuleCondition:
+        """rules.yaml の条件（文字列 または expression/weight/required を持つ辞書）を RuleCondition に変換"""
+        if isinstance(condition, RuleCondition):
+            return condition
+        if isinstance(condition, dict):
+            expression = condition['expression']
+            return RuleCondition(
+                name=condition.get('name', expression),
+                expression=expression,
+                weight=float(condition.get('weight', 1.0)),
+                required=bool(condition.get('required', True))
+            )
+        return RuleCondition(name=condition, expression=condition)
+
     def _evaluate_condition(
         self,
-        condition_str: str,
+        condition_str: Union[str, Dict, RuleCondition],
         data: Dict,
         symbol: str
     ) -> RuleResult:
@@ -370,557 +528,262 @@ class RuleBasedEngine:
         個別条件の評価
         
         Args:
-            condition_str: 条件文字列
+            condition_str: 条件文字列（または条件設定）
             data: 分析データ
             symbol: 通貨ペアシンボル
         
         Returns:
             ルール結果
         """
+        condition = self._as_rule_condition(condition_str)
         try:
-            # 条件の解析と評価
-            if "RSI_14" in condition_str:
-                return self._evaluate_rsi_condition(condition_str, data)
-            elif "EMA" in condition_str:
-                return self._evaluate_ema_condition(condition_str, data)
-            elif "MACD" in condition_str:
-                return self._evaluate_macd_condition(condition_str, data)
-            elif "Fib_" in condition_str:
-                return self._evaluate_fibonacci_condition(condition_str, data)
-            elif "active_session" in condition_str:
-                return self._evaluate_session_condition(condition_str)
-            elif "daily_trades" in condition_str or "daily_risk" in condition_str:
-                return self._evaluate_risk_condition(condition_str, data)
-            elif "Volume_Ratio" in condition_str:
-                return self._evaluate_volume_condition(condition_str, data)
-            else:
+            compiled = self._compile_condition(condition.expression)
+            if isinstance(compiled, RuleExpressionError):
                 return RuleResult(
-                    rule_name=condition_str,
+                    rule_name=condition.name,
                     passed=False,
                     score=0.0,
-                    message="Unknown condition",
-                    details={}
+                    message=f"Unknown condition: {compiled}",
+                    details={},
+                    required=condition.required,
+                    weight=condition.weight
                 )
+            
+            values, context = self._rule_snapshot(data)
+            return self._condition_result(condition, compiled, values, context)
                 
         except Exception as e:
-            self.logger.error(f"❌ 条件評価エラー ({condition_str}): {e}")
+            self.logger.error(f"❌ 条件評価エラー ({condition.expression}): {e}")
             return RuleResult(
-                rule_name=condition_str,
+                rule_name=condition.name,
                 passed=False,
                 score=0.0,
                 message=f"Evaluation error: {e}",
-                details={}
+                details={},
+                required=condition.required,
+                weight=condition.weight
             )
 
-    def _evaluate_rsi_condition(self, condition_str: str, data: Dict) -> RuleResult:
-        """RSI条件の評価"""
-        try:
-            # 最新のRSI値を取得
-            rsi_value = None
-            for timeframe, tf_data in data['timeframes'].items():
-                df = tf_data['data']
-                if isinstance(df, pd.DataFrame) and 'RSI_14' in df.columns:
-                    rsi_value = df['RSI_14'].iloc[-1]
-                    break
-            
-            if rsi_value is None or pd.isna(rsi_value):
-                return RuleResult(
-                    rule_name=condition_str,
-                    passed=False,
-                    score=0.0,
-                    message="RSI_14 data not available",
-                    details={"rsi_value": None}
-                )
-            
-            # 条件の解析
-            if "RSI_14 <= 40" in condition_str:
-                passed = rsi_value <= 40
-                score = max(0.0, 1.0 - (rsi_value - 40) / 40) if rsi_value > 40 else 1.0
-                message = f"RSI_14: {rsi_value:.2f} {'≤' if passed else '>'} 40"
-            elif "RSI_14 >= 70" in condition_str:
-                passed = rsi_value >= 70
-                score = max(0.0, 1.0 - (70 - rsi_value) / 30) if rsi_value < 70 else 1.0
-                message = f"RSI_14: {rsi_value:.2f} {'≥' if passed else '<'} 70"
-            elif "RSI_14 > 50" in condition_str:
-                passed = rsi_value > 50
-                score = max(0.0, (rsi_value - 50) / 50) if rsi_value > 50 else 0.0
-                message = f"RSI_14: {rsi_value:.2f} {'>' if passed else '≤'} 50"
-            else:
-                return RuleResult(
-                    rule_name=condition_str,
-                    passed=False,
-                    score=0.0,
-                    message="Unknown RSI condition",
-                    details={"rsi_value": rsi_value}
-                )
-            
-            return RuleResult(
-                rule_name=condition_str,
-                passed=passed,
-                score=score,
-                message=message,
-                details={"rsi_value": rsi_value}
-            )
-            
-        except Exception as e:
-            return RuleResult(
-                rule_name=condition_str,
-                passed=False,
-                score=0.0,
-                message=f"RSI evaluation error: {e}",
-                details={}
-            )
-
-    def _evaluate_ema_condition(self, condition_str: str, data: Dict) -> RuleResult:
-        """EMA条件の評価"""
-        try:
-            # 最新の価格とEMA値を取得
-            current_price = None
-            ema_value = None
-            
-            for timeframe, tf_data in data['timeframes'].items():
-                df = tf_data['data']
-                if isinstance(df, pd.DataFrame) and 'close' in df.columns:
-                    current_price = df['close'].iloc[-1]
-                    
-                    if "EMA_200" in condition_str and 'EMA_200' in df.columns:
-                        ema_value = df['EMA_200'].iloc[-1]
-                    elif "EMA_21" in condition_str and 'EMA_21' in df.columns:
-                        ema_value = df['EMA_21'].iloc[-1]
-                    
-                    if current_price is not None and ema_value is not None:
-                        break
-            
-            if current_price is None or ema_value is None or pd.isna(ema_value):
-                return RuleResult(
-                    rule_name=condition_str,
-                    passed=False,
-                    score=0.0,
-                    message="EMA data not available",
-                    details={"current_price": current_price, "ema_value": ema_value}
-                )
-            
-            # 条件の解析
-            if "price > EMA_200" in condition_str:
-                passed = current_price > ema_value
-                # スコアを0-1の範囲に正規化（価格差の割合を制限）
-                price_diff_ratio = (current_price - ema_value) / ema_value
-                score = min(1.0, max(0.0, price_diff_ratio * 10)) if current_price > ema_value else 0.0
-                message = f"Price: {current_price:.5f} {'>' if passed else '≤'} EMA_200: {ema_value:.5f}"
-            elif "price < EMA_200" in condition_str:
-                passed = current_price < ema_value
-                # スコアを0-1の範囲に正規化（価格差の割合を制限）
-                price_diff_ratio = (ema_value - current_price) / ema_value
-                score = min(1.0, max(0.0, price_diff_ratio * 10)) if current_price < ema_value else 0.0
-                message = f"Price: {current_price:.5f} {'<' if passed else '≥'} EMA_200: {ema_value:.5f}"
-            elif "price > EMA_21" in condition_str:
-                passed = current_price > ema_value
-                # スコアを0-1の範囲に正規化（価格差の割合を制限）
-                price_diff_ratio = (current_price - ema_value) / ema_value
-                score = min(1.0, max(0.0, price_diff_ratio * 10)) if current_price > ema_value else 0.0
-                message = f"Price: {current_price:.5f} {'>' if passed else '≤'} EMA_21: {ema_value:.5f}"
-            else:
-                return RuleResult(
-                    rule_name=condition_str,
-                    passed=False,
-                    score=0.0,
-                    message="Unknown EMA condition",
-                    details={"current_price": current_price, "ema_value": ema_value}
-                )
-            
-            return RuleResult(
-                rule_name=condition_str,
-                passed=passed,
-                score=score,
-                message=message,
-                details={"current_price": current_price, "ema_value": ema_value}
-            )
-            
-        except Exception as e:
-            return RuleResult(
-                rule_name=condition_str,
-                passed=False,
-                score=0.0,
-                message=f"EMA evaluation error: {e}",
-                details={}
-            )
-
-    def _evaluate_macd_condition(self, condition_str: str, data: Dict) -> RuleResult:
-        """MACD条件の評価"""
-        try:
-            # 最新のMACD値を取得
-            macd_value = None
-            macd_signal = None
-            
-            for timeframe, tf_data in data['timeframes'].items():
-                df = tf_data['data']
-                if isinstance(df, pd.DataFrame):
-                    if 'MACD' in df.columns:
-                        macd_value = df['MACD'].iloc[-1]
-                    if 'MACD_Signal' in df.columns:
-                        macd_signal = df['MACD_Signal'].iloc[-1]
-                
-                if macd_value is not None and macd_signal is not None:
-                    break
-            
-            if macd_value is None or pd.isna(macd_value):
-                return RuleResult(
-                    rule_name=condition_str,
-                    passed=False,
-                    score=0.0,
-                    message="MACD data not available",
-                    details={"macd_value": macd_value, "macd_signal": macd_signal}
-                )
-            
-            # 条件の解析
-            if "MACD > MACD_Signal" in condition_str:
-                if macd_signal is None or pd.isna(macd_signal):
-                    return RuleResult(
-                        rule_name=condition_str,
-                        passed=False,
-                        score=0.0,
-                        message="MACD_Signal data not available",
-                        details={"macd_value": macd_value, "macd_signal": macd_signal}
-                    )
-                
-                passed = macd_value > macd_signal
-                # スコアを0-1の範囲に正規化（MACD差の割合を制限）
-                macd_diff_ratio = (macd_value - macd_signal) / abs(macd_signal) if macd_signal != 0 else 0
-                score = min(1.0, max(0.0, macd_diff_ratio * 5)) if macd_value > macd_signal else 0.0
-                message = f"MACD: {macd_value:.6f} {'>' if passed else '≤'} Signal: {macd_signal:.6f}"
-            elif "MACD < MACD_Signal" in condition_str:
-                if macd_signal is None or pd.isna(macd_signal):
-                    return RuleResult(
-                        rule_name=condition_str,
-                        passed=False,
-                        score=0.0,
-                        message="MACD_Signal data not available",
-                        details={"macd_value": macd_value, "macd_signal": macd_signal}
-                    )
-                
-                passed = macd_value < macd_signal
-                # スコアを0-1の範囲に正規化（MACD差の割合を制限）
-                macd_diff_ratio = (macd_signal - macd_value) / abs(macd_signal) if macd_signal != 0 else 0
-                score = min(1.0, max(0.0, macd_diff_ratio * 5)) if macd_value < macd_signal else 0.0
-                message = f"MACD: {macd_value:.6f} {'<' if passed else '≥'} Signal: {macd_signal:.6f}"
-            elif "MACD > 0" in condition_str:
-                passed = macd_value > 0
-                # スコアを0-1の範囲に正規化（MACD値を制限）
-                score = min(1.0, max(0.0, macd_value * 100)) if macd_value > 0 else 0.0
-                message = f"MACD: {macd_value:.6f} {'>' if passed else '≤'} 0"
-            else:
-                return RuleResult(
-                    rule_name=condition_str,
-                    passed=False,
-                    score=0.0,
-                    message="Unknown MACD condition",
-                    details={"macd_value": macd_value, "macd_signal": macd_signal}
-                )
-            
-            return RuleResult(
-                rule_name=condition_str,
-                passed=passed,
-                score=score,
-                message=message,
-                details={"macd_value": macd_value, "macd_signal": macd_signal}
-            )
-            
-        except Exception as e:
-            return RuleResult(
-                rule_name=condition_str,
-                passed=False,
-                score=0.0,
-                message=f"MACD evaluation error: {e}",
-                details={}
-            )
+    @staticmethod
+    def _condition_result(
+        condition: RuleCondition,
+        compiled: CompiledCondition,
+        values: List[float],
+        context: Dict[str, Any]
+    ) -> RuleResult:
+        """コンパイル済み条件の評価結果"""
+        passed, score = compiled.evaluate(values, context)
+        message, details = compiled.describe(values, context)
+        return RuleResult(
+            rule_name=condition.name,
+            passed=passed,
+            score=score,
+            message=message,
+            details=details,
+            required=condition.required,
+            weight=condition.weight
+        )
+
+    async def prepare_tick_state(
+        self,
+        symbol: str = 'USDJPY=X',
+        analysis_type: str = 'trend_direction'
+    ) -> Optional[TickRuleState]:
+        """
+        ティック評価用の状態を作成（足の確定ごとに1回だけ呼び出す）
+        
+        Args:
+            symbol: 通貨ペアシンボル
+            analysis_type: 分析タイプ
+        
+        Returns:
+            ティック評価用の状態（データがない場合はNone）
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        data = await self.data_preparator.prepare_analysis_data(analysis_type, symbol)
+        if not data['timeframes']:
+            self.logger.warning("⚠️ 利用可能なデータがありません")
+            return None
+        return self.build_tick_state(data, symbol, analysis_type)
 
-    def _evaluate_fibonacci_condition(self, condition_str: str, data: Dict) -> RuleResult:
-        """フィボナッチ条件の評価"""
-        try:
-            # 最新の価格とフィボナッチレベルを取得
-            current_price = None
-            fib_levels = {}
-            
-            for timeframe, tf_data in data['timeframes'].items():
-                df = tf_data['data']
-                if isinstance(df, pd.DataFrame) and 'close' in df.columns:
-                    current_price = df['close'].iloc[-1]
-                
-                    # フィボナッチレベルの取得
-                    for col in df.columns:
-                        if col.startswith('Fib_'):
-                            level = col.replace('Fib_', '')
-                            try:
-                                fib_levels[level] = df[col].iloc[-1]
-                            except:
-                                continue
-                
-                if current_price is not None and fib_levels:
-                    break
-            
-            if current_price is None or not fib_levels:
-                return RuleResult(
-                    rule_name=condition_str,
-                    passed=False,
-                    score=0.0,
-                    message="Fibonacci data not available",
-                    details={"current_price": current_price, "fib_levels": fib_levels}
-                )
-            
-            # 条件の解析
-            if "price BETWEEN Fib_0.382 AND Fib_0.618" in condition_str:
-                fib_382 = fib_levels.get('0.382')
-                fib_618 = fib_levels.get('0.618')
-                
-                if fib_382 is None or fib_618 is None or pd.isna(fib_382) or pd.isna(fib_618):
-                    return RuleResult(
-                        rule_name=condition_str,
-                        passed=False,
-                        score=0.0,
-                        message="Required Fibonacci levels not available",
-                        details={"current_price": current_price, "fib_levels": fib_levels}
-                    )
-                
-                passed = fib_382 <= current_price <= fib_618
-                if passed:
-                    # 中央値からの距離でスコア計算
-                    center = (fib_382 + fib_618) / 2
-                    distance = abs(current_price - center)
-                    max_distance = (fib_618 - fib_382) / 2
-                    score = max(0.0, 1.0 - distance / max_distance)
-                else:
-                    score = 0.0
-                
-                message = f"Price: {current_price:.5f} {'∈' if passed else '∉'} [Fib_0.382: {fib_382:.5f}, Fib_0.618: {fib_618:.5f}]"
-                
-            elif "price > Fib_1.272" in condition_str:
-                fib_1272 = fib_levels.get('1.272')
-                
-                if fib_1272 is None or pd.isna(fib_1272):
-                    return RuleResult(
-                        rule_name=condition_str,
-                        passed=False,
-                        score=0.0,
-                        message="Fib_1.272 not available",
-                        details={"current_price": current_price, "fib_levels": fib_levels}
-                    )
-                
-                passed = current_price > fib_1272
-                score = max(0.0, (current_price - fib_1272) / fib_1272 * 100) if current_price > fib_1272 else 0.0
-                message = f"Price: {current_price:.5f} {'>' if passed else '≤'} Fib_1.272: {fib_1272:.5f}"
-                
-            elif "price BETWEEN Fib_0.618 AND Fib_0.786" in condition_str:
-                fib_618 = fib_levels.get('0.618')
-                fib_786 = fib_levels.get('0.786')
-                
-                if fib_618 is None or fib_786 is None or pd.isna(fib_618) or pd.isna(fib_786):
-                    return RuleResult(
-                        rule_name=condition_str,
-                        passed=False,
-                        score=0.0,
-                        message="Required Fibonacci levels not available",
-                        details={"current_price": current_price, "fib_levels": fib_levels}
-                    )
-                
-                passed = fib_618 <= current_price <= fib_786
-                if passed:
-                    # 中央値からの距離でスコア計算
-                    center = (fib_618 + fib_786) / 2
-                    distance = abs(current_price - center)
-                    max_distance = (fib_786 - fib_618) / 2
-                    score = max(0.0, 1.0 - distance / max_distance)
+    def build_tick_state(self, data: Dict, symbol: str, analysis_type: str = 'trend_direction') -> TickRuleState:
+        """
+        分析データからティック評価用の状態を作成
+        
+        価格に依存しない条件（確定足の指標のみを参照する条件）はここで一度だけ評価し、
+        形成中の足の価格を参照する条件だけをティックごとの評価対象にする。
+        """
+        rules = []
+        for rule_config in self.rules_config.get('active_rules', []):
+            if not rule_config.get('enabled', False):
+                continue
+            conditions = []
+            for condition in rule_config.get('conditions', []):
+                condition = self._as_rule_condition(condition)
+                compiled = self._compile_condition(condition.expression)
+                conditions.append((condition, None if isinstance(compiled, RuleExpressionError) else compiled))
+            rules.append((rule_config, conditions))
+        
+        # 全条件のコンパイル後に値ベクトルを確定し、ティックで書き換えるためにコピーする
+        values, context = self._rule_snapshot(data)
+        values = list(values)
+        
+        price_slots: Dict[str, List[int]] = {column: [] for column in self.FORMING_BAR_COLUMNS}
+        for slot, (name, _, offset) in enumerate(self.rule_symbols.keys):
+            column = COLUMN_ALIASES.get(name, name)
+            if offset == 0 and column in price_slots:
+                price_slots[column].append(slot)
+        price_sensitive = {slot for slots in price_slots.values() for slot in slots}
+        
+        bar_results: Dict[str, Tuple[bool, float]] = {}
+        tick_conditions: Dict[str, CompiledCondition] = {}
+        for _, conditions in rules:
+            for condition, compiled in conditions:
+                if compiled is None:
+                    continue
+                if price_sensitive.intersection(compiled.slots):
+                    tick_conditions[condition.expression] = compiled
                 else:
-                    score = 0.0
-                
-                message = f"Price: {current_price:.5f} {'∈' if passed else '∉'} [Fib_0.618: {fib_618:.5f}, Fib_0.786: {fib_786:.5f}]"
-                
-            else:
-                return RuleResult(
-                    rule_name=condition_str,
-                    passed=False,
-                    score=0.0,
-                    message="Unknown Fibonacci condition",
-                    details={"current_price": current_price, "fib_levels": fib_levels}
-                )
-            
-            return RuleResult(
-                rule_name=condition_str,
-                passed=passed,
-                score=score,
-                message=message,
-                details={"current_price": current_price, "fib_levels": fib_levels}
-            )
-            
-        except Exception as e:
-            return RuleResult(
-                rule_name=condition_str,
-                passed=False,
-                score=0.0,
-                message=f"Fibonacci evaluation error: {e}",
-                details={}
-            )
-
-    def _evaluate_session_condition(self, condition_str: str) -> RuleResult:
-        """セッション条件の評価"""
-        try:
-            # 現在時刻の取得（JST）
-            now_jst = datetime.now(timezone(timedelta(hours=9)))
-            current_time = now_jst.time()
-            
-            # アクティブセッションの判定
-            active_sessions = []
-            
-            for session_type, times in self.session_times.items():
-                start_time = datetime.strptime(times["start"], "%H:%M").time()
-                end_time = datetime.strptime(times["end"], "%H:%M").time()
-                
-                if start_time <= end_time:
-                    # 同日内のセッション
-                    if start_time <= current_time <= end_time:
-                        active_sessions.append(session_type.value)
+                    bar_results[condition.expression] = compiled.evaluate(values, context)
+        
+        return TickRuleState(
+            symbol=symbol,
+            analysis_type=analysis_type,
+            data=data,
+            values=values,
+            context=context,
+            rules=rules,
+            bar_results=bar_results,
+            tick_conditions=tick_conditions,
+            price_slots=price_slots,
+            risk_passed=self._check_risk_constraints(data, symbol)['passed']
+        )
+
+    def evaluate_tick(self, state: TickRuleState, price: float) -> List[EntrySignal]:
+        """
+        ティック価格でのエントリー条件の評価
+        
+        形成中の足の終値・高値・安値のスロットだけを書き換え、価格に依存する条件だけを再評価する。
+        データベースの参照や指標の再計算は行わない。同じ足で一度シグナルを出したルールは再評価しない。
+        
+        Args:
+            state: prepare_tick_state() / build_tick_state() で作成した状態
+            price: ティックの価格（ミッド）
+        
+        Returns:
+            このティックで新たに条件を満たしたエントリーシグナルのリスト
+        """
+        values = state.values
+        state.ticks += 1
+        state.bar_high = max(state.bar_high, price)
+        state.bar_low = min(state.bar_low, price)
+        for slot in state.price_slots['close']:
+            values[slot] = price
+        for slot in state.price_slots['high']:
+            values[slot] = state.bar_high
+        for slot in state.price_slots['low']:
+            values[slot] = state.bar_low
+        
+        if not state.risk_passed:
+            return []
+        
+        context = state.context
+        tick_results = {expression: compiled.evaluate(values, context)
+                        for expression, compiled in state.tick_conditions.items()}
+        
+        signals = []
+        for rule_config, conditions in state.rules:
+            if rule_config['name'] in state.fired:
+                continue
+            total_score = 0.0
+            total_weight = 0.0
+            for condition, compiled in conditions:
+                if compiled is None:
+                    passed, score = False, 0.0
                 else:
-                    # 日をまたぐセッション（ニューヨーク）
-                    if current_time >= start_time or current_time <= end_time:
-                        active_sessions.append(session_type.value)
-            
-            # 条件の解析
-            if "active_session = Tokyo OR London" in condition_str:
-                required_sessions = ["Tokyo", "London"]
-                passed = any(session in active_sessions for session in required_sessions)
-                score = 1.0 if passed else 0.0
-                message = f"Active sessions: {active_sessions} {'⊃' if passed else '⊅'} {required_sessions}"
-                
-            elif "active_session = London OR NewYork" in condition_str:
-                required_sessions = ["London", "NewYork"]
-                passed = any(session in active_sessions for session in required_sessions)
-                score = 1.0 if passed else 0.0
-                message = f"Active sessions: {active_sessions} {'⊃' if passed else '⊅'} {required_sessions}"
-                
+                    passed, score = tick_results.get(condition.expression) or state.bar_results[condition.expression]
+                if condition.required and not passed:
+                    break
+                total_score += score * condition.weight
+                total_weight += condition.weight
             else:
-                return RuleResult(
-                    rule_name=condition_str,
-                    passed=False,
-                    score=0.0,
-                    message="Unknown session condition",
-                    details={"active_sessions": active_sessions}
-                )
-            
-            return RuleResult(
-                rule_name=condition_str,
-                passed=passed,
-                score=score,
-                message=message,
-                details={"active_sessions": active_sessions, "current_time": current_time}
-            )
-            
-        except Exception as e:
-            return RuleResult(
-                rule_name=condition_str,
-                passed=False,
-                score=0.0,
-                message=f"Session evaluation error: {e}",
-                details={}
+                overall_score = total_score / total_weight if total_weight > 0 else 0.0
+                if overall_score < self.min_signal_score:
+                    continue
+                # メッセージ付きの結果はシグナルを出すときだけ作成
+                rule_results = [self._condition_result(condition, compiled, values, context)
+                                for condition, compiled in conditions]
+                signals.append(self._generate_entry_signal(
+                    rule_config, state.data, rule_results, overall_score, state.symbol, entry_price=price
+                ))
+                state.fired.add(rule_config['name'])
+                self.logger.info(f"✅ ティックシグナル生成: {rule_config['name']} @ {price} (信頼度: {overall_score:.2f})")
+        return signals
+
+    def _rule_snapshot(self, data: Dict) -> Tuple[List[float], Dict[str, Any]]:
+        """
+        条件評価用の値ベクトルとコンテキスト
+        
+        同じ分析データに対する評価では、各スロットの値を一度だけ取り出して全ルールで共有する。
+        シンボル表が増えた場合（未登録の条件式の評価）は追加分だけを解決する。
+        """
+        snapshot = self._snapshot
+        if snapshot is None or snapshot[0] is not data:
+            context: Dict[str, Any] = {"active_session": frozenset(self._active_sessions())}
+            context.update(self._daily_risk_stats())
+            snapshot = self._snapshot = (data, [], context)
+        _, values, context = snapshot
+        if len(values) < len(self.rule_symbols):
+            values.extend(
+                self._resolve_rule_value(data, key, context)
+                for key in self.rule_symbols.keys[len(values):]
             )
-
-    def _evaluate_risk_condition(self, condition_str: str, data: Dict) -> RuleResult:
-        """リスク条件の評価"""
-        try:
-            # 現在のリスク状況を取得（簡易実装）
-            # 実際の実装では、データベースから日次統計を取得
-            
-            if "daily_trades < 5" in condition_str:
-                # 仮の値（実際はデータベースから取得）
-                daily_trades = 2  # 例
-                passed = daily_trades < 5
-                score = max(0.0, 1.0 - daily_trades / 5) if daily_trades < 5 else 0.0
-                message = f"Daily trades: {daily_trades} {'<' if passed else '≥'} 5"
-                
-            elif "daily_risk < 3%" in condition_str:
-                # 仮の値（実際はデータベースから取得）
-                daily_risk = 1.2  # %
-                passed = daily_risk < 3.0
-                score = max(0.0, 1.0 - daily_risk / 3.0) if daily_risk < 3.0 else 0.0
-                message = f"Daily risk: {daily_risk}% {'<' if passed else '≥'} 3%"
-                
+        return values, context
+
+    def _resolve_rule_value(self, data: Dict, key: Tuple[str, Optional[str], int], context: Dict) -> float:
+        """指標参照の値（時間足の指定がなければ列を持つ最初の時間足の値）"""
+        name, timeframe, offset = key
+        if name in context and timeframe is None:
+            return float(context[name]) if offset == 0 else math.nan
+        column = COLUMN_ALIASES.get(name, name)
+        for tf, tf_data in data.get('timeframes', {}).items():
+            if timeframe is not None and tf != timeframe:
+                continue
+            df = tf_data.get('data') if isinstance(tf_data, dict) else None
+            if pd is not None and isinstance(df, pd.DataFrame) and column in df.columns:
+                if len(df) <= offset:
+                    return math.nan
+                value = df[column].iloc[-1 - offset]
+                return math.nan if pd.isna(value) else float(value)
+        return math.nan
+
+    def _active_sessions(self, now: Optional[datetime] = None) -> List[str]:
+        """現在アクティブな取引セッション"""
+        # 現在時刻の取得（JST）
+        now_jst = (now or datetime.now(timezone.utc)).astimezone(timezone(timedelta(hours=9)))
+        current_time = now_jst.time()
+        
+        active_sessions = []
+        for session_type, times in self.session_times.items():
+            start_time = datetime.strptime(times["start"], "%H:%M").time()
+            end_time = datetime.strptime(times["end"], "%H:%M").time()
+            
+            if start_time <= end_time:
+                # 同日内のセッション
+                if start_time <= current_time <= end_time:
+                    active_sessions.append(session_type.value)
             else:
-                return RuleResult(
-                    rule_name=condition_str,
-                    passed=False,
-                    score=0.0,
-                    message="Unknown risk condition",
-                    details={}
-                )
-            
-            return RuleResult(
-                rule_name=condition_str,
-                passed=passed,
-                score=score,
-                message=message,
-                details={"daily_trades": daily_trades if "daily_trades" in condition_str else None,
-                        "daily_risk": daily_risk if "daily_risk" in condition_str else None}
-            )
-            
-        except Exception as e:
-            return RuleResult(
-                rule_name=condition_str,
-                passed=False,
-                score=0.0,
-                message=f"Risk evaluation error: {e}",
-                details={}
-            )
+                # 日をまたぐセッション（ニューヨーク）
+                if current_time >= start_time or current_time <= end_time:
+                    active_sessions.append(session_type.value)
+        return active_sessions
 
-    def _evaluate_volume_condition(self, condition_str: str, data: Dict) -> RuleResult:
-        """ボリューム条件の評価"""
-        try:
-            # 最新のボリューム比率を取得
-            volume_ratio = None
-            
-            for timeframe, tf_data in data['timeframes'].items():
-                df = tf_data['data']
-                if isinstance(df, pd.DataFrame) and 'Volume_Ratio' in df.columns:
-                    volume_ratio = df['Volume_Ratio'].iloc[-1]
-                    break
-            
-            if volume_ratio is None or pd.isna(volume_ratio):
-                return RuleResult(
-                    rule_name=condition_str,
-                    passed=False,
-                    score=0.0,
-                    message="Volume_Ratio data not available",
-                    details={"volume_ratio": volume_ratio}
-                )
-            
-            # 条件の解析
-            if "Volume_Ratio > 1.5" in condition_str:
-                passed = volume_ratio > 1.5
-                score = max(0.0, (volume_ratio - 1.5) / 1.5) if volume_ratio > 1.5 else 0.0
-                message = f"Volume_Ratio: {volume_ratio:.2f} {'>' if passed else '≤'} 1.5"
-                
-            else:
-                return RuleResult(
-                    rule_name=condition_str,
-                    passed=False,
-                    score=0.0,
-                    message="Unknown volume condition",
-                    details={"volume_ratio": volume_ratio}
-                )
-            
-            return RuleResult(
-                rule_name=condition_str,
-                passed=passed,
-                score=score,
-                message=message,
-                details={"volume_ratio": volume_ratio}
-            )
-            
-        except Exception as e:
-            return RuleResult(
-                rule_name=condition_str,
-                passed=False,
-                score=0.0,
-                message=f"Volume evaluation error: {e}",
-                details={}
-            )
+    def _daily_risk_stats(self) -> Dict[str, float]:
+        """日次のトレード数とリスク（%）"""
+        # 仮の値（実際はデータベースから日次統計を取得）
+        return {"daily_trades": 2, "daily_risk": 1.2}
 
     def _check_risk_constraints(self, data: Dict, symbol: str) -> Dict:
         """リスク制約のチェック"""
@@ -932,15 +795,17 @@ class RuleBasedEngine:
                 "details": {}
             }
             
+            stats = self._daily_risk_stats()
+            
             # 日次トレード数チェック
-            daily_trades = 2  # 仮の値
+            daily_trades = stats["daily_trades"]
             if daily_trades >= self.risk_constraints["max_trades_per_day"]:
                 constraints_check["passed"] = False
                 constraints_check["reason"] = f"Daily trades limit exceeded: {daily_trades}/{self.risk_constraints['max_trades_per_day']}"
                 return constraints_check
             
             # 日次リスクチェック
-            daily_risk = 1.2  # 仮の値
+            daily_risk = stats["daily_risk"]
             if daily_risk >= self.risk_constraints["max_risk_per_day"]:
                 constraints_check["passed"] = False
                 constraints_check["reason"] = f"Daily risk limit exceeded: {daily_risk}%/{self.risk_constraints['max_risk_per_day']}%"
@@ -968,7 +833,8 @@ class RuleBasedEngine:
         data: Dict,
         rule_results: List[RuleResult],
         confidence: float,
-        symbol: str
+        symbol: str,
+        entry_price: Optional[float] = None
     ) -> EntrySignal:
         """
         エントリーシグナルの生成
@@ -979,6 +845,7 @@ class RuleBasedEngine:
             rule_results: ルール結果
             confidence: 信頼度
             symbol: 通貨ペアシンボル
+            entry_price: エントリー価格（ティック評価時の価格。Noneの場合は最新足の終値）
         
         Returns:
             エントリーシグナル
@@ -999,6 +866,9 @@ class RuleBasedEngine:
                 if current_price is not None and atr_value is not None:
                     break
             
+            if entry_price is not None:
+                current_price = entry_price
+            
             if current_price is None or atr_value is None:
                 raise ValueError("Required price data not available")
             
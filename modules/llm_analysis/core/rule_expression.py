@@ -0,0 +1,611 @@
+"""
+ルール条件式のパーサーとコンパイラ
+
+rules.yaml の条件文字列（"RSI_14 <= 40", "price BETWEEN Fib_0.382 AND Fib_0.618" など）を
+読み込み時に一度だけ構文解析して型付きの式木にし、評価関数へコンパイルします。
+
+- 指標参照: ``RSI_14`` / ``price`` / ``Fib_0.382``。``RSI_14@1h`` で時間足を指定
+- 数値: ``40`` / ``1.5`` / ``3%``（% はその数値のまま。daily_risk などは%単位）
+- 比較: ``< <= > >= = !=``、範囲: ``x BETWEEN a AND b``
+- クロス: ``MACD CROSSES_ABOVE MACD_Signal``（1本前の足との比較）
+- 論理: ``AND`` / ``OR`` / ``NOT`` / 括弧、四則演算: ``EMA_21 + ATR_14 * 0.5``
+- カテゴリ: ``active_session = Tokyo OR London``
+
+指標参照は SymbolTable のスロット番号に解決され、評価時は値ベクトルのインデックス参照と
+比較だけを行います。閾値は式に書かれた値がそのまま使われるため、閾値の変更にコードの修正は不要です。
+"""
+
+import math
+import operator
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+# 指標名の別名（条件式の表記 → データフレームの列名）
+COLUMN_ALIASES = {'price': 'close'}
+
+# 値ベクトルではなく評価コンテキストの集合と照合するカテゴリ変数
+CATEGORICAL_NAMES = frozenset({'active_session'})
+
+# 指標同士の比較で満点になる相対差（1%の差で1.0）
+RELATIVE_SCORE_SCALE = 10.0
+
+_KEYWORDS = frozenset({'AND', 'OR', 'NOT', 'BETWEEN', 'CROSSES_ABOVE', 'CROSSES_BELOW'})
+
+_TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<number>\d+(?:\.\d+)?)(?P<percent>%)?
+      | (?P<ident>[A-Za-z_][A-Za-z0-9_.]*(?:@[A-Za-z0-9]+)?)
+      | (?P<op><=|>=|!=|==|<|>|=|\+|-|\*|/|\(|\))
+    )""", re.VERBOSE)
+
+_COMPARATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '=': operator.eq,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+# 不成立時のメッセージに使う否定の記号
+_NEGATED_SYMBOLS = {'<': '≥', '<=': '>', '>': '≤', '>=': '<', '=': '≠', '==': '≠', '!=': '='}
+
+_ARITHMETIC = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+}
+
+
+class RuleExpressionError(ValueError):
+    """条件式の構文エラー"""
+
+
+# ---------------------------------------------------------------------------
+# 式木
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Number:
+    """数値リテラル"""
+    value: float
+
+    def __str__(self) -> str:
+        return f"{self.value:g}"
+
+
+@dataclass(frozen=True)
+class Ref:
+    """指標参照（timeframe が None の場合は列を持つ最初の時間足、offset は何本前か）"""
+    name: str
+    timeframe: Optional[str] = None
+    offset: int = 0
+
+    @property
+    def key(self) -> Tuple[str, Optional[str], int]:
+        return (self.name, self.timeframe, self.offset)
+
+    def shifted(self, bars: int) -> 'Ref':
+        return Ref(self.name, self.timeframe, self.offset + bars)
+
+    def __str__(self) -> str:
+        text = self.name if self.timeframe is None else f"{self.name}@{self.timeframe}"
+        return text if self.offset == 0 else f"{text}[-{self.offset}]"
+
+
+@dataclass(frozen=True)
+class Arithmetic:
+    """四則演算"""
+    op: str
+    left: 'Operand'
+    right: 'Operand'
+
+    def __str__(self) -> str:
+        return f"({self.left} {self.op} {self.right})"
+
+
+@dataclass(frozen=True)
+class Negate:
+    """単項マイナス"""
+    operand: 'Operand'
+
+    def __str__(self) -> str:
+        return f"-{self.operand}"
+
+
+Operand = Union[Number, Ref, Arithmetic, Negate]
+
+
+@dataclass(frozen=True)
+class Compare:
+    """二項比較"""
+    op: str
+    left: Operand
+    right: Operand
+
+
+@dataclass(frozen=True)
+class Between:
+    """範囲判定（境界を含む。下限と上限の記述順は問わない）"""
+    operand: Operand
+    low: Operand
+    high: Operand
+
+
+@dataclass(frozen=True)
+class Cross:
+    """クロス判定（above: 1本前は left <= right、現在は left > right）"""
+    above: bool
+    left: Operand
+    right: Operand
+
+
+@dataclass(frozen=True)
+class InSet:
+    """カテゴリ変数の集合判定（active_session = Tokyo OR London）"""
+    name: str
+    values: Tuple[str, ...]
+    negated: bool = False
+
+
+@dataclass(frozen=True)
+class BoolOp:
+    """AND / OR"""
+    op: str
+    terms: Tuple['Expression', ...]
+
+
+@dataclass(frozen=True)
+class Not:
+    """否定"""
+    term: 'Expression'
+
+
+Expression = Union[Compare, Between, Cross, InSet, BoolOp, Not]
+
+
+# ---------------------------------------------------------------------------
+# 構文解析
+# ---------------------------------------------------------------------------
+
+def tokenize(expression: str) -> List[Tuple[str, str]]:
+    """条件式を (種別, 値) のトークン列に分解"""
+    tokens = []
+    position = 0
+    text = expression.rstrip()
+    while position < len(text):
+        match = _TOKEN_PATTERN.match(text, position)
+        if match is None or match.end() == position:
+            raise RuleExpressionError(f"解釈できない文字があります: {expression!r} (位置 {position})")
+        position = match.end()
+        if match.group('number') is not None:
+            tokens.append(('number', match.group('number')))
+        elif match.group('ident') is not None:
+            word = match.group('ident')
+            tokens.append(('keyword', word.upper()) if word.upper() in _KEYWORDS else ('ident', word))
+        else:
+            tokens.append(('op', match.group('op')))
+    return tokens
+
+
+class _Parser:
+    """再帰下降パーサー"""
+
+    def __init__(self, expression: str, constants: Mapping[str, float]):
+        self.expression = expression
+        self.tokens = tokenize(expression)
+        self.position = 0
+        self.constants = constants
+
+    def parse(self) -> Expression:
+        if not self.tokens:
+            raise RuleExpressionError("条件式が空です")
+        node = self._or()
+        if self.position != len(self.tokens):
+            raise self._error(f"余分なトークン {self.tokens[self.position][1]!r}")
+        return node
+
+    # --- トークン操作 ---
+
+    def _peek(self) -> Optional[Tuple[str, str]]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _accept(self, kind: str, value: Optional[str] = None) -> Optional[str]:
+        token = self._peek()
+        if token is not None and token[0] == kind and (value is None or token[1] == value):
+            self.position += 1
+            return token[1]
+        return None
+
+    def _expect(self, kind: str, value: Optional[str] = None) -> str:
+        accepted = self._accept(kind, value)
+        if accepted is None:
+            found = self._peek()
+            raise self._error(f"{value or kind} が必要です（{found[1] if found else '終端'}）")
+        return accepted
+
+    def _error(self, message: str) -> RuleExpressionError:
+        return RuleExpressionError(f"{message}: {self.expression!r}")
+
+    # --- 論理式 ---
+
+    def _or(self) -> Expression:
+        terms = [self._and()]
+        while self._accept('keyword', 'OR'):
+            terms.append(self._and())
+        return terms[0] if len(terms) == 1 else BoolOp('OR', tuple(terms))
+
+    def _and(self) -> Expression:
+        terms = [self._not()]
+        while self._accept('keyword', 'AND'):
+            terms.append(self._not())
+        return terms[0] if len(terms) == 1 else BoolOp('AND', tuple(terms))
+
+    def _not(self) -> Expression:
+        if self._accept('keyword', 'NOT'):
+            return Not(self._not())
+        if self._peek() == ('op', '('):
+            # "(A OR B)" と "(ATR * 1.5) > x" の区別のため、論理式として読めなければ巻き戻す
+            start = self.position
+            self.position += 1
+            try:
+                node = self._or()
+                self._expect('op', ')')
+                following = self._peek()
+                if following is None or following[0] == 'keyword' or following == ('op', ')'):
+                    return node
+            except RuleExpressionError:
+                pass
+            self.position = start
+        return self._predicate()
+
+    def _predicate(self) -> Expression:
+        token = self._peek()
+        if token is not None and token[0] == 'ident' and token[1] in CATEGORICAL_NAMES:
+            return self._categorical()
+
+        left = self._additive()
+        if self._accept('keyword', 'BETWEEN'):
+            low = self._additive()
+            self._expect('keyword', 'AND')
+            return Between(left, low, self._additive())
+        if self._accept('keyword', 'CROSSES_ABOVE'):
+            return Cross(True, left, self._additive())
+        if self._accept('keyword', 'CROSSES_BELOW'):
+            return Cross(False, left, self._additive())
+        token = self._peek()
+        if token is None or token[0] != 'op' or token[1] not in _COMPARATORS:
+            raise self._error("比較演算子が必要です")
+        self.position += 1
+        return Compare(token[1], left, self._additive())
+
+    def _categorical(self) -> InSet:
+        name = self._expect('ident')
+        token = self._peek()
+        if token not in (('op', '='), ('op', '=='), ('op', '!=')):
+            raise self._error(f"{name} には = または != が必要です")
+        self.position += 1
+        values = [self._expect('ident')]
+        # カテゴリ値の OR は集合の列挙（次が比較を伴う条件であれば論理演算子として残す）
+        while self._peek() == ('keyword', 'OR') and self._is_bare_word(self.position + 1):
+            self.position += 1
+            values.append(self._expect('ident'))
+        return InSet(name, tuple(values), negated=token[1] == '!=')
+
+    def _is_bare_word(self, index: int) -> bool:
+        if index >= len(self.tokens) or self.tokens[index][0] != 'ident':
+            return False
+        following = self.tokens[index + 1] if index + 1 < len(self.tokens) else None
+        return following is None or following[0] == 'keyword' or following == ('op', ')')
+
+    # --- 算術式 ---
+
+    def _additive(self) -> Operand:
+        node = self._multiplicative()
+        while True:
+            op = self._accept('op', '+') or self._accept('op', '-')
+            if op is None:
+                return node
+            node = Arithmetic(op, node, self._multiplicative())
+
+    def _multiplicative(self) -> Operand:
+        node = self._unary()
+        while True:
+            op = self._accept('op', '*') or self._accept('op', '/')
+            if op is None:
+                return node
+            node = Arithmetic(op, node, self._unary())
+
+    def _unary(self) -> Operand:
+        if self._accept('op', '-'):
+            operand = self._unary()
+            return Number(-operand.value) if isinstance(operand, Number) else Negate(operand)
+        if self._accept('op', '('):
+            node = self._additive()
+            self._expect('op', ')')
+            return node
+        number = self._accept('number')
+        if number is not None:
+            # "3%" は%単位の値としてそのまま 3 を使う（% はトークン化の時点で読み捨て）
+            return Number(float(number))
+        word = self._accept('ident')
+        if word is None:
+            found = self._peek()
+            raise self._error(f"値が必要です（{found[1] if found else '終端'}）")
+        name, _, timeframe = word.partition('@')
+        if not timeframe and name in self.constants:
+            return Number(float(self.constants[name]))
+        return Ref(name, timeframe or None)
+
+
+def parse_expression(expression: str, constants: Optional[Mapping[str, float]] = None) -> Expression:
+    """
+    条件式を式木に変換
+
+    Args:
+        expression: 条件文字列
+        constants: 名前で参照できる定数（rules.yaml の parameters など）
+
+    Raises:
+        RuleExpressionError: 構文が正しくない場合
+    """
+    return _Parser(expression, constants or {}).parse()
+
+
+# ---------------------------------------------------------------------------
+# コンパイル
+# ---------------------------------------------------------------------------
+
+class SymbolTable:
+    """指標参照 (name, timeframe, offset) と値ベクトルのスロット番号の対応"""
+
+    def __init__(self):
+        self.keys: List[Tuple[str, Optional[str], int]] = []
+        self._slots: Dict[Tuple[str, Optional[str], int], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def slot(self, ref: Ref) -> int:
+        slot = self._slots.get(ref.key)
+        if slot is None:
+            slot = self._slots[ref.key] = len(self.keys)
+            self.keys.append(ref.key)
+        return slot
+
+
+Values = Sequence[float]
+Context = Mapping[str, object]
+Evaluator = Callable[[Values, Context], Tuple[bool, float]]
+
+
+def _is_missing(value: float) -> bool:
+    return value is None or value != value
+
+
+def _relative_score(a: float, b: float) -> float:
+    """指標同士の比較の余裕度（相対差を RELATIVE_SCORE_SCALE 倍して 0-1 に制限）"""
+    return min(1.0, abs(a - b) / abs(b) * RELATIVE_SCORE_SCALE) if b else 1.0
+
+
+def _threshold_score(op: str, value: float, threshold: float) -> float:
+    """
+    閾値比較の余裕度
+
+    境界を含む比較（<=, >=）と等号は帯の内側にあれば満点、
+    厳密な比較（<, >）は閾値からの相対距離を 0-1 に制限したもの
+    """
+    if op in ('<', '>') and threshold:
+        return min(1.0, abs(value - threshold) / abs(threshold))
+    return 1.0
+
+
+class _Compiler:
+    """式木を値ベクトル上の評価関数に変換"""
+
+    def __init__(self, symbols: SymbolTable):
+        self.symbols = symbols
+        self.refs: List[Ref] = []
+
+    def _ref(self, ref: Ref) -> int:
+        if ref not in self.refs:
+            self.refs.append(ref)
+        return self.symbols.slot(ref)
+
+    def operand(self, node: Operand, shift: int = 0) -> Callable[[Values], float]:
+        if isinstance(node, Number):
+            value = node.value
+            return lambda values: value
+        if isinstance(node, Ref):
+            slot = self._ref(node.shifted(shift))
+            return lambda values: values[slot]
+        if isinstance(node, Negate):
+            inner = self.operand(node.operand, shift)
+            return lambda values: -inner(values)
+        left, right = self.operand(node.left, shift), self.operand(node.right, shift)
+        combine = _ARITHMETIC[node.op]
+
+        def arithmetic(values: Values) -> float:
+            a, b = left(values), right(values)
+            if node.op == '/' and b == 0:
+                return math.nan
+            return combine(a, b)
+        return arithmetic
+
+    def expression(self, node: Expression) -> Evaluator:
+        if isinstance(node, Compare):
+            return self._compare(node)
+        if isinstance(node, Between):
+            return self._between(node)
+        if isinstance(node, Cross):
+            return self._cross(node)
+        if isinstance(node, InSet):
+            return self._in_set(node)
+        if isinstance(node, Not):
+            inner = self.expression(node.term)
+
+            def negate(values: Values, context: Context) -> Tuple[bool, float]:
+                passed = not inner(values, context)[0]
+                return passed, 1.0 if passed else 0.0
+            return negate
+        terms = [self.expression(term) for term in node.terms]
+        if node.op == 'AND':
+            def conjunction(values: Values, context: Context) -> Tuple[bool, float]:
+                score = 1.0
+                for term in terms:
+                    passed, term_score = term(values, context)
+                    if not passed:
+                        return False, 0.0
+                    score = min(score, term_score)
+                return True, score
+            return conjunction
+
+        def disjunction(values: Values, context: Context) -> Tuple[bool, float]:
+            best = None
+            for term in terms:
+                passed, term_score = term(values, context)
+                if passed and (best is None or term_score > best):
+                    best = term_score
+            return (False, 0.0) if best is None else (True, best)
+        return disjunction
+
+    def _compare(self, node: Compare) -> Evaluator:
+        compare, op = _COMPARATORS[node.op], node.op
+        # 指標と定数の比較（最も多い形）はインデックス参照1回と比較1回に特化
+        if isinstance(node.left, Ref) and isinstance(node.right, Number):
+            slot, threshold = self._ref(node.left), node.right.value
+
+            def ref_threshold(values: Values, context: Context) -> Tuple[bool, float]:
+                value = values[slot]
+                if not compare(value, threshold) or value != value:
+                    return False, 0.0
+                return True, _threshold_score(op, value, threshold)
+            return ref_threshold
+        if isinstance(node.left, Ref) and isinstance(node.right, Ref):
+            left_slot, right_slot = self._ref(node.left), self._ref(node.right)
+
+            def ref_ref(values: Values, context: Context) -> Tuple[bool, float]:
+                a, b = values[left_slot], values[right_slot]
+                if not compare(a, b) or a != a or b != b:
+                    return False, 0.0
+                return True, 1.0 if op in ('=', '==', '!=') else _relative_score(a, b)
+            return ref_ref
+
+        left, right = self.operand(node.left), self.operand(node.right)
+        constant = isinstance(node.right, Number)
+
+        def general(values: Values, context: Context) -> Tuple[bool, float]:
+            a, b = left(values), right(values)
+            if not compare(a, b) or a != a or b != b:
+                return False, 0.0
+            if constant:
+                return True, _threshold_score(op, a, b)
+            return True, 1.0 if op in ('=', '==', '!=') else _relative_score(a, b)
+        return general
+
+    def _between(self, node: Between) -> Evaluator:
+        value, low, high = self.operand(node.operand), self.operand(node.low), self.operand(node.high)
+
+        def between(values: Values, context: Context) -> Tuple[bool, float]:
+            x, a, b = value(values), low(values), high(values)
+            if a > b:
+                a, b = b, a
+            if not a <= x <= b:
+                return False, 0.0
+            # 範囲の中央からの距離でスコア計算
+            half_width = (b - a) / 2
+            return True, max(0.0, 1.0 - abs(x - (a + b) / 2) / half_width) if half_width else 1.0
+        return between
+
+    def _cross(self, node: Cross) -> Evaluator:
+        left, right = self.operand(node.left), self.operand(node.right)
+        previous_left, previous_right = self.operand(node.left, 1), self.operand(node.right, 1)
+        above = node.above
+
+        def cross(values: Values, context: Context) -> Tuple[bool, float]:
+            a, b = left(values), right(values)
+            prev_a, prev_b = previous_left(values), previous_right(values)
+            if above:
+                passed = prev_a <= prev_b and a > b
+            else:
+                passed = prev_a >= prev_b and a < b
+            return (True, 1.0) if passed else (False, 0.0)
+        return cross
+
+    def _in_set(self, node: InSet) -> Evaluator:
+        name, wanted, negated = node.name, frozenset(node.values), node.negated
+
+        def in_set(values: Values, context: Context) -> Tuple[bool, float]:
+            matched = not wanted.isdisjoint(context.get(name) or ())
+            passed = matched != negated
+            return passed, 1.0 if passed else 0.0
+        return in_set
+
+
+@dataclass
+class CompiledCondition:
+    """コンパイル済みの条件式"""
+    expression: str
+    tree: Expression
+    evaluate: Evaluator
+    refs: Tuple[Ref, ...]
+    slots: Tuple[int, ...]
+
+    def describe(self, values: Values, context: Context) -> Tuple[str, Dict[str, object]]:
+        """判定結果のメッセージと参照した値（RuleResult 用。評価の高速経路では使わない）"""
+        details: Dict[str, object] = {str(ref): values[slot] for ref, slot in zip(self.refs, self.slots)}
+        missing = [name for name, value in details.items() if _is_missing(value)]
+        if missing:
+            return f"{', '.join(missing)} data not available", details
+        tree = self.tree
+        if isinstance(tree, InSet):
+            active = sorted(context.get(tree.name) or ())
+            details[tree.name] = active
+            passed = self.evaluate(values, context)[0]
+            return f"{tree.name}: {active} {'⊃' if passed else '⊅'} {list(tree.values)}", details
+        if isinstance(tree, Compare):
+            passed = self.evaluate(values, context)[0]
+            symbol = tree.op if passed else _NEGATED_SYMBOLS[tree.op]
+            return f"{self._format(tree.left, values)} {symbol} {self._format(tree.right, values)}", details
+        if isinstance(tree, Between):
+            passed = self.evaluate(values, context)[0]
+            return (f"{self._format(tree.operand, values)} {'∈' if passed else '∉'} "
+                    f"[{self._format(tree.low, values)}, {self._format(tree.high, values)}]"), details
+        passed = self.evaluate(values, context)[0]
+        return f"{self.expression}: {'passed' if passed else 'not passed'}", details
+
+    def _format(self, node: Operand, values: Values) -> str:
+        if isinstance(node, Number):
+            return str(node)
+        if isinstance(node, Ref):
+            return f"{node}: {values[self.slots[self.refs.index(node)]]:.6g}"
+        return str(node)
+
+
+def compile_expression(expression: str, symbols: SymbolTable,
+                       constants: Optional[Mapping[str, float]] = None) -> CompiledCondition:
+    """
+    条件式を構文解析して評価関数にコンパイル
+
+    Args:
+        expression: 条件文字列
+        symbols: 指標参照のスロットを割り当てるシンボル表（複数の条件で共有）
+        constants: 名前で参照できる定数
+
+    Returns:
+        evaluate(values, context) -> (passed, score) を持つコンパイル済み条件
+    """
+    tree = parse_expression(expression, constants)
+    compiler = _Compiler(symbols)
+    evaluate = compiler.expression(tree)
+    refs = tuple(compiler.refs)
+    return CompiledCondition(
+        expression=expression,
+        tree=tree,
+        evaluate=evaluate,
+        refs=refs,
+        slots=tuple(symbols.slot(ref) for ref in refs),
+    )
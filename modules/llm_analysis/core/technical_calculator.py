@@ -8,7 +8,11 @@
 3. 執行判断（M5）: エントリータイミングの最適化
 """
 
+import hashlib
+import json
 import logging
+import math
+import time
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timezone
 
@@ -27,6 +31,9 @@ try:
 except ImportError:
     np = None
 
+from .incremental_indicators import IncrementalIndicatorEngine
+from .performance_monitor import performance_monitor
+
 logger = logging.getLogger(__name__)
 
 
@@ -67,6 +74,13 @@ class TechnicalIndicatorCalculator:
             }
         }
         
+        # インクリメンタルモード用の指標状態（symbol, timeframe ごと）
+        self.incremental_engine = IncrementalIndicatorEngine(swing_periods={
+            timeframe: config['swing_periods']
+            for configs in self.fibonacci_config.values()
+            for timeframe, config in configs.items()
+        })
+        
         # 運用方針に基づく指標設定
         self.indicator_config = {
             "trend_direction": {  # 大局判断（D1・H4）
@@ -116,6 +130,14 @@ class TechnicalIndicatorCalculator:
             }
         }
     
+    def config_hash(self) -> str:
+        """指標・フィボナッチ設定のハッシュ（指標値キャッシュのキー用）"""
+        payload = json.dumps(
+            {'indicator_config': self.indicator_config, 'fibonacci_config': self.fibonacci_config},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
     def calculate_all_indicators(self, data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
         """全時間足のテクニカル指標を計算"""
         self.logger.info("📊 階層的テクニカル指標計算開始")
@@ -131,7 +153,11 @@ class TechnicalIndicatorCalculator:
                 continue
             
             # 指標計算
+            started = time.perf_counter()
             df_with_indicators = self._calculate_timeframe_indicators(df, timeframe)
+            performance_monitor.record_metric(
+                'technical_calculation_time', time.perf_counter() - started, {'timeframe': timeframe}
+            )
             result[timeframe] = df_with_indicators
             
             self.logger.info(f"✅ {timeframe}足: {len(df_with_indicators.columns)}個の指標を計算")
@@ -139,6 +165,243 @@ class TechnicalIndicatorCalculator:
         self.logger.info("📊 階層的テクニカル指標計算完了")
         return result
     
+    def calculate_latest_incremental(self, symbol: str, timeframe: str, df: pd.DataFrame) -> Optional[Dict]:
+        """
+        インクリメンタルモードで最新足の指標値を計算
+        
+        初回（または履歴が途切れた場合）はdfの全履歴で状態をウォームアップし、
+        以降は前回より新しい足だけを O(1) で反映します。前回の最新足が同じタイムスタンプのまま
+        更新されていた場合（形成中の足）は、その足を差し替えて再計算します。
+        
+        Args:
+            symbol: シンボル
+            timeframe: 時間足
+            df: 時系列順のOHLCVデータ（timestamp列またはDatetimeIndex）
+            
+        Returns:
+            最新足の指標値の辞書（データが無効な場合はNone）
+        """
+        if df is None or df.empty:
+            return None
+        
+        timestamps = self._bar_timestamps(df)
+        engine = self.incremental_engine
+        state = engine.get_state(symbol, timeframe)
+        
+        # タイムスタンプがない、状態がない、または履歴に空白がある場合はウォームアップ
+        if (
+            timestamps is None
+            or timestamps[-1] is None
+            or state is None
+            or state.last_timestamp is None
+            or timestamps[0] > state.last_timestamp
+            or timestamps[-1] < state.last_timestamp
+        ):
+            self.logger.debug(f"インクリメンタル指標を再構築: {symbol} {timeframe} ({len(df)}本)")
+            return engine.warm_up(symbol, timeframe, self._to_bar_records(df, timestamps))
+        
+        # 前回の最新足以降だけを変換して反映
+        last_timestamp = state.last_timestamp
+        start = int(timestamps.searchsorted(last_timestamp))
+        latest = None
+        for bar in self._to_bar_records(df, timestamps, start):
+            if bar['timestamp'] > last_timestamp:
+                latest = engine.update(symbol, timeframe, bar)
+            elif bar['timestamp'] == last_timestamp and engine.is_revision(symbol, timeframe, bar):
+                latest = engine.revise_last(symbol, timeframe, bar)
+        
+        return latest if latest is not None else engine.get_latest(symbol, timeframe)
+    
+    def calculate_latest_indicators(self, symbol: str, timeframe: str, df: pd.DataFrame) -> Optional[Dict]:
+        """
+        最新足の全指標値を計算（calculate_all_indicators の最終行と同じ列）
+        
+        TA-Libの指標・ボリューム系・スイングポイントはインクリメンタルモードで新しい足の分だけ更新し、
+        状態判定やフィボナッチなどの派生指標はその最新値と直近の指標値から求めます。
+        DataFrameの再構築や全履歴の再計算は行いません。
+        
+        Args:
+            symbol: シンボル
+            timeframe: 時間足
+            df: 時系列順のOHLCVデータ（timestamp列またはDatetimeIndex）
+            
+        Returns:
+            最新足の指標値の辞書（データが無効な場合はNone）
+        """
+        if df is None or not self._validate_latest_data(df):
+            return None
+        latest = self.calculate_latest_incremental(symbol, timeframe, df)
+        if latest is None:
+            return None
+        
+        started = time.perf_counter()
+        history = self.incremental_engine.get_history(symbol, timeframe)[-len(df):]
+        row = {column: df[column].iat[-1] for column in df.columns if column not in latest}
+        for name in ('open', 'high', 'low', 'close', 'volume', *IncrementalIndicatorEngine.SUPPORTED_INDICATORS):
+            row[name] = latest[name]
+        # _check_volume_availability と同じ判定（dfには列を追加しない）
+        row['volume_available'] = bool((df['volume'].to_numpy() != 0).any())
+        
+        self._add_latest_derived_indicators(row, history, timeframe)
+        self._add_latest_fibonacci_indicators(row, latest, timeframe)
+        self._add_latest_timeframe_specific_indicators(row, history, timeframe)
+        performance_monitor.record_metric(
+            'technical_calculation_time', time.perf_counter() - started, {'timeframe': timeframe}
+        )
+        return row
+    
+    @staticmethod
+    def _past(history: List[Dict], column: str, bars_ago: int) -> float:
+        """bars_ago 本前の指標値（履歴が足りない場合はNaN）"""
+        return history[-1 - bars_ago][column] if len(history) > bars_ago else float('nan')
+    
+    def _add_latest_derived_indicators(self, row: Dict, history: List[Dict], timeframe: str) -> None:
+        """最新足の状態判定（_determine_* と同じ条件）"""
+        row['ADXR'] = (row['ADX'] + self._past(history, 'ADX', 13)) / 2
+        
+        if row['EMA_21'] > row['EMA_55'] and row['EMA_55'] > row['EMA_200']:
+            row['Trend_Direction'] = 'BULLISH'
+        elif row['EMA_21'] < row['EMA_55'] and row['EMA_55'] < row['EMA_200']:
+            row['Trend_Direction'] = 'BEARISH'
+        else:
+            row['Trend_Direction'] = 'SIDEWAYS'
+        
+        if row['RSI_14'] > 70 or row['Stochastic_K'] > 80:
+            row['Momentum_State'] = 'OVERBOUGHT'
+        elif row['RSI_14'] < 30 or row['Stochastic_K'] < 20:
+            row['Momentum_State'] = 'OVERSOLD'
+        else:
+            row['Momentum_State'] = 'NEUTRAL'
+        
+        # 直近50本のATRにおける最新値の順位（rolling(50).rank(pct=True) と同じ平均順位）
+        window = [bar['ATR_14'] for bar in history[-50:]]
+        atr_percentile = float('nan')
+        if len(window) == 50 and not any(math.isnan(value) for value in window):
+            current = window[-1]
+            less = sum(1 for value in window if value < current)
+            equal = sum(1 for value in window if value == current)
+            atr_percentile = (less + (equal + 1) / 2) / 50
+        if atr_percentile > 0.8:
+            row['Volatility_State'] = 'HIGH'
+        elif atr_percentile < 0.2:
+            row['Volatility_State'] = 'LOW'
+        else:
+            row['Volatility_State'] = 'NORMAL'
+        
+        if row['Volume_Ratio'] > 1.5:
+            row['Volume_State'] = 'HIGH'
+        elif row['Volume_Ratio'] < 0.5:
+            row['Volume_State'] = 'LOW'
+        else:
+            row['Volume_State'] = 'NORMAL'
+    
+    def _add_latest_fibonacci_indicators(self, row: Dict, latest: Dict, timeframe: str) -> None:
+        """エンジンが確定した最新のスイングハイ・ローから最新足のフィボナッチ指標を計算"""
+        fib_config = self._get_fibonacci_config(timeframe)
+        if not fib_config:
+            return
+        
+        row['Fibonacci_Position'] = 'UNKNOWN'
+        latest_high, latest_low = latest.get('Swing_High'), latest.get('Swing_Low')
+        if latest_high is None or math.isnan(latest_high):
+            return
+        
+        diff = latest_high - latest_low
+        fib_levels = {level: latest_high - (diff * level) for level in fib_config['levels']}
+        for level, value in fib_levels.items():
+            row[f'Fib_{level}'] = value
+        for ext in fib_config['extensions']:
+            row[f'Fib_Ext_{ext}'] = latest_high + (diff * (ext - 1.0))
+        
+        # _determine_fibonacci_position と同じく、後のレベルの判定で上書き
+        close = row['close']
+        levels = sorted(fib_levels.items())
+        for i, (level, price) in enumerate(levels):
+            if i == 0:
+                if close >= price:
+                    row['Fibonacci_Position'] = f'ABOVE_{level}'
+            else:
+                prev_level, prev_price = levels[i - 1]
+                if price <= close < prev_price:
+                    row['Fibonacci_Position'] = f'BETWEEN_{prev_level}_{level}'
+    
+    def _add_latest_timeframe_specific_indicators(self, row: Dict, history: List[Dict], timeframe: str) -> None:
+        """最新足の時間足固有の指標（_calculate_timeframe_specific_indicators と同じ列）"""
+        if timeframe in ["1d", "4h"]:
+            slopes = [row[f'EMA_{period}'] - self._past(history, f'EMA_{period}', 5) for period in (21, 55, 200)]
+            row['Long_Trend_Strength'] = sum(slopes) / len(slopes)
+            row['Trend_Consistency'] = (
+                int(slopes[0] * slopes[1] > 0) + int(slopes[0] * slopes[2] > 0) + int(slopes[1] * slopes[2] > 0)
+            ) / 3
+        elif timeframe == "1h":
+            if row['close'] < row['BB_Lower']:
+                row['Entry_Zone'] = 'SELL_ZONE'
+            elif row['close'] > row['BB_Upper']:
+                row['Entry_Zone'] = 'BUY_ZONE'
+            else:
+                row['Entry_Zone'] = 'NEUTRAL'
+            recent = history[-20:]
+            full = len(recent) == 20
+            row['Support_Level'] = min(bar['low'] for bar in recent) if full else float('nan')
+            row['Resistance_Level'] = max(bar['high'] for bar in recent) if full else float('nan')
+        elif timeframe == "5m":
+            if row['RSI_14'] < 30 and row['Stochastic_K'] < 20:
+                row['Entry_Timing'] = 'BUY_TIMING'
+            elif row['RSI_14'] > 70 and row['Stochastic_K'] > 80:
+                row['Entry_Timing'] = 'SELL_TIMING'
+            else:
+                row['Entry_Timing'] = 'WAIT'
+            row['Short_Momentum'] = row['RSI_7'] - self._past(history, 'RSI_7', 3)
+        
+        if row['MACD'] > row['MACD_Signal'] and row['EMA_21'] > row['EMA_55']:
+            row['Trend_Reinforcement'] = 1
+        elif row['MACD'] < row['MACD_Signal'] and row['EMA_21'] < row['EMA_55']:
+            row['Trend_Reinforcement'] = -1
+        else:
+            row['Trend_Reinforcement'] = 0
+        
+        if row['RSI_14'] < 30:
+            row['Counter_Trend_Condition'] = 'COUNTER_BUY'
+        elif row['RSI_14'] > 70:
+            row['Counter_Trend_Condition'] = 'COUNTER_SELL'
+        else:
+            row['Counter_Trend_Condition'] = 'NONE'
+    
+    @staticmethod
+    def _bar_timestamps(df: pd.DataFrame):
+        """足のタイムスタンプ配列（timestamp列またはDatetimeIndex、どちらもなければNone）"""
+        if 'timestamp' in df.columns:
+            return df['timestamp'].array
+        if isinstance(df.index, pd.DatetimeIndex):
+            return df.index.array
+        return None
+    
+    def _to_bar_records(self, df: pd.DataFrame, timestamps=None, start: int = 0) -> List[Dict]:
+        """DataFrameをインクリメンタル計算用の足リストに変換（start 行目以降）"""
+        columns = [(column, df[column].to_numpy()) for column in ('open', 'high', 'low', 'close', 'volume')]
+        records = []
+        for i in range(start, len(df)):
+            record = {column: values[i] for column, values in columns}
+            record['timestamp'] = timestamps[i] if timestamps is not None else None
+            records.append(record)
+        return records
+    
+    def _validate_latest_data(self, df: pd.DataFrame) -> bool:
+        """最新足の計算用のデータ妥当性チェック（_validate_data と同じ条件、dfは変更しない）"""
+        if df.empty:
+            return False
+        
+        for col in ['open', 'high', 'low', 'close', 'volume']:
+            if col not in df.columns:
+                self.logger.error(f"❌ 必須カラム '{col}' が見つかりません")
+                return False
+        
+        if np.isnan(df['close'].to_numpy(dtype=np.float64)).all():
+            self.logger.error("❌ 価格データが全てNaNです")
+            return False
+        
+        return True
+    
     def _validate_data(self, df: pd.DataFrame) -> bool:
         """データの妥当性チェック"""
         required_columns = ['open', 'high', 'low', 'close', 'volume']
@@ -11,7 +11,8 @@ import asyncio
 import decimal
 import logging
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Hashable, Mapping, Optional, List
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
 import pytz
@@ -20,6 +21,11 @@ import pytz
 sys.path.append(str(Path(__file__).parent.parent.parent.parent))
 
 from modules.llm_analysis.core.pattern_loader import PatternLoader
+from modules.llm_analysis.core.pattern_compiler import PatternCompiler, CompiledGatePlan, CompiledVariant
+from modules.llm_analysis.core.gate_memo import GateResultMemo
+from modules.llm_analysis.core.condition_ordering import ConditionOrdering
+from modules.llm_analysis.core.gate_trace import GateLogSettings, GateTrace
+from modules.llm_analysis.core.indicator_table import IndicatorTable
 from modules.llm_analysis.core.technical_calculator import TechnicalIndicatorCalculator
 from modules.llm_analysis.core.performance_monitor import performance_monitor, measure_async_time
 
@@ -64,55 +70,33 @@ class ConditionEvaluator:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        # 評価中のスナップショットのシンボルテーブル
+        self._table: Optional[IndicatorTable] = None
+    
+    @contextmanager
+    def snapshot(self, indicators: Dict[str, Any]):
+        """
+        スナップショットの評価中、指標の解決結果と欠損警告を共有する
+        
+        スコープ内ではスナップショットを書き換えないこと（解決結果がキャッシュされるため）
+        """
+        previous = self._table
+        self._table = IndicatorTable(indicators)
+        try:
+            yield self._table
+        finally:
+            self._table = previous
+    
+    def table_for(self, indicators: Dict[str, Any]) -> IndicatorTable:
+        """スナップショットのシンボルテーブルを取得（評価中のスナップショット以外は新規作成）"""
+        table = self._table
+        if table is not None and table.source is indicators:
+            return table
+        return IndicatorTable(indicators)
     
     def _get_indicator_value(self, indicators: Dict[str, Any], indicator_name: str, timeframe: str) -> Any:
         """時間足プレフィックスを考慮した指標値の取得"""
-        # 1. 時間足プレフィックス付きで検索
-        prefixed_name = f"{timeframe}_{indicator_name}"
-        if prefixed_name in indicators:
-            value = indicators[prefixed_name]
-            # DataFrameの場合は最新の値を取得
-            if hasattr(value, 'iloc') and hasattr(value, 'columns'):
-                if indicator_name in value.columns:
-                    latest_value = value[indicator_name].iloc[-1]
-                    self.logger.debug(f"指標 {indicator_name} を {timeframe} 時間足で発見: {prefixed_name} = {latest_value}")
-                    return latest_value
-            else:
-                self.logger.debug(f"指標 {indicator_name} を {timeframe} 時間足で発見: {prefixed_name} = {value}")
-                return value
-        
-        # 2. 元の名前で検索
-        if indicator_name in indicators:
-            value = indicators[indicator_name]
-            # DataFrameの場合は最新の値を取得
-            if hasattr(value, 'iloc') and hasattr(value, 'columns'):
-                if indicator_name in value.columns:
-                    latest_value = value[indicator_name].iloc[-1]
-                    self.logger.debug(f"指標 {indicator_name} を元の名前で発見: {latest_value}")
-                    return latest_value
-            else:
-                self.logger.debug(f"指標 {indicator_name} を元の名前で発見: {value}")
-                return value
-        
-        # 3. 他の時間足で検索（フォールバック）
-        timeframes = ['1d', '4h', '1h', '5m']
-        for tf in timeframes:
-            if tf != timeframe:
-                fallback_name = f"{tf}_{indicator_name}"
-                if fallback_name in indicators:
-                    value = indicators[fallback_name]
-                    # DataFrameの場合は最新の値を取得
-                    if hasattr(value, 'iloc') and hasattr(value, 'columns'):
-                        if indicator_name in value.columns:
-                            latest_value = value[indicator_name].iloc[-1]
-                            self.logger.debug(f"指標 {indicator_name} を {tf} 時間足で発見: {fallback_name} = {latest_value}")
-                            return latest_value
-                    else:
-                        self.logger.debug(f"指標 {indicator_name} を {tf} 時間足で発見: {fallback_name} = {value}")
-                        return value
-        
-        self.logger.warning(f"指標 {indicator_name} が見つかりません (時間足: {timeframe})")
-        return None
+        return self.table_for(indicators).get(indicator_name, timeframe)
     
     async def evaluate_condition(self, indicators: Dict[str, Any], condition: Dict[str, Any]) -> float:
         """
@@ -137,7 +121,7 @@ class ConditionEvaluator:
                 return 0.0
             indicator_value = self._get_indicator_value(indicators, indicator_name, timeframe)
             if indicator_value is None:
-                self.logger.warning(f"指標が見つかりません: {indicator_name} (時間足: {timeframe})")
+                # 欠損の警告はシンボルテーブルがスナップショットごとに1回出力する
                 return 0.0
             
             # 参照値の取得（時間足プレフィックスを考慮）
@@ -313,8 +297,22 @@ class ThreeGateEngine:
         self.pattern_loader = PatternLoader(config_dir="/app/modules/llm_analysis/config")
         self.technical_calculator = TechnicalIndicatorCalculator()
         self.condition_evaluator = ConditionEvaluator()
+        self.pattern_compiler = PatternCompiler(translate_condition=self._translate_condition_name)
+        # 参照する時間足の足が変わるまでパターンの評価結果を再利用する
+        self.gate_memo = GateResultMemo()
+        # 不合格が確定した時点でパターン評価を打ち切る（DEBUGログ時は全条件を評価）
+        self.early_exit = True
+        self.condition_ordering = ConditionOrdering()
         self.logger = logging.getLogger(__name__)
         self.jst = pytz.timezone('Asia/Tokyo')
+        # 本番モードでは条件・パターン単位のログをリングバッファに記録し、シグナル生成時とエラー時のみ出力
+        self.log_settings = GateLogSettings.from_env()
+        self.verbose_logging = self.log_settings.mode == 'verbose'
+        self.trace = GateTrace(
+            capacity=self.log_settings.trace_capacity,
+            sample_every=self.log_settings.sample_every,
+            output=self.logger,
+        )
         
         # 統計情報
         self.stats = {
@@ -325,6 +323,7 @@ class ThreeGateEngine:
             'signals_generated': 0,
             'start_time': datetime.now(timezone.utc),
             'total_evaluation_time': 0.0,
+            'early_exits': 0,
         }
         
         # シグナル間隔制限（最後のシグナル生成時刻を記録）
@@ -347,28 +346,7 @@ class ThreeGateEngine:
     
     def _get_indicator_value(self, indicators: Dict[str, Any], indicator_name: str, timeframe: str) -> Any:
         """時間足プレフィックスを考慮した指標値の取得"""
-        # 1. 時間足プレフィックス付きで検索
-        prefixed_name = f"{timeframe}_{indicator_name}"
-        if prefixed_name in indicators:
-            self.logger.debug(f"指標 {indicator_name} を {timeframe} 時間足で発見: {prefixed_name} = {indicators[prefixed_name]}")
-            return indicators[prefixed_name]
-        
-        # 2. 元の名前で検索
-        if indicator_name in indicators:
-            self.logger.debug(f"指標 {indicator_name} を元の名前で発見: {indicators[indicator_name]}")
-            return indicators[indicator_name]
-        
-        # 3. 他の時間足で検索（フォールバック）
-        timeframes = ['1d', '4h', '1h', '5m']
-        for tf in timeframes:
-            if tf != timeframe:
-                fallback_name = f"{tf}_{indicator_name}"
-                if fallback_name in indicators:
-                    self.logger.debug(f"指標 {indicator_name} を {tf} 時間足で発見: {fallback_name} = {indicators[fallback_name]}")
-                    return indicators[fallback_name]
-        
-        self.logger.warning(f"指標 {indicator_name} が見つかりません (時間足: {timeframe})")
-        return None
+        return self.condition_evaluator._get_indicator_value(indicators, indicator_name, timeframe)
     
     def _extract_support_resistance_levels(self, data: Dict[str, Any]) -> Dict[str, List[float]]:
         """サポート・レジスタンスレベルを抽出"""
@@ -617,6 +595,9 @@ class ThreeGateEngine:
     
     def _show_progress(self, current_gate: int, total_gates: int = 3):
         """進捗表示"""
+        if not self.verbose_logging:
+            self.trace.record(logging.INFO, 'progress', "GATE %d/%d 評価開始", current_gate, total_gates)
+            return
         progress = "█" * current_gate + "░" * (total_gates - current_gate)
         self.logger.info(f"🚀 三層ゲート分析進行中... [{progress}] GATE {current_gate}/{total_gates}")
     
@@ -729,8 +710,42 @@ class ThreeGateEngine:
             self.logger.info(f"❌ GATE {gate_num}: 不合格 - 信頼度: {result.confidence:.2f}")
             self._log_failed_gate_details(f"GATE {gate_num}", result)
     
+    def _trace(self, event: str, message: str, *args: Any, level: int = logging.INFO, **fields: Any):
+        """ホットパスのログ（verbose では即時出力、本番ではトレースに記録）"""
+        if self.verbose_logging:
+            if self.logger.isEnabledFor(level):
+                self.logger.log(level, message, *args)
+            return
+        self.trace.record(level, event, message, *args, **fields)
+    
+    def _flush_trace(self, reason: str, level: int = logging.INFO):
+        """トレースをまとめて出力（シグナル生成時・エラー時）"""
+        if not self.verbose_logging:
+            self.trace.flush(reason, level)
+    
+    def _log_gate_summary(self, symbol: str, results: list):
+        """ゲートごとのサマリーを1行ずつ出力（本番モード）"""
+        for i, (gate_name, result) in enumerate(results, 1):
+            valid = bool(result and result.valid)
+            self.logger.info(
+                "%s GATE %d %s: %s %s - 信頼度: %.2f", "✅" if valid else "❌", i, gate_name, symbol,
+                result.pattern if result else None, result.confidence if result else 0.0,
+                extra={'event': 'gate_summary', 'fields': {
+                    'symbol': symbol,
+                    'gate': i,
+                    'valid': valid,
+                    'pattern': result.pattern if result else None,
+                    'confidence': result.confidence if result else 0.0,
+                    'failed_conditions': list(result.failed_conditions) if result else [],
+                }}
+            )
+    
     def _log_evaluation_summary(self, symbol: str, results: list):
         """評価結果のサマリー表示"""
+        if not self.verbose_logging:
+            self._log_gate_summary(symbol, results)
+            return
+        
         self.logger.info(f"🚪 三層ゲート評価開始: {symbol} [{self._get_jst_time()}]")
         
         # 階層化された結果表示
@@ -756,17 +771,26 @@ class ThreeGateEngine:
             self.logger.info("└── 📊 最終結果: シグナル生成なし")
 
     @measure_async_time('total_evaluation_time')
-    async def evaluate(self, symbol: str, data: Dict[str, Any]) -> Optional[ThreeGateResult]:
+    async def evaluate(self, symbol: str, data: Dict[str, Any],
+                       bar_versions: Optional[Mapping[str, Hashable]] = None) -> Optional[ThreeGateResult]:
         """
         三層ゲートによる評価
         
         Args:
             symbol: 通貨ペアシンボル
             data: 市場データ
+            bar_versions: 時間足ごとの足のバージョン（指定時はパターン結果をメモ化）
             
         Returns:
             三層ゲート評価結果（すべてのゲートを通過した場合のみ）
         """
+        # 3ゲートで指標の解決結果と欠損警告を共有する
+        with self.condition_evaluator.snapshot(data):
+            return await self._evaluate_snapshot(symbol, data, bar_versions)
+    
+    async def _evaluate_snapshot(self, symbol: str, data: Dict[str, Any],
+                                 bar_versions: Optional[Mapping[str, Hashable]]) -> Optional[ThreeGateResult]:
+        """三層ゲート評価の本体"""
         try:
             start_time = datetime.now(timezone.utc)
             
@@ -779,7 +803,7 @@ class ThreeGateEngine:
             
             # GATE 1: 環境認識
             self._show_progress(1)
-            gate1_result = await self._evaluate_gate1(symbol, data)
+            gate1_result = await self._evaluate_gate1(symbol, data, bar_versions)
             if not gate1_result.valid:
                 self._log_evaluation_summary(symbol, [("環境認識ゲート", gate1_result)])
                 return None
@@ -788,7 +812,7 @@ class ThreeGateEngine:
             
             # GATE 2: シナリオ選定
             self._show_progress(2)
-            gate2_result = await self._evaluate_gate2(symbol, data, gate1_result)
+            gate2_result = await self._evaluate_gate2(symbol, data, gate1_result, bar_versions)
             if not gate2_result.valid:
                 self._log_evaluation_summary(symbol, [
                     ("環境認識ゲート", gate1_result),
@@ -800,7 +824,7 @@ class ThreeGateEngine:
             
             # GATE 3: トリガー
             self._show_progress(3)
-            gate3_result = await self._evaluate_gate3(symbol, data, gate2_result)
+            gate3_result = await self._evaluate_gate3(symbol, data, gate2_result, bar_versions)
             if not gate3_result.valid:
                 self._log_evaluation_summary(symbol, [
                     ("環境認識ゲート", gate1_result),
@@ -844,6 +868,7 @@ class ThreeGateEngine:
             self.stats['total_evaluation_time'] += evaluation_time
             
             # 成功時の特別表示
+            self._flush_trace(f"シグナル生成: {symbol}")
             self._log_signal_generation(result)
             return result
             
@@ -852,70 +877,29 @@ class ThreeGateEngine:
             evaluation_time = (datetime.now(timezone.utc) - start_time).total_seconds()
             self.stats['total_evaluation_time'] += evaluation_time
             
+            self._flush_trace(f"評価エラー: {symbol}", logging.ERROR)
             self.logger.error(f"❌ 三層ゲート評価エラー: {e}")
             return None
     
     @measure_async_time('gate1_evaluation_time')
-    async def _evaluate_gate1(self, symbol: str, data: Dict[str, Any]) -> GateResult:
+    async def _evaluate_gate1(self, symbol: str, data: Dict[str, Any],
+                              bar_versions: Optional[Mapping[str, Hashable]] = None) -> GateResult:
         """GATE 1: 環境認識の評価"""
         try:
-            self.logger.info(f"GATE 1 パターン設定読み込み開始")
-            patterns = self.pattern_loader.load_gate_patterns(1)
-            self.logger.info(f"GATE 1 パターン設定読み込み完了: {len(patterns.get('patterns', {}))}個のパターン")
-            
-            for pattern_name, pattern_config in patterns.get('patterns', {}).items():
-                self.logger.info(f"GATE 1 パターン評価: {pattern_name}")
-                
-                # パターンの種類に応じて評価
-                if 'bullish_trend' in pattern_config:
-                    result = await self._evaluate_pattern_variant(
-                        pattern_name, pattern_config['bullish_trend'], data, 'bullish'
-                    )
-                    self.logger.info(f"GATE 1 パターン結果: {pattern_name} (bullish) - 有効: {result.valid}, 信頼度: {result.confidence:.2f}")
-                    # 最後に評価されたパターンの条件詳細を保存
-                    self._last_condition_details = result.additional_data.get('condition_details', {})
-                    if result.valid:
-                        return result
-                
-                if 'bearish_trend' in pattern_config:
-                    result = await self._evaluate_pattern_variant(
-                        pattern_name, pattern_config['bearish_trend'], data, 'bearish'
-                    )
-                    self.logger.info(f"GATE 1 パターン結果: {pattern_name} (bearish) - 有効: {result.valid}, 信頼度: {result.confidence:.2f}")
-                    # 最後に評価されたパターンの条件詳細を保存
-                    self._last_condition_details = result.additional_data.get('condition_details', {})
-                    if result.valid:
-                        return result
-                
-                if 'uptrend_reversal' in pattern_config:
-                    result = await self._evaluate_pattern_variant(
-                        pattern_name, pattern_config['uptrend_reversal'], data, 'uptrend_reversal'
-                    )
-                    self.logger.info(f"GATE 1 パターン結果: {pattern_name} (uptrend_reversal) - 有効: {result.valid}, 信頼度: {result.confidence:.2f}")
-                    # 最後に評価されたパターンの条件詳細を保存
-                    self._last_condition_details = result.additional_data.get('condition_details', {})
-                    if result.valid:
-                        return result
-                
-                if 'downtrend_reversal' in pattern_config:
-                    result = await self._evaluate_pattern_variant(
-                        pattern_name, pattern_config['downtrend_reversal'], data, 'downtrend_reversal'
-                    )
-                    self.logger.info(f"GATE 1 パターン結果: {pattern_name} (downtrend_reversal) - 有効: {result.valid}, 信頼度: {result.confidence:.2f}")
-                    # 最後に評価されたパターンの条件詳細を保存
-                    self._last_condition_details = result.additional_data.get('condition_details', {})
-                    if result.valid:
-                        return result
-                
-                if 'conditions' in pattern_config:
-                    result = await self._evaluate_pattern_variant(
-                        pattern_name, pattern_config, data, 'neutral'
-                    )
-                    self.logger.info(f"GATE 1 パターン結果: {pattern_name} (neutral) - 有効: {result.valid}, 信頼度: {result.confidence:.2f}")
-                    # 最後に評価されたパターンの条件詳細を保存
-                    self._last_condition_details = result.additional_data.get('condition_details', {})
-                    if result.valid:
-                        return result
+            self._trace('gate', "GATE 1 パターン設定読み込み開始")
+            plan = self._get_gate_plan(1)
+            self._trace('gate', "GATE 1 パターン設定読み込み完了: %d個のパターン", plan.pattern_count)
+            
+            values = plan.resolve(data, self.condition_evaluator.table_for(data).resolve)
+            for variant in plan.variants:
+                self._trace('pattern', "GATE 1 パターン評価: %s", variant.pattern_name)
+                result = self._evaluate_variant_memoized(plan, variant, values, symbol, data, bar_versions)
+                self._trace('pattern', "GATE 1 パターン結果: %s (%s) - 有効: %s, 信頼度: %.2f",
+                            variant.pattern_name, variant.variant, result.valid, result.confidence)
+                # 最後に評価されたパターンの条件詳細を保存
+                self._last_condition_details = result.additional_data.get('condition_details', {})
+                if result.valid:
+                    return result
             
             # どのパターンも合格しなかった場合
             # 最後に評価されたパターンの条件詳細を保持
@@ -934,6 +918,7 @@ class ThreeGateEngine:
             )
             
         except Exception as e:
+            self._flush_trace(f"GATE 1 評価エラー: {symbol}", logging.ERROR)
             self.logger.error(f"GATE 1 評価エラー: {e}")
             return GateResult(
                 valid=False,
@@ -946,10 +931,13 @@ class ThreeGateEngine:
             )
     
     @measure_async_time('gate2_evaluation_time')
-    async def _evaluate_gate2(self, symbol: str, data: Dict[str, Any], gate1_result: GateResult) -> GateResult:
+    async def _evaluate_gate2(self, symbol: str, data: Dict[str, Any], gate1_result: GateResult,
+                              bar_versions: Optional[Mapping[str, Hashable]] = None) -> GateResult:
         """GATE 2: シナリオ選定の評価"""
         try:
-            patterns = self.pattern_loader.load_gate_patterns(2)
+            plan = self._get_gate_plan(2)
+            patterns = plan.source
+            values = plan.resolve(data, self.condition_evaluator.table_for(data).resolve)
             
             # GATE 1の結果に基づいて有効なシナリオを特定
             valid_scenarios = self._get_valid_scenarios_for_environment(gate1_result.pattern, patterns)
@@ -959,9 +947,14 @@ class ThreeGateEngine:
             last_condition_details = {}
             
             for scenario_name in valid_scenarios:
-                if scenario_name in patterns.get('patterns', {}):
-                    scenario_config = patterns['patterns'][scenario_name]
-                    result = await self._evaluate_scenario(scenario_name, scenario_config, data, gate1_result)
+                scenario = plan.scenarios.get(scenario_name)
+                if scenario is not None:
+                    result = self._evaluate_compiled_scenario(
+                        scenario, values, gate1_result,
+                        evaluate_variant=lambda variant: self._evaluate_variant_memoized(
+                            plan, variant, values, symbol, data, bar_versions
+                        )
+                    )
                     
                     # シナリオの評価結果を記録
                     scenario_info = {
@@ -998,6 +991,7 @@ class ThreeGateEngine:
             )
             
         except Exception as e:
+            self._flush_trace(f"GATE 2 評価エラー: {symbol}", logging.ERROR)
             self.logger.error(f"GATE 2 評価エラー: {e}")
             return GateResult(
                 valid=False,
@@ -1010,11 +1004,12 @@ class ThreeGateEngine:
             )
     
     @measure_async_time('gate3_evaluation_time')
-    async def _evaluate_gate3(self, symbol: str, data: Dict[str, Any], gate2_result: GateResult) -> GateResult:
+    async def _evaluate_gate3(self, symbol: str, data: Dict[str, Any], gate2_result: GateResult,
+                              bar_versions: Optional[Mapping[str, Hashable]] = None) -> GateResult:
         """GATE 3: トリガーの評価"""
         try:
-            patterns = self.pattern_loader.load_gate_patterns(3)
-            self.logger.info(f"GATE 3 パターン数: {len(patterns.get('patterns', {}))}")
+            plan = self._get_gate_plan(3)
+            self._trace('gate', "GATE 3 パターン数: %d", plan.pattern_count)
             
             # GATE 1の結果から環境を取得
             gate1_environment = gate2_result.additional_data.get('gate1_environment', None)
@@ -1023,18 +1018,19 @@ class ThreeGateEngine:
                 gate1_environment = "trending_market (bearish)"  # デフォルト
                 self.logger.warning(f"GATE 1環境情報が見つかりません。デフォルト使用: {gate1_environment}")
             
-            for pattern_name, pattern_config in patterns.get('patterns', {}).items():
+            values = plan.resolve(data, self.condition_evaluator.table_for(data).resolve)
+            for variant in plan.variants:
                 # 環境制限をチェック
-                allowed_environments = pattern_config.get('allowed_environments', [])
+                allowed_environments = variant.allowed_environments
                 if allowed_environments and gate1_environment not in allowed_environments:
-                    self.logger.info(f"GATE 3 パターンスキップ: {pattern_name} - 環境制限 ({gate1_environment} not in {allowed_environments})")
+                    self._trace('pattern', "GATE 3 パターンスキップ: %s - 環境制限 (%s not in %s)",
+                                variant.pattern_name, gate1_environment, allowed_environments)
                     continue
                 
-                self.logger.info(f"GATE 3 パターン評価: {pattern_name}")
-                result = await self._evaluate_pattern_variant(
-                    pattern_name, pattern_config, data, 'trigger'
-                )
-                self.logger.info(f"GATE 3 パターン結果: {pattern_name} - 有効: {result.valid}, 信頼度: {result.confidence:.2f}")
+                self._trace('pattern', "GATE 3 パターン評価: %s", variant.pattern_name)
+                result = self._evaluate_variant_memoized(plan, variant, values, symbol, data, bar_versions)
+                self._trace('pattern', "GATE 3 パターン結果: %s - 有効: %s, 信頼度: %.2f",
+                            variant.pattern_name, result.valid, result.confidence)
                 if result.valid:
                     return result
             
@@ -1050,6 +1046,7 @@ class ThreeGateEngine:
             )
             
         except Exception as e:
+            self._flush_trace(f"GATE 3 評価エラー: {symbol}", logging.ERROR)
             self.logger.error(f"GATE 3 評価エラー: {e}")
             return GateResult(
                 valid=False,
@@ -1061,107 +1058,220 @@ class ThreeGateEngine:
                 timestamp=datetime.now(timezone.utc)
             )
     
+    def _get_gate_plan(self, gate_number: int) -> CompiledGatePlan:
+        """ゲートの評価プランを取得（パターン設定が更新された場合のみ再コンパイル）"""
+        patterns = self.pattern_loader.load_gate_patterns(gate_number)
+        plan = self.pattern_compiler.get_plan(gate_number, patterns)
+        if self.gate_memo.bind(plan):
+            # 旧プランの条件の実績は使わない
+            self.condition_ordering.clear()
+        return plan
+    
+    def _evaluate_variant_memoized(self, plan: CompiledGatePlan, variant: CompiledVariant, values: List[Any],
+                                   symbol: str, data: Dict[str, Any],
+                                   bar_versions: Optional[Mapping[str, Hashable]]) -> GateResult:
+        """参照する時間足の足が変わっていなければメモ済みの結果を返すバリアント評価"""
+        key = self.gate_memo.version_key(plan, variant, data, bar_versions)
+        if key is not None:
+            cached = self.gate_memo.get(plan.gate_number, symbol, variant, key)
+            if cached is not None and 'early_exit' in cached.additional_data and self._full_condition_details():
+                # 打ち切った結果は全条件の詳細が必要な場合に使わない
+                cached = None
+            if cached is not None:
+                self._trace('pattern', "GATE %d パターン結果を再利用: %s", plan.gate_number, variant.result_pattern,
+                            level=logging.DEBUG)
+                return cached
+        
+        result = self._evaluate_compiled_variant(variant, values)
+        if key is not None:
+            self.gate_memo.put(plan.gate_number, symbol, variant, key, result)
+        return result
+    
     async def _evaluate_pattern_variant(self, pattern_name: str, pattern_config: Dict[str, Any], 
                                       data: Dict[str, Any], variant: str) -> GateResult:
-        """パターンバリアントの評価"""
-        conditions = pattern_config.get('conditions', [])
-        confidence_config = pattern_config.get('confidence_calculation', {})
-        min_confidence = confidence_config.get('min_confidence', 0.6)
-        required_conditions = pattern_config.get('required_conditions', [])  # 必須条件
+        """パターンバリアントの評価（設定辞書を直接コンパイルして評価）"""
+        plan = self.pattern_compiler.compile_single_variant(pattern_name, pattern_config, variant)
+        values = plan.resolve(data, self.condition_evaluator.table_for(data).resolve)
+        return self._evaluate_compiled_variant(plan.variants[0], values)
+    
+    def _evaluate_compiled_variant(self, variant: CompiledVariant, values: List[Any],
+                                   full_detail: Optional[bool] = None) -> GateResult:
+        """
+        コンパイル済みパターンバリアントの評価
         
-        passed_conditions = []
-        failed_conditions = []
-        condition_details = {}  # 条件の詳細情報を保存
-        total_score = 0.0
-        total_weight = 0.0
+        必須条件を先に評価し、残りの条件は不合格が早く確定する順に評価します。
+        必須条件が不合格になった時点、または残りの条件がすべて合格しても
+        min_confidence に届かなくなった時点で評価を打ち切ります（不合格のみ。合格の場合は全条件を評価）。
+        
+        Args:
+            variant: コンパイル済みバリアント
+            values: スロット番号順の指標値
+            full_detail: 打ち切らずに全条件の詳細を作成するか（Noneの場合は設定とログレベルで決定）
+        """
+        if full_detail is None:
+            full_detail = self._full_condition_details()
+        conditions = variant.conditions
+        if full_detail or variant.total_weight < 0 or any(c.weight < 0 for c in conditions):
+            order = range(len(conditions))
+            full_detail = True
+        else:
+            order = self.condition_ordering.order(variant)
         
-        for condition in conditions:
+        scores: Dict[int, Optional[float]] = {}
+        condition_details = {}  # 条件の詳細情報を保存
+        evaluated_score = 0.0
+        evaluated_weight = 0.0
+        remaining_weight = variant.total_weight
+        upper_bound = None
+        required_count = len({index for group in variant.required_indices for index in group})
+        required_checked = False
+        
+        for position, index in enumerate(order):
+            condition = conditions[index]
+            translated_name = condition.translated_name
+            remaining_weight -= condition.weight
             try:
-                condition_name = condition.get('name', 'unknown')
-                translated_name = self._translate_condition_name(condition_name)
-                self.logger.info(f"条件評価開始: {translated_name}")
-                score = await self.condition_evaluator.evaluate_condition(data, condition)
-                weight = condition.get('weight', 1.0)
+                score = condition.evaluate(values)
+                weight = condition.weight
                 
-                self.logger.info(f"条件評価結果: {translated_name} - スコア: {score:.2f}, 重み: {weight}")
+                self._trace('condition', "条件評価結果: %s - スコア: %.2f, 重み: %s", translated_name, score, weight)
                 
-                total_score += score * weight
-                total_weight += weight
+                evaluated_score += score * weight
+                evaluated_weight += weight
+                scores[index] = score
                 
                 # 条件の詳細情報を作成
-                condition_detail = self._create_condition_detail(condition, data, score)
-                condition_name = condition['name']
-                translated_name = self._translate_condition_name(condition_name)
-                condition_details[translated_name] = condition_detail
-                
-                self.logger.info(f"条件詳細作成: {translated_name} - {condition_detail}")
-                
-                if score >= 0.5:  # 50%以上で合格とみなす
-                    passed_conditions.append(translated_name)
-                else:
-                    failed_conditions.append(translated_name)
+                condition_details[translated_name] = condition.describe(values, score)
+                if not full_detail:
+                    self.condition_ordering.record(condition, score >= 0.5)
                     
             except Exception as e:
-                condition_name = condition.get('name', 'unknown')
-                translated_name = self._translate_condition_name(condition_name)
                 self.logger.warning(f"条件評価エラー: {translated_name} - {e}")
-                failed_conditions.append(translated_name)
+                scores[index] = None
                 condition_details[translated_name] = f"エラー: {e}"
+            
+            if full_detail or position + 1 == len(conditions):
+                continue
+            
+            # 必須条件をすべて評価した時点で不合格が確定していれば打ち切り
+            if not required_checked and position + 1 >= required_count:
+                required_checked = True
+                if not self._required_conditions_met(variant, scores):
+                    upper_bound = self._confidence_upper_bound(evaluated_score, evaluated_weight, remaining_weight)
+                    break
+            
+            # 残りが全て合格した場合の信頼度（上限）が閾値に届かなければ打ち切り
+            if position + 1 >= required_count:
+                bound = self._confidence_upper_bound(evaluated_score, evaluated_weight, remaining_weight)
+                if bound < variant.min_confidence - 1e-9:
+                    upper_bound = bound
+                    break
         
-        confidence = total_score / total_weight if total_weight > 0 else 0.0
+        # 合否・信頼度は元の条件順で集計（打ち切りが無い場合は従来と同じ値になる）
+        passed_conditions = []
+        failed_conditions = []
+        total_score = 0.0
+        total_weight = 0.0
+        for index, condition in enumerate(conditions):
+            if index not in scores:
+                continue
+            score = scores[index]
+            if score is not None:
+                total_score += score * condition.weight
+                total_weight += condition.weight
+            if score is not None and score >= 0.5:  # 50%以上で合格とみなす
+                passed_conditions.append(condition.translated_name)
+            else:
+                failed_conditions.append(condition.translated_name)
+        
+        additional_data = {
+            **variant.additional_data,
+            'condition_details': {
+                condition.translated_name: condition_details[condition.translated_name]
+                for index, condition in enumerate(conditions) if index in scores
+            }
+        }
+        
+        if upper_bound is not None:
+            skipped = [condition.translated_name for index, condition in enumerate(conditions) if index not in scores]
+            self.stats['early_exits'] += 1
+            self._trace('pattern', "パターン評価を打ち切り: %s - 未評価: %d件", variant.result_pattern, len(skipped),
+                        level=logging.DEBUG)
+            additional_data['early_exit'] = {'skipped_conditions': skipped}
+            # 未評価の条件がある場合の信頼度は上限値
+            confidence = upper_bound
+        else:
+            confidence = total_score / total_weight if total_weight > 0 else 0.0
         
         # 必須条件のチェック
         required_conditions_met = True
-        if required_conditions:
-            for required_condition in required_conditions:
-                if required_condition not in passed_conditions:
-                    required_conditions_met = False
-                    self.logger.warning(f"必須条件 '{required_condition}' が不合格")
-                    break
-        
-        valid = confidence >= min_confidence and required_conditions_met
+        for required_condition in variant.required_conditions:
+            if required_condition not in passed_conditions:
+                required_conditions_met = False
+                self._trace('condition', "必須条件 '%s' が不合格", required_condition, level=logging.WARNING)
+                break
         
-        self.logger.info(f"GateResult作成前 - condition_details: {condition_details}")
+        valid = upper_bound is None and confidence >= variant.min_confidence and required_conditions_met
         
-        result = GateResult(
+        return GateResult(
             valid=valid,
-            pattern=f"{pattern_name}_{variant}",
+            pattern=variant.result_pattern,
             confidence=confidence,
             passed_conditions=passed_conditions,
             failed_conditions=failed_conditions,
-            additional_data={
-                **pattern_config.get('additional_data', {}),
-                'condition_details': condition_details
-            },
+            additional_data=additional_data,
             timestamp=datetime.now(timezone.utc)
         )
-        
-        self.logger.info(f"GateResult作成後 - additional_data: {result.additional_data}")
-        
-        return result
+    
+    def explain_variant(self, variant: CompiledVariant, values: List[Any]) -> GateResult:
+        """通知・デバッグ用に全条件の詳細付きでバリアントを評価"""
+        return self._evaluate_compiled_variant(variant, values, full_detail=True)
+    
+    def _full_condition_details(self) -> bool:
+        """評価を打ち切らずに全条件の詳細を作成するか"""
+        return not self.early_exit or self.logger.isEnabledFor(logging.DEBUG)
+    
+    @staticmethod
+    def _required_conditions_met(variant: CompiledVariant, scores: Dict[int, Optional[float]]) -> bool:
+        """評価済みのスコアで全ての必須条件に合格しているか"""
+        for group in variant.required_indices:
+            if not any(scores.get(index) is not None and scores[index] >= 0.5 for index in group):
+                return False
+        return True
+    
+    @staticmethod
+    def _confidence_upper_bound(evaluated_score: float, evaluated_weight: float, remaining_weight: float) -> float:
+        """残りの条件が全て合格（スコア1.0）した場合の信頼度"""
+        weight = evaluated_weight + remaining_weight
+        return (evaluated_score + remaining_weight) / weight if weight > 0 else 0.0
     
     async def _evaluate_scenario(self, scenario_name: str, scenario_config: Dict[str, Any], 
                                data: Dict[str, Any], gate1_result: GateResult) -> GateResult:
         """シナリオの評価"""
-        # 環境条件による分岐処理
-        environment_conditions = scenario_config.get('environment_conditions', {})
-        
-        if environment_conditions:
-            # 環境に応じたシナリオバリアントを評価
-            for env_name, env_config in environment_conditions.items():
-                if self._matches_environment(env_name, gate1_result.pattern):
-                    result = await self._evaluate_pattern_variant(
-                        scenario_name, env_config, data, env_name
-                    )
-                    if result.valid:
-                        return result
-        else:
+        plan = self.pattern_compiler.compile_gate(2, {'patterns': {scenario_name: scenario_config}})
+        values = plan.resolve(data, self.condition_evaluator.table_for(data).resolve)
+        return self._evaluate_compiled_scenario(plan.scenarios[scenario_name], values, gate1_result)
+    
+    def _evaluate_compiled_scenario(self, scenario, values: List[Any], gate1_result: GateResult,
+                                    evaluate_variant=None) -> GateResult:
+        """コンパイル済みシナリオの評価"""
+        if evaluate_variant is None:
+            evaluate_variant = lambda variant: self._evaluate_compiled_variant(variant, values)
+        
+        if scenario.direct is not None:
             # 直接的な条件評価
-            return await self._evaluate_pattern_variant(scenario_name, scenario_config, data, 'direct')
+            return evaluate_variant(scenario.direct)
+        
+        # 環境に応じたシナリオバリアントを評価
+        for env_name, variant in scenario.environment_variants:
+            if self._matches_environment(env_name, gate1_result.pattern):
+                result = evaluate_variant(variant)
+                if result.valid:
+                    return result
         
         return GateResult(
             valid=False,
-            pattern=f"{scenario_name}_no_match",
+            pattern=f"{scenario.name}_no_match",
             confidence=0.0,
             passed_conditions=[],
             failed_conditions=[],
@@ -0,0 +1,629 @@
+#!/usr/bin/env python3
+"""
+三層ゲート ベクトル化バックテスト
+
+ThreeGateEngine.evaluate を足ごとに呼び出す代わりに、履歴全体の指標列を
+NumPy配列として保持し、コンパイル済みゲートプラン（PatternCompiler）の全条件を
+全足まとめて評価します。
+
+- 上位足（1d/4h/1h）は基準足（5m）の各時刻に as-of で整列します。
+  既定では確定済みの足だけを参照し、未来の値を使いません。
+- 条件のスコア・信頼度・必須条件・GATE 1→2→3 の分岐はライブエンジンと同じ規則で
+  判定するため、同じスナップショットに対しては同じ GateResult の判定になります。
+- シグナル足だけはスナップショットを組み立ててエンジンのメソッドで
+  ThreeGateResult（エントリー価格・SL・TP）を生成します。
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from modules.llm_analysis.core.indicator_table import FALLBACK_TIMEFRAMES
+from modules.llm_analysis.core.pattern_compiler import CompiledCondition, CompiledGatePlan, CompiledVariant
+from modules.llm_analysis.core.three_gate_engine import GateResult, ThreeGateEngine, ThreeGateResult
+
+logger = logging.getLogger(__name__)
+
+TIMEFRAME_DURATIONS = {
+    '5m': pd.Timedelta(minutes=5),
+    '15m': pd.Timedelta(minutes=15),
+    '1h': pd.Timedelta(hours=1),
+    '4h': pd.Timedelta(hours=4),
+    '1d': pd.Timedelta(days=1),
+}
+
+# IndicatorTable のフォールバック順
+_FALLBACK_TIMEFRAMES = FALLBACK_TIMEFRAMES
+
+_COMPARISON_UFUNCS = {
+    '>': np.greater,
+    '<': np.less,
+    '>=': np.greater_equal,
+    '<=': np.less_equal,
+    '==': lambda a, b: np.abs(a - b) < 0.001,
+    '!=': lambda a, b: np.abs(a - b) >= 0.001,
+}
+
+# 解決済みの列: (値, Noneマスク, 数値でない値のマスク)
+SlotColumn = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def _extract_timestamps(df: pd.DataFrame) -> pd.DatetimeIndex:
+    """timestamp列またはDatetimeIndexからUTCの時刻列（ナノ秒単位）を取得"""
+    if 'timestamp' in df.columns:
+        timestamps = pd.DatetimeIndex(pd.to_datetime(df['timestamp']))
+    elif isinstance(df.index, pd.DatetimeIndex):
+        timestamps = df.index
+    else:
+        raise ValueError("timestamp列またはDatetimeIndexが必要です")
+
+    if timestamps.tz is None:
+        timestamps = timestamps.tz_localize('UTC')
+    else:
+        timestamps = timestamps.tz_convert('UTC')
+    # asi8 と Timedelta.value をナノ秒で揃える
+    return timestamps.as_unit('ns')
+
+
+@dataclass
+class AlignedHistory:
+    """基準足に as-of 整列した時間足別の指標履歴"""
+    base_timeframe: str
+    timestamps: pd.DatetimeIndex
+    frames: Dict[str, pd.DataFrame]
+    rows: Dict[str, np.ndarray]
+    _columns: Dict[Tuple[str, str], SlotColumn] = field(default_factory=dict, repr=False)
+    _slots: Dict[Tuple[str, str], SlotColumn] = field(default_factory=dict, repr=False)
+    _keys: Optional[Dict[str, Tuple[str, str]]] = field(default=None, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def column(self, timeframe: str, name: str) -> SlotColumn:
+        """時間足の列を基準足の長さに整列した配列として取得（キャッシュ付き）"""
+        key = (timeframe, name)
+        cached = self._columns.get(key)
+        if cached is not None:
+            return cached
+
+        series = self.frames[timeframe][name]
+        raw = series.to_numpy()
+        if raw.dtype == object:
+            none_mask = np.fromiter((v is None for v in raw), dtype=bool, count=len(raw))
+            numeric = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64)
+            bad_mask = ~none_mask & series.notna().to_numpy() & np.isnan(numeric)
+        else:
+            none_mask = np.zeros(len(raw), dtype=bool)
+            numeric = raw.astype(np.float64)
+            bad_mask = np.zeros(len(raw), dtype=bool)
+
+        rows = self.rows[timeframe]
+        take = np.where(rows >= 0, rows, 0)
+        column = (numeric[take], none_mask[take], bad_mask[take])
+        self._columns[key] = column
+        return column
+
+    def resolve(self, name: str, timeframe: str) -> SlotColumn:
+        """IndicatorTable と同じ順序で指標列を解決（キャッシュ付き）"""
+        cached = self._slots.get((name, timeframe))
+        if cached is not None:
+            return cached
+
+        if self._keys is None:
+            self._keys = {
+                f"{tf}_{column}": (tf, column)
+                for tf, frame in self.frames.items() for column in frame.columns
+            }
+
+        candidates = [f"{timeframe}_{name}", name]
+        candidates += [f"{tf}_{name}" for tf in _FALLBACK_TIMEFRAMES if tf != timeframe]
+
+        length = len(self)
+        values = np.full(length, np.nan)
+        none_mask = np.ones(length, dtype=bool)
+        bad_mask = np.zeros(length, dtype=bool)
+        # 優先度の低い候補から上書きしていく（足が存在しない時間足は見つからない扱い）
+        for key in reversed(candidates):
+            if key not in self._keys:
+                continue
+            tf, column = self._keys[key]
+            present = self.rows[tf] >= 0
+            column_values, column_none, column_bad = self.column(tf, column)
+            values = np.where(present, column_values, values)
+            none_mask = np.where(present, column_none, none_mask)
+            bad_mask = np.where(present, column_bad, bad_mask)
+
+        resolved = (values, none_mask, bad_mask)
+        self._slots[(name, timeframe)] = resolved
+        return resolved
+
+    def snapshot(self, index: int) -> Dict[str, Any]:
+        """
+        基準足 index 時点のスナップショットを作成
+
+        ThreeGateAnalysisService._calculate_technical_indicators と同じ
+        {timeframe}_{indicator} 形式の辞書を返します。
+        """
+        data = {}
+        for timeframe, frame in self.frames.items():
+            row = self.rows[timeframe][index]
+            if row < 0:
+                continue
+            for key, value in frame.iloc[row].to_dict().items():
+                data[f"{timeframe}_{key}"] = value
+        return data
+
+
+@dataclass
+class VectorizedBacktestResult:
+    """ベクトル化バックテストの結果"""
+    decisions: pd.DataFrame
+    signals: List[ThreeGateResult]
+    history: AlignedHistory = field(repr=False)
+    elapsed_seconds: float = 0.0
+
+    def get_summary(self) -> Dict[str, Any]:
+        """ゲート通過数とシグナル数の集計"""
+        decisions = self.decisions
+        total = len(decisions)
+        return {
+            'total_bars': total,
+            'gate1_passed': int(decisions['gate1_valid'].sum()),
+            'gate2_passed': int(decisions['gate2_valid'].sum()),
+            'gate3_passed': int(decisions['gate3_valid'].sum()),
+            'signals_generated': int(decisions['signal'].sum()),
+            'elapsed_seconds': self.elapsed_seconds,
+        }
+
+
+class VectorizedGateBacktester:
+    """コンパイル済みゲートプランを全足まとめて評価するバックテスター"""
+
+    def __init__(self, engine: Optional[ThreeGateEngine] = None, base_timeframe: str = '5m',
+                 closed_bars_only: bool = True, min_signal_interval: Optional[timedelta] = None):
+        """
+        初期化
+
+        Args:
+            engine: パターン設定・シグナル生成に使うエンジン（Noneの場合は新規作成）
+            base_timeframe: 評価する基準足
+            closed_bars_only: Trueの場合、基準足の終了時点で確定済みの上位足だけを参照
+            min_signal_interval: シグナル間隔制限（Noneの場合はエンジンの設定を足の時刻で適用）
+        """
+        self.engine = engine or ThreeGateEngine()
+        self.base_timeframe = base_timeframe
+        self.closed_bars_only = closed_bars_only
+        if min_signal_interval is None and not self.engine.force_signal_on_test:
+            min_signal_interval = self.engine.min_signal_interval
+        self.min_signal_interval = min_signal_interval
+        self.logger = logging.getLogger(__name__)
+
+    def run_from_prices(self, price_data: Dict[str, pd.DataFrame], symbol: Optional[str] = None,
+                        build_signals: bool = True) -> VectorizedBacktestResult:
+        """
+        OHLCVデータから指標を計算してバックテストを実行
+
+        Args:
+            price_data: 時間足別のOHLCVデータ（全履歴）
+            symbol: 通貨ペアシンボル
+            build_signals: シグナル足の ThreeGateResult を生成するか
+
+        Returns:
+            バックテスト結果
+        """
+        indicators = self.engine.technical_calculator.calculate_all_indicators(price_data)
+        return self.run(indicators, symbol=symbol, build_signals=build_signals)
+
+    def run(self, indicator_frames: Dict[str, pd.DataFrame], symbol: Optional[str] = None,
+            build_signals: bool = True) -> VectorizedBacktestResult:
+        """
+        指標計算済みの全履歴でバックテストを実行
+
+        Args:
+            indicator_frames: calculate_all_indicators() の戻り値
+            symbol: 通貨ペアシンボル
+            build_signals: シグナル足の ThreeGateResult を生成するか
+
+        Returns:
+            バックテスト結果
+        """
+        start = time.perf_counter()
+        history = self.align(indicator_frames)
+        decisions = self.evaluate(history)
+
+        signals = []
+        if build_signals:
+            for index in np.flatnonzero(decisions['signal'].to_numpy()):
+                signals.append(self.build_signal(history, int(index), symbol))
+
+        elapsed = time.perf_counter() - start
+        self.logger.info(
+            f"⚡ ベクトル化バックテスト完了: {len(history)}本, "
+            f"シグナル {int(decisions['signal'].sum())}件, {elapsed:.2f}秒"
+        )
+        return VectorizedBacktestResult(
+            decisions=decisions,
+            signals=signals,
+            history=history,
+            elapsed_seconds=elapsed,
+        )
+
+    def align(self, indicator_frames: Dict[str, pd.DataFrame]) -> AlignedHistory:
+        """
+        時間足別の指標履歴を基準足の時刻に as-of 整列
+
+        Args:
+            indicator_frames: 時間足別の指標DataFrame
+
+        Returns:
+            整列済みの履歴
+        """
+        if self.base_timeframe not in indicator_frames:
+            raise ValueError(f"基準足 {self.base_timeframe} のデータがありません")
+
+        base_timestamps = _extract_timestamps(indicator_frames[self.base_timeframe])
+        base_keys = base_timestamps.asi8
+        if self.closed_bars_only:
+            base_keys = base_keys + self._duration(self.base_timeframe).value
+
+        frames = {}
+        rows = {}
+        for timeframe, frame in indicator_frames.items():
+            timestamps = _extract_timestamps(frame)
+            if not timestamps.is_monotonic_increasing:
+                raise ValueError(f"{timeframe}足のデータが時系列順ではありません")
+
+            if timeframe == self.base_timeframe:
+                aligned = np.arange(len(frame))
+            else:
+                keys = timestamps.asi8
+                if self.closed_bars_only:
+                    keys = keys + self._duration(timeframe).value
+                aligned = np.searchsorted(keys, base_keys, side='right') - 1
+
+            frames[timeframe] = frame
+            rows[timeframe] = aligned
+
+        return AlignedHistory(
+            base_timeframe=self.base_timeframe,
+            timestamps=base_timestamps,
+            frames=frames,
+            rows=rows,
+        )
+
+    def evaluate(self, history: AlignedHistory) -> pd.DataFrame:
+        """
+        全足のゲート判定を計算
+
+        Args:
+            history: 整列済みの履歴
+
+        Returns:
+            足ごとのゲート判定（パターン名・信頼度・通過可否・シグナル）
+        """
+        plans = {gate: self.engine._get_gate_plan(gate) for gate in (1, 2, 3)}
+        length = len(history)
+        variant_cache: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+        def evaluate_variant(plan: CompiledGatePlan, variant: CompiledVariant):
+            cached = variant_cache.get(id(variant))
+            if cached is None:
+                cached = self._evaluate_variant(plan, variant, history)
+                variant_cache[id(variant)] = cached
+            return cached
+
+        def first_valid(plan, candidates, mask):
+            winner = np.full(length, -1, dtype=np.int64)
+            confidence = np.zeros(length)
+            for variant_id, variant in candidates:
+                valid, variant_confidence = evaluate_variant(plan, variant)
+                take = mask & (winner < 0) & valid
+                winner[take] = variant_id
+                confidence[take] = variant_confidence[take]
+            return winner, confidence
+
+        # GATE 1: バリアントを順に評価し、最初に合格したものを採用
+        gate1_variants = list(plans[1].variants)
+        all_bars = np.ones(length, dtype=bool)
+        gate1_winner, gate1_confidence = first_valid(plans[1], list(enumerate(gate1_variants)), all_bars)
+
+        # GATE 2: GATE 1 の環境ごとに評価対象のシナリオ列が決まる
+        gate2_variants: List[CompiledVariant] = []
+        gate2_ids: Dict[int, int] = {}
+        gate2_winner = np.full(length, -1, dtype=np.int64)
+        gate2_confidence = np.zeros(length)
+        for gate1_id, gate1_variant in enumerate(gate1_variants):
+            mask = gate1_winner == gate1_id
+            if not mask.any():
+                continue
+            candidates = []
+            for variant in self._gate2_candidates(plans[2], gate1_variant.result_pattern):
+                if id(variant) not in gate2_ids:
+                    gate2_ids[id(variant)] = len(gate2_variants)
+                    gate2_variants.append(variant)
+                candidates.append((gate2_ids[id(variant)], variant))
+            winner, confidence = first_valid(plans[2], candidates, mask)
+            gate2_winner[mask] = winner[mask]
+            gate2_confidence[mask] = confidence[mask]
+
+        # GATE 3: GATE 1 の環境で許可されたトリガーを評価
+        gate3_variants = list(plans[3].variants)
+        gate3_winner = np.full(length, -1, dtype=np.int64)
+        gate3_confidence = np.zeros(length)
+        for gate1_id, gate1_variant in enumerate(gate1_variants):
+            mask = (gate1_winner == gate1_id) & (gate2_winner >= 0)
+            if not mask.any():
+                continue
+            environment = gate1_variant.result_pattern
+            candidates = [
+                (variant_id, variant) for variant_id, variant in enumerate(gate3_variants)
+                if not variant.allowed_environments or environment in variant.allowed_environments
+            ]
+            winner, confidence = first_valid(plans[3], candidates, mask)
+            gate3_winner[mask] = winner[mask]
+            gate3_confidence[mask] = confidence[mask]
+
+        gate1_valid = gate1_winner >= 0
+        gate2_valid = gate2_winner >= 0
+        gate3_valid = gate3_winner >= 0
+        overall = np.where(gate3_valid, (gate1_confidence + gate2_confidence + gate3_confidence) / 3.0, np.nan)
+
+        decisions = pd.DataFrame({
+            'timestamp': history.timestamps,
+            'gate1_valid': gate1_valid,
+            'gate1_pattern': self._pattern_names(gate1_variants, gate1_winner, 'no_valid_pattern', all_bars),
+            'gate1_confidence': gate1_confidence,
+            'gate2_valid': gate2_valid,
+            'gate2_pattern': self._pattern_names(gate2_variants, gate2_winner, 'no_valid_scenario', gate1_valid),
+            'gate2_confidence': gate2_confidence,
+            'gate3_valid': gate3_valid,
+            'gate3_pattern': self._pattern_names(gate3_variants, gate3_winner, 'no_valid_trigger', gate2_valid),
+            'gate3_confidence': gate3_confidence,
+            'overall_confidence': overall,
+        })
+        decisions['signal_type'] = self._signal_types(decisions, gate3_valid)
+        decisions['signal'] = self._apply_signal_interval(history.timestamps, gate3_valid)
+        return decisions
+
+    def build_signal(self, history: AlignedHistory, index: int,
+                     symbol: Optional[str] = None) -> ThreeGateResult:
+        """
+        シグナル足の ThreeGateResult をエンジンのメソッドで生成
+
+        Args:
+            history: 整列済みの履歴
+            index: 基準足のインデックス
+            symbol: 通貨ペアシンボル
+
+        Returns:
+            三層ゲート評価結果
+        """
+        engine = self.engine
+        data = history.snapshot(index)
+        timestamp = history.timestamps[index].to_pydatetime()
+
+        # 3ゲートと損切り・利確の計算で指標の解決結果を共有する
+        with engine.condition_evaluator.snapshot(data):
+            gate1 = engine._evaluate_compiled_variant(*self._winning_variant(1, data))
+            gate2 = engine._evaluate_compiled_variant(*self._winning_variant(2, data, gate1.pattern))
+            gate2.additional_data['gate1_environment'] = gate1.pattern
+            gate3 = engine._evaluate_compiled_variant(*self._winning_variant(3, data, gate1.pattern))
+            for gate in (gate1, gate2, gate3):
+                gate.timestamp = timestamp
+
+            entry_price = engine._calculate_entry_price(data, gate1, gate2)
+            return ThreeGateResult(
+                symbol=symbol,
+                gate1=gate1,
+                gate2=gate2,
+                gate3=gate3,
+                overall_confidence=(gate1.confidence + gate2.confidence + gate3.confidence) / 3.0,
+                signal_type=engine._determine_signal_type(gate1, gate2, gate3),
+                entry_price=entry_price,
+                stop_loss=engine._calculate_stop_loss(data, gate1, gate2, entry_price),
+                take_profit=engine._calculate_take_profit(data, gate1, gate2, entry_price),
+                timestamp=timestamp,
+            )
+
+    def _winning_variant(self, gate_number: int, data: Dict[str, Any],
+                         environment: Optional[str] = None) -> Tuple[CompiledVariant, List[Any]]:
+        """スナップショットで最初に合格するバリアントと解決済みの値を取得"""
+        plan = self.engine._get_gate_plan(gate_number)
+        values = plan.resolve(data, self.engine.condition_evaluator.table_for(data).resolve)
+        if gate_number == 1:
+            candidates = plan.variants
+        elif gate_number == 2:
+            candidates = self._gate2_candidates(plan, environment)
+        else:
+            candidates = [
+                variant for variant in plan.variants
+                if not variant.allowed_environments or environment in variant.allowed_environments
+            ]
+
+        for variant in candidates:
+            result = self.engine._evaluate_compiled_variant(variant, values)
+            if result.valid:
+                return variant, values
+        raise ValueError(f"GATE {gate_number} に合格するパターンがありません")
+
+    def _gate2_candidates(self, plan: CompiledGatePlan, environment: str) -> List[CompiledVariant]:
+        """GATE 1 の環境で評価されるGATE 2バリアントを評価順に列挙"""
+        candidates = []
+        for scenario_name in self.engine._get_valid_scenarios_for_environment(environment, plan.source):
+            scenario = plan.scenarios.get(scenario_name)
+            if scenario is None:
+                continue
+            if scenario.direct is not None:
+                candidates.append(scenario.direct)
+                continue
+            for env_name, variant in scenario.environment_variants:
+                if self.engine._matches_environment(env_name, environment):
+                    candidates.append(variant)
+        return candidates
+
+    def _evaluate_variant(self, plan: CompiledGatePlan, variant: CompiledVariant,
+                          history: AlignedHistory) -> Tuple[np.ndarray, np.ndarray]:
+        """バリアントの合否と信頼度を全足分計算"""
+        length = len(history)
+        total_score = np.zeros(length)
+        total_weight = 0.0
+        passed: Dict[str, np.ndarray] = {}
+
+        for condition in variant.conditions:
+            score = self._score_condition(plan, condition, history)
+            total_score += score * condition.weight
+            total_weight += condition.weight
+            condition_passed = score >= 0.5
+            previous = passed.get(condition.translated_name)
+            passed[condition.translated_name] = (
+                condition_passed if previous is None else previous | condition_passed
+            )
+
+        if total_weight > 0:
+            confidence = total_score / total_weight
+        else:
+            confidence = np.zeros(length)
+
+        valid = confidence >= variant.min_confidence
+        for required in variant.required_conditions:
+            valid = valid & passed.get(required, np.zeros(length, dtype=bool))
+        return valid, confidence
+
+    def _score_condition(self, plan: CompiledGatePlan, condition: CompiledCondition,
+                         history: AlignedHistory) -> np.ndarray:
+        """条件スコア（0.0 / 1.0）を全足分計算"""
+        length = len(history)
+        zeros = np.zeros(length)
+        if condition.indicator_slot is None:
+            return zeros
+
+        spec = condition.spec
+        reference = spec.get('reference')
+        value = spec.get('value')
+        indicator_values, indicator_none, indicator_bad = history.resolve(
+            *plan.slot_keys[condition.indicator_slot]
+        )
+
+        if condition.reference_slot is not None:
+            reference_values, reference_none, reference_bad = history.resolve(
+                *plan.slot_keys[condition.reference_slot]
+            )
+            score = self._apply_operator(condition.operator, spec, indicator_values, indicator_bad,
+                                         reference_values, reference_bad)
+            if value is not None:
+                # 参照指標が None の場合は value にフォールバック
+                fallback = self._apply_constant(condition.operator, spec, indicator_values, indicator_bad, value)
+                score = np.where(reference_none, fallback, score)
+            else:
+                score = np.where(reference_none, 0.0, score)
+        elif reference or value is None:
+            return zeros
+        else:
+            score = self._apply_constant(condition.operator, spec, indicator_values, indicator_bad, value)
+
+        return np.where(indicator_none, 0.0, score)
+
+    def _apply_constant(self, operator: Any, spec: Any, values: np.ndarray, bad: np.ndarray,
+                        constant: Any) -> np.ndarray:
+        """定数の参照値に対する演算子の適用"""
+        length = len(values)
+        if isinstance(constant, list):
+            if operator in ('between', 'not_between') and len(constant) == 2:
+                min_val, max_val = constant
+                with np.errstate(invalid='ignore'):
+                    inside = (min_val <= values) & (values <= max_val)
+                matched = inside if operator == 'between' else ~inside
+                return np.where(bad, 0.0, matched.astype(np.float64))
+            return np.zeros(length)
+
+        if isinstance(constant, str) and operator not in _COMPARISON_UFUNCS:
+            # 文字列の参照値は比較演算子でのみ float に変換される
+            return np.zeros(length)
+        try:
+            reference = float(constant)
+        except (ValueError, TypeError):
+            return np.zeros(length)
+        return self._apply_operator(operator, spec, values, bad,
+                                    np.full(length, reference), np.zeros(length, dtype=bool))
+
+    @staticmethod
+    def _apply_operator(operator: Any, spec: Any, values: np.ndarray, bad: np.ndarray,
+                        references: np.ndarray, reference_bad: np.ndarray) -> np.ndarray:
+        """数値の参照値に対する演算子の適用（PatternCompiler._bind_operator と同じ判定）"""
+        invalid = bad | reference_bad
+        with np.errstate(invalid='ignore'):
+            if operator in _COMPARISON_UFUNCS:
+                if 'multiplier' in spec:
+                    try:
+                        references = references * float(spec['multiplier'])
+                    except (ValueError, TypeError):
+                        return np.zeros(len(values))
+                invalid = invalid | np.isnan(values) | np.isnan(references)
+                matched = _COMPARISON_UFUNCS[operator](values, references)
+            elif operator in ('all_above', 'any_above'):
+                matched = values > references
+            elif operator in ('all_below', 'any_below'):
+                matched = values < references
+            elif operator == 'near':
+                matched = np.abs(values - references) <= spec.get('tolerance', 0.01) * references
+            elif operator == 'engulfs':
+                matched = np.abs(values) > np.abs(references) * 1.1
+            elif operator == 'breaks':
+                matched = values > references
+            else:
+                # between / not_between（リスト参照が必要）、oscillates_around（系列が必要）、未対応の演算子
+                return np.zeros(len(values))
+        return np.where(invalid, 0.0, matched.astype(np.float64))
+
+    @staticmethod
+    def _pattern_names(variants: List[CompiledVariant], winner: np.ndarray, failed_name: str,
+                       reached: np.ndarray) -> np.ndarray:
+        """勝ちバリアントのインデックスをパターン名に変換（未到達のゲートはNone）"""
+        names = np.array([variant.result_pattern for variant in variants] + [failed_name, None], dtype=object)
+        index = np.where(winner >= 0, winner, len(variants))
+        index = np.where(reached, index, len(variants) + 1)
+        return names[index]
+
+    def _signal_types(self, decisions: pd.DataFrame, passed: np.ndarray) -> np.ndarray:
+        """パターンの組み合わせごとにシグナルタイプを決定"""
+        signal_types = np.full(len(decisions), None, dtype=object)
+        if not passed.any():
+            return signal_types
+
+        combinations = decisions.loc[passed, ['gate1_pattern', 'gate2_pattern', 'gate3_pattern']]
+        cache = {}
+        for index, combination in zip(np.flatnonzero(passed), combinations.itertuples(index=False, name=None)):
+            if combination not in cache:
+                gates = [
+                    GateResult(valid=True, pattern=pattern, confidence=0.0, passed_conditions=[],
+                               failed_conditions=[], additional_data={}, timestamp=None)
+                    for pattern in combination
+                ]
+                cache[combination] = self.engine._determine_signal_type(*gates)
+            signal_types[index] = cache[combination]
+        return signal_types
+
+    def _apply_signal_interval(self, timestamps: pd.DatetimeIndex, passed: np.ndarray) -> np.ndarray:
+        """シグナル間隔制限を足の時刻で適用"""
+        if self.min_signal_interval is None:
+            return passed.copy()
+
+        signals = np.zeros(len(passed), dtype=bool)
+        interval = pd.Timedelta(self.min_signal_interval).value
+        times = timestamps.asi8
+        last_signal = None
+        for index in np.flatnonzero(passed):
+            if last_signal is None or times[index] - last_signal >= interval:
+                signals[index] = True
+                last_signal = times[index]
+        return signals
+
+    def _duration(self, timeframe: str) -> pd.Timedelta:
+        if timeframe not in TIMEFRAME_DURATIONS:
+            raise ValueError(f"未対応の時間足です: {timeframe}")
+        return TIMEFRAME_DURATIONS[timeframe]
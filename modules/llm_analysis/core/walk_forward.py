@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+三層ゲート設定のウォークフォワード検証
+
+履歴をローリング（またはアンカー）のインサンプル期間と、その直後のアウトオブサンプル期間に分割し、
+インサンプルで最良だったパラメータがアウトオブサンプルでも通用するかを確認します。
+
+- 全ウィンドウ・全組み合わせの評価を ParameterSweep のプロセスプールでまとめて並列実行します。
+- 指標は全期間で一度だけ計算・整列し、各ウィンドウは共有配列の区間を参照するため、
+  重なり合うウィンドウで同じ足の指標を再計算しません。
+- ウィンドウごとの選択パラメータと、パラメータの安定性（最頻値の採用率・変更回数・変動係数）、
+  アウトオブサンプル成績の劣化を集計します。
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from modules.llm_analysis.core.parameter_sweep import ParameterRange, ParameterSweep
+from modules.llm_analysis.core.vectorized_backtest import TIMEFRAME_DURATIONS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class WalkForwardWindow:
+    """インサンプル [in_sample_start, in_sample_end) とアウトオブサンプル [in_sample_end, out_of_sample_end)"""
+    index: int
+    in_sample_start: pd.Timestamp
+    in_sample_end: pd.Timestamp
+    out_of_sample_end: pd.Timestamp
+
+    @property
+    def out_of_sample_start(self) -> pd.Timestamp:
+        return self.in_sample_end
+
+
+def build_windows(start: pd.Timestamp, end: pd.Timestamp, in_sample: pd.Timedelta, out_of_sample: pd.Timedelta,
+                  step: Optional[pd.Timedelta] = None, anchored: bool = False) -> List[WalkForwardWindow]:
+    """
+    ウォークフォワードのウィンドウを作成
+
+    Args:
+        start: 履歴の開始時刻
+        end: 履歴の終了時刻（この時刻を含まない）
+        in_sample: インサンプル期間の長さ
+        out_of_sample: アウトオブサンプル期間の長さ
+        step: ウィンドウをずらす幅（Noneの場合はアウトオブサンプル期間の長さ）
+        anchored: Trueの場合、インサンプル期間の開始を start に固定して伸ばしていく
+
+    Returns:
+        アウトオブサンプル期間が履歴に収まるウィンドウのリスト
+    """
+    in_sample, out_of_sample = pd.Timedelta(in_sample), pd.Timedelta(out_of_sample)
+    step = pd.Timedelta(step) if step is not None else out_of_sample
+    if in_sample <= pd.Timedelta(0) or out_of_sample <= pd.Timedelta(0) or step <= pd.Timedelta(0):
+        raise ValueError("ウィンドウの長さとずらす幅は正の値を指定してください")
+
+    windows = []
+    offset = pd.Timedelta(0)
+    while start + offset + in_sample + out_of_sample <= end:
+        in_sample_end = start + offset + in_sample
+        windows.append(WalkForwardWindow(
+            index=len(windows),
+            in_sample_start=start if anchored else start + offset,
+            in_sample_end=in_sample_end,
+            out_of_sample_end=in_sample_end + out_of_sample,
+        ))
+        offset += step
+    return windows
+
+
+@dataclass
+class WalkForwardResult:
+    """ウォークフォワード検証の結果"""
+    windows: pd.DataFrame
+    stability: pd.DataFrame
+    evaluations: pd.DataFrame = field(repr=False)
+    elapsed_seconds: float = 0.0
+
+    def get_summary(self) -> Dict[str, Any]:
+        """アウトオブサンプル成績とインサンプルからの劣化の集計"""
+        windows = self.windows
+        in_sample_r = float(windows['is_avg_r'].mean()) if len(windows) else 0.0
+        out_of_sample_r = float(windows['oos_avg_r'].mean()) if len(windows) else 0.0
+        return {
+            'windows': len(windows),
+            'oos_signals': int(windows['oos_signals'].sum()) if len(windows) else 0,
+            'oos_total_r': float(windows['oos_total_r'].sum()) if len(windows) else 0.0,
+            'is_avg_r': in_sample_r,
+            'oos_avg_r': out_of_sample_r,
+            # インサンプルの期待値がアウトオブサンプルでどれだけ残ったか
+            'walk_forward_efficiency': out_of_sample_r / in_sample_r if in_sample_r > 0 else None,
+            'mean_oos_rank_pct': float(windows['oos_rank_pct'].mean()) if len(windows) else None,
+            'elapsed_seconds': self.elapsed_seconds,
+        }
+
+
+class WalkForwardValidator:
+    """ローリングウィンドウでパラメータ選択を検証するウォークフォワードランナー"""
+
+    _METRICS = ('signals', 'wins', 'win_rate', 'avg_r', 'total_r')
+
+    def __init__(self, in_sample: pd.Timedelta, out_of_sample: pd.Timedelta,
+                 step: Optional[pd.Timedelta] = None, anchored: bool = False,
+                 sweep: Optional[ParameterSweep] = None, rank_by: str = 'total_r', min_signals: int = 1):
+        """
+        初期化
+
+        Args:
+            in_sample: インサンプル期間の長さ
+            out_of_sample: アウトオブサンプル期間の長さ
+            step: ウィンドウをずらす幅（Noneの場合はアウトオブサンプル期間の長さ）
+            anchored: Trueの場合、インサンプル期間の開始を履歴の先頭に固定
+            sweep: 評価に使うスイープエンジン（Noneの場合は既定の設定で作成）
+            rank_by: インサンプルでパラメータを選択する指標
+            min_signals: 選択対象とするインサンプルの最小シグナル数
+        """
+        self.in_sample = pd.Timedelta(in_sample)
+        self.out_of_sample = pd.Timedelta(out_of_sample)
+        self.step = step
+        self.anchored = anchored
+        self.sweep = sweep or ParameterSweep()
+        self.rank_by = rank_by
+        self.min_signals = min_signals
+        self.logger = logging.getLogger(__name__)
+
+    def run_from_prices(self, price_data: Dict[str, pd.DataFrame],
+                        ranges: Sequence[ParameterRange]) -> WalkForwardResult:
+        """OHLCVデータから指標を一度だけ計算して検証を実行"""
+        indicators = self.sweep.engine.technical_calculator.calculate_all_indicators(price_data)
+        return self.run(indicators, ranges)
+
+    def run(self, indicator_frames: Dict[str, pd.DataFrame], ranges: Sequence[ParameterRange]) -> WalkForwardResult:
+        """
+        指標計算済みの全履歴でウォークフォワード検証を実行
+
+        Args:
+            indicator_frames: calculate_all_indicators() の戻り値
+            ranges: スイープするパラメータ
+
+        Returns:
+            ウィンドウごとの選択結果とパラメータの安定性
+        """
+        start = time.perf_counter()
+        timestamps = self._base_timestamps(indicator_frames)
+        end = timestamps[-1] + TIMEFRAME_DURATIONS[self.sweep.base_timeframe]
+        windows = build_windows(timestamps[0], end, self.in_sample, self.out_of_sample,
+                                step=self.step, anchored=self.anchored)
+        if not windows:
+            raise ValueError("履歴がインサンプルとアウトオブサンプルの合計より短いため、ウィンドウを作成できません")
+
+        segments = []
+        for window in windows:
+            segments.append((window.in_sample_start, window.in_sample_end))
+            segments.append((window.out_of_sample_start, window.out_of_sample_end))
+        evaluations = self.sweep.evaluate_segments(indicator_frames, ranges, segments)
+        evaluations.insert(0, 'window', evaluations['segment'] // 2)
+        evaluations.insert(1, 'sample', np.where(evaluations['segment'] % 2 == 0, 'in_sample', 'out_of_sample'))
+        evaluations = evaluations.drop(columns='segment')
+
+        paths = [parameter.path for parameter in ranges]
+        table = pd.DataFrame([self._select(window, evaluations, paths) for window in windows])
+        elapsed = time.perf_counter() - start
+        self.logger.info(f"🚶 ウォークフォワード検証完了: {len(windows)}ウィンドウ, {elapsed:.2f}秒")
+        return WalkForwardResult(
+            windows=table,
+            stability=self.parameter_stability(table, paths),
+            evaluations=evaluations,
+            elapsed_seconds=elapsed,
+        )
+
+    def _select(self, window: WalkForwardWindow, evaluations: pd.DataFrame, paths: List[str]) -> Dict[str, Any]:
+        """インサンプルで最良のパラメータを選び、そのアウトオブサンプル成績を取得"""
+        rows = evaluations[evaluations['window'] == window.index]
+        in_sample = rows[rows['sample'] == 'in_sample'].reset_index(drop=True)
+        out_of_sample = rows[rows['sample'] == 'out_of_sample'].reset_index(drop=True)
+
+        eligible = in_sample[in_sample['signals'] >= self.min_signals]
+        candidates = eligible if len(eligible) else in_sample
+        # 同順位は組み合わせの並び順（先に列挙した値）を優先
+        chosen = int(candidates[self.rank_by].idxmax())
+
+        # アウトオブサンプルで選択パラメータが全組み合わせ中どの位置だったか（1.0が最良）
+        oos_scores = out_of_sample[self.rank_by]
+        oos_rank_pct = float((oos_scores <= oos_scores.iloc[chosen]).mean())
+
+        record = {
+            'window': window.index,
+            'in_sample_start': window.in_sample_start,
+            'in_sample_end': window.in_sample_end,
+            'out_of_sample_end': window.out_of_sample_end,
+            **{path: in_sample.at[chosen, path] for path in paths},
+            'eligible': len(eligible) > 0,
+        }
+        for metric in self._METRICS:
+            record[f'is_{metric}'] = in_sample.at[chosen, metric]
+            record[f'oos_{metric}'] = out_of_sample.at[chosen, metric]
+        record['oos_rank_pct'] = oos_rank_pct
+        return record
+
+    @staticmethod
+    def parameter_stability(windows: pd.DataFrame, paths: Sequence[str]) -> pd.DataFrame:
+        """
+        ウィンドウ間での選択パラメータの安定性
+
+        Returns:
+            パラメータごとの最頻値・採用率・隣接ウィンドウ間の変更回数・ユニーク数・変動係数
+        """
+        rows = []
+        for path in paths:
+            chosen = windows[path]
+            counts = chosen.value_counts(sort=True)
+            numeric = pd.to_numeric(chosen, errors='coerce')
+            mean = numeric.mean()
+            rows.append({
+                'parameter': path,
+                'mode': counts.index[0] if len(counts) else None,
+                'mode_share': float(counts.iloc[0] / len(chosen)) if len(counts) else 0.0,
+                'changes': int((chosen != chosen.shift()).iloc[1:].sum()),
+                'unique_values': int(chosen.nunique()),
+                'mean': float(mean) if numeric.notna().all() else None,
+                'cv': float(numeric.std(ddof=0) / abs(mean)) if numeric.notna().all() and mean else None,
+            })
+        return pd.DataFrame(rows)
+
+    def _base_timestamps(self, indicator_frames: Dict[str, pd.DataFrame]) -> pd.DatetimeIndex:
+        frame = indicator_frames.get(self.sweep.base_timeframe)
+        if frame is None or frame.empty:
+            raise ValueError(f"基準足 {self.sweep.base_timeframe} の指標がありません")
+        timestamps = pd.DatetimeIndex(pd.to_datetime(frame['timestamp'])) if 'timestamp' in frame.columns \
+            else pd.DatetimeIndex(frame.index)
+        return timestamps.tz_localize('UTC') if timestamps.tz is None else timestamps.tz_convert('UTC')
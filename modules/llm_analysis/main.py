@@ -19,6 +19,7 @@ from modules.llm_analysis.config.settings import (
     LLMAnalysisSettings,
 )
 from modules.llm_analysis.core.llm_analysis_service import LLMAnalysisService
+from modules.instrumentation.core.exporter import start_metrics_server
 
 # ログ設定
 logging.basicConfig(
@@ -135,6 +136,7 @@ async def main():
         # 設定を読み込み
         settings = LLMAnalysisSettings.from_env()
         logger.info(f"Starting LLM analysis with settings: {settings.to_dict()}")
+        start_metrics_server("llm_analysis", default_port=8002)
 
         # サービスを作成して開始
         service = LLMAnalysisMain(settings)
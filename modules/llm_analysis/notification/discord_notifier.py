@@ -14,6 +14,9 @@ from dataclasses import dataclass, asdict
 from enum import Enum
 import os
 from dotenv import load_dotenv
+import time
+
+from ...instrumentation.core.metrics import get_metrics
 
 from ..core.scenario_manager import Scenario, Trade, ExitReason, TradeDirection
 from ..core.snapshot_manager import TradeSnapshot, MarketSnapshot
@@ -884,6 +887,7 @@ class DiscordNotifier:
             self.logger.warning("Discord webhook URLが設定されていません")
             return False
         
+        started = time.perf_counter()
         try:
             # メッセージデータの構築
             data = {}
@@ -907,13 +911,16 @@ class DiscordNotifier:
                 headers={"Content-Type": "application/json"}
             ) as response:
                 if response.status == 204:
+                    get_metrics().observe('discord_send_time', time.perf_counter() - started, status='success')
                     return True
                 else:
                     error_text = await response.text()
+                    get_metrics().observe('discord_send_time', time.perf_counter() - started, status='error')
                     self.logger.error(f"Discord送信エラー: {response.status} - {error_text}")
                     return False
                     
         except Exception as e:
+            get_metrics().observe('discord_send_time', time.perf_counter() - started, status='exception')
             self.logger.error(f"Discord送信エラー: {e}")
             return False
 
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+イベント駆動パイプラインの決定的リプレイ
+
+保存済みの price_data の5分足（または記録したティック）を仮想時計で再生し、本番と同じ
+ContinuousDataCollector → events → ThreeGateAnalysisService → シグナル保存 → Discord通知
+の経路を通します。Discord通知だけはスタブに差し替えて送信内容を記録します。
+
+- 時計: 各モジュールの datetime.now() を仮想時計に差し替え、足の確定時刻ごとに時計を進めます。
+  待機（asyncio.sleep）は行わないため、1か月分の取引も数分で再生できます。
+- データベース: 本番と同じスキーマ（マイグレーション適用済み）の専用データベースを使います。
+  リプレイ開始前の足はウォームアップとして保存し、以降の足はコレクター経由で保存されます。
+- 結果: スループット（足/秒、ステップ遅延）と保存されたシグナルを ReplayReport にまとめます。
+  fingerprint() / compare() でゲート設定変更前後のシグナルを比較できます。
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from types import ModuleType
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ...data_collection.core import continuous_collector
+from ...data_collection.core.continuous_collector import ContinuousDataCollector
+from ...data_collection.providers.base_provider import BaseDataProvider, DataCollectionResult, PriceData, TimeFrame
+from ...data_persistence.config.settings import DatabaseConfig
+from ...data_persistence.core.database.connection_manager import DatabaseConnectionManager
+from ..core import gate_memo, three_gate_engine
+from ..core.bar_store import BarStore
+from ..core.three_gate_engine import ThreeGateEngine
+from ..notification.discord_notifier import DiscordMessage, DiscordNotifier
+from ..services import three_gate_analysis_service
+from ..services.three_gate_analysis_service import ThreeGateAnalysisService
+
+logger = logging.getLogger(__name__)
+
+BAR_DURATION = timedelta(minutes=5)
+
+# 仮想時計に差し替えるモジュール（datetime.now() でシグナル間隔・タイムスタンプ・取得範囲を決めている）
+PIPELINE_MODULES = (continuous_collector, three_gate_analysis_service, three_gate_engine, gate_memo)
+
+
+class VirtualClock:
+    """リプレイ用の仮想時計（UTC）"""
+
+    def __init__(self, start: datetime):
+        self._now = self._as_utc(start)
+
+    @staticmethod
+    def _as_utc(moment: datetime) -> datetime:
+        moment = pd.Timestamp(moment).to_pydatetime()
+        return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment.astimezone(timezone.utc)
+
+    def now(self) -> datetime:
+        return self._now
+
+    def advance_to(self, moment: datetime) -> None:
+        """時計を進める（戻すことはできない）"""
+        moment = self._as_utc(moment)
+        if moment < self._now:
+            raise ValueError(f"仮想時計は戻せません: {self._now.isoformat()} → {moment.isoformat()}")
+        self._now = moment
+
+    @contextmanager
+    def patch(self, modules: Iterable[ModuleType] = PIPELINE_MODULES) -> Iterator["VirtualClock"]:
+        """モジュールの datetime を仮想時計の now() を返すクラスに差し替える"""
+        clock = self
+
+        class VirtualDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                moment = clock.now()
+                return moment.astimezone(tz) if tz is not None else moment.astimezone().replace(tzinfo=None)
+
+            @classmethod
+            def utcnow(cls):
+                return clock.now().replace(tzinfo=None)
+
+        originals = [(module, module.datetime) for module in modules if getattr(module, 'datetime', None) is datetime]
+        for module, _ in originals:
+            module.datetime = VirtualDatetime
+        try:
+            yield self
+        finally:
+            for module, original in originals:
+                module.datetime = original
+
+
+def ticks_to_bars(ticks: pd.DataFrame) -> pd.DataFrame:
+    """
+    記録したティックを5分足に集約
+
+    Args:
+        ticks: timestamp 列と price 列（または bid/ask 列）を持つティック
+
+    Returns:
+        timestamp, open, high, low, close, volume（ティック数）の5分足
+    """
+    timestamps = pd.to_datetime(ticks['timestamp'], utc=True)
+    price = ticks['price'] if 'price' in ticks.columns else (ticks['bid'] + ticks['ask']) / 2
+    series = pd.Series(price.to_numpy(dtype=np.float64), index=pd.DatetimeIndex(timestamps)).sort_index()
+    bars = series.resample(BAR_DURATION).ohlc()
+    bars['volume'] = series.resample(BAR_DURATION).count()
+    return bars.dropna().rename_axis('timestamp').reset_index()
+
+
+async def load_stored_bars(connection_manager: DatabaseConnectionManager, symbol: str,
+                           start: datetime, end: datetime, timeframe: str = '5m') -> pd.DataFrame:
+    """保存済みの price_data から [start, end) の足を読み込む"""
+    async with connection_manager.get_connection() as conn:
+        rows = await conn.fetch("""
+            SELECT timestamp, open, high, low, close, volume
+            FROM price_data
+            WHERE symbol = $1 AND timeframe = $2 AND timestamp >= $3 AND timestamp < $4
+            ORDER BY timestamp
+        """, symbol, timeframe, start, end)
+    return pd.DataFrame(
+        [(row['timestamp'], float(row['open']), float(row['high']), float(row['low']),
+          float(row['close']), int(row['volume'])) for row in rows],
+        columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'],
+    )
+
+
+class ReplayProvider(BaseDataProvider):
+    """記録済みの5分足を仮想時計の時刻までに確定した分だけ返すプロバイダー"""
+
+    def __init__(self, bars: pd.DataFrame, clock: VirtualClock, symbol: str):
+        super().__init__("replay")
+        self.clock = clock
+        self.symbol = symbol
+        # searchsorted に Timestamp.value（ナノ秒）を渡すため単位を揃える
+        timestamps = pd.DatetimeIndex(pd.to_datetime(bars['timestamp'], utc=True)).as_unit('ns')
+        order = np.argsort(timestamps.asi8, kind='stable')
+        self._timestamps = timestamps[order]
+        self._ns = self._timestamps.asi8
+        self._values = bars[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64)[order]
+
+    def __len__(self) -> int:
+        return len(self._ns)
+
+    @property
+    def timestamps(self) -> pd.DatetimeIndex:
+        return self._timestamps
+
+    def bars_between(self, start: datetime, end: datetime) -> List[PriceData]:
+        """開始時刻が [start, end) の足を PriceData として取得"""
+        lo = int(self._ns.searchsorted(pd.Timestamp(start).value, side='left'))
+        hi = int(self._ns.searchsorted(pd.Timestamp(end).value, side='left'))
+        return [
+            PriceData(
+                symbol=self.symbol,
+                timeframe=TimeFrame.M5,
+                timestamp=self._timestamps[i].to_pydatetime(),
+                open=float(self._values[i, 0]),
+                high=float(self._values[i, 1]),
+                low=float(self._values[i, 2]),
+                close=float(self._values[i, 3]),
+                volume=int(self._values[i, 4]),
+                source=self.name,
+            )
+            for i in range(lo, hi)
+        ]
+
+    async def get_historical_data(self, symbol: str, timeframe: TimeFrame,
+                                  start_date: datetime, end_date: datetime) -> DataCollectionResult:
+        if timeframe != TimeFrame.M5:
+            return DataCollectionResult(False, [], error_message=f"リプレイは5分足のみ対応: {timeframe.value}")
+        # 仮想時刻までに確定した足だけを返す
+        closed_before = min(pd.Timestamp(end_date), pd.Timestamp(self.clock.now())) - BAR_DURATION
+        data = self.bars_between(start_date, closed_before + pd.Timedelta(1, unit='ns'))
+        return DataCollectionResult(True, data)
+
+    async def get_latest_data(self, symbol: str, timeframe: TimeFrame) -> DataCollectionResult:
+        now = self.clock.now()
+        return await self.get_historical_data(symbol, timeframe, now - BAR_DURATION * 2, now)
+
+    async def get_available_symbols(self) -> List[str]:
+        return [self.symbol]
+
+    def is_available(self) -> bool:
+        return True
+
+    async def health_check(self) -> bool:
+        return True
+
+
+class ReplayDiscordNotifier(DiscordNotifier):
+    """送信せずにメッセージを記録する Discord 通知のスタブ"""
+
+    def __init__(self, clock: VirtualClock):
+        super().__init__()
+        self.clock = clock
+        self.sent: List[Dict[str, Any]] = []
+
+    async def initialize(self) -> None:
+        self.logger.info("✅ Discord配信スタブ初期化完了（リプレイ）")
+
+    async def _send_message(self, message: DiscordMessage) -> bool:
+        self.sent.append({'time': self.clock.now(), 'message': message})
+        return True
+
+    async def close(self):
+        self.sent.clear()
+
+
+@dataclass
+class ReplayReport:
+    """リプレイ結果（スループットと保存されたシグナル）"""
+    symbol: str
+    start: datetime
+    end: datetime
+    steps: int
+    bars: int
+    events: int
+    wall_seconds: float
+    step_latencies: List[float] = field(repr=False, default_factory=list)
+    signals: List[Dict[str, Any]] = field(default_factory=list)
+    notifications: int = 0
+
+    def get_summary(self) -> Dict[str, Any]:
+        """スループットの集計"""
+        latencies = np.asarray(self.step_latencies) if self.step_latencies else np.zeros(1)
+        virtual_seconds = (self.end - self.start).total_seconds()
+        return {
+            'symbol': self.symbol,
+            'steps': self.steps,
+            'bars': self.bars,
+            'events': self.events,
+            'signals': len(self.signals),
+            'notifications': self.notifications,
+            'wall_seconds': self.wall_seconds,
+            'bars_per_second': self.bars / self.wall_seconds if self.wall_seconds > 0 else None,
+            'speedup': virtual_seconds / self.wall_seconds if self.wall_seconds > 0 else None,
+            'step_latency_p50': float(np.percentile(latencies, 50)),
+            'step_latency_p95': float(np.percentile(latencies, 95)),
+            'step_latency_max': float(latencies.max()),
+            'fingerprint': self.fingerprint(),
+        }
+
+    def fingerprint(self) -> str:
+        """シグナル列のハッシュ（設定変更前後の回帰確認用）"""
+        payload = json.dumps(self.signals, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def compare(self, other: "ReplayReport") -> Dict[str, List[Dict[str, Any]]]:
+        """
+        別のリプレイ結果とシグナルを比較
+
+        Returns:
+            added（other にのみある）/ removed（self にのみある）/ changed（同時刻・同方向で内容が異なる）
+        """
+        def key(signal):
+            return signal['created_at'], signal['signal_type']
+
+        mine = {key(signal): signal for signal in self.signals}
+        theirs = {key(signal): signal for signal in other.signals}
+        return {
+            'added': [theirs[k] for k in sorted(theirs.keys() - mine.keys())],
+            'removed': [mine[k] for k in sorted(mine.keys() - theirs.keys())],
+            'changed': [
+                {'before': mine[k], 'after': theirs[k]}
+                for k in sorted(mine.keys() & theirs.keys()) if mine[k] != theirs[k]
+            ],
+        }
+
+
+class PipelineReplay:
+    """仮想時計でイベント駆動パイプライン全体を再生するランナー"""
+
+    def __init__(self, connection_manager: DatabaseConnectionManager, bars: pd.DataFrame,
+                 symbol: str = "USDJPY=X", replay_start: Optional[datetime] = None,
+                 engine: Optional[ThreeGateEngine] = None, interval: timedelta = BAR_DURATION,
+                 reset: bool = False):
+        """
+        初期化
+
+        Args:
+            connection_manager: リプレイ先の専用データベース（初期化済み、マイグレーション適用済み）
+            bars: 再生する5分足（timestamp, open, high, low, close, volume）
+            symbol: シンボル
+            replay_start: 再生開始時刻（これより前の足はウォームアップとして事前に保存。Noneの場合は先頭から）
+            engine: 評価に使うエンジン（Noneの場合は新規作成）
+            interval: 収集サイクルの間隔（本番の収集間隔）
+            reset: Trueの場合、開始前にリプレイ先のシンボルの price_data / events / three_gate_signals を削除
+        """
+        if bars.empty:
+            raise ValueError("再生する足がありません")
+
+        self.symbol = symbol
+        self.connection_manager = connection_manager
+        self.interval = interval
+        self.reset = reset
+
+        timestamps = pd.DatetimeIndex(pd.to_datetime(bars['timestamp'], utc=True))
+        self.replay_start = VirtualClock._as_utc(replay_start if replay_start is not None else timestamps.min())
+        self.replay_end = VirtualClock._as_utc(timestamps.max() + BAR_DURATION)
+        self.clock = VirtualClock(self.replay_start)
+
+        self.provider = ReplayProvider(bars, self.clock, symbol)
+        self.collector = ContinuousDataCollector(symbol=symbol)
+        self.collector.provider = self.provider
+        self.collector.connection_manager = connection_manager
+
+        self.service = ThreeGateAnalysisService(engine or ThreeGateEngine(), connection_manager)
+        self.service.bar_store = BarStore()
+        self.notifier = ReplayDiscordNotifier(self.clock)
+        self.service.discord_notifier = self.notifier
+        self.logger = logging.getLogger(__name__)
+
+    def schedule(self) -> List[datetime]:
+        """収集サイクルを実行する仮想時刻"""
+        first = self.replay_start + self.interval
+        count = max(0, int((self.replay_end - first) / self.interval) + 1)
+        return [first + self.interval * i for i in range(count)]
+
+    async def run(self, max_steps: Optional[int] = None) -> ReplayReport:
+        """
+        リプレイを実行
+
+        Args:
+            max_steps: 実行する収集サイクル数の上限
+
+        Returns:
+            スループットと保存されたシグナル
+        """
+        steps = self.schedule()[:max_steps]
+        latencies: List[float] = []
+        bars = events = 0
+
+        with self.clock.patch():
+            await self._prepare()
+            started = time.perf_counter()
+            for moment in steps:
+                self.clock.advance_to(moment)
+                step_started = time.perf_counter()
+                results = await self.collector.collect_all_timeframes()
+                bars += results.get(TimeFrame.M5.value, 0)
+                while True:
+                    processed = await self.service.process_events()
+                    events += processed
+                    if processed < self.service.event_batch_size:
+                        break
+                latencies.append(time.perf_counter() - step_started)
+            wall_seconds = time.perf_counter() - started
+            signals = await self._load_signals()
+
+        report = ReplayReport(
+            symbol=self.symbol,
+            start=self.replay_start,
+            end=self.clock.now(),
+            steps=len(steps),
+            bars=bars,
+            events=events,
+            wall_seconds=wall_seconds,
+            step_latencies=latencies,
+            signals=signals,
+            notifications=len(self.notifier.sent),
+        )
+        summary = report.get_summary()
+        self.logger.info(
+            f"⏩ リプレイ完了: {summary['steps']}サイクル, {summary['bars']}本, {summary['events']}イベント, "
+            f"シグナル{summary['signals']}件, {summary['wall_seconds']:.1f}秒 (x{summary['speedup'] or 0:.0f})"
+        )
+        return report
+
+    async def _prepare(self) -> None:
+        """リプレイ先を初期化し、開始前の足をウォームアップとして保存"""
+        if self.reset:
+            async with self.connection_manager.get_connection() as conn:
+                for table in ('price_data', 'events', 'three_gate_signals'):
+                    await conn.execute(f"DELETE FROM {table} WHERE symbol = $1", self.symbol)
+
+        warmup = self.provider.bars_between(self.provider.timestamps[0], self.replay_start)
+        if not warmup:
+            raise ValueError("リプレイ開始前の足がありません（replay_start を先頭より後にしてください）")
+
+        collector = self.collector
+        await collector.save_to_database(self.symbol, TimeFrame.M5.value, warmup)
+        derived: Dict[str, List[PriceData]] = {}
+        for bar in collector.resampler.update(warmup):
+            derived.setdefault(bar.timeframe.value, []).append(bar)
+        for timeframe, timeframe_bars in derived.items():
+            await collector.save_to_database(self.symbol, timeframe, timeframe_bars)
+        # ウォームアップで集計中のバケットはリサンプラーに残っている
+        collector._resampler_seeded = True
+        collector._cycle_bars = {}
+        derived_counts = {timeframe: len(timeframe_bars) for timeframe, timeframe_bars in derived.items()}
+        self.logger.info(f"🌱 ウォームアップ: 5分足{len(warmup)}本, 上位足{derived_counts}")
+
+    async def _load_signals(self) -> List[Dict[str, Any]]:
+        """リプレイ期間に保存されたシグナルを読み込む"""
+        async with self.connection_manager.get_connection() as conn:
+            rows = await conn.fetch("""
+                SELECT signal_type, overall_confidence, entry_price, stop_loss, take_profit,
+                       gate1_pattern, gate1_confidence, gate2_pattern, gate2_confidence,
+                       gate3_pattern, gate3_confidence, created_at
+                FROM three_gate_signals
+                WHERE symbol = $1 AND created_at >= $2 AND created_at <= $3
+                ORDER BY created_at, id
+            """, self.symbol, self.replay_start, self.clock.now())
+        signals = []
+        for row in rows:
+            signal = {key: row[key] for key in row.keys()}
+            for key, value in signal.items():
+                if hasattr(value, 'as_tuple'):  # Decimal
+                    signal[key] = float(value)
+            signal['created_at'] = signal['created_at'].isoformat()
+            signals.append(signal)
+        return signals
+
+
+async def main():
+    """保存済みの price_data をリプレイ用データベースで再生"""
+    parser = argparse.ArgumentParser(description="イベント駆動パイプラインのリプレイ")
+    parser.add_argument("--symbol", default="USDJPY=X")
+    parser.add_argument("--start", required=True, help="再生開始（ISO8601）")
+    parser.add_argument("--end", required=True, help="再生終了（ISO8601）")
+    parser.add_argument("--warmup-days", type=int, default=300, help="開始前に保存するウォームアップ日数")
+    parser.add_argument("--target", default=os.getenv("REPLAY_DATABASE_URL"), help="リプレイ先データベースの接続文字列")
+    parser.add_argument("--reset", action="store_true", help="リプレイ先のシンボルのデータを削除してから再生")
+    args = parser.parse_args()
+    if not args.target:
+        parser.error("--target または REPLAY_DATABASE_URL でリプレイ先の専用データベースを指定してください")
+
+    config = DatabaseConfig()
+    source = DatabaseConnectionManager(
+        connection_string=f"postgresql://{config.username}:{config.password}@{config.host}:{config.port}/{config.database}",
+        min_connections=1, max_connections=2,
+    )
+    target = DatabaseConnectionManager(connection_string=args.target, min_connections=1, max_connections=4)
+    start = VirtualClock._as_utc(datetime.fromisoformat(args.start))
+    end = VirtualClock._as_utc(datetime.fromisoformat(args.end))
+
+    await source.initialize()
+    await target.initialize()
+    try:
+        bars = await load_stored_bars(source, args.symbol, start - timedelta(days=args.warmup_days), end)
+        replay = PipelineReplay(target, bars, symbol=args.symbol, replay_start=start, reset=args.reset)
+        report = await replay.run()
+        print(json.dumps(report.get_summary(), indent=2, default=str, ensure_ascii=False))
+    finally:
+        await source.close()
+        await target.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    asyncio.run(main())
@@ -0,0 +1,160 @@
+"""
+足の確定に合わせたポーリングスケジューラー
+
+固定間隔でポーリングする代わりに、足の境界の直後に起きて確定した足を取得します。
+
+- 起床: 次の足の境界 + 反映待ち（settle_delay）
+- 再試行: 確定足がまだ反映されていなければ指数バックオフで再取得（上限回数まで）
+- 待機: 確定足を取得したら次の境界まで何もしない
+- 市場時間: FX の週末（金曜17:00〜日曜17:00 ニューヨーク時間）はポーリングせず、
+  市場が開いてから最初の足の確定まで待機
+"""
+
+import logging
+import statistics
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta, timezone
+from typing import Any, Deque, Dict, Optional
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _as_utc(now: datetime) -> datetime:
+    if now.tzinfo is None:
+        return now.replace(tzinfo=timezone.utc)
+    return now.astimezone(timezone.utc)
+
+
+@dataclass
+class FXMarketHours:
+    """FX の取引時間（日曜の取引開始から金曜の取引終了まで、ニューヨーク時間基準）"""
+    timezone: str = "America/New_York"
+    open_weekday: int = 6   # 日曜
+    close_weekday: int = 4  # 金曜
+    session_time: time = time(17, 0)
+
+    def __post_init__(self):
+        self._tz = pytz.timezone(self.timezone)
+
+    def is_open(self, now: datetime) -> bool:
+        """取引時間中かどうか"""
+        local = _as_utc(now).astimezone(self._tz)
+        weekday = local.weekday()
+        if weekday == self.close_weekday:
+            return local.time() < self.session_time
+        if weekday == self.open_weekday:
+            return local.time() >= self.session_time
+        # 金曜の取引終了から日曜の取引開始までの間の曜日（土曜）は休場
+        return not self.close_weekday < weekday < self.open_weekday
+
+    def next_open(self, now: datetime) -> datetime:
+        """次に取引が始まる時刻（UTC、取引時間中なら now）"""
+        now = _as_utc(now)
+        if self.is_open(now):
+            return now
+        local = now.astimezone(self._tz)
+        days_ahead = (self.open_weekday - local.weekday()) % 7
+        open_date = local.date() + timedelta(days=days_ahead)
+        opens_at = self._tz.localize(datetime.combine(open_date, self.session_time))
+        return opens_at.astimezone(timezone.utc)
+
+
+@dataclass
+class PollStats:
+    """ポーリングの統計"""
+    polls: int = 0
+    wasted_polls: int = 0
+    bars: int = 0
+    fallback_bars: int = 0
+    missed_bars: int = 0
+    closed_market_waits: int = 0
+    # 足の確定から取得までの遅延（秒）
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=500))
+
+    def record_latency(self, seconds: float) -> None:
+        self.latencies.append(seconds)
+
+    def median_latency(self) -> Optional[float]:
+        return statistics.median(self.latencies) if self.latencies else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'polls': self.polls,
+            'wasted_polls': self.wasted_polls,
+            'bars': self.bars,
+            'fallback_bars': self.fallback_bars,
+            'missed_bars': self.missed_bars,
+            'closed_market_waits': self.closed_market_waits,
+            'median_latency': self.median_latency(),
+        }
+
+
+class BarClosePollScheduler:
+    """足の境界に合わせたポーリングの起床時刻と再試行間隔を決める"""
+
+    def __init__(
+        self,
+        interval: timedelta = timedelta(minutes=5),
+        settle_delay: timedelta = timedelta(seconds=2),
+        retry_base: timedelta = timedelta(seconds=2),
+        retry_max: timedelta = timedelta(seconds=30),
+        max_retries: int = 6,
+        market_hours: Optional[FXMarketHours] = None
+    ):
+        """
+        初期化
+
+        Args:
+            interval: 足の長さ
+            settle_delay: 境界から最初のポーリングまでの待ち時間（データ提供元への反映待ち）
+            retry_base: 最初の再試行までの待ち時間（以降は倍々）
+            retry_max: 再試行の待ち時間の上限
+            max_retries: 確定足が見つからないときの再試行回数
+            market_hours: 市場時間（None の場合は FX の取引時間）
+        """
+        if interval <= timedelta(0):
+            raise ValueError("足の長さは正の値を指定してください")
+        if max_retries < 0:
+            raise ValueError("再試行回数は0以上を指定してください")
+        self.interval = interval
+        self.settle_delay = settle_delay
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.max_retries = max_retries
+        self.market_hours = market_hours or FXMarketHours()
+        self.stats = PollStats()
+
+    def bar_start(self, now: datetime) -> datetime:
+        """時刻が属する足の開始時刻（UTC）"""
+        now = _as_utc(now)
+        return _EPOCH + ((now - _EPOCH) // self.interval) * self.interval
+
+    def next_boundary(self, now: datetime) -> datetime:
+        """now より後の最初の足の境界"""
+        return self.bar_start(now) + self.interval
+
+    def next_wake(self, now: datetime) -> datetime:
+        """
+        次に起きる時刻
+
+        取引時間中は次の境界の直後。休場中は取引開始後に最初の足が確定した直後。
+        """
+        now = _as_utc(now)
+        if not self.market_hours.is_open(now):
+            self.stats.closed_market_waits += 1
+            now = self.market_hours.next_open(now)
+        return self.next_boundary(now) + self.settle_delay
+
+    def closed_bar_start(self, wake: datetime) -> datetime:
+        """起床時刻の直前に確定した足の開始時刻"""
+        return self.bar_start(wake) - self.interval
+
+    def retry_delay(self, attempt: int) -> float:
+        """attempt 回目（0始まり）の再試行までの待ち時間（秒）"""
+        delay = self.retry_base * (2 ** attempt)
+        return min(delay, self.retry_max).total_seconds()
@@ -10,16 +10,25 @@ import asyncio
 import aiohttp
 import json
 import ssl
-from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any, Callable, Awaitable
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any, AsyncIterable, Callable, Awaitable, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 import os
 from dotenv import load_dotenv
 
-from ..core.scenario_manager import Scenario, Trade, ExitReason, TradeDirection
-from ..core.rule_engine import RuleBasedEngine, EntrySignal
+from ..core.scenario_manager import Scenario, Trade, ExitReason
+from ..core.rule_engine import RuleBasedEngine, EntrySignal, TickRuleState
 from ..notification.discord_notifier import DiscordNotifier
+from .stream_dispatch import HEARTBEAT_MARKER, LineSplitter, OverflowPolicy, StreamDispatcher, get_json_loads
+from .tick_bar_aggregator import TickBar, TickBarAggregator
+from modules.data_persistence.config.settings import DatabaseConfig
+from modules.data_persistence.core.database.bulk_upsert import bulk_upsert_price_data
+from modules.data_persistence.core.database.connection_manager import DatabaseConnectionManager
+from modules.data_persistence.core.database.event_listener import DATA_COLLECTION_CHANNEL, notify_event
+
+# ストリームから集計した足の price_data.source
+STREAM_BAR_SOURCE = 'oanda_stream'
 
 
 class StreamType(Enum):
@@ -27,6 +36,7 @@ class StreamType(Enum):
     PRICING = "pricing"
     TRANSACTIONS = "transactions"
     ACCOUNT = "account"
+    BARS = "bars"  # 価格ストリームから集計した足の確定
 
 
 @dataclass
@@ -72,8 +82,20 @@ class AccountData:
 class OANDAStreamClient:
     """OANDA Stream API連携クライアント"""
 
-    def __init__(self):
-        """初期化"""
+    _STREAM_LABELS = {
+        StreamType.PRICING: "価格ストリーム",
+        StreamType.TRANSACTIONS: "取引ストリーム",
+        StreamType.ACCOUNT: "アカウントストリーム",
+    }
+
+    def __init__(self, connection_manager: Optional[DatabaseConnectionManager] = None, persist_bars: bool = True):
+        """
+        初期化
+        
+        Args:
+            connection_manager: 集計した足の保存先（Noneの場合は initialize() で設定から作成）
+            persist_bars: 集計した足を price_data に保存し、データ収集完了イベントを発行するか
+        """
         self.logger = logging.getLogger(__name__)
         self._lock = None
         
@@ -101,13 +123,41 @@ class OANDAStreamClient:
         self.stream_callbacks: Dict[str, List[Callable]] = {
             StreamType.PRICING.value: [],
             StreamType.TRANSACTIONS.value: [],
-            StreamType.ACCOUNT.value: []
+            StreamType.ACCOUNT.value: [],
+            StreamType.BARS.value: []
+        }
+        
+        # 読み取りとディスパッチの分離（ストリームごとの有界キュー）
+        self._json_loads = get_json_loads(fast=os.getenv('OANDA_FAST_JSON', 'true').lower() == 'true')
+        self.stream_queue_sizes = {
+            StreamType.PRICING.value: int(os.getenv('OANDA_PRICE_QUEUE_SIZE', '1000')),
+            StreamType.TRANSACTIONS.value: 10000,
+            StreamType.ACCOUNT.value: 100
         }
+        # 価格は通貨ペアごとに最新のティックだけを残すのが既定（drop_oldest も指定可）
+        self.price_overflow_policy = OverflowPolicy(os.getenv('OANDA_PRICE_OVERFLOW_POLICY', 'coalesce'))
+        self.dispatchers: Dict[str, StreamDispatcher] = {}
         
         # ルールエンジンとDiscord通知
         self.rule_engine: Optional[RuleBasedEngine] = None
         self.discord_notifier: Optional[DiscordNotifier] = None
         
+        # ティック評価（足の確定ごとに分析データを取得し、足の途中はメモリ上の状態だけで評価）
+        self.bar_interval = timedelta(minutes=5)
+        self.analysis_type = 'trend_direction'
+        self._tick_states: Dict[str, Tuple[datetime, TickRuleState]] = {}
+        self._tick_state_tasks: Dict[str, asyncio.Task] = {}
+        # 確定足の処理が終わっていない通貨ペア（件数）。その間はティックから状態を作り直さない
+        self._pending_bar_closes: Dict[str, int] = {}
+        
+        # ティック→足の集計（足の境界を過ぎた時点で確定し、一括UPSERTで保存）
+        self.bar_aggregator = TickBarAggregator(interval=self.bar_interval, timeframe='5m')
+        self.bar_close_grace = timedelta(milliseconds=250)  # 境界直前に発生したティックの到着待ち
+        self.connection_manager = connection_manager
+        self.persist_bars = persist_bars
+        self._owns_connection_manager = False
+        self._bar_tasks: set = set()
+        
         # 接続状態
         self.is_connected = False
         self.reconnect_attempts = 0
@@ -144,8 +194,29 @@ class OANDAStreamClient:
                 self.discord_notifier = DiscordNotifier()
                 await self.discord_notifier.initialize()
                 
+                # 集計した足の保存先
+                if self.persist_bars and self.connection_manager is None:
+                    await self._initialize_bar_storage()
+                
                 self.logger.info("✅ OANDA Stream APIクライアント初期化完了（REST API不使用設計）")
 
+    async def _initialize_bar_storage(self) -> None:
+        """足の保存用データベース接続の初期化（失敗した場合は保存せずに集計のみ行う）"""
+        try:
+            db_config = DatabaseConfig()
+            connection_string = f"postgresql://{db_config.username}:{db_config.password}@{db_config.host}:{db_config.port}/{db_config.database}"
+            connection_manager = DatabaseConnectionManager(
+                connection_string=connection_string,
+                min_connections=1,
+                max_connections=2
+            )
+            await connection_manager.initialize()
+            self.connection_manager = connection_manager
+            self._owns_connection_manager = True
+        except Exception as e:
+            self.persist_bars = False
+            self.logger.warning(f"⚠️ 足の保存を無効化（データベース接続エラー）: {e}")
+
     async def start_price_stream(self, instruments: List[str]) -> None:
         """
         価格ストリームの開始
@@ -174,6 +245,10 @@ class OANDAStreamClient:
             task = asyncio.create_task(self._handle_price_stream(stream_url, params))
             self.active_streams[StreamType.PRICING.value] = task
             
+            # ティックが途切れても足の境界で確定させるタイマー
+            if StreamType.BARS.value not in self.active_streams:
+                self.active_streams[StreamType.BARS.value] = asyncio.create_task(self._bar_close_timer())
+            
             self.is_connected = True
             self.reconnect_attempts = 0
             
@@ -225,117 +300,163 @@ class OANDAStreamClient:
 
     async def _handle_price_stream(self, stream_url: str, params: Dict[str, str]) -> None:
         """価格ストリームの処理"""
-        while True:
-            try:
-                async with self.session.get(stream_url, params=params) as response:
-                    if response.status != 200:
-                        self.logger.error(f"❌ 価格ストリーム接続エラー: {response.status}")
-                        await self._handle_reconnect()
-                        return
-                    
-                    self.logger.info("✅ 価格ストリーム接続成功")
-                    
-                    async for line in response.content:
-                        if line:
-                            try:
-                                # JSONデータの解析
-                                data = json.loads(line.decode('utf-8'))
-                                
-                                # 価格データの処理
-                                if 'type' in data and data['type'] == 'PRICE':
-                                    price_data = self._parse_price_data(data)
-                                    if price_data:
-                                        await self._process_price_data(price_data)
-                                
-                            except json.JSONDecodeError as e:
-                                self.logger.warning(f"⚠️ JSON解析エラー: {e}")
-                                continue
-                            except Exception as e:
-                                self.logger.error(f"❌ 価格データ処理エラー: {e}")
-                                continue
-                                
-            except asyncio.CancelledError:
-                self.logger.info("📡 価格ストリーム停止")
-                break
-            except Exception as e:
-                self.logger.error(f"❌ 価格ストリームエラー: {e}")
-                await self._handle_reconnect()
-                await asyncio.sleep(self.reconnect_delay)
+        await self._run_stream(StreamType.PRICING, stream_url, params, self._decode_price_message, reconnect=True)
 
     async def _handle_transaction_stream(self, stream_url: str) -> None:
         """取引ストリームの処理"""
-        while True:
-            try:
-                async with self.session.get(stream_url) as response:
-                    if response.status != 200:
-                        self.logger.error(f"❌ 取引ストリーム接続エラー: {response.status}")
-                        return
-                    
-                    self.logger.info("✅ 取引ストリーム接続成功")
-                    
-                    async for line in response.content:
-                        if line:
-                            try:
-                                # JSONデータの解析
-                                data = json.loads(line.decode('utf-8'))
-                                
-                                # 取引データの処理
-                                if 'transaction' in data:
-                                    transaction_data = self._parse_transaction_data(data['transaction'])
-                                    if transaction_data:
-                                        await self._process_transaction_data(transaction_data)
-                                
-                            except json.JSONDecodeError as e:
-                                self.logger.warning(f"⚠️ JSON解析エラー: {e}")
-                                continue
-                            except Exception as e:
-                                self.logger.error(f"❌ 取引データ処理エラー: {e}")
-                                continue
-                                
-            except asyncio.CancelledError:
-                self.logger.info("📡 取引ストリーム停止")
-                break
-            except Exception as e:
-                self.logger.error(f"❌ 取引ストリームエラー: {e}")
-                await asyncio.sleep(self.reconnect_delay)
+        await self._run_stream(StreamType.TRANSACTIONS, stream_url, None, self._decode_transaction_message)
 
     async def _handle_account_stream(self, stream_url: str) -> None:
         """アカウントストリームの処理"""
+        await self._run_stream(StreamType.ACCOUNT, stream_url, None, self._decode_account_message)
+
+    async def _run_stream(
+        self,
+        stream_type: StreamType,
+        stream_url: str,
+        params: Optional[Dict[str, str]],
+        decode: Callable[[Dict[str, Any]], Optional[Any]],
+        reconnect: bool = False
+    ) -> None:
+        """
+        ストリーム接続の維持
+        
+        Args:
+            stream_type: ストリームタイプ
+            stream_url: ストリームURL
+            params: クエリパラメータ
+            decode: 解析済みJSONからディスパッチするメッセージを作る関数（対象外はNone）
+            reconnect: 接続エラー時に再接続処理を行うか
+        """
+        label = self._STREAM_LABELS[stream_type]
         while True:
             try:
-                async with self.session.get(stream_url) as response:
+                async with self.session.get(stream_url, params=params) as response:
                     if response.status != 200:
-                        self.logger.error(f"❌ アカウントストリーム接続エラー: {response.status}")
+                        self.logger.error(f"❌ {label}接続エラー: {response.status}")
+                        if reconnect:
+                            await self._handle_reconnect()
                         return
                     
-                    self.logger.info("✅ アカウントストリーム接続成功")
+                    self.logger.info(f"✅ {label}接続成功")
+                    await self._read_stream(stream_type, response.content.iter_any(), decode)
                     
-                    async for line in response.content:
-                        if line:
-                            try:
-                                # JSONデータの解析
-                                data = json.loads(line.decode('utf-8'))
-                                
-                                # アカウントデータの処理
-                                if 'account' in data:
-                                    account_data = self._parse_account_data(data['account'])
-                                    if account_data:
-                                        await self._process_account_data(account_data)
-                                
-                            except json.JSONDecodeError as e:
-                                self.logger.warning(f"⚠️ JSON解析エラー: {e}")
-                                continue
-                            except Exception as e:
-                                self.logger.error(f"❌ アカウントデータ処理エラー: {e}")
-                                continue
-                                
             except asyncio.CancelledError:
-                self.logger.info("📡 アカウントストリーム停止")
+                self.logger.info(f"📡 {label}停止")
                 break
             except Exception as e:
-                self.logger.error(f"❌ アカウントストリームエラー: {e}")
+                self.logger.error(f"❌ {label}エラー: {e}")
+                if reconnect:
+                    await self._handle_reconnect()
                 await asyncio.sleep(self.reconnect_delay)
 
+    async def _read_stream(
+        self,
+        stream_type: StreamType,
+        chunks: AsyncIterable[bytes],
+        decode: Callable[[Dict[str, Any]], Optional[Any]]
+    ) -> None:
+        """
+        ストリームの読み取り（ディスパッチとは分離）
+        
+        受信したチャンクを行に分割し、ハートビートはJSONを解析せずに除外する。
+        メッセージは有界キューに入れるだけで、コールバックやルール評価の完了は待たない。
+        """
+        dispatcher = self._get_dispatcher(stream_type)
+        stats = dispatcher.stats
+        loads = self._json_loads
+        splitter = LineSplitter()
+        
+        def read_line(line: bytes) -> None:
+            stats.lines += 1
+            if HEARTBEAT_MARKER in line:
+                stats.heartbeats += 1
+                return
+            try:
+                data = loads(line)
+            except ValueError as e:
+                stats.parse_errors += 1
+                self.logger.warning(f"⚠️ JSON解析エラー: {e}")
+                return
+            stats.parsed += 1
+            try:
+                message = decode(data)
+            except Exception as e:
+                self.logger.error(f"❌ {self._STREAM_LABELS[stream_type]}データ処理エラー: {e}")
+                return
+            if message is not None:
+                dispatcher.put_nowait(message)
+        
+        async for chunk in chunks:
+            for line in splitter.feed(chunk):
+                read_line(line)
+        for line in splitter.flush():
+            read_line(line)
+
+    def _get_dispatcher(self, stream_type: StreamType) -> StreamDispatcher:
+        """ストリームタイプごとのディスパッチャー（初回に作成して開始）"""
+        dispatcher = self.dispatchers.get(stream_type.value)
+        if dispatcher is None:
+            if stream_type == StreamType.PRICING:
+                dispatcher = StreamDispatcher(
+                    stream_type.value, self._process_price_data,
+                    maxsize=self.stream_queue_sizes[stream_type.value],
+                    policy=self.price_overflow_policy,
+                    key=lambda price_data: price_data.instrument
+                )
+            elif stream_type == StreamType.TRANSACTIONS:
+                dispatcher = StreamDispatcher(
+                    stream_type.value, self._process_transaction_data,
+                    maxsize=self.stream_queue_sizes[stream_type.value]
+                )
+            else:
+                dispatcher = StreamDispatcher(
+                    stream_type.value, self._process_account_data,
+                    maxsize=self.stream_queue_sizes[stream_type.value]
+                )
+            self.dispatchers[stream_type.value] = dispatcher
+        dispatcher.start()
+        return dispatcher
+
+    def get_stream_stats(self) -> Dict[str, Dict[str, Any]]:
+        """ストリームごとの読み取り・ディスパッチ統計（キューの深さと解析レートを含む）"""
+        return {
+            name: {**dispatcher.stats.to_dict(), 'queue_depth': dispatcher.depth}
+            for name, dispatcher in self.dispatchers.items()
+        }
+
+    def _decode_price_message(self, data: Dict[str, Any]) -> Optional[PriceData]:
+        """価格メッセージの解析と足の集計（読み取り側で全ティックを集計するため、キューで間引かれても足は正確）"""
+        if data.get('type') != 'PRICE':
+            return None
+        price_data = self._parse_price_data(data)
+        if price_data is None:
+            return None
+        
+        # スプレッドとミッドプライスの計算
+        price_data.spread = price_data.ask - price_data.bid
+        price_data.mid_price = (price_data.bid + price_data.ask) / 2
+        
+        # 足の集計（次の足のティックで前の足が確定）
+        closed_bars = self.bar_aggregator.add_tick(
+            price_data.instrument, price_data.time, price_data.bid, price_data.ask
+        )
+        if closed_bars:
+            self._dispatch_closed_bars(closed_bars)
+        return price_data
+
+    def _decode_transaction_message(self, data: Dict[str, Any]) -> Optional[TransactionData]:
+        """取引メッセージの解析"""
+        if 'transaction' not in data:
+            return None
+        return self._parse_transaction_data(data['transaction'])
+
+    def _decode_account_message(self, data: Dict[str, Any]) -> Optional[AccountData]:
+        """アカウントメッセージの解析"""
+        if 'account' not in data:
+            return None
+        return self._parse_account_data(data['account'])
+
     def _parse_price_data(self, data: Dict[str, Any]) -> Optional[PriceData]:
         """価格データの解析"""
         try:
@@ -389,11 +510,7 @@ class OANDAStreamClient:
             return None
 
     async def _process_price_data(self, price_data: PriceData) -> None:
-        """価格データの処理"""
-        # スプレッドとミッドプライスの計算
-        price_data.spread = price_data.ask - price_data.bid
-        price_data.mid_price = (price_data.bid + price_data.ask) / 2
-        
+        """価格データの処理（ディスパッチャーから呼ばれる。スプレッド等は読み取り時に計算済み）"""
         # コールバックの実行
         for callback in self.stream_callbacks[StreamType.PRICING.value]:
             try:
@@ -436,43 +553,208 @@ class OANDAStreamClient:
             except Exception as e:
                 self.logger.error(f"❌ アカウントデータコールバックエラー: {e}")
 
+    async def _bar_close_timer(self) -> None:
+        """足の境界ごとに形成中の足を確定"""
+        while True:
+            try:
+                now = datetime.now(timezone.utc)
+                wake_at = self.bar_aggregator.next_boundary(now) + self.bar_close_grace
+                await asyncio.sleep((wake_at - now).total_seconds())
+                
+                closed_bars = self.bar_aggregator.close_due(datetime.now(timezone.utc) - self.bar_close_grace)
+                if closed_bars:
+                    self._dispatch_closed_bars(closed_bars)
+                    
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"❌ 足確定タイマーエラー: {e}")
+
+    def _dispatch_closed_bars(self, bars: List[TickBar]) -> None:
+        """確定した足の保存・通知をティック処理と切り離して実行"""
+        instruments = {bar.instrument for bar in bars}
+        for instrument in instruments:
+            self._pending_bar_closes[instrument] = self._pending_bar_closes.get(instrument, 0) + 1
+        
+        def done(task: asyncio.Task) -> None:
+            self._bar_tasks.discard(task)
+            for instrument in instruments:
+                remaining = self._pending_bar_closes.get(instrument, 0) - 1
+                if remaining > 0:
+                    self._pending_bar_closes[instrument] = remaining
+                else:
+                    self._pending_bar_closes.pop(instrument, None)
+        
+        task = asyncio.create_task(self._handle_closed_bars(bars))
+        self._bar_tasks.add(task)
+        task.add_done_callback(done)
+
+    async def _handle_closed_bars(self, bars: List[TickBar]) -> None:
+        """
+        確定した足の処理
+        
+        1. price_data へ一括UPSERTし、足を含むデータ収集完了イベントを発行
+        2. 確定した足をこのプロセスのバーストアへ反映
+        3. 足確定のコールバックを実行
+        4. 反映後の分析データでティック評価用の状態を作り直す
+        """
+        events = self._build_bar_events(bars)
+        try:
+            if self.persist_bars and self.connection_manager is not None:
+                await self._persist_bars(bars, events)
+        except Exception as e:
+            self.logger.error(f"❌ 足の保存エラー: {e}")
+        
+        if self.rule_engine:
+            # ティック評価状態はこのプロセスのバーストアから作り直すため、
+            # NOTIFY の受信を待たずに確定足を反映しておく
+            for symbol, event_data in events.items():
+                try:
+                    await self.rule_engine.data_preparator.apply_collection_event(symbol, event_data)
+                except Exception as e:
+                    self.logger.error(f"❌ バーストアへの足の反映エラー ({symbol}): {e}")
+        
+        for bar in bars:
+            for callback in self.stream_callbacks[StreamType.BARS.value]:
+                try:
+                    if asyncio.iscoroutinefunction(callback):
+                        await callback(bar)
+                    else:
+                        callback(bar)
+                except Exception as e:
+                    self.logger.error(f"❌ 足確定コールバックエラー: {e}")
+            
+            if self.rule_engine:
+                self._schedule_tick_state_refresh(bar.instrument, bar.end, force=True)
+
+    def _build_bar_events(self, bars: List[TickBar]) -> Dict[str, Dict[str, Any]]:
+        """確定した足からシンボルごとのデータ収集完了イベントを作成"""
+        by_symbol: Dict[str, Dict[str, List[List[Any]]]] = {}
+        for bar in bars:
+            by_symbol.setdefault(self._to_symbol(bar.instrument), {}).setdefault(bar.timeframe, []).append(
+                bar.to_event_row()
+            )
+        
+        timestamp = datetime.now(timezone.utc).isoformat()
+        return {
+            symbol: {
+                "symbol": symbol,
+                "timeframes": {
+                    timeframe: {"new_records": len(rows), "latest_timestamp": rows[-1][0]}
+                    for timeframe, rows in payload.items()
+                },
+                "total_new_records": sum(len(rows) for rows in payload.values()),
+                "timestamp": timestamp,
+                "source": STREAM_BAR_SOURCE,
+                "bars": payload
+            }
+            for symbol, payload in by_symbol.items()
+        }
+
+    async def _persist_bars(self, bars: List[TickBar], events: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """mid の足を COPY + マージで price_data に保存し、データ収集完了イベントを発行"""
+        if events is None:
+            events = self._build_bar_events(bars)
+        columns = ("symbol", "timeframe", "timestamp", "open", "close", "high", "low", "volume", "source")
+        records = [
+            (self._to_symbol(bar.instrument), bar.timeframe, bar.start,
+             bar.mid.open, bar.mid.close, bar.mid.high, bar.mid.low, bar.tick_count, STREAM_BAR_SOURCE)
+            for bar in bars
+        ]
+        
+        async with self.connection_manager.get_connection() as conn:
+            await bulk_upsert_price_data(conn, records, columns)
+            
+            # イベントを購読する他プロセスのバーストアはイベント内の足を追記するため、DBの再取得は不要
+            for symbol, event_data in events.items():
+                async with conn.transaction():
+                    event_id = await conn.fetchval("""
+                        INSERT INTO events (event_type, symbol, event_data, created_at)
+                        VALUES ('data_collection_completed', $1, $2, NOW())
+                        RETURNING id
+                    """, symbol, json.dumps(event_data))
+                    await notify_event(conn, DATA_COLLECTION_CHANNEL, {
+                        "id": event_id,
+                        "event_type": "data_collection_completed",
+                        "symbol": symbol
+                    })
+        
+        self.logger.info(f"🕯️ 足を保存: {len(records)}件 ({', '.join(sorted(events))})")
+
     async def _evaluate_trading_rules(self, price_data: PriceData) -> None:
-        """取引ルールの評価"""
+        """
+        取引ルールの評価（ティックパス）
+        
+        分析データの取得と指標の計算は足が切り替わったときに1回だけバックグラウンドで行い、
+        ティックごとには形成中の足の価格を書き換えて価格に依存する条件だけを再評価する。
+        """
         try:
-            # ルールエンジンでの判定
-            evaluation_result = await self.rule_engine.evaluate_entry_conditions({
-                'instrument': price_data.instrument,
-                'price': price_data.mid_price,
-                'bid': price_data.bid,
-                'ask': price_data.ask,
-                'spread': price_data.spread,
-                'timestamp': price_data.time
-            })
+            instrument = price_data.instrument
+            bar_start = self._bar_start(price_data.time)
+            current = self._tick_states.get(instrument)
             
-            # エントリーシグナルの生成
-            if evaluation_result.get('should_enter', False):
-                entry_signal = EntrySignal(
-                    direction=TradeDirection.BUY if evaluation_result.get('direction') == 'BUY' else TradeDirection.SELL,
-                    strategy=evaluation_result.get('strategy', 'unknown'),
-                    confidence=evaluation_result.get('confidence', 0.0),
-                    entry_price=price_data.mid_price,
-                    stop_loss=evaluation_result.get('stop_loss', 0.0),
-                    take_profit_1=evaluation_result.get('take_profit_1', 0.0),
-                    take_profit_2=evaluation_result.get('take_profit_2', 0.0),
-                    take_profit_3=evaluation_result.get('take_profit_3', 0.0),
-                    risk_reward_ratio=evaluation_result.get('risk_reward_ratio', 0.0),
-                    max_hold_time=evaluation_result.get('max_hold_time', 240),
-                    rule_results=evaluation_result.get('rule_results', []),
-                    technical_summary=evaluation_result.get('technical_summary', {}),
-                    created_at=datetime.now(timezone.utc)
-                )
-                
+            # 確定足の処理中は、その足を反映した後に処理側が状態を作り直す
+            if (current is None or current[0] < bar_start) and instrument not in self._pending_bar_closes:
+                self._schedule_tick_state_refresh(instrument, bar_start)
+            
+            # 新しい足の状態ができるまで（確定足の指標が揃うまで）は評価しない
+            if current is None or current[0] != bar_start:
+                return
+            
+            for entry_signal in self.rule_engine.evaluate_tick(current[1], price_data.mid_price):
                 # シナリオの作成と通知
                 await self._create_and_notify_scenario(entry_signal, price_data)
                 
         except Exception as e:
             self.logger.error(f"❌ 取引ルール評価エラー: {e}")
 
+    def _bar_start(self, time: datetime) -> datetime:
+        """ティック時刻が属する足の開始時刻"""
+        if time.tzinfo is None:
+            time = time.replace(tzinfo=timezone.utc)
+        epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+        return epoch + ((time - epoch) // self.bar_interval) * self.bar_interval
+
+    def _schedule_tick_state_refresh(self, instrument: str, bar_start: datetime, force: bool = False) -> None:
+        """
+        ティック評価用の状態の作り直しを予約（通貨ペアごとに同時に1つまで）
+        
+        Args:
+            force: 実行中の作り直しを取り消してやり直す（確定足の保存後など、取得済みのデータが古い場合）
+        """
+        task = self._tick_state_tasks.get(instrument)
+        if task is not None and not task.done():
+            if not force:
+                return
+            task.cancel()
+        self._tick_state_tasks[instrument] = asyncio.create_task(
+            self._refresh_tick_state(instrument, bar_start)
+        )
+
+    async def _refresh_tick_state(self, instrument: str, bar_start: datetime) -> None:
+        """足の確定時に分析データを取得してティック評価用の状態を作成"""
+        try:
+            symbol = self._to_symbol(instrument)
+            state = await self.rule_engine.prepare_tick_state(symbol, self.analysis_type)
+            if state is not None:
+                current = self._tick_states.get(instrument)
+                if current is not None and current[0] == bar_start:
+                    # 同じ足の状態を作り直した場合は、シグナル済みのルールと足の高値・安値を引き継ぐ
+                    state.fired |= current[1].fired
+                    state.bar_high = max(state.bar_high, current[1].bar_high)
+                    state.bar_low = min(state.bar_low, current[1].bar_low)
+                    state.ticks = current[1].ticks
+                self._tick_states[instrument] = (bar_start, state)
+                self.logger.debug(f"🔄 ティック評価状態更新: {instrument} {bar_start.isoformat()} "
+                                  f"(ティック評価条件: {len(state.tick_conditions)})")
+        except Exception as e:
+            self.logger.error(f"❌ ティック評価状態の更新エラー ({instrument}): {e}")
+
+    @staticmethod
+    def _to_symbol(instrument: str) -> str:
+        """OANDAの通貨ペア名（USD_JPY）を分析データのシンボル（USDJPY=X）に変換"""
+        return f"{instrument.replace('_', '')}=X"
+
     async def _create_and_notify_scenario(self, entry_signal: EntrySignal, price_data: PriceData) -> None:
         """シナリオの作成と通知"""
         try:
@@ -548,11 +830,18 @@ class OANDAStreamClient:
                 pass
             del self.active_streams[stream_type.value]
             self.logger.info(f"✅ ストリーム停止: {stream_type.value}")
+        
+        dispatcher = self.dispatchers.pop(stream_type.value, None)
+        if dispatcher is not None:
+            await dispatcher.stop()
 
     async def stop_all_streams(self) -> None:
         """全ストリームの停止"""
-        for stream_type in list(self.active_streams.keys()):
+        for stream_type in set(self.active_streams) | set(self.dispatchers):
             await self.stop_stream(StreamType(stream_type))
+        for task in list(self._tick_state_tasks.values()) + list(self._bar_tasks):
+            task.cancel()
+        self._tick_state_tasks.clear()
         self.is_connected = False
         self.logger.info("✅ 全ストリーム停止")
 
@@ -567,6 +856,11 @@ class OANDAStreamClient:
         if self.discord_notifier:
             await self.discord_notifier.close()
         
+        if self._owns_connection_manager and self.connection_manager:
+            await self.connection_manager.close()
+            self.connection_manager = None
+            self._owns_connection_manager = False
+        
         self.logger.info("OANDAStreamClient closed")
 
 
@@ -0,0 +1,251 @@
+"""
+ストリームの読み取りとディスパッチの分離
+
+ソケットからの読み取り（行分割・JSON解析・ハートビートの除外）と、
+コールバックやルール評価の実行を有界キューで切り離します。
+遅いコールバックがあってもソケットの読み取りは止まらず、キューが溢れた場合は
+設定したポリシーで古いメッセージを捨てます。
+
+- 行分割: 受信したチャンクをまとめて split し、行の途中で切れた末尾だけを次回に持ち越す
+- JSON: orjson が利用できればそれを使い、なければ標準の json を使う
+- ハートビート: JSON を解析する前にバイト列の検索だけで除外
+- あふれ時のポリシー:
+    - drop_oldest: 最も古いメッセージを捨てる
+    - coalesce: キー（通貨ペア）ごとに最新のメッセージだけを残す
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from modules.instrumentation.core.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# OANDA のハートビート行に含まれるバイト列（{"type":"HEARTBEAT",...}）
+HEARTBEAT_MARKER = b'"HEARTBEAT"'
+
+# メトリクスの更新間隔（秒）
+_METRICS_INTERVAL = 1.0
+
+
+class OverflowPolicy(Enum):
+    """キューがあふれたときのポリシー"""
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+
+
+def get_json_loads(fast: bool = True) -> Callable[[Union[bytes, str]], Any]:
+    """JSON 解析関数（fast=True かつ orjson が利用できる場合は orjson.loads）"""
+    if fast and orjson is not None:
+        return orjson.loads
+    return json.loads
+
+
+class LineSplitter:
+    """チャンク単位で受信したバイト列を行に分割"""
+
+    def __init__(self):
+        self._partial = b''
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """
+        チャンクを追加して完成した行を返す（空行は含まない）
+
+        行の途中で終わっている末尾は次のチャンクと連結されるまで保持する。
+        """
+        if self._partial:
+            chunk = self._partial + chunk
+        lines = chunk.split(b'\n')
+        self._partial = lines.pop()
+        return [line for line in lines if line.strip()]
+
+    def flush(self) -> List[bytes]:
+        """保持している末尾を行として返す（接続終了時）"""
+        partial, self._partial = self._partial, b''
+        return [partial] if partial.strip() else []
+
+
+@dataclass
+class StreamStats:
+    """ストリームの読み取り・ディスパッチの統計"""
+    name: str
+    lines: int = 0
+    heartbeats: int = 0
+    parsed: int = 0
+    parse_errors: int = 0
+    enqueued: int = 0
+    dispatched: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+    max_depth: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    def parse_rate(self, now: Optional[float] = None) -> float:
+        """開始からの1秒あたりの解析行数"""
+        elapsed = (now if now is not None else time.monotonic()) - self.started_at
+        return self.parsed / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'lines': self.lines,
+            'heartbeats': self.heartbeats,
+            'parsed': self.parsed,
+            'parse_errors': self.parse_errors,
+            'enqueued': self.enqueued,
+            'dispatched': self.dispatched,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'max_depth': self.max_depth,
+            'parse_rate': self.parse_rate(),
+        }
+
+
+class StreamDispatcher:
+    """有界キューとディスパッチタスク"""
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Optional[Awaitable[None]]],
+        maxsize: int = 1000,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        key: Optional[Callable[[Any], Hashable]] = None
+    ):
+        """
+        初期化
+
+        Args:
+            name: ストリーム名（統計・メトリクスのラベル）
+            handler: メッセージごとに呼び出す関数（コルーチン関数も可）
+            maxsize: キューに保持する最大件数
+            policy: あふれたときのポリシー
+            key: coalesce で最新のみを残す単位（通貨ペアなど）
+        """
+        if maxsize <= 0:
+            raise ValueError("キューの最大件数は1以上を指定してください")
+        if policy == OverflowPolicy.COALESCE and key is None:
+            raise ValueError("coalesce ポリシーにはキー関数が必要です")
+        self.name = name
+        self.handler = handler
+        self.maxsize = maxsize
+        self.policy = policy
+        self.key = key
+        self.stats = StreamStats(name)
+        self.logger = logging.getLogger(__name__)
+
+        self._is_coroutine = asyncio.iscoroutinefunction(handler)
+        self._queue: Deque[Any] = deque()
+        # coalesce: キーの到着順と、キーごとの最新メッセージ
+        self._latest: Dict[Hashable, Any] = {}
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._metrics_at = 0.0
+        self._published_depth = 0
+        self._busy = False
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def put_nowait(self, message: Any) -> None:
+        """メッセージをキューに追加（読み取り側から呼ぶ。待機しない）"""
+        stats = self.stats
+        stats.enqueued += 1
+        if self.policy == OverflowPolicy.COALESCE:
+            key = self.key(message)
+            if key in self._latest:
+                # 未処理の同じキーのメッセージを最新で置き換える（順番はそのまま）
+                self._latest[key] = message
+                stats.coalesced += 1
+                return
+            if len(self._queue) >= self.maxsize:
+                self._latest.pop(self._queue.popleft(), None)
+                stats.dropped += 1
+            self._latest[key] = message
+            self._queue.append(key)
+        else:
+            if len(self._queue) >= self.maxsize:
+                self._queue.popleft()
+                stats.dropped += 1
+            self._queue.append(message)
+
+        if len(self._queue) > stats.max_depth:
+            stats.max_depth = len(self._queue)
+        self._ready.set()
+
+    def _pop(self) -> Any:
+        item = self._queue.popleft()
+        if self.policy == OverflowPolicy.COALESCE:
+            return self._latest.pop(item)
+        return item
+
+    def start(self) -> asyncio.Task:
+        """ディスパッチタスクを開始"""
+        if self._task is None or self._task.done():
+            self.stats.started_at = time.monotonic()
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        """ディスパッチタスクを停止（未処理のメッセージは破棄）"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def drain(self) -> None:
+        """キューが空になり、処理中のメッセージが終わるまで待機"""
+        while self._queue or self._busy:
+            await asyncio.sleep(0)
+
+    async def run(self) -> None:
+        """キューのメッセージを順にハンドラへ渡す"""
+        while True:
+            await self._ready.wait()
+            while self._queue:
+                message = self._pop()
+                self._busy = True
+                try:
+                    if self._is_coroutine:
+                        await self.handler(message)
+                    else:
+                        self.handler(message)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.logger.error(f"❌ {self.name} ディスパッチエラー: {e}")
+                finally:
+                    self._busy = False
+                self.stats.dispatched += 1
+                self._publish_metrics()
+            self._ready.clear()
+            # バースト後にキューが空になったことを反映
+            self._publish_metrics(force=self._published_depth != 0)
+
+    def _publish_metrics(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._metrics_at < _METRICS_INTERVAL:
+            return
+        self._metrics_at = now
+        self._published_depth = len(self._queue)
+        metrics = get_metrics()
+        metrics.set_gauge('stream_queue_depth', len(self._queue), stream=self.name)
+        metrics.set_gauge('stream_parse_rate', self.stats.parse_rate(now), stream=self.name)
+        metrics.set_gauge('stream_dropped_messages', self.stats.dropped, stream=self.name)
@@ -0,0 +1,177 @@
+"""
+ティック→足 集計
+
+価格ストリームの bid/ask ティックから、通貨ペアごとに bid/ask/mid の OHLC 足を作成します。
+出来高の代わりにティック数を数えます。
+
+- 足はティック時刻を足の長さで切り捨てた開始時刻ごとに集計（UTC基準）
+- 次の足のティックが届いた時点、またはタイマーで足の終了時刻を過ぎた時点で確定
+- 確定済みの足より古いティック（遅延到着）は足を書き換えずに破棄して件数だけ記録
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass
+class OHLC:
+    """四本値"""
+    open: float
+    high: float
+    low: float
+    close: float
+
+    @classmethod
+    def start(cls, price: float) -> 'OHLC':
+        return cls(price, price, price, price)
+
+    def update(self, price: float) -> None:
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+
+
+@dataclass
+class TickBar:
+    """ティックから集計した足（開始時刻を含み、終了時刻を含まない）"""
+    instrument: str
+    timeframe: str
+    start: datetime
+    end: datetime
+    bid: OHLC
+    ask: OHLC
+    mid: OHLC
+    tick_count: int = 1
+    last_tick: Optional[datetime] = None
+
+    def to_event_row(self) -> List[Any]:
+        """バーストアのイベント形式 [ISO8601タイムスタンプ, open, high, low, close, volume]（mid、出来高はティック数）"""
+        mid = self.mid
+        return [self.start.isoformat(), mid.open, mid.high, mid.low, mid.close, self.tick_count]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'instrument': self.instrument,
+            'timeframe': self.timeframe,
+            'start': self.start.isoformat(),
+            'end': self.end.isoformat(),
+            'bid': vars(self.bid).copy(),
+            'ask': vars(self.ask).copy(),
+            'mid': vars(self.mid).copy(),
+            'tick_count': self.tick_count,
+        }
+
+
+@dataclass
+class AggregatorStats:
+    """集計の統計"""
+    ticks: int = 0
+    bars_closed: int = 0
+    late_ticks: int = 0
+    last_close: Optional[datetime] = None
+    per_instrument: Dict[str, int] = field(default_factory=dict)
+
+
+class TickBarAggregator:
+    """bid/ask ティックを一定間隔の足に集計"""
+
+    def __init__(self, interval: timedelta = timedelta(minutes=5), timeframe: str = '5m'):
+        """
+        初期化
+
+        Args:
+            interval: 足の長さ
+            timeframe: 足の時間足名（price_data の timeframe）
+        """
+        if interval <= timedelta(0):
+            raise ValueError("足の長さは正の値を指定してください")
+        self.interval = interval
+        self.timeframe = timeframe
+        self.stats = AggregatorStats()
+        self._forming: Dict[str, TickBar] = {}
+        # 通貨ペアごとの確定済みの最新足の終了時刻（これより前のティックは遅延として破棄）
+        self._closed_until: Dict[str, datetime] = {}
+        self.logger = logging.getLogger(__name__)
+
+    def bar_start(self, time: datetime) -> datetime:
+        """時刻が属する足の開始時刻"""
+        if time.tzinfo is None:
+            time = time.replace(tzinfo=timezone.utc)
+        return _EPOCH + ((time - _EPOCH) // self.interval) * self.interval
+
+    def next_boundary(self, now: datetime) -> datetime:
+        """now より後の最初の足の境界"""
+        return self.bar_start(now) + self.interval
+
+    def forming(self, instrument: str) -> Optional[TickBar]:
+        """形成中の足"""
+        return self._forming.get(instrument)
+
+    def add_tick(self, instrument: str, time: datetime, bid: float, ask: float) -> List[TickBar]:
+        """
+        ティックを追加
+
+        Returns:
+            このティックで確定した足（次の足のティックが届いた場合のみ）
+        """
+        start = self.bar_start(time)
+        closed_until = self._closed_until.get(instrument)
+        if closed_until is not None and start < closed_until:
+            self.stats.late_ticks += 1
+            return []
+
+        self.stats.ticks += 1
+        mid = (bid + ask) / 2
+        bar = self._forming.get(instrument)
+        if bar is not None and bar.start == start:
+            bar.bid.update(bid)
+            bar.ask.update(ask)
+            bar.mid.update(mid)
+            bar.tick_count += 1
+            bar.last_tick = time
+            return []
+
+        closed = [self._close(instrument)] if bar is not None else []
+        self._forming[instrument] = TickBar(
+            instrument=instrument,
+            timeframe=self.timeframe,
+            start=start,
+            end=start + self.interval,
+            bid=OHLC.start(bid),
+            ask=OHLC.start(ask),
+            mid=OHLC.start(mid),
+            last_tick=time,
+        )
+        return closed
+
+    def close_due(self, now: datetime) -> List[TickBar]:
+        """
+        終了時刻を過ぎた形成中の足を確定（ティックが途切れても境界で確定させるためのタイマー用）
+
+        Args:
+            now: 現在時刻（UTC）
+
+        Returns:
+            確定した足
+        """
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+        due = [instrument for instrument, bar in self._forming.items() if bar.end <= now]
+        return [self._close(instrument) for instrument in due]
+
+    def _close(self, instrument: str) -> TickBar:
+        bar = self._forming.pop(instrument)
+        self._closed_until[instrument] = bar.end
+        self.stats.bars_closed += 1
+        self.stats.last_close = bar.end
+        self.stats.per_instrument[instrument] = self.stats.per_instrument.get(instrument, 0) + 1
+        self.logger.debug(f"🕯️ 足確定: {instrument} {bar.start.isoformat()} ({bar.tick_count}ティック)")
+        return bar
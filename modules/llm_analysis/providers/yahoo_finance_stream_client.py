@@ -7,8 +7,9 @@ OANDAの認証問題を回避し、Yahoo Finance APIを使用してリアルタ
 
 import asyncio
 import logging
+import pandas as pd
 import yfinance as yf
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any, Callable, Awaitable
 from dataclasses import dataclass
 from enum import Enum
@@ -16,6 +17,7 @@ from enum import Enum
 from ..core.scenario_manager import Scenario, Trade, ExitReason, TradeDirection
 from ..core.rule_engine import RuleBasedEngine, EntrySignal
 from ..notification.discord_notifier import DiscordNotifier
+from .bar_poll_scheduler import BarClosePollScheduler
 
 
 class StreamType(Enum):
@@ -51,8 +53,14 @@ class TransactionData:
 class YahooFinanceStreamClient:
     """Yahoo Finance Stream Client（OANDA代替）"""
 
-    def __init__(self):
-        """初期化"""
+    def __init__(self, poll_scheduler: Optional[BarClosePollScheduler] = None, poll_interval_name: str = '5m'):
+        """
+        初期化
+        
+        Args:
+            poll_scheduler: 足の確定に合わせたポーリングのスケジューラー（None の場合は5分足・FXの取引時間）
+            poll_interval_name: 取得する足の間隔（yfinance の interval）
+        """
         self.logger = logging.getLogger(__name__)
         self.callbacks: Dict[str, List[Callable]] = {
             StreamType.PRICING.value: [],
@@ -68,6 +76,11 @@ class YahooFinanceStreamClient:
         self.is_connected = False
         self.is_running = False
         
+        # ポーリング（足の境界の直後に起きて確定足を取得）
+        self.poll_scheduler = poll_scheduler or BarClosePollScheduler()
+        self.poll_interval_name = poll_interval_name
+        self._stop_event = asyncio.Event()
+        
         # シンボルマッピング
         self.symbol_mapping = {
             'USD_JPY': 'USDJPY=X',
@@ -114,53 +127,17 @@ class YahooFinanceStreamClient:
         
         self.is_running = True
         self.is_connected = True
+        self._stop_event.clear()
         
         self.logger.info(f"🔄 価格ストリーム開始: {instruments}")
         
         try:
             while self.is_running:
-                for instrument in instruments:
-                    try:
-                        # Yahoo Financeシンボルに変換
-                        yahoo_symbol = self.symbol_mapping.get(instrument, f"{instrument}=X")
-                        
-                        # 価格データ取得
-                        ticker = yf.Ticker(yahoo_symbol)
-                        info = ticker.info
-                        
-                        if info and 'regularMarketPrice' in info:
-                            # 価格データの作成
-                            current_price = info.get('regularMarketPrice', 0)
-                            bid = info.get('bid', current_price - 0.001)
-                            ask = info.get('ask', current_price + 0.001)
-                            
-                            price_data = PriceData(
-                                instrument=instrument,
-                                time=datetime.now(timezone.utc),
-                                bid=bid,
-                                ask=ask,
-                                status='tradeable',
-                                spread=ask - bid,
-                                mid_price=(bid + ask) / 2
-                            )
-                            
-                            # コールバックの実行
-                            for callback in self.callbacks[StreamType.PRICING.value]:
-                                try:
-                                    if asyncio.iscoroutinefunction(callback):
-                                        await callback(price_data)
-                                    else:
-                                        callback(price_data)
-                                except Exception as e:
-                                    self.logger.error(f"❌ コールバックエラー: {e}")
-                            
-                            self.logger.debug(f"📊 価格更新: {instrument} - {price_data.mid_price:.5f}")
-                        
-                    except Exception as e:
-                        self.logger.error(f"❌ 価格取得エラー {instrument}: {e}")
-                
-                # 60秒間隔で更新
-                await asyncio.sleep(60)
+                # 次の足の境界の直後（休場中は取引開始後の最初の確定足）まで待機
+                wake = self.poll_scheduler.next_wake(datetime.now(timezone.utc))
+                if not await self._sleep_until(wake):
+                    break
+                await self._poll_closed_bars(instruments, self.poll_scheduler.closed_bar_start(wake))
                 
         except Exception as e:
             self.logger.error(f"❌ ストリームエラー: {e}")
@@ -168,6 +145,135 @@ class YahooFinanceStreamClient:
         finally:
             self.is_running = False
 
+    async def _sleep_until(self, wake: datetime) -> bool:
+        """
+        指定時刻まで待機（ストリーム停止で中断）
+        
+        Returns:
+            ストリームが実行中のまま指定時刻に達した場合 True
+        """
+        timeout = (wake - datetime.now(timezone.utc)).total_seconds()
+        if timeout > 0:
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.is_running
+
+    async def _poll_closed_bars(self, instruments: List[str], bar_start: datetime) -> None:
+        """
+        確定した足が取得できるまでバックオフしながらポーリング
+        
+        Args:
+            instruments: 監視する通貨ペアのリスト
+            bar_start: 確定を待つ足の開始時刻（UTC）
+        """
+        scheduler = self.poll_scheduler
+        stats = scheduler.stats
+        bar_end = bar_start + scheduler.interval
+        pending = list(instruments)
+        
+        for attempt in range(scheduler.max_retries + 1):
+            final = attempt == scheduler.max_retries
+            for instrument in list(pending):
+                try:
+                    history = await self._fetch_recent_bars(instrument)
+                    stats.polls += 1
+                    bar = self._select_closed_bar(history, bar_start, bar_end, final)
+                    if bar is None:
+                        stats.wasted_polls += 1
+                        continue
+                    
+                    pending.remove(instrument)
+                    stats.bars += 1
+                    if final:
+                        stats.fallback_bars += 1
+                    stats.record_latency((datetime.now(timezone.utc) - bar_end).total_seconds())
+                    await self._emit_price(self._bar_to_price_data(instrument, bar, bar_end))
+                    
+                except Exception as e:
+                    self.logger.error(f"❌ 価格取得エラー {instrument}: {e}")
+            
+            if not pending or not self.is_running or final:
+                break
+            if not await self._sleep_until(
+                datetime.now(timezone.utc) + timedelta(seconds=scheduler.retry_delay(attempt))
+            ):
+                break
+        
+        if pending and self.is_running:
+            stats.missed_bars += len(pending)
+            self.logger.warning(f"⚠️ 確定足を取得できませんでした: {pending} ({bar_start.isoformat()})")
+
+    async def _fetch_recent_bars(self, instrument: str) -> pd.DataFrame:
+        """直近の足を取得（yfinance はブロッキングのためスレッドで実行）"""
+        yahoo_symbol = self.symbol_mapping.get(instrument, f"{instrument}=X")
+        return await asyncio.to_thread(
+            yf.Ticker(yahoo_symbol).history,
+            period='1d',
+            interval=self.poll_interval_name
+        )
+
+    @staticmethod
+    def _select_closed_bar(
+        history: Optional[pd.DataFrame],
+        bar_start: datetime,
+        bar_end: datetime,
+        final: bool = False
+    ) -> Optional[pd.Series]:
+        """
+        取得した足から確定済みの足を選ぶ
+        
+        Yahoo Finance は形成中の足も返すため、次の足（bar_end 以降）が現れた時点で
+        bar_start の足を確定とみなす。final の場合は次の足がなくても bar_start の足を使う。
+        """
+        if history is None or history.empty:
+            return None
+        index = history.index
+        if index.tz is None:
+            index = index.tz_localize('UTC')
+        else:
+            index = index.tz_convert('UTC')
+        
+        if not final and index[-1] < bar_end:
+            return None
+        matches = (index >= bar_start) & (index < bar_end)
+        if not matches.any():
+            return None
+        return history[matches].iloc[-1]
+
+    def _bar_to_price_data(self, instrument: str, bar: pd.Series, bar_end: datetime) -> PriceData:
+        """確定足の終値から価格データを作成（時刻は足の確定時刻）"""
+        close = float(bar['Close'])
+        bid = close - 0.001
+        ask = close + 0.001
+        return PriceData(
+            instrument=instrument,
+            time=bar_end,
+            bid=bid,
+            ask=ask,
+            status='tradeable',
+            spread=ask - bid,
+            mid_price=close
+        )
+
+    async def _emit_price(self, price_data: PriceData) -> None:
+        """価格コールバックの実行"""
+        for callback in self.callbacks[StreamType.PRICING.value]:
+            try:
+                if asyncio.iscoroutinefunction(callback):
+                    await callback(price_data)
+                else:
+                    callback(price_data)
+            except Exception as e:
+                self.logger.error(f"❌ コールバックエラー: {e}")
+        
+        self.logger.debug(f"📊 価格更新: {price_data.instrument} - {price_data.mid_price:.5f}")
+
+    def get_poll_stats(self) -> Dict[str, Any]:
+        """ポーリングの統計（ポーリング回数・空振り回数・確定から取得までの遅延の中央値）"""
+        return self.poll_scheduler.stats.to_dict()
+
     async def start_trade_stream(self) -> None:
         """トレードストリームの開始（Yahoo Financeでは使用しない）"""
         self.logger.warning("⚠️ Yahoo Financeではトレードストリームは使用できません")
@@ -180,6 +286,7 @@ class YahooFinanceStreamClient:
         """ストリームの停止"""
         self.is_running = False
         self.is_connected = False
+        self._stop_event.set()
         self.logger.info("🛑 ストリーム停止")
 
     async def get_current_price(self, instrument: str) -> Optional[PriceData]:
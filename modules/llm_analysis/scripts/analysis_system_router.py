@@ -19,10 +19,14 @@ from typing import Dict, Any, List, Optional
 sys.path.append(str(Path(__file__).parent.parent.parent.parent))
 
 from modules.data_persistence.core.database.connection_manager import DatabaseConnectionManager
+from modules.data_persistence.core.database.event_listener import EventNotificationListener
+from modules.data_persistence.core.database.event_queue import EventQueue
 from modules.data_persistence.config.settings import DatabaseConfig
 from modules.llm_analysis.services.analysis_service import AnalysisService
 from modules.llm_analysis.services.three_gate_analysis_service import ThreeGateAnalysisService
 from modules.llm_analysis.core.three_gate_engine import ThreeGateEngine
+from modules.llm_analysis.core.bar_store import get_bar_store
+from modules.instrumentation.core.exporter import start_metrics_server
 
 # ログ設定
 logging.basicConfig(
@@ -53,6 +57,11 @@ class AnalysisSystemRouter:
         self.three_gate_service = None
         self.is_running = False
         self.monitor_task = None
+        self.event_listener = None
+        self.event_queue = None
+        self.event_batch_size = 10
+        self.poll_interval = 5.0  # LISTEN接続が無い場合のポーリング間隔（秒）
+        self.fallback_poll_interval = 60.0  # 取りこぼし回収用のポーリング間隔（秒）
         
         # 統計情報
         self.stats = {
@@ -87,6 +96,12 @@ class AnalysisSystemRouter:
             )
             await self.connection_manager.initialize()
             
+            # イベント通知リスナー（LISTEN/NOTIFY）
+            self.event_listener = EventNotificationListener(db_config.connection_string)
+            
+            # イベントキュー（複数ワーカーで並列に消費できるようリース付きで確保）
+            self.event_queue = EventQueue(self.connection_manager)
+            
             # 分析サービスの初期化
             if self.analysis_mode == "legacy":
                 self.analysis_service = AnalysisService()
@@ -119,7 +134,8 @@ class AnalysisSystemRouter:
             logger.info("🚀 分析システムルーター開始")
             self.is_running = True
             
-            # イベント監視タスクの開始
+            # イベント通知リスナーとイベント監視タスクの開始
+            await self.event_listener.start()
             self.monitor_task = asyncio.create_task(self._monitor_events())
             
             logger.info("✅ 分析システムルーター開始完了")
@@ -152,8 +168,15 @@ class AnalysisSystemRouter:
                     for event in unprocessed_events:
                         await self._process_event(event)
                 
-                # 5秒間隔で監視
-                await asyncio.sleep(5)
+                # バッチいっぱいに確保できた場合は未処理が残っているため、待機せずに続けて確保
+                if len(unprocessed_events) >= self.event_batch_size:
+                    continue
+                
+                # 次のイベント通知まで待機
+                await self.event_listener.wait_for_event(
+                    poll_interval=self.poll_interval,
+                    fallback_interval=self.fallback_poll_interval
+                )
                 
             except asyncio.CancelledError:
                 logger.info("👁️ イベント監視タスクがキャンセルされました")
@@ -163,28 +186,20 @@ class AnalysisSystemRouter:
                 await asyncio.sleep(10)  # エラー時は10秒待機
     
     async def _get_unprocessed_events(self) -> List[Dict[str, Any]]:
-        """未処理のイベントを取得"""
+        """未処理のイベントを確保（他のワーカーが確保中のイベントは除外）"""
         try:
-            async with self.connection_manager.get_connection() as conn:
-                events = await conn.fetch("""
-                    SELECT id, event_type, symbol, event_data, created_at
-                    FROM events 
-                    WHERE event_type = 'data_collection_completed' 
-                    AND processed = FALSE
-                    ORDER BY created_at ASC
-                    LIMIT 10
-                """)
-                
-                return [
-                    {
-                        'id': event['id'],
-                        'event_type': event['event_type'],
-                        'symbol': event['symbol'],
-                        'event_data': event['event_data'],
-                        'created_at': event['created_at']
-                    }
-                    for event in events
-                ]
+            events = await self.event_queue.claim('data_collection_completed', limit=self.event_batch_size)
+            
+            return [
+                {
+                    'id': event['id'],
+                    'event_type': event['event_type'],
+                    'symbol': event['symbol'],
+                    'event_data': event['event_data'],
+                    'created_at': event['created_at']
+                }
+                for event in events
+            ]
                 
         except Exception as e:
             logger.error(f"❌ 未処理イベント取得エラー: {e}")
@@ -195,6 +210,9 @@ class AnalysisSystemRouter:
         try:
             logger.info(f"🔄 イベント処理開始: ID={event['id']}, シンボル={event['symbol']}")
             
+            # イベントに含まれる新しい足を共有バーストアへ反映
+            await get_bar_store().apply_event(self.connection_manager, event['symbol'], event['event_data'])
+            
             # 分析モードに基づいてイベントを処理
             if self.analysis_mode == "legacy":
                 await self._process_legacy_event(event)
@@ -217,6 +235,8 @@ class AnalysisSystemRouter:
             
         except Exception as e:
             logger.error(f"❌ イベント処理エラー: ID={event['id']}, エラー={e}")
+            # 再試行待ちに戻す（試行回数の上限に達した場合はデッドレター）
+            await self._mark_event_failed(event['id'], str(e))
     
     async def _process_legacy_event(self, event: Dict[str, Any]):
         """既存システムでイベントを処理"""
@@ -265,12 +285,15 @@ class AnalysisSystemRouter:
     async def _mark_event_processed(self, event_id: int):
         """イベントを処理済みとしてマーク"""
         try:
-            async with self.connection_manager.get_connection() as conn:
-                await conn.execute("""
-                    UPDATE events 
-                    SET processed = TRUE, processed_at = NOW() 
-                    WHERE id = $1
-                """, event_id)
+            await self.event_queue.complete(event_id)
+                
+        except Exception as e:
+            logger.error(f"❌ イベントマークエラー: {e}")
+    
+    async def _mark_event_failed(self, event_id: int, error_message: str):
+        """イベントの処理失敗を記録"""
+        try:
+            await self.event_queue.fail(event_id, error_message)
                 
         except Exception as e:
             logger.error(f"❌ イベントマークエラー: {e}")
@@ -351,6 +374,9 @@ class AnalysisSystemRouter:
                 except asyncio.CancelledError:
                     pass
             
+            if self.event_listener:
+                await self.event_listener.stop()
+            
             # 分析サービスを停止
             if self.analysis_service:
                 await self.analysis_service.stop()
@@ -378,6 +404,8 @@ async def main():
     
     args = parser.parse_args()
     
+    start_metrics_server("llm_analysis", default_port=8002)
+    
     router = AnalysisSystemRouter(analysis_mode=args.mode)
     
     try:
@@ -20,6 +20,7 @@ from modules.llm_analysis.core.three_gate_engine import ThreeGateEngine
 from modules.llm_analysis.services.three_gate_analysis_service import ThreeGateAnalysisService
 from modules.data_persistence.core.database.connection_manager import DatabaseConnectionManager
 from modules.data_persistence.config.settings import DatabaseConfig
+from modules.instrumentation.core.exporter import start_metrics_server
 
 # ログ設定
 logging.basicConfig(
@@ -138,10 +139,14 @@ class ThreeGateSystem:
         while self.is_running:
             try:
                 # データ収集完了イベントを監視
-                await self.analysis_service.process_events()
+                processed = await self.analysis_service.process_events()
                 
-                # 5秒間隔で監視
-                await asyncio.sleep(5)
+                # バッチいっぱいに処理した場合は未処理が残っているため、待機せずに続けて処理
+                if processed >= self.analysis_service.event_batch_size:
+                    continue
+                
+                # 次のイベント通知まで待機
+                await self.analysis_service.wait_for_events()
                 
             except asyncio.CancelledError:
                 logger.info("👁️ イベント監視タスクがキャンセルされました")
@@ -224,6 +229,8 @@ async def main():
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
+    start_metrics_server("llm_analysis", default_port=8002)
+    
     system = ThreeGateSystem()
     
     try:
@@ -19,6 +19,8 @@ from typing import Dict, List, Optional
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from modules.data_persistence.core.database.connection_manager import DatabaseConnectionManager
+from modules.data_persistence.core.database.event_listener import EventNotificationListener
+from modules.data_persistence.core.database.event_queue import EventQueue
 from modules.data_persistence.config.settings import DatabaseConfig
 from modules.llm_analysis.core.data_preparator import LLMDataPreparator
 from modules.llm_analysis.core.rule_engine import RuleBasedEngine
@@ -44,6 +46,14 @@ class AnalysisService:
             max_connections=self.db_config.max_connections
         )
         
+        # イベント通知（LISTEN/NOTIFY）とフォールバックポーリング設定
+        self.event_listener = EventNotificationListener(connection_string)
+        # 複数ワーカーで並列に消費できるよう、イベントはリース付きで確保する
+        self.event_queue = EventQueue(self.connection_manager)
+        self.event_batch_size = 10
+        self.poll_interval = 5.0  # LISTEN接続が無い場合のポーリング間隔（秒）
+        self.fallback_poll_interval = 60.0  # 取りこぼし回収用のポーリング間隔（秒）
+        
         # 分析コンポーネント
         self.data_preparator = LLMDataPreparator()
         self.rule_engine = RuleBasedEngine()
@@ -88,6 +98,8 @@ class AnalysisService:
         logger.info("🔄 分析サービス開始 - イベント監視中...")
         
         try:
+            await self.event_listener.start()
+            
             while self.is_running:
                 try:
                     # 未処理のイベントを取得
@@ -96,8 +108,15 @@ class AnalysisService:
                     for event in events:
                         await self._process_event(event)
                     
-                    # 5秒間隔でイベントをチェック
-                    await asyncio.sleep(5)
+                    # バッチいっぱいに確保できた場合は未処理が残っているため、待機せずに続けて確保
+                    if len(events) >= self.event_batch_size:
+                        continue
+                    
+                    # 次のイベント通知まで待機
+                    await self.event_listener.wait_for_event(
+                        poll_interval=self.poll_interval,
+                        fallback_interval=self.fallback_poll_interval
+                    )
                     
                 except Exception as e:
                     logger.error(f"❌ イベント処理エラー: {e}")
@@ -119,6 +138,7 @@ class AnalysisService:
         self.is_running = False
         
         try:
+            await self.event_listener.stop()
             await self.connection_manager.close()
             await self.discord_notifier.close()
             logger.info("✅ 分析サービス停止完了")
@@ -126,20 +146,13 @@ class AnalysisService:
             logger.error(f"❌ 分析サービス停止エラー: {e}")
     
     async def _get_unprocessed_events(self) -> List[Dict]:
-        """未処理のイベントを取得"""
+        """未処理のイベントを確保（他のワーカーが確保中のイベントは除外）"""
         try:
-            async with self.connection_manager.get_connection() as conn:
-                events = await conn.fetch("""
-                    SELECT id, event_type, symbol, event_data, created_at
-                    FROM events 
-                    WHERE event_type = 'data_collection_completed' 
-                    AND processed = false 
-                    AND symbol = $1
-                    ORDER BY created_at
-                    LIMIT 10
-                """, self.symbol)
-                
-                return [dict(event) for event in events]
+            return await self.event_queue.claim(
+                'data_collection_completed',
+                limit=self.event_batch_size,
+                symbol=self.symbol
+            )
                 
         except Exception as e:
             logger.error(f"❌ イベント取得エラー: {e}")
@@ -153,6 +166,9 @@ class AnalysisService:
             
             logger.info(f"🔄 イベント処理開始: ID={event_id}, シンボル={event['symbol']}")
             
+            # イベントに含まれる新しい足を共有バーストアへ反映
+            await self.data_preparator.apply_collection_event(event['symbol'], event_data)
+            
             # テクニカル分析の実行
             analysis_result = await self._perform_technical_analysis(event['symbol'])
             
@@ -330,24 +346,14 @@ class AnalysisService:
     async def _mark_event_processed(self, event_id: int):
         """イベントを処理済みにマーク"""
         try:
-            async with self.connection_manager.get_connection() as conn:
-                await conn.execute("""
-                    UPDATE events 
-                    SET processed = true, processed_at = NOW() 
-                    WHERE id = $1
-                """, event_id)
+            await self.event_queue.complete(event_id)
         except Exception as e:
             logger.error(f"❌ イベント処理済みマークエラー: {e}")
     
     async def _mark_event_error(self, event_id: int, error_message: str):
-        """イベントにエラーをマーク"""
+        """イベントにエラーをマーク（再試行待ちに戻し、上限到達でデッドレター）"""
         try:
-            async with self.connection_manager.get_connection() as conn:
-                await conn.execute("""
-                    UPDATE events 
-                    SET error_message = $1, retry_count = retry_count + 1
-                    WHERE id = $2
-                """, error_message, event_id)
+            await self.event_queue.fail(event_id, error_message)
         except Exception as e:
             logger.error(f"❌ イベントエラーマークエラー: {e}")
 
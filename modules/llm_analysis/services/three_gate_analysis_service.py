@@ -14,7 +14,12 @@ from typing import Dict, Any, List, Optional
 
 from ..core.three_gate_engine import ThreeGateEngine, ThreeGateResult
 from ...data_persistence.core.database.connection_manager import DatabaseConnectionManager
+from ...data_persistence.core.database.event_listener import EventNotificationListener
+from ...data_persistence.core.database.event_queue import EventQueue
 from ..core.technical_calculator import TechnicalIndicatorCalculator
+from ..core.bar_store import get_bar_store
+from ..core.indicator_snapshot_cache import IndicatorSnapshotCache
+from ...instrumentation.core.metrics import get_metrics
 from ..notification.discord_notifier import DiscordNotifier, DiscordMessage, DiscordEmbed
 
 logger = logging.getLogger(__name__)
@@ -32,9 +37,25 @@ class ThreeGateAnalysisService:
         self.engine = engine
         self.connection_manager = connection_manager
         self.technical_calculator = TechnicalIndicatorCalculator()
+        self.bar_store = get_bar_store()
+        # 入力の足が変わっていない時間足の指標値を再利用するキャッシュ
+        self.indicator_cache = IndicatorSnapshotCache()
+        # 足の追加ごとに指標状態を更新する（全履歴を再計算しない）時間足
+        self.incremental_timeframes = {'5m'}
+        # 時間足データ取得の同時実行数と、未読み込み時に1クエリでまとめて取得するか
+        self.max_concurrent_fetches = 4
+        self.single_query_fetch = False
         self.discord_notifier = DiscordNotifier()
         self.logger = logging.getLogger(__name__)
         
+        # イベント通知（LISTEN/NOTIFY）とフォールバックポーリング設定
+        self.event_listener = EventNotificationListener(getattr(connection_manager, 'connection_string', None))
+        # 複数ワーカーで並列に消費できるよう、イベントはリース付きで確保する
+        self.event_queue = EventQueue(connection_manager)
+        self.event_batch_size = 10
+        self.poll_interval = 5.0  # LISTEN接続が無い場合のポーリング間隔（秒）
+        self.fallback_poll_interval = 60.0  # 取りこぼし回収用のポーリング間隔（秒）
+        
         # 統計情報
         self.stats = {
             'total_events_processed': 0,
@@ -82,17 +103,44 @@ class ThreeGateAnalysisService:
             self.logger.info(f"├── GATE 3 通過率: {gate3_rate:.1f}% ({self.stats['gate3_pass_count']}/{self.stats['gate2_pass_count']})")
             self.logger.info(f"└── シグナル生成率: {signal_rate:.1f}% ({self.stats['total_signals_generated']}/{self.stats['total_events_processed']})")
     
-    async def process_events(self):
-        """イベントの処理"""
+    async def process_events(self) -> int:
+        """
+        イベントの処理
+        
+        Returns:
+            取得したイベント数
+        """
         try:
             # 未処理のイベントを取得
             events = await self._get_unprocessed_events()
             
             for event in events:
                 await self._process_single_event(event)
+            
+            return len(events)
                 
         except Exception as e:
             self.logger.error(f"❌ イベント処理エラー: {e}")
+            return 0
+    
+    async def wait_for_events(self) -> bool:
+        """
+        次のデータ収集完了イベントまで待機
+        
+        通知を受信すると即座に戻ります。LISTEN接続中は低頻度のフォールバック
+        ポーリング、切断中は従来の間隔でタイムアウトします。
+        process_events() がバッチいっぱいに処理した場合は未処理が残っているため、
+        呼び出し元は待機せずに続けて process_events() を呼び出してください。
+        
+        Returns:
+            通知で起床した場合True
+        """
+        # LISTEN接続は初回の待機時に開始（イベントを自前で監視する呼び出し元では不要）
+        await self.event_listener.start()
+        return await self.event_listener.wait_for_event(
+            poll_interval=self.poll_interval,
+            fallback_interval=self.fallback_poll_interval
+        )
     
     async def process_data_collection_event(self, symbol: str, new_data_count: int):
         """データ収集完了イベントの処理"""
@@ -118,13 +166,14 @@ class ThreeGateAnalysisService:
             self.logger.info(f"🚪 三層ゲート分析開始: {symbol}")
             
             # テクニカル指標を計算
-            indicators = await self._calculate_technical_indicators(symbol)
+            bar_versions: Dict[str, Any] = {}
+            indicators = await self._calculate_technical_indicators(symbol, bar_versions)
             
             # 三層ゲート評価を実行
             if indicators is None:
                 self.logger.warning(f"⚠️ テクニカル指標の計算に失敗: {symbol}")
                 return
-            result = await self.engine.evaluate(symbol, indicators)
+            result = await self.engine.evaluate(symbol, indicators, bar_versions=bar_versions)
             
             # 統計情報の更新
             self.stats['last_analysis_time'] = datetime.now(timezone.utc)
@@ -157,29 +206,21 @@ class ThreeGateAnalysisService:
             self.logger.error(f"❌ 三層ゲート分析エラー: {e}")
     
     async def _get_unprocessed_events(self) -> List[Dict[str, Any]]:
-        """未処理のイベントを取得"""
+        """未処理のイベントを確保（他のワーカーが確保中のイベントは除外）"""
         try:
-            async with self.connection_manager.get_connection() as conn:
-                result = await conn.fetch("""
-                    SELECT id, event_type, symbol, event_data, created_at
-                    FROM events 
-                    WHERE event_type = 'data_collection_completed' 
-                    AND processed = FALSE
-                    ORDER BY created_at ASC
-                    LIMIT 10
-                """)
-                
-                events = []
-                for row in result:
-                    events.append({
-                        'id': row['id'],
-                        'event_type': row['event_type'],
-                        'symbol': row['symbol'],
-                        'event_data': json.loads(row['event_data']) if row['event_data'] else {},
-                        'created_at': row['created_at']
-                    })
-                
-                return events
+            result = await self.event_queue.claim('data_collection_completed', limit=self.event_batch_size)
+            
+            events = []
+            for row in result:
+                events.append({
+                    'id': row['id'],
+                    'event_type': row['event_type'],
+                    'symbol': row['symbol'],
+                    'event_data': json.loads(row['event_data']) if row['event_data'] else {},
+                    'created_at': row['created_at']
+                })
+            
+            return events
                 
         except Exception as e:
             self.logger.error(f"❌ イベント取得エラー: {e}")
@@ -194,16 +235,21 @@ class ThreeGateAnalysisService:
             
             self.logger.info(f"🔄 イベント処理開始: {symbol} (ID: {event_id})")
             
+            # イベントに含まれる新しい足を共有バーストアへ反映
+            await self.bar_store.apply_event(self.connection_manager, symbol, event_data)
+            
             # テクニカル指標の計算
-            technical_data = await self._calculate_technical_indicators(symbol)
+            bar_versions: Dict[str, Any] = {}
+            technical_data = await self._calculate_technical_indicators(symbol, bar_versions)
             
             if not technical_data:
                 self.logger.warning(f"⚠️ テクニカル指標の計算に失敗: {symbol}")
-                await self._mark_event_processed(event_id, success=False)
+                await self._mark_event_processed(event_id, success=False,
+                                                 error_message="テクニカル指標の計算に失敗")
                 return
             
             # 三層ゲート評価の実行
-            result = await self.engine.evaluate(symbol, technical_data)
+            result = await self.engine.evaluate(symbol, technical_data, bar_versions=bar_versions)
             
             if result:
                 # シグナル生成
@@ -224,28 +270,67 @@ class ThreeGateAnalysisService:
             
         except Exception as e:
             self.logger.error(f"❌ イベント処理エラー: {e}")
-            await self._mark_event_processed(event['id'], success=False)
+            await self._mark_event_processed(event['id'], success=False, error_message=str(e))
     
-    async def _calculate_technical_indicators(self, symbol: str) -> Optional[Dict[str, Any]]:
-        """テクニカル指標の計算"""
+    async def _calculate_technical_indicators(self, symbol: str,
+                                              bar_versions: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        テクニカル指標の計算
+        
+        Args:
+            symbol: シンボル
+            bar_versions: 指定した場合、計算に使った時間足ごとの足のバージョンを格納
+                          （ThreeGateEngine.evaluate のゲート結果メモ化に渡す）
+        """
         try:
-            # 各時間足のデータを取得
+            # 各時間足のデータを並列に取得
             timeframes = ['1d', '4h', '1h', '5m']
             all_data = {}
             
-            for timeframe in timeframes:
-                # 複数のデータポイントを取得（テクニカル指標計算に必要）
-                data_list = await self._get_multiple_price_data(symbol, timeframe, limit=250)
-                if data_list:
-                    # DataFrameとして処理
-                    df = pd.DataFrame(data_list)
+            await self.bar_store.ensure_fresh_many(
+                self.connection_manager, symbol, timeframes,
+                max_concurrency=self.max_concurrent_fetches,
+                single_query=self.single_query_fetch
+            )
+            semaphore = asyncio.Semaphore(self.max_concurrent_fetches)
+            config_hash = self.technical_calculator.config_hash()
+            
+            async def latest_indicators(timeframe: str) -> Optional[Dict[str, Any]]:
+                # 読み出し前にキーを取得（読み出し中に足が更新されても、次回はキー不一致で再計算される）
+                snapshot_key = self.bar_store.get_snapshot_key(symbol, timeframe)
+                cache_key = (*snapshot_key, config_hash) if snapshot_key else None
+                if bar_versions is not None and cache_key is not None:
+                    bar_versions[timeframe] = cache_key
+                if cache_key is not None:
+                    cached = self.indicator_cache.get(symbol, timeframe, cache_key)
+                    if cached is not None:
+                        return cached
+                
+                async with semaphore:
+                    # 複数のデータポイントを取得（テクニカル指標計算に必要）
+                    df = await self._get_multiple_price_data(symbol, timeframe, limit=250)
+                if df is None:
+                    return None
+                
+                if timeframe in self.incremental_timeframes:
+                    latest = self.technical_calculator.calculate_latest_indicators(symbol, timeframe, df)
+                else:
                     indicators = self.technical_calculator.calculate_all_indicators({timeframe: df})
-                    if timeframe in indicators:
-                        # 最新の指標値を取得
-                        latest_indicators = indicators[timeframe].iloc[-1].to_dict()
-                        # 時間足プレフィックスを追加
-                        for key, value in latest_indicators.items():
-                            all_data[f"{timeframe}_{key}"] = value
+                    latest = indicators[timeframe].iloc[-1].to_dict() if timeframe in indicators else None
+                if latest is None:
+                    return None
+                
+                # 最新の指標値に時間足プレフィックスを追加
+                values = {f"{timeframe}_{key}": value for key, value in latest.items()}
+                if cache_key is not None:
+                    self.indicator_cache.put(symbol, timeframe, cache_key, values)
+                return values
+            
+            results = await asyncio.gather(*(latest_indicators(timeframe) for timeframe in timeframes))
+            
+            for values in results:
+                if values:
+                    all_data.update(values)
             
             return all_data
             
@@ -253,36 +338,14 @@ class ThreeGateAnalysisService:
             self.logger.error(f"❌ テクニカル指標計算エラー: {e}")
             return None
     
-    async def _get_multiple_price_data(self, symbol: str, timeframe: str, limit: int = 250) -> Optional[List[Dict[str, Any]]]:
-        """複数の価格データを取得（テクニカル指標計算用）"""
+    async def _get_multiple_price_data(self, symbol: str, timeframe: str, limit: int = 250) -> Optional[pd.DataFrame]:
+        """複数の価格データを取得（テクニカル指標計算用、共有バーストアから読み出し）"""
         try:
-            async with self.connection_manager.get_connection() as conn:
-                # 最新の複数の価格データを取得（時系列順で取得）
-                results = await conn.fetch("""
-                    SELECT open, high, low, close, volume, timestamp
-                    FROM price_data 
-                    WHERE symbol = $1 AND timeframe = $2
-                    ORDER BY timestamp DESC 
-                    LIMIT $3
-                """, symbol, timeframe, limit)
-                
-                # 時系列順に並び替え
-                results = list(reversed(results))
-                
-                if results:
-                    data_list = []
-                    for result in results:
-                        data_list.append({
-                            'open': result['open'],
-                            'high': result['high'],
-                            'low': result['low'],
-                            'close': result['close'],
-                            'volume': result['volume'],
-                            'timestamp': result['timestamp']
-                        })
-                    return data_list
-                
-                return None
+            df = await self.bar_store.get_frame(
+                self.connection_manager, symbol, timeframe, limit=limit, index=False,
+                fields=('open', 'high', 'low', 'close', 'volume')
+            )
+            return df if not df.empty else None
                 
         except Exception as e:
             self.logger.error(f"❌ 複数価格データ取得エラー: {e}")
@@ -320,11 +383,12 @@ class ThreeGateAnalysisService:
     async def _handle_signal_generation(self, result: ThreeGateResult):
         """シグナル生成の処理"""
         try:
-            # シグナル情報をデータベースに保存
-            await self._save_signal_to_database(result)
-            
-            # Discord通知の送信（実装予定）
-            await self._send_discord_notification(result)
+            with get_metrics().time('signal_generation_time'):
+                # シグナル情報をデータベースに保存
+                await self._save_signal_to_database(result)
+                
+                # Discord通知の送信（実装予定）
+                await self._send_discord_notification(result)
             
         except Exception as e:
             self.logger.error(f"❌ シグナル処理エラー: {e}")
@@ -428,15 +492,13 @@ class ThreeGateAnalysisService:
         except Exception as e:
             self.logger.error(f"❌ Discord通知エラー: {e}")
     
-    async def _mark_event_processed(self, event_id: int, success: bool):
-        """イベントを処理済みにマーク"""
+    async def _mark_event_processed(self, event_id: int, success: bool, error_message: str = ""):
+        """イベントを処理済みにマーク（失敗時は再試行待ち、上限到達でデッドレター）"""
         try:
-            async with self.connection_manager.get_connection() as conn:
-                await conn.execute("""
-                    UPDATE events 
-                    SET processed = TRUE, processed_at = NOW()
-                    WHERE id = $1
-                """, event_id)
+            if success:
+                await self.event_queue.complete(event_id)
+            else:
+                await self.event_queue.fail(event_id, error_message or "イベント処理失敗")
                 
         except Exception as e:
             self.logger.error(f"❌ イベントマークエラー: {e}")
@@ -455,7 +517,8 @@ class ThreeGateAnalysisService:
                 'database_connected': True,
                 'technical_calculator': 'available',
                 'last_analysis': self.stats['last_analysis_time'],
-                'total_events_processed': self.stats['total_events_processed']
+                'total_events_processed': self.stats['total_events_processed'],
+                'event_listener': self.event_listener.get_stats()
             }
             
         except Exception as e:
@@ -473,7 +536,9 @@ class ThreeGateAnalysisService:
             'signal_generation_rate': (
                 self.stats['total_signals_generated'] / self.stats['total_events_processed'] 
                 if self.stats['total_events_processed'] > 0 else 0
-            )
+            ),
+            'indicator_cache': self.indicator_cache.get_stats(),
+            'gate_memo': self.engine.gate_memo.get_stats()
         }
     
     async def close(self):
@@ -481,6 +546,8 @@ class ThreeGateAnalysisService:
         try:
             self.logger.info("🔧 三層ゲート分析サービス終了")
             
+            await self.event_listener.stop()
+            
             # TechnicalIndicatorCalculatorは同期クラスなのでcloseメソッドは不要
             
             self.logger.info("✅ 三層ゲート分析サービス終了完了")
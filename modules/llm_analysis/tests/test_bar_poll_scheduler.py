@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+足の確定に合わせたポーリングのテスト
+
+境界直後の起床時刻、再試行のバックオフ、FX の週末の休場、
+形成中の足を含む取得結果からの確定足の判定、確定足が現れるまでの再試行を確認します。
+"""
+
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+import pandas as pd
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from modules.llm_analysis.providers.bar_poll_scheduler import BarClosePollScheduler, FXMarketHours
+from modules.llm_analysis.providers.yahoo_finance_stream_client import YahooFinanceStreamClient, StreamType
+
+# 2024-01-05 は金曜日（ニューヨークは冬時間のため取引終了は 22:00 UTC）
+FRIDAY = datetime(2024, 1, 5, 1, 2, 30, tzinfo=timezone.utc)
+
+
+def test_wakes_after_boundary_with_backoff():
+    """次の境界の直後に起き、再試行の待ち時間は倍々で上限に達すること"""
+    scheduler = BarClosePollScheduler()
+    wake = scheduler.next_wake(FRIDAY)
+    assert wake == datetime(2024, 1, 5, 1, 5, 2, tzinfo=timezone.utc)
+    assert scheduler.closed_bar_start(wake) == datetime(2024, 1, 5, 1, 0, tzinfo=timezone.utc)
+    # 境界ちょうどでも次の境界まで待つ
+    assert scheduler.next_wake(datetime(2024, 1, 5, 1, 5, tzinfo=timezone.utc)) == \
+        datetime(2024, 1, 5, 1, 10, 2, tzinfo=timezone.utc)
+    assert [scheduler.retry_delay(attempt) for attempt in range(6)] == [2, 4, 8, 16, 30, 30]
+
+
+def test_sleeps_through_fx_weekend():
+    """金曜の取引終了後は日曜の取引開始後の最初の確定足まで待つこと（夏時間も考慮）"""
+    hours = FXMarketHours()
+    scheduler = BarClosePollScheduler(market_hours=hours)
+
+    # 取引終了直前の足は確定を待って取得する
+    assert scheduler.next_wake(datetime(2024, 1, 5, 21, 58, tzinfo=timezone.utc)) == \
+        datetime(2024, 1, 5, 22, 0, 2, tzinfo=timezone.utc)
+    assert not hours.is_open(datetime(2024, 1, 5, 22, 0, 2, tzinfo=timezone.utc))
+    assert scheduler.next_wake(datetime(2024, 1, 5, 22, 0, 2, tzinfo=timezone.utc)) == \
+        datetime(2024, 1, 7, 22, 5, 2, tzinfo=timezone.utc)
+    assert hours.next_open(datetime(2024, 1, 6, 12, 0, tzinfo=timezone.utc)) == \
+        datetime(2024, 1, 7, 22, 0, tzinfo=timezone.utc)
+    # 夏時間は 21:00 UTC に開始
+    assert hours.next_open(datetime(2024, 7, 6, 12, 0, tzinfo=timezone.utc)) == \
+        datetime(2024, 7, 7, 21, 0, tzinfo=timezone.utc)
+    assert hours.is_open(datetime(2024, 7, 7, 21, 0, tzinfo=timezone.utc))
+    assert scheduler.stats.closed_market_waits == 1
+
+
+def test_selects_bar_only_after_rollover():
+    """次の足が現れるまでは確定とみなさず、最終試行では形成中でなくても採用すること"""
+    index = pd.date_range('2024-01-05 00:55', periods=2, freq='5min', tz='Europe/London')
+    history = pd.DataFrame({'Close': [146.9, 147.0]}, index=index)
+    bar_start = datetime(2024, 1, 5, 1, 0, tzinfo=timezone.utc)
+    bar_end = bar_start + timedelta(minutes=5)
+
+    assert YahooFinanceStreamClient._select_closed_bar(history, bar_start, bar_end) is None
+    assert YahooFinanceStreamClient._select_closed_bar(history, bar_start, bar_end, final=True)['Close'] == 147.0
+
+    rolled = pd.concat([history, pd.DataFrame({'Close': [147.1]}, index=index[-1:] + pd.Timedelta(minutes=5))])
+    assert YahooFinanceStreamClient._select_closed_bar(rolled, bar_start, bar_end)['Close'] == 147.0
+    assert YahooFinanceStreamClient._select_closed_bar(pd.DataFrame(), bar_start, bar_end, final=True) is None
+
+
+def test_polls_until_closed_bar_appears():
+    """確定足が現れるまで再試行し、確定足ごとに1回だけコールバックを呼ぶこと"""
+    scheduler = BarClosePollScheduler(
+        interval=timedelta(seconds=1),
+        settle_delay=timedelta(milliseconds=10),
+        retry_base=timedelta(milliseconds=10),
+        retry_max=timedelta(milliseconds=40),
+        max_retries=5
+    )
+    client = YahooFinanceStreamClient(poll_scheduler=scheduler)
+    received = []
+    client.add_callback(StreamType.PRICING, received.append)
+    fetches = []
+
+    async def fetch_recent_bars(instrument):
+        # 境界後の2回目の取得で次の足が現れる
+        now = datetime.now(timezone.utc)
+        fetches.append(now)
+        start = scheduler.bar_start(now)
+        rolled = sum(1 for fetched in fetches if scheduler.bar_start(fetched) == start) >= 2
+        last = start if rolled else start - scheduler.interval
+        index = pd.DatetimeIndex([last - scheduler.interval, last])
+        return pd.DataFrame({'Close': [147.0, 147.1]}, index=index)
+
+    async def run():
+        task = asyncio.create_task(client.start_price_stream(['USD_JPY']))
+        while len(received) < 2:
+            await asyncio.sleep(0.01)
+        client.stop_stream()
+        await asyncio.wait_for(task, 1)
+
+    with mock.patch.object(scheduler.market_hours, 'is_open', return_value=True), \
+            mock.patch.object(client, '_fetch_recent_bars', side_effect=fetch_recent_bars):
+        asyncio.run(run())
+
+    assert [price.time for price in received][1] - received[0].time == timedelta(seconds=1)
+    assert all(price.mid_price == 147.0 for price in received)
+    stats = client.get_poll_stats()
+    assert stats['polls'] == 4 and stats['wasted_polls'] == 2
+    assert stats['fallback_bars'] == 0 and stats['missed_bars'] == 0
+    assert 0 <= stats['median_latency'] < 0.5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
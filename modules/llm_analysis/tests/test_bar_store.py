@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+ローリングバーストアのテスト
+
+リングバッファのビュー、イベントからの追記、DB差分同期の条件を確認します。
+"""
+
+import sys
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from modules.llm_analysis.core.bar_store import BarStore
+from modules.llm_analysis.core.data_preparator import LLMDataPreparator
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_rows(count: int, start: datetime = START, step: timedelta = timedelta(minutes=5)):
+    """price_data の行と同じ並びのタプルを作成"""
+    return [
+        (start + step * i, 150.0 + i, 150.5 + i, 149.5 + i, 150.2 + i, 100 + i, 1.0)
+        for i in range(count)
+    ]
+
+
+class InMemoryPriceTable:
+    """price_data クエリを記録する接続管理の代替（DBなしで同期条件を確認するため）"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    @asynccontextmanager
+    async def get_connection(self):
+        yield self
+
+    async def fetch(self, query, symbol, timeframe, *args):
+        self.queries.append(query)
+        if 'timestamp >=' in query:
+            since, limit = args
+            return [row for row in self.rows if row[0] >= since][:limit]
+        (limit,) = args
+        return list(reversed(self.rows))[:limit]
+
+
+def test_rolling_window_keeps_latest_bars_as_read_only_views():
+    """容量を超えると古い足が捨てられ、ビューは読み取り専用のゼロコピーであること"""
+    store = BarStore(capacity=100)
+    store.append_bars('USDJPY=X', '5m', make_rows(1000))
+
+    view = store.get_view('USDJPY=X', '5m')
+    assert len(view) == 100
+    assert view.close[0] == pytest.approx(150.2 + 900)
+    assert view.close[-1] == pytest.approx(150.2 + 999)
+    assert not view.close.flags.writeable
+
+    frame = view.to_frame()
+    assert np.shares_memory(frame['close'].to_numpy(), view.close)
+    assert frame.index[-1] == pd.Timestamp(START + timedelta(minutes=5 * 999))
+
+    tail = store.get_view('USDJPY=X', '5m', limit=10)
+    assert len(tail) == 10 and tail.close[-1] == view.close[-1]
+
+
+def test_upsert_updates_open_bar_and_fills_gaps():
+    """同時刻の足は上書きされ、窓内の欠損は時刻順に挿入されること"""
+    store = BarStore(capacity=50)
+    rows = make_rows(10)
+    store.append_bars('USDJPY=X', '1h', rows[:5] + rows[6:])
+
+    revised = (rows[-1][0], 1.0, 2.0, 0.5, 1.5, 7, 1.0)
+    store.append_bars('USDJPY=X', '1h', [revised, rows[5]])
+
+    view = store.get_view('USDJPY=X', '1h')
+    assert len(view) == 10
+    assert np.all(np.diff(view.timestamp.astype('int64')) > 0)
+    assert view.close[5] == pytest.approx(rows[5][4])
+    assert view.close[-1] == pytest.approx(1.5)
+
+
+def test_events_append_without_db_reads_until_gap():
+    """連続したイベントの足はDBを読まずに追記し、欠落時のみ差分同期すること"""
+    async def scenario():
+        rows = make_rows(300)
+        table = InMemoryPriceTable(rows[:200])
+        store = BarStore(capacity=250)
+
+        first = await store.get_frame(table, 'USDJPY=X', '5m', limit=250)
+        warm_queries = len(table.queries)
+
+        # 連続したイベント: DBアクセスなし
+        bars = [[row[0].isoformat(), *row[1:6]] for row in rows[200:202]]
+        await store.apply_event(table, 'USDJPY=X', {'timeframes': {'5m': {}}, 'bars': {'5m': bars}})
+        after_event = len(table.queries)
+
+        # 取りこぼし（途中のイベントを別ワーカーが処理）: 差分同期
+        table.rows = rows[:260]
+        gap_bars = [[row[0].isoformat(), *row[1:6]] for row in rows[258:260]]
+        await store.apply_event(table, 'USDJPY=X', {'timeframes': {'5m': {}}, 'bars': {'5m': gap_bars}})
+
+        latest = await store.get_frame(table, 'USDJPY=X', '5m', limit=250)
+        return first, warm_queries, after_event, len(table.queries), latest, store.get_stats()
+
+    first, warm_queries, after_event, total_queries, latest, stats = asyncio.run(scenario())
+    assert len(first) == 200
+    assert warm_queries == 1
+    assert after_event == warm_queries
+    assert total_queries == warm_queries + 1
+    assert len(latest) == 250
+    assert latest['close'].iloc[-1] == pytest.approx(150.2 + 259)
+    assert stats['event_bars_applied'] == 2
+    assert stats['delta_syncs'] == 1
+
+
+class FakeClock:
+    """bar_store が参照する time.monotonic / time.time の代替"""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+def test_readers_without_events_resync_after_bar_close():
+    """イベントを受け取らない読み手は足の区切りを跨ぐか短い許容秒数を過ぎると差分同期すること"""
+    clock = FakeClock(1_700_000_370.0)  # 5分足の区切りから270秒後
+
+    async def scenario():
+        table = InMemoryPriceTable(make_rows(10))
+        store = BarStore(capacity=100)
+        await store.ensure_fresh(table, 'USDJPY=X', '5m')
+        synced = []
+        for advance, max_staleness in ((20.0, 60.0), (20.0, 60.0), (100.0, None), (30.0, 60.0)):
+            clock.now += advance
+            before = store.get_stats()['delta_syncs']
+            await store.ensure_fresh(table, 'USDJPY=X', '5m', max_staleness=max_staleness)
+            synced.append(store.get_stats()['delta_syncs'] > before)
+        return synced
+
+    with mock.patch('modules.llm_analysis.core.bar_store.time', clock):
+        synced = asyncio.run(scenario())
+    # 許容秒数内かつ区切り前は同期しない → 40秒でも区切りを跨いだので同期
+    # → イベント前提の読み手は既定の max_staleness まで同期しない → 許容秒数を超えたので同期
+    assert synced == [False, True, False, True]
+
+
+def test_preparator_uses_short_staleness_until_events_are_applied():
+    """データ準備器はイベントを反映した時間足だけバーストアの既定の鮮度を使うこと"""
+    async def scenario():
+        table = InMemoryPriceTable(make_rows(10))
+        preparator = LLMDataPreparator()
+        preparator.connection_manager = table
+        preparator.bar_store = BarStore(capacity=100)
+        preparator._initialized = True
+        await preparator._fetch_all_timeframes('USDJPY=X', ['5m', '1h'], START, START + timedelta(hours=1))
+        before = preparator._max_staleness('USDJPY=X', '5m')
+        bars = [[row[0].isoformat(), *row[1:6]] for row in make_rows(11)[10:]]
+        await preparator.apply_collection_event('USDJPY=X', {'timeframes': {'5m': {}}, 'bars': {'5m': bars}})
+        return before, preparator._max_staleness('USDJPY=X', '5m'), preparator._max_staleness('USDJPY=X', '1h')
+
+    before, after, other = asyncio.run(scenario())
+    assert before == 60.0
+    assert after is None
+    assert other == 60.0
+
+
+class SlowMultiTimeframeTable:
+    """時間足ごとの price_data を遅延付きで返す接続管理の代替"""
+
+    def __init__(self, rows_by_timeframe, delay: float):
+        self.rows_by_timeframe = rows_by_timeframe
+        self.delay = delay
+        self.queries = []
+
+    @asynccontextmanager
+    async def get_connection(self):
+        yield self
+
+    async def fetch(self, query, symbol, timeframe, limit):
+        self.queries.append(query)
+        await asyncio.sleep(self.delay)
+        if 'ROW_NUMBER()' in query:
+            return [
+                (tf, *row) for tf in sorted(timeframe)
+                for row in self.rows_by_timeframe[tf][-limit:]
+            ]
+        return list(reversed(self.rows_by_timeframe[timeframe]))[:limit]
+
+
+def test_timeframes_are_fetched_concurrently_or_in_one_query():
+    """複数時間足の読み込みが並列（最も遅いクエリ分）または1クエリで完了すること"""
+    timeframes = ['1d', '4h', '1h', '5m']
+    rows = {tf: make_rows(50) for tf in timeframes}
+
+    async def scenario(single_query: bool):
+        table = SlowMultiTimeframeTable(rows, delay=0.2)
+        store = BarStore(capacity=100)
+        started = asyncio.get_running_loop().time()
+        await store.ensure_fresh_many(table, 'USDJPY=X', timeframes, single_query=single_query)
+        elapsed = asyncio.get_running_loop().time() - started
+        return elapsed, len(table.queries), [len(store.get_view('USDJPY=X', tf)) for tf in timeframes]
+
+    elapsed, queries, lengths = asyncio.run(scenario(single_query=False))
+    assert queries == 4 and elapsed < 0.6
+    assert lengths == [50] * 4
+
+    elapsed, queries, lengths = asyncio.run(scenario(single_query=True))
+    assert queries == 1 and elapsed < 0.4
+    assert lengths == [50] * 4
+
+
+if __name__ == "__main__":
+    test_rolling_window_keeps_latest_bars_as_read_only_views()
+    test_upsert_updates_open_bar_and_fills_gaps()
+    test_events_append_without_db_reads_until_gap()
+    test_timeframes_are_fetched_concurrently_or_in_one_query()
+    test_readers_without_events_resync_after_bar_close()
+    test_preparator_uses_short_staleness_until_events_are_applied()
+    print("✅ ローリングバーストアテスト完了")
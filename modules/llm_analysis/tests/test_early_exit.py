@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+パターン評価の打ち切りのテスト
+
+打ち切りありの評価が全条件評価と同じ合否・信頼度（合格時）になり、
+必須条件の不合格や信頼度の上限で評価が打ち切られることを確認します。
+"""
+
+import sys
+import os
+import random
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from modules.llm_analysis.core.pattern_loader import PatternLoader
+from modules.llm_analysis.core.three_gate_engine import ThreeGateEngine
+
+CONFIG_DIR = str(Path(__file__).parent.parent / "config")
+
+
+def create_engine() -> ThreeGateEngine:
+    engine = ThreeGateEngine()
+    engine.pattern_loader = PatternLoader(config_dir=CONFIG_DIR)
+    return engine
+
+
+def gate_variants(plan):
+    variants = list(plan.variants)
+    for scenario in plan.scenarios.values():
+        if scenario.direct is not None:
+            variants.append(scenario.direct)
+        variants.extend(variant for _, variant in scenario.environment_variants)
+    return variants
+
+
+def test_early_exit_matches_full_evaluation():
+    """全ゲートのバリアントで、打ち切りありと全条件評価の合否が一致し、合格時は結果も一致すること"""
+    engine = create_engine()
+    rng = random.Random(7)
+    early_exits = 0
+
+    for gate_number in (1, 2, 3):
+        plan = engine._get_gate_plan(gate_number)
+        for _ in range(200):
+            values = [rng.choice([None, float('nan'), rng.uniform(0, 200), rng.uniform(95, 105)])
+                      for _ in plan.slot_keys]
+            for variant in gate_variants(plan):
+                fast = engine._evaluate_compiled_variant(variant, values)
+                full = engine.explain_variant(variant, values)
+                assert fast.valid == full.valid, variant.result_pattern
+                assert 'early_exit' not in full.additional_data
+                if fast.valid:
+                    assert fast.confidence == full.confidence
+                    assert fast.passed_conditions == full.passed_conditions
+                    assert fast.additional_data == full.additional_data
+                elif 'early_exit' in fast.additional_data:
+                    early_exits += 1
+                    assert fast.confidence >= full.confidence - 1e-9
+                    skipped = fast.additional_data['early_exit']['skipped_conditions']
+                    assert len(fast.passed_conditions) + len(fast.failed_conditions) + len(skipped) == len(variant.conditions)
+
+    assert early_exits > 0
+    assert engine.stats['early_exits'] == early_exits
+
+
+def test_required_condition_checked_first():
+    """必須条件が不合格なら他の条件を評価せずに打ち切ること"""
+    engine = create_engine()
+    conditions = [
+        {'name': f'cond_{i}', 'indicator': 'RSI_14', 'operator': '>', 'value': 50, 'timeframe': '1h', 'weight': 1.0}
+        for i in range(4)
+    ]
+    conditions.append({'name': 'required', 'indicator': 'ADX', 'operator': '>', 'value': 25, 'timeframe': '1h'})
+    config = {
+        'conditions': conditions,
+        'required_conditions': [engine._translate_condition_name('required')],
+        'confidence_calculation': {'min_confidence': 0.5},
+    }
+    plan = engine.pattern_compiler.compile_single_variant('sample', config, 'direct')
+    variant = plan.variants[0]
+    slot = {key: index for index, key in enumerate(plan.slot_keys)}
+    values = [None] * len(plan.slot_keys)
+    values[slot[('RSI_14', '1h')]] = 70.0
+    values[slot[('ADX', '1h')]] = 10.0
+
+    evaluated = []
+    for condition in variant.conditions:
+        object.__setattr__(condition, 'evaluate',
+                           lambda v, c=condition, f=condition.evaluate: evaluated.append(c.name) or f(v))
+
+    result = engine._evaluate_compiled_variant(variant, values)
+    assert not result.valid
+    assert evaluated == ['required']
+    assert len(result.additional_data['early_exit']['skipped_conditions']) == 4
+
+    evaluated.clear()
+    values[slot[('ADX', '1h')]] = 30.0
+    result = engine._evaluate_compiled_variant(variant, values)
+    assert result.valid
+    assert evaluated[0] == 'required' and len(evaluated) == 5
+
+
+if __name__ == "__main__":
+    test_early_exit_matches_full_evaluation()
+    test_required_condition_checked_first()
+    print("✅ パターン評価打ち切りテスト完了")
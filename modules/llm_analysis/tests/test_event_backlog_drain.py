@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+イベント消費ループのバックログ処理テスト
+
+バッチいっぱいにイベントを確保できた場合は通知やタイムアウトを待たずに続けて確保し、
+未処理が尽きてから次の通知を待つことを確認します。
+"""
+
+import asyncio
+import os
+import sys
+from unittest import mock
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from modules.llm_analysis.services.analysis_service import AnalysisService
+
+
+def test_full_batches_are_claimed_without_waiting():
+    """バックログはバッチごとに待機せず連続して確保され、待機は最後の1回だけであること"""
+    service = AnalysisService()
+    batches = [[{'id': i} for i in range(service.event_batch_size)]] * 3 + [[{'id': 99}]]
+    claims = []
+    waits = []
+
+    async def get_unprocessed_events():
+        claims.append(len(waits))
+        return batches[len(claims) - 1]
+
+    async def wait_for_event(poll_interval, fallback_interval):
+        waits.append(fallback_interval)
+        service.is_running = False
+        return False
+
+    with mock.patch.object(service, '_get_unprocessed_events', side_effect=get_unprocessed_events), \
+            mock.patch.object(service, '_process_event', new=mock.AsyncMock()), \
+            mock.patch.object(service.event_listener, 'start', new=mock.AsyncMock()), \
+            mock.patch.object(service.event_listener, 'wait_for_event', side_effect=wait_for_event):
+        asyncio.run(service.start())
+
+    # 3回のフルバッチと残り1件を待機なしで確保し、その後に通常の間隔で1回だけ待機
+    assert claims == [0, 0, 0, 0]
+    assert waits == [service.fallback_poll_interval]
+
+
+if __name__ == "__main__":
+    test_full_batches_are_claimed_without_waiting()
+    print("✅ イベントバックログ処理テスト完了")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+ゲート結果メモのテスト
+
+参照する時間足の足のバージョンが変わらない限りパターンを再評価せず、
+バージョンやパターン設定が変わった場合は再評価することを確認します。
+"""
+
+import sys
+import os
+import asyncio
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+pytest.importorskip("talib")
+
+from modules.llm_analysis.core.pattern_loader import PatternLoader
+from modules.llm_analysis.core.three_gate_engine import ThreeGateEngine
+
+CONFIG_DIR = str(Path(__file__).parent.parent / "config")
+SYMBOL = 'USDJPY=X'
+
+
+def create_snapshot(periods: int = 20000, seed: int = 5) -> dict:
+    """5分足のランダムウォークから各時間足の最新指標値（プレフィックス付き）を作成"""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range('2024-01-01', periods=periods, freq='5min', tz='UTC')
+    close = 150.0 * np.cumprod(1 + rng.normal(0, 0.0008, periods))
+    open_ = np.r_[close[0], close[:-1]]
+    df = pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) * 1.0003,
+        'low': np.minimum(open_, close) * 0.9997,
+        'close': close,
+        'volume': 0.0,
+    }, index=timestamps)
+
+    aggregation = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+    frames = {'5m': df.rename_axis('timestamp').reset_index()}
+    for timeframe, rule in (('1h', '1h'), ('4h', '4h'), ('1d', '1D')):
+        frames[timeframe] = df.resample(rule).agg(aggregation).dropna().rename_axis('timestamp').reset_index()
+
+    engine = ThreeGateEngine()
+    indicators = engine.technical_calculator.calculate_all_indicators(frames)
+    data = {}
+    for timeframe, frame in indicators.items():
+        data.update({f"{timeframe}_{key}": value for key, value in frame.iloc[-1].to_dict().items()})
+    return data
+
+
+def create_engine():
+    engine = ThreeGateEngine()
+    engine.pattern_loader = PatternLoader(config_dir=CONFIG_DIR)
+    calls = []
+    evaluate_variant = engine._evaluate_compiled_variant
+
+    def counting_evaluate(variant, values):
+        calls.append(variant.pattern_name)
+        return evaluate_variant(variant, values)
+
+    engine._evaluate_compiled_variant = counting_evaluate
+    return engine, calls
+
+
+@pytest.fixture(scope="module")
+def snapshot():
+    return create_snapshot()
+
+
+def test_unchanged_versions_reuse_gate_results(snapshot):
+    """5分足だけが更新された場合、日足を参照する GATE 1 のパターンは再評価されないこと"""
+    engine, calls = create_engine()
+    versions = {'1d': 1, '4h': 1, '1h': 1, '5m': 1}
+
+    first = asyncio.run(engine._evaluate_gate1(SYMBOL, snapshot, versions))
+    assert calls
+
+    calls.clear()
+    versions['5m'] = 2
+    second = asyncio.run(engine._evaluate_gate1(SYMBOL, snapshot, versions))
+    assert calls == []
+    assert engine.gate_memo.get_stats()['hits'] > 0
+    assert (second.valid, second.pattern, second.confidence) == (first.valid, first.pattern, first.confidence)
+    assert second.passed_conditions == first.passed_conditions
+    assert second.passed_conditions is not first.passed_conditions
+
+    # 日足が更新されたら再評価
+    versions['1d'] = 2
+    asyncio.run(engine._evaluate_gate1(SYMBOL, snapshot, versions))
+    assert calls
+
+    # バージョン未指定ではメモを使わない
+    calls.clear()
+    asyncio.run(engine._evaluate_gate1(SYMBOL, snapshot))
+    assert calls
+
+
+def test_new_plan_invalidates_memo(snapshot):
+    """パターン設定が再読み込みされて評価プランが変わるとメモが破棄されること"""
+    engine, calls = create_engine()
+    versions = {'1d': 1, '4h': 1, '1h': 1, '5m': 1}
+    asyncio.run(engine._evaluate_gate1(SYMBOL, snapshot, versions))
+
+    engine.pattern_compiler.clear()
+    calls.clear()
+    asyncio.run(engine._evaluate_gate1(SYMBOL, snapshot, versions))
+    assert calls
+    assert engine.gate_memo.get_stats()['invalidations'] == 1
+
+
+if __name__ == "__main__":
+    data = create_snapshot()
+    test_unchanged_versions_reuse_gate_results(data)
+    test_new_plan_invalidates_memo(data)
+    print("✅ ゲート結果メモテスト完了")
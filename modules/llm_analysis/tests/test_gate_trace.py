@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+ゲート評価トレースのテスト
+
+本番モードでは条件・パターン単位のログを整形せずリングバッファに記録し、
+フラッシュ時にだけ出力することを確認します。
+"""
+
+import sys
+import os
+import asyncio
+import logging
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from modules.llm_analysis.core.gate_trace import GateTrace
+from modules.llm_analysis.core.pattern_loader import PatternLoader
+from modules.llm_analysis.core.three_gate_engine import ThreeGateEngine
+
+CONFIG_DIR = str(Path(__file__).parent.parent / "config")
+
+
+class CountingValue:
+    """文字列化された回数を数える値"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "value"
+
+
+def test_events_are_formatted_only_when_emitted(caplog):
+    """記録時には整形されず、サンプリング分とフラッシュ時にだけ出力されること"""
+    output = logging.getLogger("test_gate_trace")
+    trace = GateTrace(capacity=3, sample_every=4, output=output)
+    value = CountingValue()
+
+    with caplog.at_level(logging.INFO, logger="test_gate_trace"):
+        for i in range(3):
+            trace.record(logging.INFO, 'condition', "条件 %d: %s", i, value, score=0.5)
+        assert value.formatted == 0
+        assert caplog.records == []
+
+        for i in range(3, 5):
+            trace.record(logging.INFO, 'condition', "条件 %d: %s", i, value, score=0.5)
+        assert len(caplog.records) == 1
+        assert caplog.records[0].event == 'condition'
+        assert caplog.records[0].fields == {'score': 0.5}
+
+        caplog.clear()
+        assert trace.flush("シグナル生成") == 3
+    assert len(trace) == 0
+    assert [record.getMessage() for record in caplog.records[1:]] == [
+        "   [condition] 条件 2: value",
+        "   [condition] 条件 3: value",
+        "   [condition] 条件 4: value",
+    ]
+    assert trace.flush("空") == 0
+
+
+def test_engine_production_mode_keeps_condition_logs_in_trace(caplog):
+    """本番モードのエンジンは条件ごとのログを出力せずトレースに記録し、verbose では即時出力すること"""
+    engine = ThreeGateEngine()
+    engine.pattern_loader = PatternLoader(config_dir=CONFIG_DIR)
+    engine.trace.sample_every = 0
+    assert not engine.verbose_logging
+
+    with caplog.at_level(logging.INFO, logger=engine.logger.name):
+        asyncio.run(engine.evaluate('USDJPY=X', {'1d_close': 150.0}))
+    messages = [record.getMessage() for record in caplog.records]
+    assert not any(message.startswith("条件評価結果") for message in messages)
+    assert any("GATE 1" in message and "USDJPY=X" in message for message in messages)
+    assert len(engine.trace) > 0
+
+    caplog.clear()
+    engine.verbose_logging = True
+    with caplog.at_level(logging.INFO, logger=engine.logger.name):
+        asyncio.run(engine.evaluate('USDJPY=X', {'1d_close': 150.0}))
+    assert any(record.getMessage().startswith("条件評価結果") for record in caplog.records)
+
+
+if __name__ == "__main__":
+    trace = GateTrace(capacity=10)
+    trace.record(logging.INFO, 'condition', "条件 %d", 1)
+    print(f"記録件数: {len(trace)}")
+    print("✅ ゲート評価トレーステスト完了")
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+インクリメンタル指標エンジンのテスト
+
+バッチ計算（TechnicalIndicatorCalculator）との数値一致を確認します。
+"""
+
+import sys
+import os
+from collections import deque
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+pytest.importorskip("talib")
+
+from modules.llm_analysis.core.technical_calculator import TechnicalIndicatorCalculator
+from modules.llm_analysis.core.incremental_indicators import IncrementalIndicatorEngine
+
+
+def create_sample_data(periods: int = 400, seed: int = 7) -> pd.DataFrame:
+    """サンプルデータの作成（5分足のランダムウォーク）"""
+    rng = np.random.default_rng(seed)
+    close = 150.0 * np.cumprod(1 + rng.normal(0, 0.001, periods))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.001, periods)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.001, periods)))
+
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2025-01-06', periods=periods, freq='5min', tz='UTC'),
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': np.zeros(periods),
+    })
+
+
+def _assert_matches_batch(batch_row: pd.Series, latest: dict):
+    for name in IncrementalIndicatorEngine.SUPPORTED_INDICATORS:
+        expected = batch_row[name]
+        actual = latest[name]
+        if actual is None or (not isinstance(expected, (bool, np.bool_)) and pd.isna(expected)):
+            assert actual is None or pd.isna(actual), name
+            continue
+        if isinstance(expected, (bool, np.bool_)) or isinstance(actual, bool):
+            assert bool(expected) == bool(actual), name
+            continue
+        np.testing.assert_allclose(
+            float(actual), float(expected), rtol=1e-9, atol=1e-8, equal_nan=True, err_msg=name
+        )
+
+
+def _flatten(value):
+    """取り消し記録などの入れ子の値を列挙"""
+    if isinstance(value, (tuple, list)):
+        for item in value:
+            yield from _flatten(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _flatten(item)
+    else:
+        yield value
+
+
+def test_incremental_matches_batch_every_bar():
+    """全ての足でバッチ計算と一致すること"""
+    df = create_sample_data()
+    batch = TechnicalIndicatorCalculator().calculate_all_indicators({'5m': df.copy()})['5m']
+
+    engine = IncrementalIndicatorEngine()
+    for i, bar in enumerate(df.to_dict('records')):
+        latest = engine.update('USDJPY=X', '5m', bar)
+        _assert_matches_batch(batch.iloc[i], latest)
+
+
+def test_calculator_incremental_mode_appends_new_bars():
+    """ウォームアップ後に新しい足だけを反映してもバッチ計算と一致すること"""
+    df = create_sample_data()
+    calculator = TechnicalIndicatorCalculator()
+
+    calculator.calculate_latest_incremental('USDJPY=X', '5m', df.iloc[:300])
+    state = calculator.incremental_engine.get_state('USDJPY=X', '5m')
+    assert state.bar_count == 300
+
+    # 直近250本のスライディングウィンドウで新しい足を1本ずつ渡す
+    for end in range(301, 321):
+        latest = calculator.calculate_latest_incremental('USDJPY=X', '5m', df.iloc[end - 250:end])
+    assert state.bar_count == 320
+
+    batch = calculator.calculate_all_indicators({'5m': df.iloc[:320].copy()})['5m']
+    _assert_matches_batch(batch.iloc[-1], latest)
+
+
+def test_revised_last_bar_is_recalculated():
+    """最新足が同じタイムスタンプのまま更新された場合、差し替えた履歴のバッチ計算と一致すること"""
+    df = create_sample_data()
+    calculator = TechnicalIndicatorCalculator()
+    calculator.calculate_latest_incremental('USDJPY=X', '5m', df.iloc[:300])
+
+    revised = df.iloc[:300].copy()
+    revised.loc[299, ['high', 'close']] = [revised.loc[299, 'high'] * 1.01, revised.loc[299, 'high'] * 1.005]
+    latest = calculator.calculate_latest_incremental('USDJPY=X', '5m', revised)
+    batch = calculator.calculate_all_indicators({'5m': revised.copy()})['5m']
+    _assert_matches_batch(batch.iloc[-1], latest)
+    assert calculator.incremental_engine.get_state('USDJPY=X', '5m').bar_count == 300
+
+    # 更新された足と新しい足が同時に届いた場合も、先に差し替えてから追加する
+    revised = pd.concat([revised.iloc[:299], df.iloc[299:301]], ignore_index=True)
+    latest = calculator.calculate_latest_incremental('USDJPY=X', '5m', revised)
+    batch = calculator.calculate_all_indicators({'5m': revised.copy()})['5m']
+    _assert_matches_batch(batch.iloc[-1], latest)
+    assert calculator.incremental_engine.get_state('USDJPY=X', '5m').bar_count == 301
+
+
+def test_latest_indicators_match_batch_row():
+    """calculate_latest_indicators がバッチ計算の最終行と同じ列・値を返すこと"""
+    df = create_sample_data()
+    df['volume'] = np.arange(len(df)) % 37 + 1.0
+    for timeframe in ('5m', '1h', '1d'):
+        calculator = TechnicalIndicatorCalculator()
+        calculator.calculate_latest_indicators('USDJPY=X', timeframe, df.iloc[:300].copy())
+        for end in range(301, 311):
+            latest = calculator.calculate_latest_indicators('USDJPY=X', timeframe, df.iloc[:end].copy())
+
+        batch_row = calculator.calculate_all_indicators({timeframe: df.iloc[:310].copy()})[timeframe].iloc[-1]
+        assert set(latest) == set(batch_row.index), timeframe
+        for name, expected in batch_row.items():
+            actual = latest[name]
+            if isinstance(expected, (float, np.floating)):
+                np.testing.assert_allclose(float(actual), expected, rtol=1e-9, atol=1e-8,
+                                           equal_nan=True, err_msg=f"{timeframe} {name}")
+            else:
+                assert actual == expected, f"{timeframe} {name}"
+
+
+def test_revision_rolls_back_windows_without_copying_state():
+    """形成中の足を何度差し替えても、最終的な履歴で作り直した状態と以降の足まで一致すること"""
+    df = create_sample_data()
+    df['volume'] = np.arange(len(df)) % 37 + 1.0
+    bars = df.to_dict('records')
+    engine = IncrementalIndicatorEngine(swing_periods={'5m': [3, 5, 10]})
+    expected = IncrementalIndicatorEngine(swing_periods={'5m': [3, 5, 10]})
+    expected.warm_up('USDJPY=X', '5m', bars[:250])
+
+    for bar in bars[:249]:
+        engine.update('USDJPY=X', '5m', bar)
+    for scale in (1.004, 0.996, 1.0):
+        forming = dict(bars[249], high=bars[249]['high'] * max(scale, 1.0), close=bars[249]['close'] * scale)
+        if engine.get_state('USDJPY=X', '5m').bar_count == 249:
+            engine.update('USDJPY=X', '5m', forming)
+        else:
+            engine.revise_last('USDJPY=X', '5m', forming)
+    # 取り消し記録は各指標のスカラー値と押し出した値だけ（ウィンドウのコピーを持たない）
+    assert not any(isinstance(value, deque) for value in _flatten(engine.get_state('USDJPY=X', '5m').undo))
+
+    for bar in bars[250:]:
+        actual = engine.update('USDJPY=X', '5m', bar)
+        latest = expected.update('USDJPY=X', '5m', bar)
+        assert actual.keys() == latest.keys()
+        for name, value in latest.items():
+            np.testing.assert_allclose(actual[name], value, rtol=1e-12, equal_nan=True, err_msg=name)
+    assert not np.isnan(latest['Swing_High'])
+
+
+def test_latest_indicators_follow_revised_forming_bar():
+    """形成中の足の更新を挟んでも calculate_latest_indicators がバッチ計算の最終行と一致すること"""
+    df = create_sample_data()
+    df['volume'] = np.arange(len(df)) % 37 + 1.0
+    for timeframe in ('5m', '1h', '1d'):
+        calculator = TechnicalIndicatorCalculator()
+        calculator.calculate_latest_indicators('USDJPY=X', timeframe, df.iloc[:300].copy())
+        for end in range(301, 331):
+            forming = df.iloc[:end].copy()
+            forming.loc[end - 1, ['high', 'close']] = [forming.loc[end - 1, 'high'] * 1.002,
+                                                       forming.loc[end - 1, 'close'] * 1.001]
+            calculator.calculate_latest_indicators('USDJPY=X', timeframe, forming)
+            latest = calculator.calculate_latest_indicators('USDJPY=X', timeframe, df.iloc[:end].copy())
+
+        batch_row = calculator.calculate_all_indicators({timeframe: df.iloc[:330].copy()})[timeframe].iloc[-1]
+        assert set(latest) == set(batch_row.index), timeframe
+        for name, expected in batch_row.items():
+            if isinstance(expected, (float, np.floating)):
+                np.testing.assert_allclose(float(latest[name]), expected, rtol=1e-9, atol=1e-8,
+                                           equal_nan=True, err_msg=f"{timeframe} {name}")
+            else:
+                assert latest[name] == expected, f"{timeframe} {name}"
+
+
+def test_out_of_order_bar_is_rejected():
+    """過去の足を追加しようとするとエラーになること"""
+    df = create_sample_data(periods=30)
+    engine = IncrementalIndicatorEngine()
+    bars = df.to_dict('records')
+    engine.warm_up('USDJPY=X', '5m', bars)
+
+    with pytest.raises(ValueError):
+        engine.update('USDJPY=X', '5m', bars[-1])
+
+
+if __name__ == "__main__":
+    test_incremental_matches_batch_every_bar()
+    test_calculator_incremental_mode_appends_new_bars()
+    test_revised_last_bar_is_recalculated()
+    test_latest_indicators_match_batch_row()
+    test_revision_rolls_back_windows_without_copying_state()
+    test_latest_indicators_follow_revised_forming_bar()
+    test_out_of_order_bar_is_rejected()
+    print("✅ インクリメンタル指標テスト完了")
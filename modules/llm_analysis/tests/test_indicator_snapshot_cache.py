@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+指標スナップショットキャッシュのテスト
+
+足が変わっていない時間足は再計算せず、未確定足の更新や新しい足では再計算することを確認します。
+"""
+
+import sys
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+pytest.importorskip("talib")
+
+from modules.llm_analysis.core.bar_store import BarStore, TIMEFRAME_DURATIONS
+from modules.llm_analysis.services.three_gate_analysis_service import ThreeGateAnalysisService
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+TIMEFRAMES = ['1d', '4h', '1h', '5m']
+
+
+def make_rows(timeframe: str, count: int = 260):
+    step = TIMEFRAME_DURATIONS[timeframe]
+    return [
+        (START + step * i, 150.0 + i * 0.01, 150.5 + i * 0.01, 149.5 + i * 0.01, 150.2 + i * 0.01, 100 + i, 1.0)
+        for i in range(count)
+    ]
+
+
+class InMemoryPriceTable:
+    """price_data を返す接続管理の代替"""
+
+    def __init__(self):
+        self.rows = {timeframe: make_rows(timeframe) for timeframe in TIMEFRAMES}
+
+    @asynccontextmanager
+    async def get_connection(self):
+        yield self
+
+    async def fetch(self, query, symbol, timeframe, *args):
+        if 'timestamp >=' in query:
+            since, limit = args
+            return [row for row in self.rows[timeframe] if row[0] >= since][:limit]
+        (limit,) = args
+        return list(reversed(self.rows[timeframe]))[:limit]
+
+
+def create_service():
+    service = ThreeGateAnalysisService(None, InMemoryPriceTable())
+    service.bar_store = BarStore(capacity=300)
+    calls = []
+    calculate = service.technical_calculator.calculate_all_indicators
+
+    def counting_calculate(data):
+        calls.extend(data.keys())
+        return calculate(data)
+
+    service.technical_calculator.calculate_all_indicators = counting_calculate
+    calculate_latest = service.technical_calculator.calculate_latest_indicators
+
+    def counting_calculate_latest(symbol, timeframe, df):
+        calls.append(timeframe)
+        return calculate_latest(symbol, timeframe, df)
+
+    service.technical_calculator.calculate_latest_indicators = counting_calculate_latest
+    return service, calls
+
+
+def test_unchanged_timeframes_reuse_cached_indicators():
+    """新しい5分足だけが届いた場合、5分足のみ再計算されること"""
+    service, calls = create_service()
+
+    async def scenario():
+        first = await service._calculate_technical_indicators('USDJPY=X')
+        calls.clear()
+
+        # 同じ内容の再配信ではキャッシュが有効なまま
+        service.bar_store.append_bars('USDJPY=X', '1d', make_rows('1d')[-2:])
+        unchanged = await service._calculate_technical_indicators('USDJPY=X')
+        after_unchanged = list(calls)
+
+        new_bar = (START + TIMEFRAME_DURATIONS['5m'] * 260, 160.0, 160.5, 159.5, 160.2, 500)
+        service.bar_store.append_bars('USDJPY=X', '5m', [new_bar])
+        calls.clear()
+        updated = await service._calculate_technical_indicators('USDJPY=X')
+        return first, unchanged, after_unchanged, list(calls), updated
+
+    first, unchanged, after_unchanged, recomputed, updated = asyncio.run(scenario())
+    assert after_unchanged == []
+    assert unchanged == first
+    assert recomputed == ['5m']
+    assert updated['5m_close'] == pytest.approx(160.2)
+    assert updated['1d_EMA_21'] == first['1d_EMA_21']
+    assert service.indicator_cache.get_stats()['hits'] == 4 + 3
+    # 5分足はインクリメンタル状態に新しい足を1本追加しただけ
+    state = service.technical_calculator.incremental_engine.get_state('USDJPY=X', '5m')
+    assert state.bar_count == 250 + 1
+    assert set(updated) == set(first)
+
+
+def test_revised_open_bar_and_config_change_invalidate_cache():
+    """未確定足が同時刻のまま更新された場合と指標設定が変わった場合は再計算されること"""
+    service, calls = create_service()
+
+    async def scenario():
+        await service._calculate_technical_indicators('USDJPY=X')
+
+        last = service.bar_store.get_view('USDJPY=X', '1d', limit=1)
+        revised = (last.timestamp[-1], 1.0, 2.0, 0.5, 1.5, 7, 1.0)
+        service.bar_store.append_bars('USDJPY=X', '1d', [revised])
+        calls.clear()
+        revised_result = await service._calculate_technical_indicators('USDJPY=X')
+        after_revision = list(calls)
+
+        service.technical_calculator.indicator_config['timing_execution']['indicators']['RSI_7'] = 9
+        calls.clear()
+        await service._calculate_technical_indicators('USDJPY=X')
+        return revised_result, after_revision, sorted(calls)
+
+    revised_result, after_revision, after_config_change = asyncio.run(scenario())
+    assert after_revision == ['1d']
+    assert revised_result['1d_close'] == pytest.approx(1.5)
+    assert after_config_change == sorted(TIMEFRAMES)
+
+
+if __name__ == "__main__":
+    test_unchanged_timeframes_reuse_cached_indicators()
+    test_revised_open_bar_and_config_change_invalidate_cache()
+    print("✅ 指標スナップショットキャッシュテスト完了")
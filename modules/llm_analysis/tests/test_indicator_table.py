@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+指標シンボルテーブルのテスト
+
+従来と同じ順序で指標を解決し、欠損の警告がスナップショットごとに1回になることを確認します。
+"""
+
+import sys
+import os
+import asyncio
+import logging
+
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from modules.llm_analysis.core.indicator_table import IndicatorTable
+from modules.llm_analysis.core.three_gate_engine import ConditionEvaluator
+
+
+def test_resolution_order_and_dataframes():
+    """プレフィックス付き → 元の名前 → 他の時間足 の順で解決し、DataFrameは最新値を返すこと"""
+    data = {
+        '1h_RSI_14': 55.0,
+        'RSI_14': 40.0,
+        '4h_ADX': 30.0,
+        '1d_ADX': 25.0,
+        '1d_EMA_21': pd.DataFrame({'EMA_21': [1.0, 2.0, 3.0]}),
+        '1h_EMA_21': pd.DataFrame({'other': [9.0]}),
+        '1d_Volume_Ratio': None,
+    }
+    table = IndicatorTable(data)
+
+    assert table.get('RSI_14', '1h') == 55.0
+    assert table.get('RSI_14', '4h') == 40.0
+    assert table.get('ADX', '1h') == 25.0
+    assert table.get('ADX', '4h') == 30.0
+    assert table.get('EMA_21', '1d') == 3.0
+    # 列の無いDataFrameは見つからない扱いでフォールバック
+    assert table.get('EMA_21', '1h') == 3.0
+    # 値がNoneでも存在するキーは欠損として扱わない
+    assert table.get('Volume_Ratio', '1d') is None
+    assert table.missing == []
+    assert table.get('MACD', '1d') is None
+    assert table.missing == [('MACD', '1d')]
+
+
+def test_missing_indicator_warned_once_per_snapshot(caplog):
+    """同じスナップショット内では欠損指標の警告が1回だけ出ること"""
+    evaluator = ConditionEvaluator()
+    data = {'1h_close': 150.0}
+    condition = {'name': 'missing', 'indicator': 'Volume_Ratio', 'operator': '>', 'value': 1.0, 'timeframe': '1h'}
+
+    async def evaluate_twice():
+        return [await evaluator.evaluate_condition(data, condition) for _ in range(2)]
+
+    with caplog.at_level(logging.WARNING):
+        with evaluator.snapshot(data) as table:
+            assert evaluator.table_for(data) is table
+            assert asyncio.run(evaluate_twice()) == [0.0, 0.0]
+    assert sum('Volume_Ratio' in record.getMessage() for record in caplog.records) == 1
+
+    # スコープ外では新しいスナップショットとして扱う
+    assert evaluator.table_for(data) is not table
+
+
+if __name__ == "__main__":
+    test_resolution_order_and_dataframes()
+    print("✅ 指標シンボルテーブルテスト完了")
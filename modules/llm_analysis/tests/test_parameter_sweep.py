@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+パラメータスイープのテスト
+
+パスによる設定の書き換え、基準値の組み合わせがベクトル化バックテストと同じシグナル数になること、
+並列実行と同一プロセス実行の結果が一致することを確認します。
+"""
+
+import sys
+import os
+from pathlib import Path
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+pytest.importorskip("talib")
+
+from modules.llm_analysis.core.parameter_sweep import ParameterRange, ParameterSweep, set_pattern_value
+from modules.llm_analysis.core.pattern_loader import PatternLoader
+from modules.llm_analysis.core.three_gate_engine import ThreeGateEngine
+from modules.llm_analysis.core.vectorized_backtest import VectorizedGateBacktester
+from modules.llm_analysis.tests.test_vectorized_backtest import create_price_data
+
+CONFIG_DIR = str(Path(__file__).parent.parent / "config")
+
+ADX_PATH = "gate1.patterns.ranging_market.conditions[weak_trend_adx].value"
+MIN_CONFIDENCE_PATH = "gate1.patterns.trend_reversal.uptrend_reversal.confidence_calculation.min_confidence"
+
+
+def _create_engine() -> ThreeGateEngine:
+    engine = ThreeGateEngine()
+    engine.pattern_loader = PatternLoader(config_dir=CONFIG_DIR, watch=False)
+    return engine
+
+
+@pytest.fixture(scope="module")
+def indicators():
+    engine = _create_engine()
+    return engine.technical_calculator.calculate_all_indicators(create_price_data())
+
+
+def test_set_pattern_value():
+    """name とインデックスでリストの要素を指定して書き換えられること"""
+    engine = _create_engine()
+    patterns = {gate: engine.pattern_loader.load_gate_patterns(gate) for gate in (1, 2, 3)}
+    sweep = ParameterSweep(base_patterns=patterns, engine=engine, processes=1)
+    patterns = sweep.base_patterns
+
+    set_pattern_value(patterns, ADX_PATH, 30)
+    set_pattern_value(patterns, "gate1.patterns.ranging_market.conditions[1].weight", 0.5)
+    ranging = patterns[1]['patterns']['ranging_market']
+    assert ranging['conditions'][0]['value'] == 30
+    assert ranging['conditions'][1]['weight'] == 0.5
+    # 基準の設定（ローダーのキャッシュ）は変更されない
+    assert engine.pattern_loader.load_gate_patterns(1)['patterns']['ranging_market'] is not ranging
+
+    with pytest.raises(KeyError):
+        set_pattern_value(patterns, "gate1.patterns.ranging_market.conditions[missing].value", 1)
+    with pytest.raises(ValueError):
+        ParameterRange("patterns.trending_market", (1,)).gate_number
+
+
+def test_sweep_matches_backtest_and_is_deterministic(indicators):
+    """基準値の行がバックテストと同じシグナル数になり、並列実行でも結果が変わらないこと"""
+    engine = _create_engine()
+    ranges = [
+        ParameterRange(ADX_PATH, (20, 30)),
+        ParameterRange(MIN_CONFIDENCE_PATH, (0.6, 1.0)),
+    ]
+
+    serial = ParameterSweep(engine=engine, processes=1, horizon_bars=48).run(indicators, ranges)
+    parallel = ParameterSweep(engine=engine, processes=2, horizon_bars=48).run(indicators, ranges)
+    assert len(serial) == 4
+    assert list(serial['rank']) == [1, 2, 3, 4]
+    assert serial.equals(parallel)
+    assert (serial['total_r'].diff().dropna() <= 0).all()
+    assert serial['gate1_passed'].nunique() > 1
+
+    decisions = VectorizedGateBacktester(_create_engine()).evaluate(
+        VectorizedGateBacktester(engine).align(indicators)
+    )
+    base = serial[(serial[ADX_PATH] == 20) & (serial[MIN_CONFIDENCE_PATH] == 0.6)].iloc[0]
+    assert base['signals'] == int(decisions['signal'].sum())
+    assert base['gate1_passed'] == int(decisions['gate1_valid'].sum())
+    assert 0 < base['signals']
+    assert base['wins'] <= base['signals']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+パターンコンパイラのテスト
+"""
+
+import sys
+import os
+import asyncio
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from modules.llm_analysis.core.pattern_loader import PatternLoader
+from modules.llm_analysis.core.pattern_compiler import PatternCompiler
+from modules.llm_analysis.core.three_gate_engine import ConditionEvaluator
+
+CONFIG_DIR = str(Path(__file__).parent.parent / "config")
+
+
+def _sample_indicators():
+    return {
+        '1d_close': 150.0,
+        '1d_EMA_200': 148.0,
+        '1d_ADX': 18.0,
+        '1d_MACD': 0.1,
+        '1d_MACD_Signal': 0.05,
+        '1h_close': 149.5,
+        '1h_BB_Middle': 149.6,
+        '1h_BB_Upper': 150.1,
+        '1h_BB_Lower': 149.1,
+        '1h_bollinger_width': 0.012,
+        '1h_RSI_14': 55.0,
+        '1h_Stochastic_K': float('nan'),
+        '5m_RSI_14': 45.0,
+        '5m_candle_body': 0.04,
+        '5m_average_body_size': 0.03,
+    }
+
+
+def test_compiled_conditions_match_condition_evaluator():
+    """コンパイル済み条件がConditionEvaluatorと同じスコアを返すこと"""
+    conditions = [
+        {'name': 'gt_ref', 'indicator': 'close', 'operator': '>', 'reference': 'EMA_200', 'timeframe': '1d'},
+        {'name': 'lt_value', 'indicator': 'ADX', 'operator': '<', 'value': 20, 'timeframe': '1d'},
+        {'name': 'all_below', 'indicator': 'ADX', 'operator': 'all_below', 'value': 20, 'periods': 5},
+        {'name': 'between', 'indicator': 'RSI_14', 'operator': 'between', 'value': [30, 70], 'timeframe': '1h'},
+        {'name': 'nan_value', 'indicator': 'Stochastic_K', 'operator': '<', 'value': 80, 'timeframe': '1h'},
+        {'name': 'near', 'indicator': 'close', 'operator': 'near', 'reference': 'BB_Middle',
+         'timeframe': '1h', 'tolerance': 0.005},
+        {'name': 'multiplier', 'indicator': 'candle_body', 'operator': '>', 'reference': 'average_body_size',
+         'multiplier': 1.2},
+        {'name': 'fallback_tf', 'indicator': 'RSI_14', 'operator': '<', 'value': 50, 'timeframe': '4h'},
+        {'name': 'missing', 'indicator': 'Volume_Ratio', 'operator': '>', 'value': 1.0, 'timeframe': '1h'},
+        {'name': 'list_reference', 'indicator': 'close', 'operator': 'between',
+         'reference': ['EMA_21', 'EMA_55'], 'timeframe': '1h'},
+    ]
+    indicators = _sample_indicators()
+    evaluator = ConditionEvaluator()
+    compiler = PatternCompiler()
+
+    plan = compiler.compile_single_variant('sample', {'conditions': conditions}, 'direct')
+    values = plan.resolve(indicators, evaluator._get_indicator_value)
+
+    for condition, compiled in zip(conditions, plan.variants[0].conditions):
+        expected = asyncio.run(evaluator.evaluate_condition(indicators, condition))
+        assert compiled.evaluate(values) == expected, condition['name']
+
+
+def test_plan_is_recompiled_only_when_patterns_change():
+    """パターン設定が差し替わった時だけ再コンパイルされること"""
+    loader = PatternLoader(config_dir=CONFIG_DIR)
+    compiler = PatternCompiler()
+
+    first = compiler.get_plan(1, loader.load_gate_patterns(1))
+    second = compiler.get_plan(1, loader.load_gate_patterns(1))
+    assert first is second
+    assert compiler.get_stats() == {'compiles': 1, 'hits': 1}
+
+    loader.reload_patterns(1)
+    third = compiler.get_plan(1, loader.load_gate_patterns(1))
+    assert third is not first
+    assert compiler.get_stats()['compiles'] == 2
+
+
+def test_gate_plans_resolve_shared_slots():
+    """同じ(指標, 時間足)の参照が1つのスロットにまとめられること"""
+    loader = PatternLoader(config_dir=CONFIG_DIR)
+    compiler = PatternCompiler()
+
+    for gate_number in (1, 2, 3):
+        plan = compiler.get_plan(gate_number, loader.load_gate_patterns(gate_number))
+        assert len(plan.slot_keys) == len(set(plan.slot_keys))
+        assert plan.pattern_count == len(loader.load_gate_patterns(gate_number)['patterns'])
+
+
+if __name__ == "__main__":
+    test_compiled_conditions_match_condition_evaluator()
+    test_plan_is_recompiled_only_when_patterns_change()
+    test_gate_plans_resolve_shared_slots()
+    print("✅ パターンコンパイラテスト完了")
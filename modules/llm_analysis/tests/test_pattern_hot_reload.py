@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+パターン設定ホットリロードのテスト
+
+読み込み済みの設定はファイルを確認せずに返し、変更は監視側で検証済みの設定に差し替わること、
+内容が同じ場合や不正な設定の場合は差し替わらないことを確認します。
+"""
+
+import sys
+import os
+import shutil
+import time
+from pathlib import Path
+from unittest import mock
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from modules.llm_analysis.core.pattern_loader import PatternLoader
+
+CONFIG_DIR = Path(__file__).parent.parent / "config"
+
+
+def wait_until(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+def test_hot_path_does_not_stat(tmp_path):
+    """読み込み済みの設定の取得でファイルシステムを参照しないこと"""
+    shutil.copy(CONFIG_DIR / "gate1_patterns.yaml", tmp_path / "gate1_patterns.yaml")
+    loader = PatternLoader(config_dir=str(tmp_path), watch=False)
+    first = loader.load_gate_patterns(1)
+
+    with mock.patch.object(Path, 'stat', side_effect=AssertionError("stat called")), \
+            mock.patch.object(Path, 'exists', side_effect=AssertionError("exists called")):
+        for _ in range(3):
+            assert loader.load_gate_patterns(1) is first
+    assert loader.content_hash(1) is not None
+
+
+def test_watcher_swaps_validated_patterns(tmp_path):
+    """変更は検証後に差し替わり、touch のみや不正な設定では現在の設定が維持されること"""
+    config_file = tmp_path / "gate1_patterns.yaml"
+    shutil.copy(CONFIG_DIR / "gate1_patterns.yaml", config_file)
+    loader = PatternLoader(config_dir=str(tmp_path), poll_interval=0.05)
+    try:
+        first = loader.load_gate_patterns(1)
+        first_hash = loader.content_hash(1)
+
+        # 内容が同じなら差し替えない
+        stat = config_file.stat()
+        os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+        assert wait_until(lambda: loader._file_signatures['gate1'][0] == stat.st_mtime_ns + 10_000_000)
+        assert loader.load_gate_patterns(1) is first
+
+        # 不正な設定は反映しない
+        config_file.write_text("patterns: [broken", encoding='utf-8')
+        assert wait_until(lambda: loader._cache_stats['reload_errors'] == 1)
+        assert loader.load_gate_patterns(1) is first
+        assert loader.content_hash(1) == first_hash
+
+        # 正しい変更は差し替わる
+        content = (CONFIG_DIR / "gate1_patterns.yaml").read_text(encoding='utf-8')
+        config_file.write_text(content + "\n# updated\n", encoding='utf-8')
+        assert wait_until(lambda: loader.content_hash(1) != first_hash)
+        second = loader.load_gate_patterns(1)
+        assert second is not first
+        assert second['patterns'].keys() == first['patterns'].keys()
+    finally:
+        loader.stop_watching()
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as directory:
+        test_hot_path_does_not_stat(Path(directory))
+    with tempfile.TemporaryDirectory() as directory:
+        test_watcher_swaps_validated_patterns(Path(directory))
+    print("✅ パターン設定ホットリロードテスト完了")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+パイプラインリプレイのテスト
+
+仮想時計の差し替え、仮想時刻までに確定した足だけを返すプロバイダー、ティックの集約、
+Discord通知スタブとシグナル比較を確認します（データベースを使う再生本体は対象外）。
+"""
+
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from modules.data_collection.core import continuous_collector
+from modules.data_collection.providers.base_provider import TimeFrame
+from modules.llm_analysis.core import three_gate_engine
+from modules.llm_analysis.notification.discord_notifier import DiscordMessage
+from modules.llm_analysis.orchestration.pipeline_replay import (
+    ReplayDiscordNotifier, ReplayProvider, ReplayReport, VirtualClock, ticks_to_bars
+)
+
+START = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+
+def create_bars(count: int = 24) -> pd.DataFrame:
+    timestamps = pd.date_range(START, periods=count, freq='5min', tz='UTC')
+    close = 150.0 + np.arange(count) * 0.01
+    return pd.DataFrame({'timestamp': timestamps, 'open': close, 'high': close + 0.02,
+                         'low': close - 0.02, 'close': close, 'volume': 100})
+
+
+def test_clock_patches_pipeline_modules():
+    """差し替え中は各モジュールの datetime.now() が仮想時刻を返し、終了後に戻ること"""
+    clock = VirtualClock(START)
+    with clock.patch():
+        assert three_gate_engine.datetime.now(timezone.utc) == START
+        clock.advance_to(START + timedelta(hours=1))
+        assert continuous_collector.datetime.now(timezone.utc) == START + timedelta(hours=1)
+        assert isinstance(three_gate_engine.datetime.now(timezone.utc), datetime)
+    assert three_gate_engine.datetime is datetime
+    assert datetime.now(timezone.utc) > START + timedelta(days=30)
+
+    try:
+        clock.advance_to(START)
+        assert False, "仮想時計が戻った"
+    except ValueError:
+        pass
+
+
+def test_provider_returns_closed_bars_only():
+    """仮想時刻までに確定した足だけが取得範囲内で返ること"""
+    clock = VirtualClock(START)
+    provider = ReplayProvider(create_bars(), clock, 'USDJPY=X')
+
+    async def fetch(start, end):
+        result = await provider.get_historical_data('USDJPY=X', TimeFrame.M5, start, end)
+        return [bar.timestamp for bar in result.data]
+
+    clock.advance_to(START + timedelta(minutes=22))
+    timestamps = asyncio.run(fetch(START, START + timedelta(days=1)))
+    assert timestamps == [START + timedelta(minutes=5 * i) for i in range(4)]
+
+    # DB の最新時刻 + 1分 から取得しても重複しない
+    clock.advance_to(START + timedelta(minutes=30))
+    timestamps = asyncio.run(fetch(START + timedelta(minutes=16), clock.now()))
+    assert timestamps == [START + timedelta(minutes=20), START + timedelta(minutes=25)]
+
+    result = asyncio.run(provider.get_historical_data('USDJPY=X', TimeFrame.H1, START, clock.now()))
+    assert not result.success
+
+
+def test_ticks_to_bars():
+    """ティックが5分足の OHLC とティック数に集約されること"""
+    ticks = pd.DataFrame({
+        'timestamp': [START + timedelta(seconds=s) for s in (1, 60, 290, 301, 320)],
+        'bid': [150.00, 150.10, 149.90, 150.20, 150.30],
+        'ask': [150.02, 150.12, 149.92, 150.22, 150.32],
+    })
+    bars = ticks_to_bars(ticks)
+    assert list(bars['timestamp']) == [pd.Timestamp(START), pd.Timestamp(START + timedelta(minutes=5))]
+    first = bars.iloc[0]
+    assert (first['open'], first['high'], first['low'], first['close'], first['volume']) == \
+        (150.01, 150.11, 149.91, 149.91, 3)
+
+
+def test_notifier_stub_and_report_compare():
+    """通知は送信せずに仮想時刻付きで記録され、シグナルの差分が取れること"""
+    clock = VirtualClock(START)
+    notifier = ReplayDiscordNotifier(clock)
+    asyncio.run(notifier.initialize())
+    assert asyncio.run(notifier._send_message(DiscordMessage(content="BUY"))) is True
+    assert notifier.sent[0]['time'] == START and notifier.session is None
+
+    def signal(minutes, signal_type='BUY', confidence=0.8):
+        return {'created_at': (START + timedelta(minutes=minutes)).isoformat(),
+                'signal_type': signal_type, 'overall_confidence': confidence}
+
+    before = ReplayReport('USDJPY=X', START, START + timedelta(hours=1), 12, 12, 12, 0.5,
+                          step_latencies=[0.01] * 12, signals=[signal(5), signal(30)])
+    after = ReplayReport('USDJPY=X', START, START + timedelta(hours=1), 12, 12, 12, 0.5,
+                         step_latencies=[0.01] * 12, signals=[signal(5, confidence=0.9), signal(45, 'SELL')])
+    diff = before.compare(after)
+    assert [s['created_at'] for s in diff['added']] == [signal(45)['created_at']]
+    assert [s['created_at'] for s in diff['removed']] == [signal(30)['created_at']]
+    assert diff['changed'][0]['after']['overall_confidence'] == 0.9
+    assert before.fingerprint() != after.fingerprint()
+    assert before.get_summary()['speedup'] == 3600 / 0.5
+
+
+if __name__ == "__main__":
+    test_clock_patches_pipeline_modules()
+    test_provider_returns_closed_bars_only()
+    test_ticks_to_bars()
+    test_notifier_stub_and_report_compare()
+    print("✅ パイプラインリプレイテスト完了")
@@ -164,31 +164,31 @@ async def test_rule_conditions():
         
         # RSI条件のテスト
         print("📊 RSI条件テスト...")
-        rsi_result = engine._evaluate_rsi_condition("RSI_14 <= 40", sample_data)
+        rsi_result = engine._evaluate_condition("RSI_14 <= 40", sample_data, "USDJPY=X")
         print(f"   RSI_14 <= 40: {rsi_result.passed} (スコア: {rsi_result.score:.2f})")
         print(f"   メッセージ: {rsi_result.message}")
         
         # EMA条件のテスト
         print("\n📊 EMA条件テスト...")
-        ema_result = engine._evaluate_ema_condition("price > EMA_200", sample_data)
+        ema_result = engine._evaluate_condition("price > EMA_200", sample_data, "USDJPY=X")
         print(f"   price > EMA_200: {ema_result.passed} (スコア: {ema_result.score:.2f})")
         print(f"   メッセージ: {ema_result.message}")
         
         # MACD条件のテスト
         print("\n📊 MACD条件テスト...")
-        macd_result = engine._evaluate_macd_condition("MACD > MACD_Signal", sample_data)
+        macd_result = engine._evaluate_condition("MACD > MACD_Signal", sample_data, "USDJPY=X")
         print(f"   MACD > MACD_Signal: {macd_result.passed} (スコア: {macd_result.score:.2f})")
         print(f"   メッセージ: {macd_result.message}")
         
         # セッション条件のテスト
         print("\n📊 セッション条件テスト...")
-        session_result = engine._evaluate_session_condition("active_session = Tokyo OR London")
+        session_result = engine._evaluate_condition("active_session = Tokyo OR London", sample_data, "USDJPY=X")
         print(f"   active_session = Tokyo OR London: {session_result.passed} (スコア: {session_result.score:.2f})")
         print(f"   メッセージ: {session_result.message}")
         
         # リスク条件のテスト
         print("\n📊 リスク条件テスト...")
-        risk_result = engine._evaluate_risk_condition("daily_trades < 5", sample_data)
+        risk_result = engine._evaluate_condition("daily_trades < 5", sample_data, "USDJPY=X")
         print(f"   daily_trades < 5: {risk_result.passed} (スコア: {risk_result.score:.2f})")
         print(f"   メッセージ: {risk_result.message}")
         
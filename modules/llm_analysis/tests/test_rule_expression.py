@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+ルール条件式パーサーのテスト
+
+構文解析、任意の閾値・時間足指定・クロス判定・セッション条件の評価と、
+RuleBasedEngine が読み込み時に条件式をコンパイルして値ベクトルで評価することを確認します。
+"""
+
+import sys
+import os
+import asyncio
+from datetime import datetime, timezone
+from unittest import mock
+import pandas as pd
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from modules.llm_analysis.core.rule_engine import RuleBasedEngine
+from modules.llm_analysis.core.rule_expression import (
+    Between,
+    BoolOp,
+    Compare,
+    InSet,
+    Number,
+    Ref,
+    RuleExpressionError,
+    SymbolTable,
+    compile_expression,
+    parse_expression,
+)
+
+
+def _values(symbols: SymbolTable, **values):
+    return [values.get(name if offset == 0 else f"{name}_prev", float('nan'))
+            for name, _, offset in symbols.keys]
+
+
+def test_parse_expression():
+    """比較・範囲・論理演算・セッション条件が式木になること"""
+    assert parse_expression("RSI_14 <= 40") == Compare('<=', Ref('RSI_14'), Number(40.0))
+    assert parse_expression("daily_risk < 3%") == Compare('<', Ref('daily_risk'), Number(3.0))
+    assert parse_expression("RSI_14@4h > 50").left == Ref('RSI_14', '4h')
+    assert parse_expression("price BETWEEN Fib_0.382 AND Fib_0.618") == \
+        Between(Ref('price'), Ref('Fib_0.382'), Ref('Fib_0.618'))
+    assert parse_expression("RSI_14 <= rsi_oversold", {'rsi_oversold': 35}).right == Number(35.0)
+
+    session = parse_expression("active_session = Tokyo OR London OR NewYork")
+    assert session == InSet('active_session', ('Tokyo', 'London', 'NewYork'))
+    # カテゴリ値の後の OR に比較が続く場合は論理演算子
+    mixed = parse_expression("active_session = Tokyo OR RSI_14 < 30")
+    assert isinstance(mixed, BoolOp) and mixed.op == 'OR'
+
+    grouped = parse_expression("(RSI_14 < 30 OR RSI_14 > 70) AND price > (EMA_21 * 1.01)")
+    assert grouped.op == 'AND' and grouped.terms[0].op == 'OR'
+
+    for invalid in ("", "RSI_14", "RSI_14 <= ", "RSI_14 ?? 40", "price BETWEEN 1", "RSI_14 < 40)"):
+        with pytest.raises(RuleExpressionError):
+            parse_expression(invalid)
+
+
+def test_compiled_conditions():
+    """任意の閾値・クロス・範囲をスロット参照で評価できること"""
+    symbols = SymbolTable()
+    oversold = compile_expression("RSI_14 <= 33.5", symbols)
+    rising = compile_expression("RSI_14 > 30", symbols)
+    cross = compile_expression("MACD CROSSES_ABOVE MACD_Signal", symbols)
+    band = compile_expression("price BETWEEN Fib_0.618 AND Fib_0.382", symbols)
+    # 同じ参照は同じスロットを共有
+    assert oversold.slots == rising.slots
+    assert ('MACD', None, 1) in symbols.keys
+
+    values = _values(symbols, RSI_14=33.0, MACD=0.2, MACD_prev=-0.1, MACD_Signal=0.1, MACD_Signal_prev=0.0,
+                     price=100.0, **{'Fib_0.382': 101.0, 'Fib_0.618': 99.0})
+    assert oversold.evaluate(values, {}) == (True, 1.0)
+    assert rising.evaluate(values, {}) == (True, pytest.approx(0.1))
+    assert cross.evaluate(values, {}) == (True, 1.0)
+    assert band.evaluate(values, {}) == (True, 1.0)
+
+    values[symbols.keys.index(('MACD', None, 1))] = 0.15
+    assert cross.evaluate(values, {})[0] is False
+    # 欠損値は不成立
+    values[symbols.keys.index(('RSI_14', None, 0))] = float('nan')
+    assert oversold.evaluate(values, {}) == (False, 0.0)
+    assert "data not available" in oversold.describe(values, {})[0]
+
+    session = compile_expression("active_session = London OR NewYork", symbols)
+    assert session.evaluate(values, {'active_session': frozenset({'NewYork'})}) == (True, 1.0)
+    assert session.evaluate(values, {'active_session': frozenset({'Tokyo'})}) == (False, 0.0)
+
+
+def _trend_data() -> dict:
+    frame = pd.DataFrame({
+        'close': [147.0, 147.2],
+        'RSI_14': [45.0, 38.5],
+        'EMA_200': [146.8, 146.8],
+        'EMA_21': [147.4, 147.1],
+        'EMA_55': [147.5, 147.3],
+        'MACD': [-0.002, -0.001],
+        'MACD_Signal': [-0.001, -0.0015],
+    })
+    return {'timeframes': {'1h': {'data': frame}}}
+
+
+def test_engine_evaluates_rules_yaml_conditions():
+    """拡張構文を有効にすると rules.yaml の条件がすべてコンパイルされ、従来は未対応だった条件も評価できること"""
+    engine = RuleBasedEngine(extended_conditions=True)
+    assert all(not isinstance(compiled, RuleExpressionError)
+               for compiled in engine._compiled_conditions.values())
+    data = _trend_data()
+
+    rsi = engine._evaluate_condition("RSI_14 <= 40", data, "USDJPY=X")
+    assert rsi.passed and rsi.score == 1.0
+    ema = engine._evaluate_condition("price > EMA_200", data, "USDJPY=X")
+    assert ema.passed and ema.score == pytest.approx((147.2 - 146.8) / 146.8 * 10)
+    for condition in ("EMA_21 < EMA_55", "MACD < 0", "RSI_14 < 50", "RSI_14 >= 25",
+                      "MACD CROSSES_ABOVE MACD_Signal", "RSI_14 <= 38.5"):
+        assert engine._evaluate_condition(condition, data, "USDJPY=X").passed, condition
+    assert not engine._evaluate_condition("RSI_14 <= 38.4", data, "USDJPY=X").passed
+
+    risk = engine._evaluate_condition({'expression': "daily_trades < 5", 'weight': 2.0}, data, "USDJPY=X")
+    assert risk.passed and risk.weight == 2.0 and risk.score == pytest.approx(0.6)
+    unknown = engine._evaluate_condition("RSI_14 ~ 40", data, "USDJPY=X")
+    assert not unknown.passed and unknown.message.startswith("Unknown condition")
+
+    # JST 10:00 は東京セッション
+    assert engine._active_sessions(datetime(2024, 1, 5, 1, 0, tzinfo=timezone.utc)) == ['Tokyo']
+
+
+def test_default_engine_keeps_legacy_conditions():
+    """既定では従来の条件式だけを従来のスコアで評価し、それ以外は不成立になること"""
+    engine = RuleBasedEngine()
+    assert not engine.extended_conditions
+    data = _trend_data()
+
+    for condition in ("EMA_21 < EMA_55", "MACD < 0", "RSI_14 < 50", "RSI_14 >= 25",
+                      "active_session = Tokyo OR London OR NewYork"):
+        result = engine._evaluate_condition(condition, data, "USDJPY=X")
+        assert not result.passed and result.message.startswith("Unknown condition"), condition
+
+    ema = engine._evaluate_condition("price > EMA_200", data, "USDJPY=X")
+    assert ema.passed and ema.score == pytest.approx((147.2 - 146.8) / 146.8 * 10)
+    # MACD とシグナルの比較は従来どおりシグナルに対する相対差の5倍
+    macd = engine._evaluate_condition("MACD > MACD_Signal", data, "USDJPY=X")
+    assert macd.passed and macd.score == pytest.approx(min(1.0, 0.0005 / 0.0015 * 5))
+    macd_cross = RuleBasedEngine(extended_conditions=True)._evaluate_condition("MACD > MACD_Signal", data, "USDJPY=X")
+    assert macd_cross.score == pytest.approx(1.0)
+    assert engine._evaluate_condition("MACD > 0", data, "USDJPY=X").passed is False
+
+    # フィボナッチ帯は列の順序のまま判定（逆順の帯は成立しない）
+    fib = {'timeframes': {'1h': {'data': pd.DataFrame({
+        'close': [100.0], 'Fib_0.382': [101.0], 'Fib_0.618': [99.0], 'Fib_0.786': [98.0]})}}}
+    assert not engine._evaluate_condition("price BETWEEN Fib_0.382 AND Fib_0.618", fib, "USDJPY=X").passed
+    assert not engine._evaluate_condition("price BETWEEN Fib_0.618 AND Fib_0.786", fib, "USDJPY=X").passed
+
+
+def test_rules_firing_before_and_after_extended_conditions():
+    """同じ下降トレンドのデータで、拡張構文の有無によって発火するルールが変わること"""
+    frame = pd.DataFrame({
+        'close': [140.5, 140.0],
+        'RSI_14': [32.0, 30.0],
+        'EMA_200': [160.0, 160.0],
+        'EMA_21': [140.5, 140.0],
+        'EMA_55': [150.0, 150.0],
+        'MACD': [-0.3, -0.35],
+        'MACD_Signal': [-0.2, -0.25],
+        'ATR_14': [0.4, 0.4],
+    })
+    data = {'timeframes': {'1h': {'data': frame}}}
+
+    def fired(engine: RuleBasedEngine):
+        async def evaluate():
+            names = []
+            for rule_config in engine.rules_config['active_rules']:
+                if rule_config.get('enabled') and await engine._evaluate_rule(rule_config, data, 'USDJPY=X'):
+                    names.append(rule_config['name'])
+            return names
+        with mock.patch.object(engine, '_active_sessions', return_value=['Tokyo', 'London', 'NewYork']):
+            return asyncio.run(evaluate())
+
+    assert fired(RuleBasedEngine()) == []
+    assert fired(RuleBasedEngine(extended_conditions=True)) == ['trend_follow_sell', 'strong_downtrend_sell']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
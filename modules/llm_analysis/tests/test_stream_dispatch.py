@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+ストリームの読み取り・ディスパッチ分離のテスト
+
+チャンクをまたぐ行の分割、ハートビートの除外、有界キューのあふれ時のポリシー、
+遅いコールバックがあっても読み取りが止まらないことを確認します。
+"""
+
+import sys
+import os
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from modules.llm_analysis.providers.oanda_stream_client import OANDAStreamClient, StreamType
+from modules.llm_analysis.providers.stream_dispatch import LineSplitter, OverflowPolicy, StreamDispatcher
+
+START = datetime(2024, 1, 5, 1, 0, tzinfo=timezone.utc)
+
+
+def _price_line(instrument: str, seconds: int, price: float) -> bytes:
+    time = (START + timedelta(seconds=seconds)).isoformat().replace('+00:00', 'Z')
+    return json.dumps({
+        'type': 'PRICE', 'instrument': instrument, 'time': time, 'status': 'tradeable',
+        'bids': [{'price': str(price)}], 'asks': [{'price': str(price + 0.004)}],
+    }).encode() + b'\n'
+
+
+def test_line_splitter_joins_partial_lines():
+    """チャンクの途中で切れた行が次のチャンクと連結されること"""
+    splitter = LineSplitter()
+    assert splitter.feed(b'{"a": 1}\n{"b"') == [b'{"a": 1}']
+    assert splitter.feed(b': 2}\n\n{"c": 3}') == [b'{"b": 2}']
+    assert splitter.flush() == [b'{"c": 3}']
+    assert splitter.flush() == []
+
+
+def test_overflow_policies():
+    """drop_oldest は古いものから捨て、coalesce はキーごとに最新だけを残すこと"""
+    async def run():
+        received = []
+        dropping = StreamDispatcher('drop', received.append, maxsize=2)
+        for i in range(4):
+            dropping.put_nowait(i)
+        assert dropping.stats.dropped == 2 and dropping.depth == 2
+        dropping.start()
+        await dropping.drain()
+        await dropping.stop()
+        assert received == [2, 3]
+
+        received.clear()
+        coalescing = StreamDispatcher('coalesce', received.append, maxsize=2,
+                                      policy=OverflowPolicy.COALESCE, key=lambda m: m[0])
+        for message in [('USD_JPY', 1), ('EUR_JPY', 1), ('USD_JPY', 2), ('GBP_JPY', 1)]:
+            coalescing.put_nowait(message)
+        assert (coalescing.stats.coalesced, coalescing.stats.dropped) == (1, 1)
+        coalescing.start()
+        await coalescing.drain()
+        await coalescing.stop()
+        assert received == [('EUR_JPY', 1), ('GBP_JPY', 1)]
+
+    asyncio.run(run())
+    with pytest.raises(ValueError):
+        StreamDispatcher('invalid', print, policy=OverflowPolicy.COALESCE)
+
+
+def test_slow_callback_does_not_stall_reader():
+    """遅いコールバックの間も読み取りが進み、ハートビートは解析されないこと"""
+    client = OANDAStreamClient(persist_bars=False)
+    client.stream_queue_sizes[StreamType.PRICING.value] = 5
+    client.price_overflow_policy = OverflowPolicy.DROP_OLDEST
+    gates = []
+    received = []
+
+    async def slow_callback(price_data):
+        await gates[0].wait()
+        received.append(price_data.time)
+
+    client.add_callback(StreamType.PRICING, slow_callback)
+    lines = [_price_line('USD_JPY', i, 147.0 + i / 1000) for i in range(200)]
+    lines.insert(50, b'{"type":"HEARTBEAT","time":"2024-01-05T01:00:50.000000000Z"}\n')
+    payload = b''.join(lines)
+
+    async def chunks():
+        # 行の途中で切れる固定長チャンク
+        for i in range(0, len(payload), 1000):
+            yield payload[i:i + 1000]
+            await asyncio.sleep(0)
+
+    async def run():
+        gates.append(asyncio.Event())
+        await client._read_stream(StreamType.PRICING, chunks(), client._decode_price_message)
+        stats = client.get_stream_stats()[StreamType.PRICING.value]
+        # 最初の1件の処理中に読み取りが完了している
+        assert received == []
+        gates[0].set()
+        await client.dispatchers[StreamType.PRICING.value].drain()
+        await client.stop_all_streams()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats['lines'] == 201 and stats['heartbeats'] == 1 and stats['parsed'] == 200
+    assert stats['parse_errors'] == 0
+    assert stats['queue_depth'] == 5 and stats['dropped'] == 194
+    assert len(received) == 6
+    assert received[-1] == START + timedelta(seconds=199)
+    # 足の集計は読み取り側で全ティックを対象にする
+    assert client.bar_aggregator.forming('USD_JPY').tick_count == 200
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+ティック→足 集計のテスト
+
+bid/ask/mid の四本値とティック数、足の境界での確定（次の足のティック・タイマー）、
+遅延ティックの破棄、ストリームクライアントでの足確定コールバックを確認します。
+"""
+
+import sys
+import os
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from modules.llm_analysis.providers.oanda_stream_client import OANDAStreamClient, StreamType
+from modules.llm_analysis.providers.tick_bar_aggregator import TickBarAggregator
+
+START = datetime(2024, 1, 5, 1, 0, tzinfo=timezone.utc)
+
+
+def test_aggregates_bid_ask_mid_bars():
+    """足の境界をまたぐティックで前の足が確定し、四本値とティック数が正しいこと"""
+    aggregator = TickBarAggregator(interval=timedelta(minutes=5))
+    ticks = [
+        (0, 147.000, 147.004),
+        (30, 147.010, 147.014),
+        (90, 146.990, 146.994),
+        (299, 147.002, 147.006),
+    ]
+    for seconds, bid, ask in ticks:
+        assert aggregator.add_tick('USD_JPY', START + timedelta(seconds=seconds), bid, ask) == []
+
+    closed = aggregator.add_tick('USD_JPY', START + timedelta(minutes=5), 147.1, 147.104)
+    assert len(closed) == 1
+    bar = closed[0]
+    assert (bar.start, bar.end, bar.tick_count) == (START, START + timedelta(minutes=5), 4)
+    assert (bar.bid.open, bar.bid.high, bar.bid.low, bar.bid.close) == (147.0, 147.01, 146.99, 147.002)
+    assert (bar.ask.high, bar.ask.low) == (147.014, 146.994)
+    assert bar.mid.open == pytest.approx(147.002) and bar.mid.close == pytest.approx(147.004)
+    assert bar.to_event_row()[0] == START.isoformat() and bar.to_event_row()[-1] == 4
+
+    # 確定済みの足への遅延ティックは破棄
+    assert aggregator.add_tick('USD_JPY', START + timedelta(seconds=299), 150.0, 150.004) == []
+    assert aggregator.stats.late_ticks == 1
+    assert aggregator.forming('USD_JPY').mid.high == pytest.approx(147.102)
+
+    # ティックが途切れてもタイマーで境界を過ぎた足を確定
+    assert aggregator.close_due(START + timedelta(minutes=9, seconds=59)) == []
+    closed = aggregator.close_due(START + timedelta(minutes=10))
+    assert [(bar.start, bar.tick_count) for bar in closed] == [(START + timedelta(minutes=5), 1)]
+    assert aggregator.forming('USD_JPY') is None
+    assert aggregator.next_boundary(START + timedelta(minutes=10)) == START + timedelta(minutes=15)
+
+
+def test_stream_client_emits_bar_closed():
+    """価格ストリームのティックから足が確定し、足確定コールバックが呼ばれること"""
+    client = OANDAStreamClient(persist_bars=False)
+    received = []
+    client.add_callback(StreamType.BARS, received.append)
+
+    async def chunks():
+        for seconds in (10, 100, 200, 310):
+            time = (START + timedelta(seconds=seconds)).isoformat().replace('+00:00', 'Z')
+            price = 147.0 + seconds / 10000
+            yield json.dumps({
+                'type': 'PRICE', 'instrument': 'USD_JPY', 'time': time, 'status': 'tradeable',
+                'bids': [{'price': str(price)}], 'asks': [{'price': str(price + 0.004)}],
+            }).encode() + b'\n'
+
+    async def feed():
+        await client._read_stream(StreamType.PRICING, chunks(), client._decode_price_message)
+        # 確定した足の処理はティック処理と切り離して実行される
+        await asyncio.gather(*client._bar_tasks)
+        await client.stop_all_streams()
+
+    asyncio.run(feed())
+    assert len(received) == 1
+    assert received[0].start == START and received[0].tick_count == 3
+    assert received[0].bid.close == pytest.approx(147.02)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+ティックパスのルール評価テスト
+
+足単位の状態を一度だけ作り、ティックでは形成中の足の価格だけを書き換えて
+価格に依存する条件のみを再評価すること、ストリームクライアントが足の切り替わりでだけ
+分析データを取得し直すことを確認します。
+"""
+
+import sys
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+import pandas as pd
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from modules.llm_analysis.core.bar_store import BarStore
+from modules.llm_analysis.core.rule_engine import RuleBasedEngine
+from modules.llm_analysis.providers.oanda_stream_client import OANDAStreamClient, PriceData
+from modules.llm_analysis.providers.tick_bar_aggregator import OHLC, TickBar
+
+ALL_SESSIONS = ['Tokyo', 'London', 'NewYork']
+
+
+def create_analysis_data() -> dict:
+    """押し目買い（pullback_buy）が価格次第で成立する分析データ"""
+    frame = pd.DataFrame({
+        'close': [146.8, 146.9],
+        'high': [146.95, 147.0],
+        'low': [146.7, 146.8],
+        'RSI_14': [33.0, 35.0],
+        'EMA_200': [147.0, 147.0],
+        'EMA_21': [147.2, 147.1],
+        'EMA_55': [147.0, 147.0],
+        'MACD': [0.0015, 0.002],
+        'MACD_Signal': [0.001, 0.001],
+        'ATR_14': [0.4, 0.4],
+    })
+    return {'timeframes': {'1d': {'data': frame}}}
+
+
+def _create_engine() -> RuleBasedEngine:
+    engine = RuleBasedEngine()
+    engine._initialized = True
+    return engine
+
+
+def test_tick_state_reevaluates_price_conditions_only():
+    """指標のみの条件は状態作成時に1回、価格の条件だけがティックごとに評価されること"""
+    engine = _create_engine()
+    with mock.patch.object(engine, '_active_sessions', return_value=ALL_SESSIONS):
+        state = engine.build_tick_state(create_analysis_data(), 'USDJPY=X')
+
+    assert 'price > EMA_200' in state.tick_conditions
+    assert 'price < EMA_200' in state.tick_conditions
+    assert 'RSI_14 <= 40' in state.bar_results
+    assert 'active_session = Tokyo OR London' in state.bar_results
+
+    with mock.patch.object(engine.data_preparator, 'prepare_analysis_data',
+                           side_effect=AssertionError("ティックでデータを取得してはいけない")):
+        # EMA_200 より下では押し目買いは成立しない
+        assert engine.evaluate_tick(state, 146.95) == []
+        signals = engine.evaluate_tick(state, 148.5)
+        assert [signal.strategy for signal in signals] == ['pullback_buy']
+        assert signals[0].entry_price == 148.5
+        assert signals[0].stop_loss == pytest.approx(148.5 - 0.4)
+        assert {result.rule_name for result in signals[0].rule_results} >= {'price > EMA_200', 'RSI_14 <= 40'}
+        # 同じ足では同じルールのシグナルを繰り返さない
+        assert engine.evaluate_tick(state, 148.6) == []
+
+    assert state.ticks == 3
+    assert (state.bar_low, state.bar_high) == (146.95, 148.6)
+
+
+def test_stream_client_refreshes_state_once_per_bar():
+    """ティックのバーストでも分析データの取得は足の切り替わりごとに1回であること"""
+    engine = _create_engine()
+    client = OANDAStreamClient()
+    client.rule_engine = engine
+    prepared = []
+    notified = []
+
+    async def prepare_tick_state(symbol, analysis_type):
+        prepared.append(symbol)
+        return engine.build_tick_state(create_analysis_data(), symbol, analysis_type)
+
+    async def create_and_notify(entry_signal, price_data):
+        notified.append((entry_signal.strategy, price_data.time))
+
+    start = datetime(2024, 1, 5, 1, 0, tzinfo=timezone.utc)
+
+    async def feed():
+        for i in range(600):
+            time = start + timedelta(seconds=i)
+            price = 146.9 if i < 200 else 148.5
+            await client._evaluate_trading_rules(PriceData('USD_JPY', time, price, price, 'tradeable', 0.0, price))
+            if i % 50 == 0:
+                await asyncio.sleep(0)
+        await client.stop_all_streams()
+
+    with mock.patch.object(engine, 'prepare_tick_state', side_effect=prepare_tick_state), \
+            mock.patch.object(engine, '_active_sessions', return_value=ALL_SESSIONS), \
+            mock.patch.object(client, '_create_and_notify_scenario', side_effect=create_and_notify):
+        asyncio.run(feed())
+
+    # 01:00, 01:05 の2本の足で1回ずつ
+    assert prepared == ['USDJPY=X', 'USDJPY=X']
+    assert [strategy for strategy, _ in notified] == ['pullback_buy', 'pullback_buy']
+    assert notified[0][1] == start + timedelta(seconds=200)
+    assert notified[1][1] >= start + timedelta(minutes=5)
+
+
+def test_tick_refresh_waits_for_pending_closed_bar():
+    """確定足の処理中に届いた新しい足のティックで状態を先に作らず、同じ足でシグナルを重複させないこと"""
+    engine = _create_engine()
+    client = OANDAStreamClient(connection_manager=object())
+    client.rule_engine = engine
+    persisted = asyncio.Event()
+    prepared = []
+    notified = []
+
+    async def persist_bars(bars, events=None):
+        await persisted.wait()
+
+    async def prepare_tick_state(symbol, analysis_type):
+        prepared.append(persisted.is_set())
+        return engine.build_tick_state(create_analysis_data(), symbol, analysis_type)
+
+    async def create_and_notify(entry_signal, price_data):
+        notified.append((entry_signal.strategy, price_data.time))
+
+    closed_start = datetime(2024, 1, 5, 1, 0, tzinfo=timezone.utc)
+    bar_start = closed_start + timedelta(minutes=5)
+    closed = TickBar('USD_JPY', '5m', closed_start, bar_start,
+                     OHLC(146.9, 147.0, 146.8, 146.9), OHLC(146.9, 147.0, 146.8, 146.9),
+                     OHLC(146.9, 147.0, 146.8, 146.9))
+
+    async def ticks(first: int, count: int):
+        for i in range(first, first + count):
+            time = bar_start + timedelta(seconds=i)
+            await client._evaluate_trading_rules(PriceData('USD_JPY', time, 148.5, 148.5, 'tradeable', 0.0, 148.5))
+            await asyncio.sleep(0)
+
+    async def scenario():
+        # 次の足の最初のティックで前の足が確定し、保存が終わる前にティックが続く
+        client._dispatch_closed_bars([closed])
+        await ticks(0, 20)
+        assert prepared == [] and notified == []
+
+        persisted.set()
+        await asyncio.gather(*client._bar_tasks)
+        await client._tick_state_tasks['USD_JPY']
+        await ticks(20, 10)
+
+        # 同じ足の状態を作り直してもシグナル済みのルールは引き継がれる
+        client._schedule_tick_state_refresh('USD_JPY', bar_start, force=True)
+        await client._tick_state_tasks['USD_JPY']
+        await ticks(30, 10)
+
+    with mock.patch.object(client, '_persist_bars', side_effect=persist_bars), \
+            mock.patch.object(engine.data_preparator, 'apply_collection_event', new=mock.AsyncMock()), \
+            mock.patch.object(engine, 'prepare_tick_state', side_effect=prepare_tick_state), \
+            mock.patch.object(engine, '_active_sessions', return_value=ALL_SESSIONS), \
+            mock.patch.object(client, '_create_and_notify_scenario', side_effect=create_and_notify):
+        asyncio.run(scenario())
+
+    # 状態は確定足の反映後にだけ作られ、シグナルは足ごとに1回
+    assert prepared == [True, True]
+    assert notified == [('pullback_buy', bar_start + timedelta(seconds=20))]
+    assert client._tick_states['USD_JPY'][1].ticks == 20
+    assert client._pending_bar_closes == {}
+
+
+class StalePriceTable:
+    """確定足の保存が反映されていない price_data の代替（DBの再取得では新しい足が見えない）"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @asynccontextmanager
+    async def get_connection(self):
+        yield self
+
+    async def fetch(self, query, symbol, timeframe, *args):
+        if 'timestamp >=' in query:
+            since, limit = args
+            return [row for row in self.rows if row[0] >= since][:limit]
+        (limit,) = args
+        return list(reversed(self.rows))[:limit]
+
+
+def test_closed_bar_is_visible_to_rebuilt_tick_state():
+    """確定足の処理後に作り直したティック評価状態が、その足の終値を参照すること"""
+    engine = _create_engine()
+    client = OANDAStreamClient(persist_bars=False)
+    client.rule_engine = engine
+    client.analysis_type = 'timing_execution'
+
+    now = datetime.now(timezone.utc)
+    bar_start = now.replace(second=0, microsecond=0) - timedelta(minutes=now.minute % 5 + 5)
+    rows = [
+        (bar_start - timedelta(minutes=5 * (100 - i)), 150.0, 150.5, 149.5, 150.2, 100, 1.0)
+        for i in range(100)
+    ]
+    table = StalePriceTable(rows)
+    preparator = engine.data_preparator
+    preparator.connection_manager = table
+    preparator.bar_store = BarStore(capacity=500)
+    preparator._initialized = True
+
+    closed = TickBar('USD_JPY', '5m', bar_start, bar_start + timedelta(minutes=5),
+                     OHLC(150.2, 151.0, 150.1, 150.9), OHLC(150.2, 151.0, 150.1, 150.9),
+                     OHLC(150.2, 151.0, 150.1, 150.9), tick_count=42)
+    built = []
+
+    def build_tick_state(data, symbol, analysis_type='trend_direction'):
+        built.append(data['timeframes']['5m']['data'])
+        return object()
+
+    async def scenario():
+        # 前の足の状態を作った時点でバーストアは保存済みの足まで読み込み済み
+        await preparator.bar_store.ensure_fresh(table, 'USDJPY=X', '5m')
+        await client._handle_closed_bars([closed])
+        await client._tick_state_tasks['USD_JPY']
+
+    with mock.patch.object(engine, 'build_tick_state', side_effect=build_tick_state):
+        asyncio.run(scenario())
+
+    assert len(built) == 1
+    frame = built[0]
+    assert frame.index[-1] == pd.Timestamp(bar_start)
+    assert frame['close'].iloc[-1] == pytest.approx(150.9)
+    assert client._tick_states['USD_JPY'][0] == closed.end
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+ベクトル化バックテストのテスト
+
+足ごとの ThreeGateEngine 評価と同じゲート判定になることを確認します。
+"""
+
+import sys
+import os
+import asyncio
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+pytest.importorskip("talib")
+
+from modules.llm_analysis.core.pattern_loader import PatternLoader
+from modules.llm_analysis.core.three_gate_engine import ThreeGateEngine
+from modules.llm_analysis.core.vectorized_backtest import VectorizedGateBacktester
+
+CONFIG_DIR = str(Path(__file__).parent.parent / "config")
+
+
+def create_price_data(periods: int = 75000, seed: int = 3) -> dict:
+    """5分足のランダムウォークと、それを集約した上位足を作成"""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range('2024-01-01', periods=periods, freq='5min', tz='UTC')
+    drift = 0.00002 * np.sin(np.arange(periods) / 3000)
+    close = 150.0 * np.cumprod(1 + rng.normal(0, 0.0008, periods) + drift)
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.0005, periods)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.0005, periods)))
+    df = pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close, 'volume': 0.0},
+                      index=timestamps)
+
+    aggregation = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+    data = {'5m': df.rename_axis('timestamp').reset_index()}
+    for timeframe, rule in (('1h', '1h'), ('4h', '4h'), ('1d', '1D')):
+        resampled = df.resample(rule).agg(aggregation).dropna()
+        data[timeframe] = resampled.rename_axis('timestamp').reset_index()
+    return data
+
+
+def _create_engine() -> ThreeGateEngine:
+    engine = ThreeGateEngine()
+    engine.pattern_loader = PatternLoader(config_dir=CONFIG_DIR)
+    return engine
+
+
+@pytest.fixture(scope="module")
+def backtest():
+    engine = _create_engine()
+    backtester = VectorizedGateBacktester(engine)
+    result = backtester.run_from_prices(create_price_data(), symbol='USDJPY=X', build_signals=False)
+    return engine, backtester, result
+
+
+async def _evaluate_live(engine: ThreeGateEngine, data: dict):
+    gate1 = await engine._evaluate_gate1('USDJPY=X', data)
+    gate2 = await engine._evaluate_gate2('USDJPY=X', data, gate1) if gate1.valid else None
+    gate3 = await engine._evaluate_gate3('USDJPY=X', data, gate2) if gate2 and gate2.valid else None
+    return gate1, gate2, gate3
+
+
+def test_decisions_match_live_engine(backtest):
+    """サンプル足のゲート判定がライブエンジンと一致すること"""
+    engine, _, result = backtest
+    decisions = result.decisions
+    assert decisions['gate3_valid'].any()
+
+    rng = np.random.default_rng(0)
+    indices = np.concatenate([
+        rng.choice(np.flatnonzero(decisions['gate1_valid']), 60),
+        rng.choice(np.flatnonzero(decisions['gate2_valid']), 60),
+        rng.choice(len(decisions), 60),
+    ])
+
+    for index in indices:
+        row = decisions.iloc[index]
+        live = asyncio.run(_evaluate_live(engine, result.history.snapshot(int(index))))
+        for gate_number, gate in enumerate(live, start=1):
+            if gate is None:
+                assert pd.isna(row[f'gate{gate_number}_pattern'])
+                continue
+            assert row[f'gate{gate_number}_valid'] == gate.valid
+            assert row[f'gate{gate_number}_pattern'] == gate.pattern
+            assert row[f'gate{gate_number}_confidence'] == gate.confidence
+
+
+def test_signal_result_matches_live_engine(backtest):
+    """シグナル足の ThreeGateResult がライブエンジンの評価と一致すること"""
+    engine, backtester, result = backtest
+    index = int(np.flatnonzero(result.decisions['signal'])[0])
+    signal = backtester.build_signal(result.history, index, 'USDJPY=X')
+
+    engine.force_signal_on_test = True
+    live = asyncio.run(engine.evaluate('USDJPY=X', result.history.snapshot(index)))
+    assert live is not None
+    assert signal.signal_type == live.signal_type == result.decisions['signal_type'].iloc[index]
+    assert signal.overall_confidence == live.overall_confidence
+    assert signal.entry_price == live.entry_price
+    assert signal.stop_loss == live.stop_loss
+    assert signal.take_profit == live.take_profit
+
+
+def test_higher_timeframes_use_closed_bars_only(backtest):
+    """上位足は基準足の終了時点で確定済みの足だけが参照されること"""
+    _, _, result = backtest
+    history = result.history
+    base_close = history.timestamps + pd.Timedelta(minutes=5)
+    for timeframe, duration in (('1h', pd.Timedelta(hours=1)), ('1d', pd.Timedelta(days=1))):
+        rows = history.rows[timeframe]
+        frame_timestamps = pd.DatetimeIndex(history.frames[timeframe]['timestamp'])
+        visible = rows >= 0
+        assert (frame_timestamps[rows[visible]] + duration <= base_close[visible]).all()
+
+
+def test_signal_interval_uses_bar_time(backtest):
+    """シグナル間隔制限が足の時刻で適用されること"""
+    _, _, result = backtest
+    signal_times = result.decisions.loc[result.decisions['signal'], 'timestamp']
+    assert (signal_times.diff().dropna() >= pd.Timedelta(minutes=15)).all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+ウォークフォワード検証のテスト
+
+ウィンドウの分割、指標の計算が全期間で1回だけであること、各ウィンドウの評価が
+全履歴のバックテストの該当区間と一致することを確認します。
+"""
+
+import sys
+import os
+from pathlib import Path
+from unittest import mock
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+pytest.importorskip("talib")
+
+from modules.llm_analysis.core.parameter_sweep import ParameterRange, ParameterSweep
+from modules.llm_analysis.core.pattern_loader import PatternLoader
+from modules.llm_analysis.core.three_gate_engine import ThreeGateEngine
+from modules.llm_analysis.core.vectorized_backtest import VectorizedGateBacktester
+from modules.llm_analysis.core.walk_forward import WalkForwardValidator, build_windows
+from modules.llm_analysis.tests.test_vectorized_backtest import create_price_data
+
+CONFIG_DIR = str(Path(__file__).parent.parent / "config")
+
+ADX_PATH = "gate1.patterns.ranging_market.conditions[weak_trend_adx].value"
+
+
+def _create_engine() -> ThreeGateEngine:
+    engine = ThreeGateEngine()
+    engine.pattern_loader = PatternLoader(config_dir=CONFIG_DIR, watch=False)
+    return engine
+
+
+def test_build_windows():
+    """ローリングとアンカーのウィンドウが履歴内に収まること"""
+    start = pd.Timestamp('2024-01-01', tz='UTC')
+    end = start + pd.Timedelta(days=100)
+
+    rolling = build_windows(start, end, pd.Timedelta(days=30), pd.Timedelta(days=10))
+    assert len(rolling) == 7
+    assert rolling[1].in_sample_start == start + pd.Timedelta(days=10)
+    assert all(w.out_of_sample_start == w.in_sample_end for w in rolling)
+    assert rolling[-1].out_of_sample_end <= end
+
+    anchored = build_windows(start, end, pd.Timedelta(days=30), pd.Timedelta(days=10),
+                             step=pd.Timedelta(days=20), anchored=True)
+    assert [w.in_sample_start for w in anchored] == [start] * 4
+    assert anchored[-1].in_sample_end == start + pd.Timedelta(days=90)
+
+    with pytest.raises(ValueError):
+        build_windows(start, end, pd.Timedelta(0), pd.Timedelta(days=10))
+
+
+def test_walk_forward_selects_in_sample_best():
+    """指標は1回だけ計算され、各ウィンドウが全履歴の該当区間で評価されること"""
+    engine = _create_engine()
+    sweep = ParameterSweep(engine=engine, processes=2, horizon_bars=48)
+    validator = WalkForwardValidator(pd.Timedelta(days=60), pd.Timedelta(days=30), sweep=sweep)
+    calculator = engine.technical_calculator
+    ranges = [ParameterRange(ADX_PATH, (20, 30))]
+
+    calculated = []
+    original = calculator.calculate_all_indicators
+
+    def calculate_all_indicators(data):
+        calculated.append(original(data))
+        return calculated[-1]
+
+    with mock.patch.object(calculator, 'calculate_all_indicators', side_effect=calculate_all_indicators):
+        result = validator.run_from_prices(create_price_data(), ranges)
+    assert len(calculated) == 1
+    indicators = calculated[0]
+
+    windows = result.windows
+    assert len(windows) == 6
+    assert len(result.evaluations) == len(windows) * 2 * 2
+    assert set(result.stability['parameter']) == {ADX_PATH}
+    assert result.get_summary()['windows'] == len(windows)
+
+    # 選択されたパラメータはインサンプルの total_r が最大
+    for _, window in windows.iterrows():
+        rows = result.evaluations[(result.evaluations['window'] == window['window'])
+                                  & (result.evaluations['sample'] == 'in_sample')]
+        if window['eligible']:
+            assert window['is_total_r'] == rows.loc[rows['signals'] >= 1, 'total_r'].max()
+
+    # ウィンドウのゲート通過数は全履歴のバックテストの該当区間と一致
+    decisions = VectorizedGateBacktester(_create_engine()).evaluate(
+        VectorizedGateBacktester(engine).align(indicators)
+    )
+    window = windows.iloc[-1]
+    rows = result.evaluations[(result.evaluations['window'] == window['window'])
+                              & (result.evaluations['sample'] == 'out_of_sample')
+                              & (result.evaluations[ADX_PATH] == 20)].iloc[0]
+    in_window = ((decisions['timestamp'] >= window['in_sample_end'])
+                 & (decisions['timestamp'] < window['out_of_sample_end'])).to_numpy()
+    assert rows['gate1_passed'] == int(np.sum(decisions['gate1_valid'].to_numpy() & in_window))
+    assert rows['gate3_passed'] == int(np.sum(decisions['gate3_valid'].to_numpy() & in_window))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
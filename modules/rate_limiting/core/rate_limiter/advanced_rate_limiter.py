@@ -13,6 +13,8 @@ from datetime import datetime, timedelta
 from enum import Enum
 import math
 
+from ....instrumentation.core.metrics import get_metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -112,6 +114,7 @@ class AdvancedRateLimiter:
     
     async def wait_for_availability(self, tokens: int = 1) -> None:
         """利用可能になるまで待機"""
+        started = time.perf_counter()
         while not await self.acquire(tokens):
             # 次の利用可能時間を計算
             wait_time = await self._calculate_wait_time(tokens)
@@ -119,6 +122,10 @@ class AdvancedRateLimiter:
                 await asyncio.sleep(wait_time)
             else:
                 await asyncio.sleep(0.1)  # 最小待機時間
+        get_metrics().observe(
+            'rate_limiter_wait_time', time.perf_counter() - started,
+            limiter=self.config.algorithm.value
+        )
     
     async def _check_circuit_breaker(self) -> bool:
         """サーキットブレーカーの状態をチェック"""
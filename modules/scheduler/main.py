@@ -14,6 +14,7 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from modules.scheduler.config.settings import SchedulerSettings
 from modules.scheduler.core.scheduler_service import SchedulerService
+from modules.instrumentation.core.exporter import start_metrics_server
 
 # ログ設定
 logging.basicConfig(
@@ -80,6 +81,7 @@ async def main():
         # 設定を読み込み
         settings = SchedulerSettings.from_env()
         logger.info(f"Starting scheduler with settings: {settings.to_dict()}")
+        start_metrics_server("scheduler", default_port=8001)
         
         # スケジューラーを作成して開始
         scheduler = SchedulerMain(settings)
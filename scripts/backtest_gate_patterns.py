@@ -18,6 +18,7 @@ from modules.data_persistence.core.database import DatabaseManager
 from modules.llm_analysis.core.three_gate_engine import ThreeGateEngine
 from modules.llm_analysis.core.technical_calculator import TechnicalIndicatorCalculator
 from modules.llm_analysis.core.pattern_loader import PatternLoader
+from modules.llm_analysis.core.vectorized_backtest import VectorizedGateBacktester
 
 class GatePatternBacktester:
     def __init__(self):
@@ -222,8 +223,45 @@ class GatePatternBacktester:
         print(f"  GATE 3通過率: {pattern_stats['gate3_passed']}/{pattern_stats['total_tests']} ({pattern_stats['gate3_passed']/max(pattern_stats['total_tests'], 1)*100:.1f}%)")
         print(f"  シグナル生成率: {pattern_stats['signals_generated']}/{pattern_stats['total_tests']} ({pattern_stats['signals_generated']/max(pattern_stats['total_tests'], 1)*100:.1f}%)")
 
+    async def analyze_pattern_performance_vectorized(self, symbol: str = "USDJPY=X", days: int = 365):
+        """パターンの性能分析（全履歴をベクトル化して一括評価）"""
+        print(f"\n⚡ {symbol} のベクトル化バックテスト（過去{days}日間）")
+        
+        historical_data = await self.get_historical_data(symbol, days)
+        
+        if '5m' not in historical_data:
+            print("❌ 5m足データが見つかりません")
+            return
+        
+        backtester = VectorizedGateBacktester(self.three_gate_engine)
+        result = backtester.run_from_prices(historical_data, symbol=symbol)
+        summary = result.get_summary()
+        total = max(summary['total_bars'], 1)
+        
+        print("\n📊 パターン性能統計:")
+        print(f"  総テスト数: {summary['total_bars']} ({summary['elapsed_seconds']:.2f}秒)")
+        print(f"  GATE 1通過率: {summary['gate1_passed']}/{summary['total_bars']} ({summary['gate1_passed']/total*100:.1f}%)")
+        print(f"  GATE 2通過率: {summary['gate2_passed']}/{summary['total_bars']} ({summary['gate2_passed']/total*100:.1f}%)")
+        print(f"  GATE 3通過率: {summary['gate3_passed']}/{summary['total_bars']} ({summary['gate3_passed']/total*100:.1f}%)")
+        print(f"  シグナル生成数: {summary['signals_generated']}")
+        
+        signals = result.decisions[result.decisions['signal']]
+        if not signals.empty:
+            print(f"  シグナルタイプ: {signals['signal_type'].value_counts().to_dict()}")
+        
+        return result
+
 async def main():
     """メイン関数"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="三層ゲートパターンのバックテスト")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="既存のテストに加えて全履歴のベクトル化バックテストを実行")
+    parser.add_argument("--vectorized-days", type=int, default=365,
+                        help="ベクトル化バックテストの対象日数")
+    args = parser.parse_args()
+    
     backtester = GatePatternBacktester()
     await backtester.initialize()
     
@@ -237,6 +275,10 @@ async def main():
         # パターン性能分析
         await backtester.analyze_pattern_performance("USDJPY=X", 30)
         
+        # 全履歴のベクトル化バックテスト（指定時のみ）
+        if args.vectorized:
+            await backtester.analyze_pattern_performance_vectorized("USDJPY=X", args.vectorized_days)
+        
     except Exception as e:
         print(f"❌ エラー: {e}")
         import traceback